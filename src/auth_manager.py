@@ -3,15 +3,60 @@
 Расположение: src/auth_manager.py
 """
 
+import time
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Tuple
 
-from PySide6.QtCore import QObject, Signal, Slot, Property, QTimer
+from PySide6.QtCore import QObject, Signal, Slot, Property, QTimer, QRunnable, QThreadPool
 
 from loguru import logger
 
 from repositories.users_repository import UsersRepository, UserDTO
 from repositories.login_history_repository import LoginHistoryRepository
+from login_security import LoginThrottle, LoginAuditQueue, PendingSession
+
+
+class _LoginJob(QRunnable):
+    """
+    Фоновая задача входа.
+
+    Выполняет проверку пароля (PBKDF2) и запись истории вне GUI-потока,
+    результат передаётся в AuthManager через сигнал (queued connection).
+    """
+
+    def __init__(self, auth_manager: "AuthManager", username: str, password: str):
+        super().__init__()
+        self._auth_manager = auth_manager
+        self._username = username
+        self._password = password
+
+    def run(self):
+        started = time.perf_counter()
+        try:
+            result = self._auth_manager._authenticate(self._username, self._password)
+        except Exception as e:
+            logger.exception(f"❌ Login job failed: {self._username}")
+            result = (None, None, f"Ошибка входа: {e}")
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.debug(f"⏱️ Login job for {self._username} took {elapsed_ms:.0f} ms")
+        self._auth_manager._loginJobFinished.emit(self._username, result)
+
+
+class _BackgroundTask(QRunnable):
+    """Фоновая задача обслуживания (выполняет функцию в пуле потоков)."""
+
+    def __init__(self, name: str, func, *args):
+        super().__init__()
+        self._name = name
+        self._func = func
+        self._args = args
+
+    def run(self):
+        try:
+            self._func(*self._args)
+        except Exception:
+            logger.exception(f"❌ Background task failed: {self._name}")
 
 
 class AuthManager(QObject):
@@ -22,6 +67,9 @@ class AuthManager(QObject):
     - Вход/выход пользователей
     - Таймер неактивности (автовыход)
     - Логирование входов
+
+    Вход асинхронный: login() запускает фоновую задачу и сразу возвращает
+    управление, результат приходит сигналами loginSuccessful/loginFailed.
     """
 
     # === Сигналы ===
@@ -29,34 +77,62 @@ class AuthManager(QObject):
     loginFailed = Signal(str)           # причина
     loggedOut = Signal(str)             # причина ('manual', 'timeout', 'forced')
     inactivityWarning = Signal(int)     # секунд до автовыхода
+    loginStatsReady = Signal(list)           # статистика по пользователям (requestLoginStats)
+    dailyLoginStatsReady = Signal(str, list) # username, статистика по дням (requestDailyLoginStats)
 
     # Сигналы для QML property binding
     currentUserChanged = Signal()
     currentRoleChanged = Signal()
     isLoggedInChanged = Signal()
+    loginInProgressChanged = Signal()
+
+    # Внутренний сигнал: результат фоновой задачи входа (username, результат)
+    _loginJobFinished = Signal(str, object)
 
     # Константы
     INACTIVITY_TIMEOUT = 20 * 60  # 20 минут в секундах
     WARNING_TIME = 2 * 60         # Предупреждение за 2 минуты
     MAX_FAILED_ATTEMPTS = 5       # Блокировка после 5 попыток
-
-    def __init__(self, db_path: str = "users.db", parent=None):
+    LOCKOUT_WINDOW = 15 * 60      # Окно подсчёта неудачных попыток (15 минут)
+    AUDIT_FLUSH_INTERVAL = 5      # Запись очереди истории входов каждые 5 секунд
+    HISTORY_PAGE_SIZE = 100       # Размер страницы истории входов
+    HISTORY_ARCHIVE_DAYS = 90     # Перенос истории в архив через 90 дней
+    HISTORY_PURGE_DAYS = 730      # Удаление архива через 2 года
+    RETENTION_INTERVAL = 24 * 60 * 60  # Обслуживание истории раз в сутки
+    RETENTION_START_DELAY = 60         # Первый запуск через минуту после старта
+
+    def __init__(self, db_path: str = "users.db", hash_iterations: Optional[int] = None, parent=None):
         """
         Инициализация менеджера.
 
         Args:
             db_path: Путь к базе данных пользователей.
+            hash_iterations: Количество итераций PBKDF2 для хэшей паролей
+                (None — значение UsersRepository по умолчанию).
             parent: Родительский QObject.
         """
         super().__init__(parent)
 
         # Репозитории
-        self._users_repo = UsersRepository(db_path)
+        if hash_iterations:
+            self._users_repo = UsersRepository(db_path, hash_iterations=hash_iterations)
+        else:
+            self._users_repo = UsersRepository(db_path)
         self._history_repo = LoginHistoryRepository(db_path)
 
+        # Блокировка по неудачным попыткам (в памяти) и отложенная запись истории
+        self._throttle = LoginThrottle(self.MAX_FAILED_ATTEMPTS, self.LOCKOUT_WINDOW)
+        self._throttle.seed(self._history_repo.get_recent_failures(self.LOCKOUT_WINDOW // 60))
+        self._audit_queue = LoginAuditQueue(self._history_repo, self._users_repo)
+
+        # Фоновый вход
+        self._login_in_progress = False
+        self._thread_pool = QThreadPool.globalInstance()
+        self._loginJobFinished.connect(self._on_login_job_finished)
+
         # Состояние
         self._current_user: Optional[UserDTO] = None
-        self._session_record_id: Optional[int] = None
+        self._session: Optional[PendingSession] = None
         self._session_start_time: Optional[datetime] = None
 
         # Таймер неактивности
@@ -68,6 +144,17 @@ class AuthManager(QObject):
         self._warning_timer.timeout.connect(self._on_warning_timeout)
         self._warning_seconds_left = 0
 
+        # Таймер записи очереди истории входов
+        self._audit_timer = QTimer(self)
+        self._audit_timer.timeout.connect(self._flush_audit_queue_async)
+        self._audit_timer.start(self.AUDIT_FLUSH_INTERVAL * 1000)
+
+        # Таймер обслуживания истории входов (архивация)
+        self._retention_timer = QTimer(self)
+        self._retention_timer.timeout.connect(self._run_history_retention)
+        self._retention_timer.start(self.RETENTION_INTERVAL * 1000)
+        QTimer.singleShot(self.RETENTION_START_DELAY * 1000, self._run_history_retention)
+
         logger.info("AuthManager initialized")
 
     # === Properties для QML ===
@@ -87,6 +174,11 @@ class AuthManager(QObject):
         """Авторизован ли пользователь."""
         return self._current_user is not None
 
+    @Property(bool, notify=loginInProgressChanged)
+    def loginInProgress(self) -> bool:
+        """Выполняется ли проверка входа."""
+        return self._login_in_progress
+
     @Property(int, constant=True)
     def inactivityTimeout(self) -> int:
         """Таймаут неактивности в секундах."""
@@ -118,57 +210,108 @@ class AuthManager(QObject):
     @Slot(str, str, result=bool)
     def login(self, username: str, password: str) -> bool:
         """
-        Вход в систему.
+        Вход в систему (асинхронно).
+
+        Проверка выполняется в пуле потоков; результат приходит
+        сигналом loginSuccessful или loginFailed.
 
         Args:
             username: Имя пользователя.
             password: Пароль.
 
         Returns:
-            True при успешном входе.
+            True если проверка запущена, False если вход уже выполняется.
         """
+        if self._login_in_progress:
+            logger.warning(f"⚠️ Login already in progress, ignoring attempt: {username}")
+            return False
+
         logger.info(f"🔐 Login attempt: {username}")
 
-        # Проверка блокировки
-        failed_count = self._history_repo.get_failed_attempts_count(username)
+        self._login_in_progress = True
+        self.loginInProgressChanged.emit()
+        self._thread_pool.start(_LoginJob(self, username, password))
+        return True
+
+    def _authenticate(self, username: str, password: str) -> Tuple[Optional[UserDTO], Optional[PendingSession], str]:
+        """
+        Проверка учётных данных (выполняется в фоновом потоке).
+
+        Не трогает состояние сессии и не испускает публичные сигналы — только
+        читает пользователя из БД и обращается к потокобезопасным LoginThrottle
+        и LoginAuditQueue.
+
+        Args:
+            username: Имя пользователя.
+            password: Пароль.
+
+        Returns:
+            Кортеж (пользователь, сессия в очереди истории, причина отказа).
+            При успехе причина — пустая строка.
+        """
+        # Проверка блокировки (в памяти, без обращения к БД)
+        failed_count = self._throttle.failed_count(username)
         if failed_count >= self.MAX_FAILED_ATTEMPTS:
-            reason = "Аккаунт временно заблокирован. Попробуйте через 15 минут."
             logger.warning(f"⛔ Account locked: {username} ({failed_count} failed attempts)")
-            self._history_repo.record_failed_login(username, "account_locked")
-            self.loginFailed.emit(reason)
-            return False
+            self._record_failure(username, "account_locked")
+            return None, None, "Аккаунт временно заблокирован. Попробуйте через 15 минут."
 
         # Поиск пользователя
         user = self._users_repo.get_by_username(username)
 
         if user is None:
             logger.warning(f"❌ User not found: {username}")
-            self._history_repo.record_failed_login(username, "user_not_found")
-            self.loginFailed.emit("Неверное имя пользователя или пароль")
-            return False
+            self._record_failure(username, "user_not_found")
+            return None, None, "Неверное имя пользователя или пароль"
 
         # Проверка активности
         if not user.is_active:
             logger.warning(f"❌ User inactive: {username}")
-            self._history_repo.record_failed_login(username, "user_inactive")
-            self.loginFailed.emit("Аккаунт деактивирован")
-            return False
+            self._record_failure(username, "user_inactive")
+            return None, None, "Аккаунт деактивирован"
 
         # Проверка пароля
-        if not self._users_repo.verify_password(password, user.password_hash, user.salt):
-            self._users_repo.increment_failed_attempts(username)
-            self._history_repo.record_failed_login(username, "invalid_password")
+        if not self._users_repo.verify_password(password, user.password_hash, user.salt, user.hash_iterations):
+            self._record_failure(username, "invalid_password", count_attempt=True)
             logger.warning(f"❌ Invalid password: {username}")
-            self.loginFailed.emit("Неверное имя пользователя или пароль")
-            return False
+            return None, None, "Неверное имя пользователя или пароль"
+
+        # Прозрачное перехэширование при устаревших параметрах
+        if self._users_repo.needs_rehash(user):
+            if self._users_repo.rehash_password(user.id, password):
+                user = self._users_repo.get_by_id(user.id) or user
+
+        # Запись входа и сброс счётчика неудачных попыток — через очередь
+        session = self._audit_queue.record_login(user.id, user.username)
+
+        return user, session, ""
+
+    def _record_failure(self, username: str, reason: str, count_attempt: bool = False):
+        """Учёт неудачной попытки: окно блокировки и очередь истории."""
+        self._throttle.register_failure(username)
+        self._audit_queue.record_failed_login(username, reason, count_attempt)
+
+    def _on_login_job_finished(self, username: str, result: tuple):
+        """
+        Применение результата входа (в GUI-потоке).
+
+        Args:
+            username: Имя пользователя.
+            result: Результат _authenticate().
+        """
+        user, session, reason = result
+
+        self._login_in_progress = False
+        self.loginInProgressChanged.emit()
+
+        if user is None:
+            self.loginFailed.emit(reason)
+            return
 
         # Успешный вход
         self._current_user = user
         self._session_start_time = datetime.now()
-        self._session_record_id = self._history_repo.record_login(user.id, user.username)
-
-        # Сброс счётчика неудачных попыток
-        self._users_repo.reset_failed_attempts(user.id)
+        self._session = session
 
         # Запуск таймера неактивности
         self._start_inactivity_timer()
@@ -180,7 +323,6 @@ class AuthManager(QObject):
         self.loginSuccessful.emit(user.username, user.role)
 
         logger.success(f"✅ Login successful: {username} (role={user.role})")
-        return True
 
     @Slot()
     @Slot(str)
@@ -197,8 +339,9 @@ class AuthManager(QObject):
         username = self._current_user.username
 
         # Запись выхода
-        if self._session_record_id:
-            self._history_repo.record_logout(self._session_record_id, reason)
+        if self._session:
+            self._audit_queue.record_logout(self._session, reason)
+        self._audit_queue.flush()
 
         # Остановка таймеров
         self._inactivity_timer.stop()
@@ -206,7 +349,7 @@ class AuthManager(QObject):
 
         # Сброс состояния
         self._current_user = None
-        self._session_record_id = None
+        self._session = None
         self._session_start_time = None
 
         # Уведомления
@@ -273,7 +416,8 @@ class AuthManager(QObject):
         if not self._users_repo.verify_password(
             old_password,
             self._current_user.password_hash,
-            self._current_user.salt
+            self._current_user.salt,
+            self._current_user.hash_iterations
         ):
             logger.warning("❌ Old password incorrect")
             return False
@@ -316,7 +460,7 @@ class AuthManager(QObject):
         self._history_repo.force_logout_user(user_id)
 
         # Удаляем историю входов
-        history_count = self._history_repo.delete_user_history(user_id)
+        history_count = self._history_repo.delete_user_history(user_id, user.username)
         logger.info(f"🗑️ Deleted {history_count} history records for user {user.username}")
 
         # Удаляем пользователя
@@ -381,12 +525,21 @@ class AuthManager(QObject):
         ]
 
     @Slot(result="QVariantList")
-    def getLoginHistory(self) -> list:
-        """Получение истории входов (для admin)."""
+    @Slot(int, result="QVariantList")
+    def getLoginHistory(self, before_id: int = 0) -> list:
+        """
+        Получение страницы истории входов (для admin).
+
+        Args:
+            before_id: id последней загруженной записи (0 — первая страница).
+        """
         if not self._is_admin():
             return []
 
-        history = self._history_repo.get_all_history(limit=100)
+        history = self._history_repo.get_all_history(
+            limit=self.HISTORY_PAGE_SIZE,
+            before_id=before_id or None
+        )
         return [
             {
                 "id": h.id,
@@ -399,6 +552,41 @@ class AuthManager(QObject):
             for h in history
         ]
 
+    @Slot(int)
+    def requestLoginStats(self, days: int = 30):
+        """
+        Статистика входов по пользователям за период (для admin).
+
+        Считается в пуле потоков вместе с записью очереди истории входов,
+        результат — сигнал loginStatsReady. Считается по дневной сводке —
+        O(дней × пользователей), без сканирования истории.
+
+        Args:
+            days: За сколько дней.
+        """
+        if not self._is_admin():
+            return
+
+        self._thread_pool.start(_BackgroundTask("login stats", self._compute_login_stats, days))
+
+    @Slot(str, int)
+    def requestDailyLoginStats(self, username: str, days: int = 30):
+        """
+        Статистика входов по дням (для admin).
+
+        Считается в пуле потоков, результат — сигнал dailyLoginStatsReady.
+
+        Args:
+            username: Имя пользователя (пустая строка — все пользователи).
+            days: За сколько дней.
+        """
+        if not self._is_admin():
+            return
+
+        self._thread_pool.start(_BackgroundTask(
+            "daily login stats", self._compute_daily_login_stats, username, days
+        ))
+
     @Slot(result="QVariantList")
     def getActiveSessions(self) -> list:
         """Получение активных сессий (для admin)."""
@@ -427,8 +615,52 @@ class AuthManager(QObject):
 
         self._history_repo.force_logout_user(user_id)
 
+    @Slot()
+    def shutdown(self):
+        """Завершение работы: запись накопленной истории входов."""
+        self._audit_timer.stop()
+        self._audit_queue.flush()
+        logger.info("AuthManager shut down, login audit queue flushed")
+
     # === Приватные методы ===
 
+    def _flush_audit_queue_async(self):
+        """Запись очереди истории входов в пуле потоков (по таймеру)."""
+        if self._audit_queue.pending_count:
+            self._thread_pool.start(_BackgroundTask("login audit flush", self._audit_queue.flush))
+
+    def _compute_login_stats(self, days: int):
+        """Запись очереди истории входов и статистика по пользователям (в пуле потоков)."""
+        self._audit_queue.flush()
+        self.loginStatsReady.emit([
+            {
+                "username": st["username"],
+                "sessions": st["sessions"],
+                "total_duration": self._format_duration(st["total_duration"]),
+                "avg_duration": self._format_duration(st["avg_duration"]),
+                "failed": st["failed"],
+                "manual": st["manual"],
+                "timeout": st["timeout"],
+                "forced": st["forced"],
+                "other": st["other"]
+            }
+            for st in self._history_repo.get_user_stats(days)
+        ])
+
+    def _compute_daily_login_stats(self, username: str, days: int):
+        """Запись очереди истории входов и статистика по дням (в пуле потоков)."""
+        self._audit_queue.flush()
+        self.dailyLoginStatsReady.emit(username, self._history_repo.get_daily_stats(username or None, days))
+
+    def _run_history_retention(self):
+        """Запуск архивации истории входов в пуле потоков."""
+        self._thread_pool.start(_BackgroundTask(
+            "login history retention",
+            self._history_repo.apply_retention,
+            self.HISTORY_ARCHIVE_DAYS,
+            self.HISTORY_PURGE_DAYS
+        ))
+
     def _is_admin(self) -> bool:
         """Проверка что текущий пользователь — admin."""
         return self._current_user is not None and self._current_user.role == "admin"
@@ -0,0 +1,157 @@
+"""Бенчмарк стоимости логирования на горячих путях
+
+Для нескольких конфигураций логирования измеряет время 10 000 вызовов
+FilterProxyModel.filterAcceptsRow и BaseRepository.get_connection:
+- off: приёмников нет (нижняя граница);
+- sync / enqueue: рабочая конфигурация (DEBUG) с синхронной и фоновой записью;
+- trace_sync / trace_enqueue: TRACE для filter_proxy_model и base_repository.
+
+Для сравнения в каждой конфигурации измеряется и прежний вариант фильтра
+(три logger.debug на строку без проверки уровня).
+
+drain_ms — сколько после замера фоновый поток дописывал очередь
+(работа, вынесенная из вызывающего потока).
+
+Запуск (из папки src):
+    python benchmarks/bench_logging.py --rows 10000 --repeat 5
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from PySide6.QtCore import QCoreApplication, QModelIndex
+from loguru import logger
+
+from filter_proxy_model import FilterProxyModel
+from items_model import ItemsModel
+from repositories.categories_repository import CategoriesRepository
+from utils.logger_config import setup_logging
+
+TRACE_MODULES = {"filter_proxy_model": "TRACE", "repositories.base_repository": "TRACE"}
+
+SCENARIOS = {
+    "off": None,
+    "sync": {"log_level": "DEBUG", "enqueue": False},
+    "enqueue": {"log_level": "DEBUG", "enqueue": True},
+    "trace_sync": {"log_level": "DEBUG", "enqueue": False, "module_levels": TRACE_MODULES},
+    "trace_enqueue": {"log_level": "DEBUG", "enqueue": True, "module_levels": TRACE_MODULES},
+}
+
+
+class _StaticItems:
+    """Источник данных ItemsModel без базы: фиксированный список товаров."""
+
+    def __init__(self, rows: int):
+        self._items = [
+            (f"A{i:06d}", f"Товар {i}", f"Описание {i}", "", "Датчики", 100.0 + i, i % 50,
+             "2024-01-01", "в наличии" if i % 3 else "под заказ", "шт.", "", "")
+            for i in range(rows)
+        ]
+
+    def get_all(self):
+        return list(self._items)
+
+
+def _legacy_filter_accepts_row(proxy: FilterProxyModel, source_row: int, parent) -> bool:
+    """filterAcceptsRow до оптимизации: логирование каждой строки без проверки уровня."""
+    index = proxy.sourceModel().index(source_row, 0, parent)
+    status_value = proxy.sourceModel().data(index, ItemsModel.StatusRole)
+    logger.debug(f"Row {source_row}: comparing status_value='{status_value}' "
+                 f"with filter='{proxy._status_filter}'")
+    if status_value != proxy._status_filter:
+        logger.debug(f"Row {source_row}: REJECTED by status filter")
+        return False
+    logger.debug(f"Row {source_row}: PASSED status filter")
+    return True
+
+
+def _time_ms(func, rows: int, repeat: int) -> float:
+    """Медиана времени rows вызовов func(row), мс."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for row in range(rows):
+            func(row)
+        timings.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(timings), 2)
+
+
+def _drain_ms() -> float:
+    """Время дописывания фоновой очереди логов."""
+    started = time.perf_counter()
+    logger.complete()
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+def run(rows: int, repeat: int, db_rows: int) -> dict:
+    proxy = FilterProxyModel()
+    proxy.setSourceModel(ItemsModel(_StaticItems(rows)))
+    # Напрямую, без setFilterString: сеттеры сохраняют фильтр в QSettings пользователя
+    proxy._filter_string = "товар"
+    proxy._filter_field = "name"
+    proxy._status_filter = "в наличии"
+    parent = QModelIndex()
+
+    results = {"rows": rows, "repeat": repeat, "db_rows": db_rows, "scenarios": {}}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        repository = CategoriesRepository(str(Path(tmp) / "bench.db"))
+
+        def open_connection(_):
+            with repository.get_connection() as conn:
+                conn.execute("SELECT 1")
+
+        for name, settings in SCENARIOS.items():
+            if settings is None:
+                logger.remove()
+            else:
+                setup_logging(log_dir=str(Path(tmp) / f"logs_{name}"), **settings)
+
+            filter_ms = _time_ms(lambda row: proxy.filterAcceptsRow(row, parent), rows, repeat)
+            filter_drain = _drain_ms()
+            legacy_ms = _time_ms(lambda row: _legacy_filter_accepts_row(proxy, row, parent), rows, repeat)
+            legacy_drain = _drain_ms()
+            db_ms = _time_ms(open_connection, db_rows, repeat)
+            db_drain = _drain_ms()
+
+            results["scenarios"][name] = {
+                "filter_ms_per_10k": round(filter_ms * 10000 / rows, 2),
+                "filter_drain_ms": filter_drain,
+                "legacy_filter_ms_per_10k": round(legacy_ms * 10000 / rows, 2),
+                "legacy_filter_drain_ms": legacy_drain,
+                "get_connection_us": round(db_ms * 1000 / db_rows, 1),
+                "get_connection_drain_ms": db_drain,
+            }
+            print(f"{name}: filter {results['scenarios'][name]['filter_ms_per_10k']} ms / 10k, "
+                  f"legacy {results['scenarios'][name]['legacy_filter_ms_per_10k']} ms / 10k",
+                  file=sys.stderr)
+
+        # Закрываем файлы логов до удаления временной папки
+        logger.remove()
+
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарк стоимости логирования")
+    parser.add_argument("--rows", type=int, default=10000, help="Количество проверок фильтра")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--db-rows", type=int, default=1000, help="Количество открытий соединения")
+    args = parser.parse_args()
+
+    # Экземпляр приложения нужен моделям ItemsModel и FilterProxyModel; PySide держит его до выхода
+    QCoreApplication(sys.argv)
+
+    print(json.dumps(run(args.rows, args.repeat, args.db_rows), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""Бенчмарк задержки входа
+
+Для каждого значения количества итераций PBKDF2 измеряет:
+- block_ms: сколько GUI-поток занят вызовом AuthManager.login();
+- latency_ms: время от вызова login() до сигнала loginSuccessful;
+- hash_ms: чистая стоимость одного PBKDF2.
+Отдельно измеряется первый вход после повышения количества итераций
+(с прозрачным перехэшированием).
+
+Запуск (из папки src):
+    python benchmarks/bench_login.py --iterations 100000 310000 600000 --runs 5
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from PySide6.QtCore import QCoreApplication, QEventLoop, QTimer
+
+from auth_manager import AuthManager
+from repositories.users_repository import UsersRepository
+from utils.logger_config import setup_logging
+
+USERNAME = "admin"
+PASSWORD = "admin123"
+
+
+def _login_once(auth: AuthManager) -> tuple:
+    """Выполняет один вход и возвращает (block_ms, latency_ms)."""
+    loop = QEventLoop()
+    outcome = {}
+
+    def on_success(*_):
+        outcome["ok"] = True
+        loop.quit()
+
+    def on_failed(reason):
+        outcome["error"] = reason
+        loop.quit()
+
+    auth.loginSuccessful.connect(on_success)
+    auth.loginFailed.connect(on_failed)
+    QTimer.singleShot(30000, loop.quit)
+
+    started = time.perf_counter()
+    auth.login(USERNAME, PASSWORD)
+    block_ms = (time.perf_counter() - started) * 1000
+    loop.exec()
+    latency_ms = (time.perf_counter() - started) * 1000
+
+    auth.loginSuccessful.disconnect(on_success)
+    auth.loginFailed.disconnect(on_failed)
+
+    if "ok" not in outcome:
+        raise RuntimeError(f"Login failed: {outcome.get('error', 'timeout')}")
+
+    auth.logout("manual")
+    return block_ms, latency_ms
+
+
+def _summary(values: list) -> dict:
+    return {
+        "median": round(statistics.median(values), 2),
+        "min": round(min(values), 2),
+        "max": round(max(values), 2),
+    }
+
+
+def run(iterations_list: list, runs: int) -> dict:
+    results = {"runs": runs, "iterations": []}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "users.db")
+
+        for iterations in iterations_list:
+            # Первый вход с новым количеством итераций выполняет перехэширование
+            auth = AuthManager(db_path, hash_iterations=iterations)
+            rehash_block_ms, rehash_latency_ms = _login_once(auth)
+
+            blocks, latencies, hashes = [], [], []
+            for _ in range(runs):
+                block_ms, latency_ms = _login_once(auth)
+                blocks.append(block_ms)
+                latencies.append(latency_ms)
+
+                started = time.perf_counter()
+                UsersRepository._hash_password(PASSWORD, "salt", iterations)
+                hashes.append((time.perf_counter() - started) * 1000)
+
+            results["iterations"].append({
+                "iterations": iterations,
+                "block_ms": _summary(blocks),
+                "latency_ms": _summary(latencies),
+                "hash_ms": _summary(hashes),
+                "first_login_with_rehash_ms": round(rehash_latency_ms, 2),
+            })
+
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарк задержки входа")
+    parser.add_argument("--iterations", type=int, nargs="+", default=[100000, 310000, 600000])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_logging(log_level="WARNING")
+    # Экземпляр приложения нужен для QEventLoop и QTimer ожидания входа; PySide держит его до выхода
+    QCoreApplication(sys.argv)
+
+    print(json.dumps(run(args.iterations, args.runs), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
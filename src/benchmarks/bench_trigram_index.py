@@ -0,0 +1,112 @@
+"""Бенчмарк триграммного индекса (utils.trigram_index)
+
+Строит индекс по синтетическим записям (название + производитель + email,
+как у поставщиков; email — только подстрокой) и измеряет задержку поиска
+для типичных запросов: точная подстрока, опечатка, кириллический «двойник»
+латинского артикула, короткий запрос, часть email и домен. Худший случай —
+максимум по всем запросам (worst_match_max_ms). Отдельно — стоимость sync
+после изменения 1% записей.
+
+Запуск (из папки src):
+    python benchmarks/bench_trigram_index.py --entries 100000 --repeat 20
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.trigram_index import TrigramIndex
+
+NAMES = ["Датчик", "Клапан", "Насос", "Фильтр", "Реле", "Кабель", "Муфта", "Подшипник",
+         "Sensor", "Valve", "Pump", "Controller", "Bearing", "Coupling"]
+MAKERS = ["Siemens", "Omron", "Danfoss", "ОВЕН", "Schneider", "Festo", "SKF", "ABB"]
+MAILBOXES = ["info", "sales", "office", "mail", "order"]
+DOMAINS = ["mail.ru", "gmail.com", "yandex.ru", "company.com"]
+SYLLABLES = ["ка", "ро", "ме", "ти", "ла", "ст", "пр", "ко", "ва", "ne", "tr", "ol", "ex", "ma", "ri", "on"]
+
+
+def _entries(count: int, seed: int = 1):
+    """Названия: тип изделия, модель из случайных слогов, типоразмер; производитель; email."""
+    rng = random.Random(seed)
+    models = ["".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))) for _ in range(3000)]
+    makers = MAKERS + ["".join(rng.choices(SYLLABLES, k=3)).capitalize() for _ in range(200)]
+    return {
+        f"A{i:06d}": (f"{rng.choice(NAMES)} {rng.choice(models)} {rng.randint(1, 999)}-"
+                      f"{rng.choice('ABCEHKMOPTX')}{rng.randint(10, 99)}",
+                      rng.choice(makers),
+                      f"{rng.choice(MAILBOXES)}{rng.randint(1, 999)}@{rng.choice(DOMAINS)}")
+        for i in range(count)
+    }
+
+
+def _latency_ms(func, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(samples), 3), round(max(samples), 3)
+
+
+def run(count: int, repeat: int) -> dict:
+    entries = _entries(count)
+    index = TrigramIndex(fuzzy_fields=2)
+
+    started = time.perf_counter()
+    index.sync(entries)
+    build_s = time.perf_counter() - started
+
+    queries = {
+        "substring": "клапан",
+        "typo": "подшипнек",
+        "lookalike": "ОМRОN",      # кириллические О и М
+        "model": "ролати",
+        "short": "ab",
+        "two_words": "насос danfoss",
+        "email": "mail123",
+        "domain": "gmail",
+    }
+
+    results = {"entries": count, "build_s": round(build_s, 2), "queries": {}}
+    for name, query in queries.items():
+        median_ms, max_ms = _latency_ms(lambda: index.match(query), repeat)
+        results["queries"][name] = {
+            "query": query,
+            "matches": len(index.match(query)),
+            "match_median_ms": median_ms,
+            "match_max_ms": max_ms,
+            "search_top20_median_ms": _latency_ms(lambda: index.search(query, limit=20), repeat)[0],
+        }
+        print(f"{name}: {median_ms} ms (max {max_ms}), {results['queries'][name]['matches']} matches",
+              file=sys.stderr)
+    results["worst_match_max_ms"] = max(query["match_max_ms"] for query in results["queries"].values())
+
+    # Перезагрузка данных с 1% изменённых записей
+    changed = dict(entries)
+    for key in list(changed)[::100]:
+        changed[key] = (changed[key][0] + " rev2",) + changed[key][1:]
+    started = time.perf_counter()
+    results["sync_changes"] = index.sync(changed)
+    results["sync_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарк триграммного индекса")
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.entries, args.repeat), indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
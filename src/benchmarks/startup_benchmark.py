@@ -0,0 +1,248 @@
+"""Бенчмарк запуска приложения
+
+Запускает main.py без окна (QT_QPA_PLATFORM=offscreen) на сгенерированных
+базах с разным количеством товаров и собирает:
+- время импорта модулей (python -X importtime);
+- хронологию запуска из main.py (UnitOfWork, менеджеры, модели, загрузка
+  QML, первый кадр, отложенные загрузки данных);
+- полное время от запуска процесса до выхода.
+
+Результат — JSON, который можно сравнивать между коммитами (--baseline).
+
+Запуск (из папки src):
+    python benchmarks/startup_benchmark.py --sizes 1000 10000 100000 --runs 3 --output startup.json
+    python benchmarks/startup_benchmark.py --baseline startup.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+SRC_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SRC_DIR))
+
+# Модули, время импорта которых выводится отдельно
+TRACKED_MODULES = (
+    "PySide6.QtCore", "PySide6.QtGui", "PySide6.QtQml", "loguru",
+    "repositories.unit_of_work", "items_model", "auth_manager", "file_manager",
+    "specifications_model", "storage_verifier",
+)
+
+CATEGORIES = ["Модули", "Датчики", "Диоды", "Транзисторы", "Корпуса", "Печатные платы"]
+
+
+def generate_database(path: Path, items_count: int, suppliers_count: int = 200):
+    """
+    Создаёт базу товаров заданного размера.
+
+    Схема создаётся через UnitOfWork, данные вставляются пачками.
+    """
+    from repositories.unit_of_work import UnitOfWork
+
+    UnitOfWork(str(path))
+    rng = random.Random(items_count)
+
+    with sqlite3.connect(path) as conn:
+        conn.executemany(
+            "INSERT INTO categories (name, sku_prefix, sku_digits) VALUES (?, ?, 5)",
+            [(name, f"C{i}") for i, name in enumerate(CATEGORIES)]
+        )
+        conn.executemany(
+            "INSERT INTO suppliers (name, company, email) VALUES (?, ?, ?)",
+            [(f"Контакт {i}", f"Компания {i}", f"s{i}@example.com") for i in range(suppliers_count)]
+        )
+
+        batch = []
+        for i in range(items_count):
+            article = f"C{i % len(CATEGORIES)}{i:06d}"
+            batch.append((
+                article, f"Товар {i}", f"Описание товара {i}", "",
+                i % len(CATEGORIES) + 1, round(rng.uniform(1, 10000), 2), rng.randint(0, 500)
+            ))
+            if len(batch) >= 10000:
+                conn.executemany("""
+                    INSERT INTO items (article, name, description, image_path, category_id, price, stock)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, batch)
+                batch.clear()
+        if batch:
+            conn.executemany("""
+                INSERT INTO items (article, name, description, image_path, category_id, price, stock)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, batch)
+
+        conn.executemany(
+            "INSERT OR IGNORE INTO item_suppliers (item_article, supplier_id) VALUES (?, ?)",
+            [(f"C{i % len(CATEGORIES)}{i:06d}", rng.randint(1, suppliers_count))
+             for i in range(0, items_count, 3)]
+        )
+
+
+def parse_importtime(stderr: str) -> Dict:
+    """
+    Разбирает вывод -X importtime.
+
+    Формат строки: "import time: <self us> | <cumulative us> | <module>".
+
+    Returns:
+        dict: total_ms, tracked (модуль -> cumulative ms), top (самые долгие по self).
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(parts[0]), int(parts[1])
+        except ValueError:
+            continue
+        modules[parts[2].strip()] = (self_us, cumulative_us)
+
+    # Сумма собственного времени всех модулей = общее время импорта
+    total_us = sum(self_us for self_us, _ in modules.values())
+
+    return {
+        "total_ms": round(total_us / 1000, 2),
+        "tracked": {
+            name: round(modules[name][1] / 1000, 2) for name in TRACKED_MODULES if name in modules
+        },
+        "top": [
+            {"module": name, "self_ms": round(self_us / 1000, 2), "cumulative_ms": round(cum_us / 1000, 2)}
+            for name, (self_us, cum_us) in sorted(modules.items(), key=lambda m: m[1][0], reverse=True)[:15]
+        ],
+    }
+
+
+def run_once(items_db: Path, users_db: Path, timeout: int) -> Dict:
+    """Один запуск приложения; возвращает хронологию и время импорта."""
+    with tempfile.TemporaryDirectory() as tmp:
+        timeline_path = Path(tmp) / "timeline.json"
+        env = dict(
+            os.environ,
+            QT_QPA_PLATFORM="offscreen",
+            PYTHONCODE_ITEMS_DB=str(items_db),
+            PYTHONCODE_USERS_DB=str(users_db),
+            PYTHONCODE_STARTUP_BENCHMARK=str(timeline_path),
+        )
+
+        started = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", str(SRC_DIR / "main.py")],
+            cwd=SRC_DIR, env=env, capture_output=True, text=True, timeout=timeout
+        )
+        wall_ms = (time.perf_counter() - started) * 1000
+
+        if not timeline_path.exists():
+            raise RuntimeError(f"Startup timeline was not written (exit code {proc.returncode}):\n"
+                               f"{proc.stderr[-2000:]}")
+
+        events = json.loads(timeline_path.read_text(encoding="utf-8"))["events"]
+
+    # Этап: длительность (если измерялась), иначе момент наступления от старта
+    stages = {event["name"]: event.get("duration_ms", event["at_ms"]) for event in events}
+
+    return {"wall_ms": round(wall_ms, 2), "stages": stages, "imports": parse_importtime(proc.stderr)}
+
+
+def summarize(runs: List[Dict]) -> Dict:
+    """Медианы по запускам."""
+    keys = set().union(*(run["stages"] for run in runs))
+    return {
+        "wall_ms": round(statistics.median(run["wall_ms"] for run in runs), 2),
+        "import_total_ms": round(statistics.median(run["imports"]["total_ms"] for run in runs), 2),
+        "stages": {
+            key: round(statistics.median(run["stages"][key] for run in runs if key in run["stages"]), 2)
+            for key in sorted(keys)
+        },
+        "imports_tracked": runs[-1]["imports"]["tracked"],
+        "imports_top": runs[-1]["imports"]["top"],
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=SRC_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(result: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Сравнивает медианы с базовым результатом; возвращает список регрессий."""
+    regressions = []
+    for size, current in result["sizes"].items():
+        base = baseline.get("sizes", {}).get(size)
+        if not base:
+            continue
+        pairs = [("wall_ms", current["wall_ms"], base["wall_ms"])]
+        pairs += [(stage, value, base["stages"].get(stage)) for stage, value in current["stages"].items()]
+        for name, value, base_value in pairs:
+            if base_value and value > base_value * (1 + threshold) and value - base_value > 5:
+                regressions.append(f"{size} items: {name} {base_value:.1f} -> {value:.1f} ms")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарк запуска приложения")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--timeout", type=int, default=300, help="Таймаут одного запуска, с")
+    parser.add_argument("--workdir", default=None, help="Папка для сгенерированных баз (кэш между запусками)")
+    parser.add_argument("--output", default="-", help="Файл результата JSON ('-' — stdout)")
+    parser.add_argument("--baseline", default=None, help="JSON предыдущего запуска для сравнения")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Допустимый рост времени (доля)")
+    args = parser.parse_args()
+
+    workdir = Path(args.workdir or Path(tempfile.gettempdir()) / "pythoncode_startup_bench")
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    result = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "runs": args.runs,
+        "sizes": {},
+    }
+
+    for size in args.sizes:
+        items_db = workdir / f"items_{size}.db"
+        if not items_db.exists():
+            print(f"Generating {items_db} ...", file=sys.stderr)
+            generate_database(items_db, size)
+
+        users_db = workdir / "users.db"
+        runs = [run_once(items_db, users_db, args.timeout) for _ in range(args.runs)]
+        result["sizes"][str(size)] = summarize(runs)
+        print(f"{size} items: {result['sizes'][str(size)]['wall_ms']:.0f} ms", file=sys.stderr)
+
+    output = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output == "-":
+        print(output)
+    else:
+        Path(args.output).write_text(output, encoding="utf-8")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(result, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION: {line}", file=sys.stderr)
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
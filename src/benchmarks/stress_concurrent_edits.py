@@ -0,0 +1,152 @@
+"""Стресс-тест одновременного редактирования из нескольких процессов
+
+Несколько процессов (как несколько рабочих мест) одновременно меняют
+остаток небольшого набора товаров в одной items.db: читают товар,
+увеличивают stock на 1 и сохраняют через ItemsRepository.update с
+expected_version (compare-and-swap). При ConcurrencyConflictError товар
+перечитывается и правка повторяется.
+
+Проверяется, что ни одна правка не потеряна: итоговая сумма остатков
+равна начальной плюс число успешных правок, а сумма row_version — числу
+правок. Ошибки «database is locked», дошедшие до вызывающего кода
+(ожидание и повторы исчерпаны), считаются отдельно.
+
+Запуск (из папки src):
+    python benchmarks/stress_concurrent_edits.py --workers 8 --edits 200 --items 5
+    python benchmarks/stress_concurrent_edits.py --journal-mode delete
+"""
+
+import argparse
+import json
+import multiprocessing
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from loguru import logger
+
+from models.dto import Item
+from repositories.concurrency import ConcurrencyConflictError, RetryPolicy, is_busy_error
+from repositories.items_repository import ItemsRepository
+from repositories.unit_of_work import UnitOfWork
+
+# Попыток на одну правку при конфликтах версий
+MAX_CONFLICT_RETRIES = 100
+
+
+def _seed(db_path: str, items: int, journal_mode: str) -> int:
+    """Создаёт базу с товарами; возвращает начальную сумму остатков."""
+    uow = UnitOfWork(db_path)
+    uow.configure_concurrency(journal_mode=journal_mode)
+    for i in range(items):
+        uow.items.add(Item(
+            article=f"S{i:04d}", name=f"Товар {i}", description="", image_path="",
+            category_id=None, price=10.0, stock=100
+        ))
+    return items * 100
+
+
+def _item_from_row(row) -> Item:
+    return Item(
+        article=row[0], name=row[1], description=row[2], image_path=row[3],
+        category_id=None, price=row[5], stock=row[6], status=row[8],
+        unit=row[9], manufacturer=row[10], document=row[11]
+    )
+
+
+def _worker(db_path: str, worker_id: int, edits: int, items: int,
+            busy_timeout_ms: int, retry_attempts: int, results):
+    logger.remove()
+    repository = ItemsRepository(db_path)
+    repository.busy_timeout_ms = busy_timeout_ms
+    repository.retry_policy = RetryPolicy(attempts=retry_attempts)
+
+    stats = {"successes": 0, "conflicts": 0, "busy": 0, "failed": 0, "latencies_ms": []}
+    for n in range(edits):
+        article = f"S{(worker_id + n) % items:04d}"
+        started = time.perf_counter()
+        for _ in range(MAX_CONFLICT_RETRIES):
+            try:
+                row = repository.get_by_article(article)
+                item = _item_from_row(row)
+                item.stock += 1
+                repository.update(article, item, expected_version=row[12])
+                stats["successes"] += 1
+                break
+            except ConcurrencyConflictError:
+                stats["conflicts"] += 1
+            except sqlite3.OperationalError as e:
+                if not is_busy_error(e):
+                    raise
+                stats["busy"] += 1
+        else:
+            stats["failed"] += 1
+        stats["latencies_ms"].append((time.perf_counter() - started) * 1000)
+
+    results.put(stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=8, help="процессов")
+    parser.add_argument("--edits", type=int, default=200, help="правок на процесс")
+    parser.add_argument("--items", type=int, default=5, help="товаров (меньше — больше конфликтов)")
+    parser.add_argument("--journal-mode", default="wal", help="wal, delete, truncate, persist")
+    parser.add_argument("--busy-timeout-ms", type=int, default=5000)
+    parser.add_argument("--retry-attempts", type=int, default=5)
+    args = parser.parse_args()
+
+    logger.remove()
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "items.db")
+        initial_stock = _seed(db_path, args.items, args.journal_mode)
+
+        results = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(target=_worker, args=(
+                db_path, worker_id, args.edits, args.items,
+                args.busy_timeout_ms, args.retry_attempts, results
+            ))
+            for worker_id in range(args.workers)
+        ]
+        started = time.perf_counter()
+        for process in workers:
+            process.start()
+        stats = [results.get() for _ in workers]
+        for process in workers:
+            process.join()
+        elapsed = time.perf_counter() - started
+
+        with sqlite3.connect(db_path) as conn:
+            final_stock, versions = conn.execute("SELECT SUM(stock), SUM(row_version) FROM items").fetchone()
+
+    successes = sum(s["successes"] for s in stats)
+    latencies = sorted(latency for s in stats for latency in s["latencies_ms"])
+    report = {
+        "journal_mode": args.journal_mode,
+        "workers": args.workers,
+        "edits_per_worker": args.edits,
+        "items": args.items,
+        "successes": successes,
+        "conflicts": sum(s["conflicts"] for s in stats),
+        "busy_errors": sum(s["busy"] for s in stats),
+        "failed": sum(s["failed"] for s in stats),
+        "edits_per_s": round(successes / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2], 2) if latencies else None,
+        "p99_ms": round(latencies[int(len(latencies) * 0.99)], 2) if latencies else None,
+        "max_ms": round(latencies[-1], 2) if latencies else None,
+        "final_stock": final_stock,
+        "expected_stock": initial_stock + successes,
+        "row_versions": versions,
+        "lost_updates": initial_stock + successes - final_stock,
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    sys.exit(0 if report["lost_updates"] == 0 and versions == successes else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,15 @@
 """Модель категорий для Qt/QML интерфейса с Repository Pattern"""
 
+from bisect import bisect_right
+from typing import Dict, List, Optional
+
 from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, Slot, Signal
 from loguru import logger
 
 from repositories.categories_repository import CategoriesRepository
 from models.dto import Category
+from utils.logger_config import level_enabled
+from repositories.query_monitor import query_budget
 
 
 class CategoriesModel(QAbstractListModel):
@@ -16,7 +21,14 @@ class CategoriesModel(QAbstractListModel):
 
     Attributes:
         repository: CategoriesRepository для работы с базой данных
-        _categories: Список категорий для отображения
+        _categories: Список категорий для отображения (по имени, как get_all)
+        _row_by_name: Индекс название → строка
+        _row_by_id: Индекс ID → строка
+
+    Поиск по имени и ID (QML-диалоги, импорт) идёт по словарям, а не
+    перебором списка. Индексы перестраиваются при загрузке; после
+    добавления, изменения и удаления модель обновляется точечно, без
+    повторной загрузки из БД.
 
     Roles:
         IdRole: ID категории
@@ -35,21 +47,26 @@ class CategoriesModel(QAbstractListModel):
     errorOccurred = Signal(str)
     categoriesLoaded = Signal(int)  # Новый сигнал - количество загруженных категорий
 
-    def __init__(self, categories_repository: CategoriesRepository, parent=None):
+    def __init__(self, categories_repository: CategoriesRepository, parent=None, autoload: bool = True):
         """
         Инициализирует модель категорий.
 
         Args:
             categories_repository: Репозиторий для работы с категориями.
             parent: Родительский объект Qt (опционально).
+            autoload: Загрузить данные сразу (False — загрузка позже через loadCategories).
         """
         super().__init__(parent)
 
         self.repository = categories_repository
         self._categories = []
+        self._row_by_name: Dict[str, int] = {}
+        self._row_by_id: Dict[int, int] = {}
+        self._names_cache: Optional[List[str]] = None
 
         logger.debug("CategoriesModel initialized")
-        self.loadCategories()
+        if autoload:
+            self.loadCategories()
 
     def roleNames(self):
         """
@@ -106,6 +123,7 @@ class CategoriesModel(QAbstractListModel):
 
     # ==================== Data Loading ====================
 
+    @query_budget(1)
     def loadCategories(self):
         """
         Загружает категории из репозитория и обновляет модель.
@@ -117,6 +135,7 @@ class CategoriesModel(QAbstractListModel):
         try:
             self.beginResetModel()
             self._categories = self.repository.get_all()
+            self._rebuild_index()
             self.endResetModel()
 
             logger.success(f"✅ Loaded {len(self._categories)} categories")
@@ -126,6 +145,67 @@ class CategoriesModel(QAbstractListModel):
             logger.exception("❌ Failed to load categories")
             self.errorOccurred.emit(f"Ошибка загрузки категорий: {str(e)}")
 
+    def _rebuild_index(self):
+        """Перестраивает индексы по имени и ID, сбрасывает кэш списка имён."""
+        self._row_by_name = {}
+        self._row_by_id = {}
+        for row, category in enumerate(self._categories):
+            self._row_by_name.setdefault(category.name, row)
+            self._row_by_id[category.id] = row
+        self._names_cache = None
+
+    def _sorted_row(self, name: str) -> int:
+        """Позиция для вставки категории с указанным именем (порядок ORDER BY name)."""
+        return bisect_right([category.name for category in self._categories], name)
+
+    def _insert_category(self, category: Category):
+        """Вставляет категорию в модель с сохранением сортировки."""
+        row = self._sorted_row(category.name)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._categories.insert(row, category)
+        self._rebuild_index()
+        self.endInsertRows()
+
+    def _remove_row(self, row: int):
+        """Удаляет строку модели."""
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._categories[row]
+        self._rebuild_index()
+        self.endRemoveRows()
+
+    def _replace_category(self, category: Category) -> bool:
+        """
+        Заменяет данные категории в модели.
+
+        Строка обновляется на месте (dataChanged), а при смене позиции
+        в сортировке переставляется.
+
+        Returns:
+            bool: False если категории нет в модели.
+        """
+        row = self._row_by_id.get(category.id)
+        if row is None:
+            return False
+
+        names = [c.name for c in self._categories]
+        in_order = ((row == 0 or names[row - 1] <= category.name) and
+                    (row == len(names) - 1 or category.name <= names[row + 1]))
+        if not in_order:
+            self._remove_row(row)
+            self._insert_category(category)
+            return True
+
+        previous = self._categories[row]
+        self._categories[row] = category
+        if previous.name != category.name:
+            self._row_by_name.pop(previous.name, None)
+            self._row_by_name[category.name] = row
+            self._names_cache = None
+
+        index = self.index(row, 0)
+        self.dataChanged.emit(index, index, [self.NameRole, self.PrefixRole, self.DigitsRole])
+        return True
+
     @Slot()
     def refresh(self):
         """
@@ -185,7 +265,8 @@ class CategoriesModel(QAbstractListModel):
             logger.success(f"✅ Category added: '{name}' (ID: {category_id})")
 
             # Обновляем модель
-            self.loadCategories()
+            category.id = category_id
+            self._insert_category(category)
 
         except Exception as e:
             error_msg = f"Ошибка добавления категории: {str(e)}"
@@ -247,8 +328,9 @@ class CategoriesModel(QAbstractListModel):
 
             logger.success(f"✅ Category {category_id} updated: '{new_name}'")
 
-            # Обновляем модель
-            self.loadCategories()
+            # Обновляем модель (категории нет в модели — перечитываем целиком)
+            if not self._replace_category(category):
+                self.loadCategories()
 
         except Exception as e:
             error_msg = f"Ошибка обновления категории: {str(e)}"
@@ -272,7 +354,9 @@ class CategoriesModel(QAbstractListModel):
             logger.success(f"✅ Category {category_id} deleted")
 
             # Обновляем модель
-            self.loadCategories()
+            row = self._row_by_id.get(category_id)
+            if row is not None:
+                self._remove_row(row)
 
         except Exception as e:
             error_msg = f"Ошибка удаления категории: {str(e)}"
@@ -302,7 +386,8 @@ class CategoriesModel(QAbstractListModel):
                 'sku_digits': category.sku_digits
             }
 
-            logger.trace(f"Retrieved category data for index {idx}: {category.name}")
+            if level_enabled("TRACE", __name__):
+                logger.trace(f"Retrieved category data for index {idx}: {category.name}")
             return result
 
         logger.warning(f"⚠️ Invalid category index: {idx}")
@@ -319,10 +404,9 @@ class CategoriesModel(QAbstractListModel):
         Returns:
             int: Индекс категории или -1, если не найдена.
         """
-        for i, category in enumerate(self._categories):
-            if category.name == name:
-                logger.trace(f"Found category '{name}' at index {i}")
-                return i
+        row = self._row_by_name.get(name)
+        if row is not None:
+            return row
 
         logger.debug(f"Category '{name}' not found")
         return -1
@@ -338,10 +422,9 @@ class CategoriesModel(QAbstractListModel):
         Returns:
             int: Идентификатор категории или -1, если не найдена.
         """
-        for category in self._categories:
-            if category.name == name:
-                logger.trace(f"Found category '{name}' with ID {category.id}")
-                return category.id
+        row = self._row_by_name.get(name)
+        if row is not None:
+            return self._categories[row].id
 
         logger.debug(f"Category '{name}' not found")
         return -1
@@ -384,15 +467,15 @@ class CategoriesModel(QAbstractListModel):
         Returns:
             dict: Словарь с данными категории или пустой словарь.
         """
-        for category in self._categories:
-            if category.id == category_id:
-                logger.trace(f"Found category with ID {category_id}: {category.name}")
-                return {
-                    'id': category.id,
-                    'name': category.name,
-                    'sku_prefix': category.sku_prefix,
-                    'sku_digits': category.sku_digits
-                }
+        row = self._row_by_id.get(category_id)
+        if row is not None:
+            category = self._categories[row]
+            return {
+                'id': category.id,
+                'name': category.name,
+                'sku_prefix': category.sku_prefix,
+                'sku_digits': category.sku_digits
+            }
 
         logger.warning(f"⚠️ Category with ID {category_id} not found")
         return {'id': -1, 'name': '', 'sku_prefix': '', 'sku_digits': 4}
@@ -418,21 +501,21 @@ class CategoriesModel(QAbstractListModel):
         Returns:
             bool: True если категория существует, иначе False.
         """
-        exists = any(category.name == name for category in self._categories)
-        logger.trace(f"Category '{name}' exists: {exists}")
-        return exists
+        return name in self._row_by_name
 
     @Slot(result=list)
     def getAllNames(self):
         """
         Возвращает список всех названий категорий.
 
+        Список кэшируется до следующего изменения модели.
+
         Returns:
             list: Список названий категорий.
         """
-        names = [category.name for category in self._categories]
-        logger.trace(f"Retrieved {len(names)} category names")
-        return names
+        if self._names_cache is None:
+            self._names_cache = [category.name for category in self._categories]
+        return list(self._names_cache)
 
     @Slot(result=list)
     def getAllPrefixes(self):
@@ -1,8 +1,11 @@
 # config_manager.py - ОБНОВЛЕННАЯ ВЕРСИЯ с настройками файловой структуры
+import hashlib
 import json
 import os
 from pathlib import Path
-from PySide6.QtCore import QObject, Signal, Slot, Property
+from typing import Any, Dict, Optional, Tuple
+
+from PySide6.QtCore import QObject, Signal, Slot, Property, QTimer, QFileSystemWatcher
 
 
 class ConfigManager(QObject):
@@ -13,16 +16,33 @@ class ConfigManager(QObject):
 
     НОВОЕ: Управляет структурой каталогов для хранения файлов.
 
+    Хранение:
+        - чтение — из плоского кэша с ключами через точку
+          ("security.password_hash_iterations"), без обхода словарей;
+        - запись — отложенная: изменения копятся и пишутся одним сохранением
+          через SAVE_DELAY_MS после последнего изменения (или flush());
+        - сохранение атомарное: временный файл + os.replace;
+        - файл отслеживается QFileSystemWatcher и перечитывается только
+          если его содержимое действительно изменилось.
+
     Сигналы:
         vatIncludedChanged(bool): Изменилось включение НДС в цены.
         defaultCurrencyChanged(str): Изменилась валюта по умолчанию.
         vatRateChanged(float): Изменилась ставка НДС (в процентах).
+        configReloaded(): Конфигурация перечитана из изменённого файла.
     """
 
+    # Задержка записи после последнего изменения, мс
+    SAVE_DELAY_MS = 500
+    # Задержка перечитывания после уведомления об изменении файла
+    # (редакторы сохраняют файл в несколько шагов), мс
+    RELOAD_DELAY_MS = 200
+
     # Signals for property changes
     vatIncludedChanged = Signal(bool)
     defaultCurrencyChanged = Signal(str)
     vatRateChanged = Signal(float)
+    configReloaded = Signal()
 
     def __init__(self, config_path="config.json", parent=None):
         """Инициализирует менеджер конфигурации.
@@ -34,10 +54,32 @@ class ConfigManager(QObject):
             parent (QObject, optional): Родительский объект Qt. По умолчанию None.
         """
         super().__init__(parent)
-        self._config_path = config_path
+        self._config_path = os.path.abspath(config_path)
         self._config = self._load_default_config()
+        self._flat: Dict[str, Any] = {}
+
+        # Изменения, ещё не записанные в файл (ключ через точку -> значение)
+        self._pending: Dict[str, Any] = {}
+        # Состояние файла на момент последнего чтения/записи
+        self._file_state: Optional[Tuple[int, int]] = None
+        self._file_hash: Optional[str] = None
+
+        self._save_timer = QTimer(self)
+        self._save_timer.setSingleShot(True)
+        self._save_timer.setInterval(self.SAVE_DELAY_MS)
+        self._save_timer.timeout.connect(self.flush)
+
         self._load_config()
 
+        self._reload_timer = QTimer(self)
+        self._reload_timer.setSingleShot(True)
+        self._reload_timer.setInterval(self.RELOAD_DELAY_MS)
+        self._reload_timer.timeout.connect(self._reload_if_changed)
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.fileChanged.connect(self._on_file_changed)
+        self._watch_file()
+
     def _load_default_config(self):
         """Возвращает словарь настроек по умолчанию.
 
@@ -48,7 +90,13 @@ class ConfigManager(QObject):
                 - "default_currency" (str)
                 - "decimal_places" (int)
                 - "theme" (str)
+                - "filter_delay_ms" (int): Задержка применения строки поиска
                 - "file_storage" (dict): Настройки структуры хранения файлов
+                - "security" (dict): Параметры хэширования паролей
+                - "logging" (dict): Уровень логирования, фоновая запись, уровни модулей
+                - "database" (dict): Порог медленных запросов, снимок БД в памяти,
+                  режим журнала и ожидание блокировок (несколько рабочих мест)
+                - "backup" (dict): Папка, ротация и темп резервного копирования БД
         """
         return {
             "vat_included": True,
@@ -56,6 +104,7 @@ class ConfigManager(QObject):
             "default_currency": "RUB",
             "decimal_places": 2,
             "theme": "light",
+            "filter_delay_ms": 250,
 
             # ИЗМЕНЕНО: Минимальная структура - детали берутся из config.json
             "file_storage": {
@@ -68,6 +117,37 @@ class ConfigManager(QObject):
                     "directory": "documents",
                     "subdirectories": {}  # Пустой словарь - будет заполнен из config.json
                 }
+            },
+
+            "security": {
+                "password_hash_iterations": 100000
+            },
+
+            "database": {
+                "slow_query_ms": 100,
+                "read_snapshot": False,
+                "snapshot_check_interval_s": 2.0,
+                # Для items.db на сетевом диске — "delete" (WAL только локально)
+                "journal_mode": "wal",
+                "busy_timeout_ms": 5000,
+                "retry_attempts": 5,
+                "retry_base_delay_ms": 50
+            },
+
+            # Читается DatabaseBackupManager (см. database_backup.py)
+            "backup": {
+                "directory": "backups",
+                "keep": 7,
+                "interval_hours": 24,
+                "pages_per_step": 256,
+                "step_pause_ms": 10
+            },
+
+            # Читается utils.logger_config.setup_logging_from_config при запуске
+            "logging": {
+                "level": "DEBUG",
+                "enqueue": True,
+                "modules": {}
             }
         }
 
@@ -80,38 +160,41 @@ class ConfigManager(QObject):
         """
         if os.path.exists(self._config_path):
             try:
-                with open(self._config_path, 'r', encoding='utf-8') as f:
-                    loaded_config = json.load(f)
-
-                # Deep merge with defaults to handle new settings
-                self._deep_merge(self._config, loaded_config)
-
-                # СПЕЦИАЛЬНАЯ ОБРАБОТКА: subdirectories берём ТОЛЬКО из config.json
-                # (не мержим с defaults, а заменяем полностью)
-                if "file_storage" in loaded_config:
-                    fs_loaded = loaded_config["file_storage"]
+                data = self._read_file()
+                self._apply_loaded(json.loads(data.decode("utf-8")))
+                self._file_hash = hashlib.sha256(data).hexdigest()
 
-                    # Для images subdirectories
-                    if "images" in fs_loaded and "subdirectories" in fs_loaded["images"]:
-                        self._config["file_storage"]["images"]["subdirectories"] = fs_loaded["images"]["subdirectories"]
-                        print(
-                            f"DEBUG: Loaded {len(fs_loaded['images']['subdirectories'])} image subdirectories from config")
-
-                    # Для documents subdirectories
-                    if "documents" in fs_loaded and "subdirectories" in fs_loaded["documents"]:
-                        self._config["file_storage"]["documents"]["subdirectories"] = fs_loaded["documents"][
-                            "subdirectories"]
-                        print(
-                            f"DEBUG: Loaded {len(fs_loaded['documents']['subdirectories'])} document subdirectories from config")
-
-                print(f"DEBUG: Config loaded from {self._config_path}")
+                print(
+                    f"DEBUG: Config loaded from {self._config_path}: "
+                    f"{len(self.get('file_storage.images.subdirectories', {}))} image, "
+                    f"{len(self.get('file_storage.documents.subdirectories', {}))} document subdirectories")
 
             except Exception as e:
                 print(f"ERROR: Failed to load config: {e}")
                 print("DEBUG: Using default configuration")
+                self._rebuild_cache()
         else:
             print(f"DEBUG: Config file not found, creating with defaults")
-            self._save_config()
+            self._rebuild_cache()
+            self._write_file()
+
+    def _apply_loaded(self, loaded: dict):
+        """Заменяет текущую конфигурацию загруженной (поверх настроек по умолчанию).
+
+        subdirectories в defaults пустые, поэтому слияние берёт их из файла целиком.
+        Ещё не записанные изменения применяются поверх загруженных.
+
+        Args:
+            loaded (dict): Содержимое config.json.
+        """
+        config = self._load_default_config()
+        self._deep_merge(config, loaded)
+        self._config = config
+
+        for key, value in self._pending.items():
+            self._assign(key, value)
+
+        self._rebuild_cache()
 
     def _deep_merge(self, default, loaded):
         """Глубокое слияние двух словарей (рекурсивное).
@@ -126,17 +209,191 @@ class ConfigManager(QObject):
             else:
                 default[key] = value
 
-    def _save_config(self):
-        """Сохраняет текущую конфигурацию в JSON-файл.
+    # === Кэш и доступ по ключу через точку ===
+
+    def _rebuild_cache(self):
+        """Перестраивает плоский кэш: все узлы конфигурации по ключам через точку."""
+        flat = {}
+
+        def walk(prefix, node):
+            for key, value in node.items():
+                path = f"{prefix}.{key}" if prefix else key
+                flat[path] = value
+                if isinstance(value, dict):
+                    walk(path, value)
+
+        walk("", self._config)
+        self._flat = flat
+
+    def get(self, key: str, default=None):
+        """Возвращает значение настройки по ключу через точку.
+
+        Args:
+            key (str): Ключ, например "vat_rate" или "security.password_hash_iterations".
+            default: Значение, если ключ не найден.
+
+        Returns:
+            Любое: Значение настройки (вложенные разделы — словарём).
+        """
+        return self._flat.get(key, default)
+
+    def _assign(self, key: str, value):
+        """Записывает значение в словарь конфигурации по ключу через точку."""
+        *parents, name = key.split(".")
+        node = self._config
+        for part in parents:
+            child = node.get(part)
+            if not isinstance(child, dict):
+                child = node[part] = {}
+            node = child
+        node[name] = value
+
+    def _set(self, key: str, value) -> bool:
+        """Изменяет настройку и планирует отложенную запись.
+
+        Args:
+            key (str): Ключ через точку.
+            value: Новое значение.
+
+        Returns:
+            bool: True если значение изменилось.
+        """
+        old = self._flat.get(key)
+        if key in self._flat and old == value:
+            return False
+
+        self._assign(key, value)
+        if isinstance(old, dict) or isinstance(value, dict) or "." in key:
+            self._rebuild_cache()
+        else:
+            self._flat[key] = value
+
+        self._pending[key] = value
+        self._save_timer.start()
+        return True
+
+    # === Запись в файл ===
+
+    @Slot()
+    def flush(self):
+        """Немедленно записывает отложенные изменения (вызывается при выходе)."""
+        self._save_timer.stop()
+        if self._pending:
+            self._write_file()
+
+    def _write_file(self) -> bool:
+        """Атомарно сохраняет конфигурацию в JSON-файл.
 
+        Данные пишутся во временный файл рядом с config.json и заменяют его
+        через os.replace — при сбое файл остаётся целым (старым или новым).
         Использует читаемый формат (indent=4, ensure_ascii=False).
+
+        Returns:
+            bool: True при успешной записи.
         """
+        data = json.dumps(self._config, indent=4, ensure_ascii=False).encode("utf-8")
+        tmp_path = f"{self._config_path}.tmp"
+
         try:
-            with open(self._config_path, 'w', encoding='utf-8') as f:
-                json.dump(self._config, f, indent=4, ensure_ascii=False)
-            print(f"DEBUG: Config saved to {self._config_path}")
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self._config_path)
         except Exception as e:
             print(f"ERROR: Failed to save config: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return False
+
+        self._pending.clear()
+        # Собственная запись не должна вызывать перечитывание
+        self._file_hash = hashlib.sha256(data).hexdigest()
+        self._file_state = self._stat_file()
+        # os.replace подменяет файл — наблюдение нужно восстановить
+        if hasattr(self, "_watcher"):
+            self._watch_file()
+
+        print(f"DEBUG: Config saved to {self._config_path}")
+        return True
+
+    # === Отслеживание изменений файла ===
+
+    def _stat_file(self) -> Optional[Tuple[int, int]]:
+        """(mtime_ns, size) файла конфигурации или None, если файла нет."""
+        try:
+            stat = os.stat(self._config_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read_file(self) -> bytes:
+        """Читает файл конфигурации и запоминает его состояние."""
+        self._file_state = self._stat_file()
+        with open(self._config_path, "rb") as f:
+            return f.read()
+
+    def _watch_file(self):
+        """Добавляет файл в QFileSystemWatcher (после замены файла он выпадает из наблюдения)."""
+        if os.path.exists(self._config_path) and self._config_path not in self._watcher.files():
+            self._watcher.addPath(self._config_path)
+
+    def _on_file_changed(self, path: str):
+        """Файл изменён извне — перечитываем после короткой паузы."""
+        self._reload_timer.start()
+
+    def _reload_if_changed(self) -> bool:
+        """Перечитывает конфигурацию, если файл действительно изменился.
+
+        Сначала сравниваются время изменения и размер, затем хэш содержимого:
+        собственная запись и сохранение без изменений перечитывания не вызывают.
+
+        Returns:
+            bool: True если конфигурация перечитана.
+        """
+        self._watch_file()
+
+        state = self._stat_file()
+        if state is None or state == self._file_state:
+            return False
+
+        try:
+            data = self._read_file()
+        except OSError as e:
+            print(f"ERROR: Failed to read config: {e}")
+            return False
+
+        file_hash = hashlib.sha256(data).hexdigest()
+        if file_hash == self._file_hash:
+            return False
+
+        try:
+            loaded = json.loads(data.decode("utf-8"))
+        except Exception as e:
+            # Файл может быть сохранён редактором не полностью — ждём следующего изменения
+            print(f"ERROR: Failed to reload config: {e}")
+            return False
+
+        self._file_hash = file_hash
+
+        vat_included = self._get_vat_included()
+        vat_rate = self._get_vat_rate()
+        currency = self._get_default_currency()
+
+        self._apply_loaded(loaded)
+
+        if self._get_vat_included() != vat_included:
+            self.vatIncludedChanged.emit(self._get_vat_included())
+        if self._get_vat_rate() != vat_rate:
+            self.vatRateChanged.emit(self._get_vat_rate())
+        if self._get_default_currency() != currency:
+            self.defaultCurrencyChanged.emit(self._get_default_currency())
+
+        print(f"DEBUG: Config reloaded from {self._config_path}")
+        self.configReloaded.emit()
+        return True
 
     # VAT Included Property
     def _get_vat_included(self):
@@ -145,7 +402,7 @@ class ConfigManager(QObject):
         Returns:
             bool: True, если НДС включён в отображаемые цены.
         """
-        return self._config.get("vat_included", True)
+        return self._flat.get("vat_included", True)
 
     def _set_vat_included(self, value: object) -> None:
         """Устанавливает флаг включения НДС и сохраняет конфигурацию.
@@ -153,9 +410,7 @@ class ConfigManager(QObject):
         Args:
             value (bool): Новое значение флага.
         """
-        if self._config.get("vat_included") != value:
-            self._config["vat_included"] = value
-            self._save_config()
+        if self._set("vat_included", value):
             self.vatIncludedChanged.emit(value)
             print(f"DEBUG: VAT included set to {value}")
 
@@ -169,7 +424,7 @@ class ConfigManager(QObject):
         Returns:
             float: Ставка НДС в процентах (например, 20.0).
         """
-        return self._config.get("vat_rate", 20.0)
+        return self._flat.get("vat_rate", 20.0)
 
     def _set_vat_rate(self, value):
         """Устанавливает новую ставку НДС и сохраняет конфигурацию.
@@ -177,9 +432,7 @@ class ConfigManager(QObject):
         Args:
             value (float): Новая ставка НДС в процентах.
         """
-        if self._config.get("vat_rate") != value:
-            self._config["vat_rate"] = value
-            self._save_config()
+        if self._set("vat_rate", value):
             self.vatRateChanged.emit(value)
             print(f"DEBUG: VAT rate set to {value}%")
 
@@ -193,7 +446,7 @@ class ConfigManager(QObject):
         Returns:
             str: Код валюты (например, "RUB", "USD", "EUR").
         """
-        return self._config.get("default_currency", "RUB")
+        return self._flat.get("default_currency", "RUB")
 
     def _set_default_currency(self, value):
         """Устанавливает валюту по умолчанию и сохраняет конфигурацию.
@@ -201,9 +454,7 @@ class ConfigManager(QObject):
         Args:
             value (str): Новый код валюты.
         """
-        if self._config.get("default_currency") != value:
-            self._config["default_currency"] = value
-            self._save_config()
+        if self._set("default_currency", value):
             self.defaultCurrencyChanged.emit(value)
             print(f"DEBUG: Default currency set to {value}")
 
@@ -220,7 +471,7 @@ class ConfigManager(QObject):
         Returns:
             str: Имя корневой директории (например, "files").
         """
-        return self._config.get("file_storage", {}).get("root_directory", "files")
+        return self.get("file_storage.root_directory", "files")
 
     @Slot(result=str)
     def getImagesDirectory(self):
@@ -229,7 +480,7 @@ class ConfigManager(QObject):
         Returns:
             str: Имя директории изображений (например, "images").
         """
-        return self._config.get("file_storage", {}).get("images", {}).get("directory", "images")
+        return self.get("file_storage.images.directory", "images")
 
     @Slot(result=str)
     def getDocumentsDirectory(self):
@@ -238,7 +489,7 @@ class ConfigManager(QObject):
         Returns:
             str: Имя директории документов (например, "documents").
         """
-        return self._config.get("file_storage", {}).get("documents", {}).get("directory", "documents")
+        return self.get("file_storage.documents.directory", "documents")
 
     @Slot(result="QVariantList")
     def getImageSubdirectories(self):
@@ -247,7 +498,7 @@ class ConfigManager(QObject):
         Returns:
             list: Список словарей с ключами 'name' и 'display_name'.
         """
-        subdirs = self._config.get("file_storage", {}).get("images", {}).get("subdirectories", {})
+        subdirs = self.get("file_storage.images.subdirectories", {})
         result = []
         for key, value in subdirs.items():
             result.append({
@@ -264,7 +515,7 @@ class ConfigManager(QObject):
         Returns:
             list: Список словарей с ключами 'name' и 'display_name'.
         """
-        subdirs = self._config.get("file_storage", {}).get("documents", {}).get("subdirectories", {})
+        subdirs = self.get("file_storage.documents.subdirectories", {})
         result = []
         for key, value in subdirs.items():
             result.append({
@@ -284,7 +535,7 @@ class ConfigManager(QObject):
         Returns:
             str: Отображаемое имя или сам ID, если не найдено.
         """
-        subdirs = self._config.get("file_storage", {}).get("images", {}).get("subdirectories", {})
+        subdirs = self.get("file_storage.images.subdirectories", {})
         return subdirs.get(subdir_id, {}).get("display_name", subdir_id.capitalize())
 
     @Slot(str, result=str)
@@ -297,7 +548,7 @@ class ConfigManager(QObject):
         Returns:
             str: Отображаемое имя или сам ID, если не найдено.
         """
-        subdirs = self._config.get("file_storage", {}).get("documents", {}).get("subdirectories", {})
+        subdirs = self.get("file_storage.documents.subdirectories", {})
         return subdirs.get(subdir_id, {}).get("display_name", subdir_id.capitalize())
 
     def get_file_storage_config(self):
@@ -306,7 +557,7 @@ class ConfigManager(QObject):
         Returns:
             dict: Словарь с настройками файлового хранилища.
         """
-        return self._config.get("file_storage", {})
+        return self.get("file_storage", {})
 
     # Существующие Slot методы для QML
     @Slot(str, result="QVariant")
@@ -314,24 +565,23 @@ class ConfigManager(QObject):
         """Возвращает значение настройки по ключу.
 
         Args:
-            key (str): Имя параметра конфигурации.
+            key (str): Имя параметра конфигурации; вложенные — через точку
+                ("security.password_hash_iterations").
 
         Returns:
             Любое: Значение параметра или None, если ключ не найден.
         """
-        return self._config.get(key)
+        return self._flat.get(key)
 
     @Slot(str, "QVariant")
     def setSetting(self, key, value):
-        """Устанавливает значение настройки по ключу и сохраняет конфигурацию.
+        """Устанавливает значение настройки по ключу; запись в файл — отложенная.
 
         Args:
-            key (str): Имя параметра.
+            key (str): Имя параметра; вложенные — через точку.
             value (Any): Новое значение параметра.
         """
-        if self._config.get(key) != value:
-            self._config[key] = value
-            self._save_config()
+        if self._set(key, value):
             print(f"DEBUG: Setting '{key}' set to {value}")
 
     @Slot(float, result=float)
@@ -366,47 +616,27 @@ class ConfigManager(QObject):
     def resetToDefaults(self):
         """Сбрасывает все настройки к значениям по умолчанию.
 
-        Перезаписывает конфигурацию и испускает все сигналы изменения.
+        Перезаписывает конфигурацию (сразу, без задержки) и испускает все сигналы изменения.
         """
+        self._save_timer.stop()
+        self._pending.clear()
         self._config = self._load_default_config()
-        self._save_config()
+        self._rebuild_cache()
+        self._write_file()
         # Emit all change signals
-        self.vatIncludedChanged.emit(self._config["vat_included"])
-        self.vatRateChanged.emit(self._config["vat_rate"])
-        self.defaultCurrencyChanged.emit(self._config["default_currency"])
+        self.vatIncludedChanged.emit(self._get_vat_included())
+        self.vatRateChanged.emit(self._get_vat_rate())
+        self.defaultCurrencyChanged.emit(self._get_default_currency())
         print("DEBUG: Configuration reset to defaults")
 
-    @Slot()
+    @Slot(result=bool)
     def reloadConfig(self):
-        """Перезагружает конфигурацию из файла"""
-        try:
-            print("=== ConfigManager: Reloading config from file ===")
-
-            if os.path.exists(self._config_path):
-                with open(self._config_path, 'r', encoding='utf-8') as f:
-                    loaded_config = json.load(f)
+        """Перечитывает конфигурацию из файла, если он изменился.
 
-                # Сбрасываем на defaults, затем применяем загруженные настройки
-                self._config = self._load_default_config()
-                self._deep_merge(self._config, loaded_config)
+        Обычно изменения уже подхвачены QFileSystemWatcher; вызов из QML
+        при открытии диалогов без изменений файла стоит один os.stat.
 
-                print("Config reloaded successfully")
-
-                # Выводим количество подкатегорий
-                img_subdirs = self.getImageSubdirectories()
-                doc_subdirs = self.getDocumentSubdirectories()
-                print(f"Images subdirectories: {len(img_subdirs)}")
-                print(f"Documents subdirectories: {len(doc_subdirs)}")
-
-                # Испускаем сигналы об изменениях
-                self.vatIncludedChanged.emit(self._config["vat_included"])
-                self.vatRateChanged.emit(self._config["vat_rate"])
-                self.defaultCurrencyChanged.emit(self._config["default_currency"])
-
-            else:
-                print(f"ERROR: Config file not found: {self._config_path}")
-
-        except Exception as e:
-            print(f"ERROR: Failed to reload config: {e}")
-            import traceback
-            traceback.print_exc()
\ No newline at end of file
+        Returns:
+            bool: True если конфигурация перечитана.
+        """
+        return self._reload_if_changed()
@@ -0,0 +1,402 @@
+"""Резервное копирование баз данных SQLite
+
+Копия снимается из работающей базы через sqlite3.Connection.backup
+порциями по pages_per_step страниц. Между порциями блокировка файла
+отпускается и поток засыпает на step_pause_ms, поэтому запись в базу
+приложением задерживается не дольше, чем на копирование одной порции.
+В режиме WAL источник копируется внутри одной читающей транзакции:
+запись не блокируется, а копия соответствует моменту начала. В режиме
+журнала отката SQLite начинает копирование заново после каждой чужой
+записи; если перезапусков больше max_restarts, копия снимается одним
+шагом (запись ждёт его завершения).
+
+Готовая копия проверяется PRAGMA integrity_check, сжимается gzip и
+хранится в папке резервных копий; старые копии удаляются (ротация).
+Восстановление — одним вызовом restore(): архив распаковывается,
+проверяется и записывается поверх базы тем же backup API.
+
+Модуль не зависит от Qt и может запускаться из командной строки:
+
+    python database_backup.py backup --db items.db --db users.db
+    python database_backup.py verify backups/items_20250101_120000.db.gz
+    python database_backup.py restore backups/items_20250101_120000.db.gz --db items.db
+"""
+
+import gzip
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+# Страниц за шаг: при странице 4 КБ — 1 МБ, единицы миллисекунд блокировки
+DEFAULT_PAGES_PER_STEP = 256
+
+# Пауза между шагами: запись приложения успевает пройти между порциями
+DEFAULT_STEP_PAUSE_MS = 10
+
+# Перезапусков из-за чужой записи (не WAL) до копирования одним шагом
+DEFAULT_MAX_RESTARTS = 3
+
+# Сколько копий каждой базы хранить
+DEFAULT_KEEP = 7
+
+ARCHIVE_SUFFIX = ".db.gz"
+_COPY_BUFFER = 1024 * 1024
+
+
+class BackupCancelled(Exception):
+    """Резервное копирование отменено."""
+
+
+class _Restarted(Exception):
+    """Копирование перезапускалось слишком часто."""
+
+
+class DatabaseBackup:
+    """
+    Резервные копии баз данных SQLite с ротацией.
+
+    Имя архива: <имя базы>_<ГГГГММДД_ЧЧММСС>.db.gz, например
+    items_20250101_120000.db.gz.
+
+    Attributes:
+        backup_dir: Папка резервных копий.
+        keep: Количество хранимых копий каждой базы.
+        pages_per_step: Страниц за один шаг копирования.
+        step_pause_ms: Пауза между шагами, мс.
+        max_restarts: Перезапусков копирования до копирования одним шагом.
+    """
+
+    def __init__(
+            self,
+            backup_dir: str,
+            keep: int = DEFAULT_KEEP,
+            pages_per_step: int = DEFAULT_PAGES_PER_STEP,
+            step_pause_ms: float = DEFAULT_STEP_PAUSE_MS,
+            max_restarts: int = DEFAULT_MAX_RESTARTS
+    ):
+        """
+        Инициализирует резервное копирование.
+
+        Args:
+            backup_dir: Папка резервных копий (создаётся при необходимости).
+            keep: Количество хранимых копий каждой базы (0 — без ротации).
+            pages_per_step: Страниц за один шаг копирования.
+            step_pause_ms: Пауза между шагами, мс.
+            max_restarts: Перезапусков из-за чужой записи до копирования одним шагом.
+        """
+        self.backup_dir = Path(backup_dir)
+        self.keep = keep
+        self.pages_per_step = max(1, pages_per_step)
+        self.step_pause_ms = max(0.0, step_pause_ms)
+        self.max_restarts = max(0, max_restarts)
+
+    # === Резервное копирование ===
+
+    def backup(
+            self,
+            db_path: str,
+            name: Optional[str] = None,
+            progress: Optional[Callable[[int, int], None]] = None,
+            cancel_event: Optional[threading.Event] = None
+    ) -> str:
+        """
+        Создаёт проверенную сжатую копию работающей базы.
+
+        Args:
+            db_path: Путь к файлу базы данных.
+            name: Имя базы в имени архива (по умолчанию — имя файла без расширения).
+            progress: Вызывается после каждого шага: (скопировано страниц, всего).
+            cancel_event: Событие отмены.
+
+        Returns:
+            str: Путь к созданному архиву.
+
+        Raises:
+            BackupCancelled: Если копирование отменено.
+            sqlite3.DatabaseError: Если копия не прошла проверку целостности.
+        """
+        name = name or Path(db_path).stem
+        self.backup_dir.mkdir(parents=True, exist_ok=True)
+        archive = self._new_archive_path(name)
+        temp_path = archive.with_name(f".{archive.name}.tmp")
+        pause = self.step_pause_ms / 1000
+        copied = [0]
+        restarts = [0]
+
+        def on_step(status, remaining, total):
+            if cancel_event is not None and cancel_event.is_set():
+                raise BackupCancelled(f"Backup of {name} cancelled")
+            done = total - remaining
+            if done < copied[0]:
+                restarts[0] += 1
+                if restarts[0] > self.max_restarts:
+                    raise _Restarted()
+            copied[0] = done
+            if progress:
+                progress(done, total)
+            # Блокировка источника отпущена до следующего шага
+            if remaining and pause:
+                time.sleep(pause)
+
+        started = time.perf_counter()
+        try:
+            source = sqlite3.connect(f"{Path(db_path).resolve().as_uri()}?mode=ro", uri=True,
+                                     isolation_level=None)
+            target = sqlite3.connect(temp_path)
+            try:
+                if source.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal":
+                    # Снимок WAL на всё время копирования: без перезапусков и без блокировки записи
+                    source.execute("BEGIN")
+                    source.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+                try:
+                    source.backup(target, pages=self.pages_per_step, progress=on_step)
+                except _Restarted:
+                    logger.warning(
+                        f"⚠️ Backup of {name} restarted {restarts[0]} times by concurrent writes, "
+                        f"copying in one step"
+                    )
+                    source.backup(target)
+                if source.in_transaction:
+                    source.execute("COMMIT")
+                self._check_integrity(target)
+            finally:
+                target.close()
+                source.close()
+
+            self._compress(temp_path, archive)
+        except BaseException:
+            archive.unlink(missing_ok=True)
+            raise
+        finally:
+            temp_path.unlink(missing_ok=True)
+
+        logger.info(
+            f"💾 Backup created: {archive} "
+            f"({archive.stat().st_size / 1024 / 1024:.1f} MB, {time.perf_counter() - started:.1f} s)"
+        )
+        self.rotate(name)
+        return str(archive)
+
+    def rotate(self, name: str) -> List[str]:
+        """
+        Удаляет старые копии базы сверх keep.
+
+        Returns:
+            List[str]: Пути удалённых архивов.
+        """
+        if self.keep <= 0:
+            return []
+
+        removed = []
+        for entry in self.list_backups(name)[self.keep:]:
+            try:
+                os.remove(entry["path"])
+                removed.append(entry["path"])
+            except OSError as e:
+                logger.warning(f"⚠️ Failed to remove old backup {entry['path']}: {e}")
+
+        if removed:
+            logger.info(f"🗑️ Removed {len(removed)} old backup(s) of {name}")
+        return removed
+
+    def list_backups(self, name: Optional[str] = None) -> List[Dict]:
+        """
+        Список резервных копий, новые первыми.
+
+        Args:
+            name: Имя базы (None — все базы).
+
+        Returns:
+            List[Dict]: name, path, size, created (ISO).
+        """
+        if not self.backup_dir.is_dir():
+            return []
+
+        entries = []
+        for path in self.backup_dir.glob(f"{name or '*'}_*{ARCHIVE_SUFFIX}"):
+            db_name, stamp = self._parse_archive_name(path)
+            if db_name is None or (name and db_name != name):
+                continue
+            entries.append({
+                "name": db_name,
+                "path": str(path),
+                "size": path.stat().st_size,
+                "created": stamp.isoformat(),
+            })
+
+        entries.sort(key=lambda entry: (entry["created"], entry["path"]), reverse=True)
+        return entries
+
+    # === Проверка и восстановление ===
+
+    def verify(self, archive_path: str) -> Tuple[bool, str]:
+        """
+        Проверяет архив: распаковка и PRAGMA integrity_check.
+
+        Returns:
+            Tuple[bool, str]: (исправен, результат проверки или текст ошибки).
+        """
+        temp_path = self._temp_path_for(archive_path, "verify")
+        try:
+            self._decompress(Path(archive_path), temp_path)
+            conn = sqlite3.connect(temp_path)
+            try:
+                self._check_integrity(conn)
+            finally:
+                conn.close()
+            return True, "ok"
+        except (OSError, EOFError, sqlite3.Error) as e:
+            return False, str(e)
+        finally:
+            temp_path.unlink(missing_ok=True)
+
+    def restore(self, archive_path: str, db_path: str, keep_current: bool = True) -> Optional[str]:
+        """
+        Восстанавливает базу из архива.
+
+        Архив распаковывается и проверяется до изменения базы. Запись
+        выполняется через backup API, поэтому открытые соединения
+        приложения увидят новые данные (их кэши сбрасываются SQLite).
+
+        Args:
+            archive_path: Путь к архиву.
+            db_path: Путь к восстанавливаемой базе.
+            keep_current: Сначала сохранить копию текущей базы.
+
+        Returns:
+            Optional[str]: Путь к копии текущей базы (если keep_current).
+
+        Raises:
+            sqlite3.DatabaseError: Если архив повреждён или база занята.
+        """
+        archive = Path(archive_path)
+        current_copy = None
+        temp_path = self._temp_path_for(archive_path, "restore")
+        try:
+            self._decompress(archive, temp_path)
+            source = sqlite3.connect(temp_path)
+            try:
+                self._check_integrity(source)
+
+                # После распаковки: ротация может удалить сам восстанавливаемый архив
+                if keep_current and Path(db_path).exists():
+                    name = self._parse_archive_name(archive)[0] or Path(db_path).stem
+                    current_copy = self.backup(db_path, name)
+
+                target = sqlite3.connect(db_path, timeout=30)
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+            finally:
+                source.close()
+        finally:
+            temp_path.unlink(missing_ok=True)
+
+        logger.success(f"♻️ Database {db_path} restored from {archive}")
+        return current_copy
+
+    # === Вспомогательные ===
+
+    @staticmethod
+    def _check_integrity(conn: sqlite3.Connection):
+        """PRAGMA integrity_check; при ошибках — sqlite3.DatabaseError с их списком."""
+        problems = [row[0] for row in conn.execute("PRAGMA integrity_check").fetchall()]
+        if problems != ["ok"]:
+            raise sqlite3.DatabaseError("integrity_check failed: " + "; ".join(problems[:10]))
+
+    def _new_archive_path(self, name: str) -> Path:
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        archive = self.backup_dir / f"{name}_{stamp}{ARCHIVE_SUFFIX}"
+        counter = 1
+        while archive.exists():
+            archive = self.backup_dir / f"{name}_{stamp}-{counter}{ARCHIVE_SUFFIX}"
+            counter += 1
+        return archive
+
+    @staticmethod
+    def _parse_archive_name(path: Path) -> Tuple[Optional[str], Optional[datetime]]:
+        """Имя базы и время создания из имени архива (None, None — чужой файл)."""
+        stem = path.name[:-len(ARCHIVE_SUFFIX)]
+        parts = stem.rsplit("_", 2)
+        if len(parts) != 3:
+            return None, None
+        try:
+            return parts[0], datetime.strptime(f"{parts[1]}_{parts[2].split('-')[0]}", "%Y%m%d_%H%M%S")
+        except ValueError:
+            return None, None
+
+    def _temp_path_for(self, archive_path: str, purpose: str) -> Path:
+        self.backup_dir.mkdir(parents=True, exist_ok=True)
+        return self.backup_dir / f".{Path(archive_path).name}.{purpose}.{os.getpid()}.tmp"
+
+    @staticmethod
+    def _compress(source: Path, archive: Path):
+        """Сжимает файл; архив появляется под своим именем только целиком."""
+        partial = archive.with_name(archive.name + ".part")
+        try:
+            with open(source, "rb") as src, gzip.open(partial, "wb", compresslevel=6) as dst:
+                shutil.copyfileobj(src, dst, _COPY_BUFFER)
+            os.replace(partial, archive)
+        finally:
+            partial.unlink(missing_ok=True)
+
+    @staticmethod
+    def _decompress(archive: Path, target: Path):
+        with gzip.open(archive, "rb") as src, open(target, "wb") as dst:
+            shutil.copyfileobj(src, dst, _COPY_BUFFER)
+
+
+def main(argv=None) -> int:
+    """Точка входа командной строки. Код возврата 1 при ошибке проверки."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Резервное копирование баз данных")
+    parser.add_argument("--dir", default=str(Path(__file__).parent / "backups"), help="Папка резервных копий")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    backup_parser = commands.add_parser("backup", help="Создать резервные копии")
+    backup_parser.add_argument("--db", action="append", default=None, help="База данных (можно несколько)")
+    backup_parser.add_argument("--keep", type=int, default=DEFAULT_KEEP, help="Сколько копий хранить")
+    backup_parser.add_argument("--pages", type=int, default=DEFAULT_PAGES_PER_STEP, help="Страниц за шаг")
+    backup_parser.add_argument("--pause-ms", type=float, default=DEFAULT_STEP_PAUSE_MS, help="Пауза между шагами")
+
+    verify_parser = commands.add_parser("verify", help="Проверить архив")
+    verify_parser.add_argument("archive")
+
+    restore_parser = commands.add_parser("restore", help="Восстановить базу из архива")
+    restore_parser.add_argument("archive")
+    restore_parser.add_argument("--db", required=True, help="Восстанавливаемая база данных")
+
+    commands.add_parser("list", help="Список резервных копий")
+    args = parser.parse_args(argv)
+
+    if args.command == "backup":
+        backup = DatabaseBackup(args.dir, keep=args.keep, pages_per_step=args.pages, step_pause_ms=args.pause_ms)
+        for db_path in args.db or ["items.db", "users.db"]:
+            print(backup.backup(db_path))
+        return 0
+
+    backup = DatabaseBackup(args.dir)
+    if args.command == "verify":
+        ok, message = backup.verify(args.archive)
+        print(message)
+        return 0 if ok else 1
+    if args.command == "restore":
+        backup.restore(args.archive, args.db)
+        return 0
+
+    for entry in backup.list_backups():
+        print(f"{entry['created']}  {entry['size']:>12}  {entry['path']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,201 @@
+"""Фоновое резервное копирование баз данных
+
+Расположение: src/database_backup_manager.py
+"""
+
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from PySide6.QtCore import QObject, Signal, Slot, Property, QTimer
+
+from loguru import logger
+
+from database_backup import DatabaseBackup, BackupCancelled
+
+
+class DatabaseBackupManager(QObject):
+    """
+    Менеджер резервного копирования.
+
+    Копирование, проверка и восстановление (DatabaseBackup) выполняются
+    в отдельном потоке; одновременно — только одна операция. Копии
+    снимаются по таймеру или по запросу из QML.
+    """
+
+    # === Сигналы ===
+    backupProgress = Signal(str, int, int)       # база, скопировано страниц, всего
+    backupCreated = Signal(str, str)             # база, путь к архиву
+    backupFinished = Signal()
+    backupFailed = Signal(str)                   # текст ошибки
+    verificationFinished = Signal(str, bool, str)  # архив, исправен, результат
+    databaseRestored = Signal(str)               # база (в потоке GUI)
+    restoreFailed = Signal(str)                  # текст ошибки
+    runningChanged = Signal()
+
+    # Восстановление завершено в рабочем потоке → databaseRestored в потоке GUI
+    _restored = Signal(str)
+
+    # Константы
+    DEFAULT_INTERVAL_HOURS = 24
+
+    def __init__(self, databases: Dict[str, str], backup: DatabaseBackup, parent=None):
+        """
+        Инициализация менеджера.
+
+        Args:
+            databases: Имя базы → путь к файлу (например, {"items": "items.db"}).
+            backup: Настроенный DatabaseBackup.
+            parent: Родительский QObject.
+        """
+        super().__init__(parent)
+
+        self._databases = dict(databases)
+        self._backup = backup
+
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._cancel_event = threading.Event()
+
+        self._restored.connect(self._onRestored)
+
+        # Таймер периодического копирования
+        self._schedule_timer = QTimer(self)
+        self._schedule_timer.timeout.connect(self.startBackup)
+
+        logger.info(f"DatabaseBackupManager initialized: {self._backup.backup_dir}")
+
+    # === Properties для QML ===
+
+    @Property(bool, notify=runningChanged)
+    def running(self) -> bool:
+        """Выполняется ли операция с резервными копиями."""
+        return self._running
+
+    @Property(str, constant=True)
+    def backupDirectory(self) -> str:
+        """Папка резервных копий."""
+        return str(Path(self._backup.backup_dir).resolve())
+
+    # === Слоты ===
+
+    @Slot()
+    def startBackup(self):
+        """Создаёт резервные копии всех баз в фоновом потоке."""
+        self._start("database-backup", self._runBackup)
+
+    @Slot()
+    def cancelBackup(self):
+        """Запрашивает отмену текущего копирования."""
+        if self.running:
+            self._cancel_event.set()
+            logger.info("🛑 Database backup cancel requested")
+
+    @Slot(str)
+    def verifyBackup(self, archive_path: str):
+        """Проверяет архив в фоновом потоке (результат — verificationFinished)."""
+        self._start("database-backup-verify", self._runVerify, archive_path)
+
+    @Slot(str, str)
+    def restoreBackup(self, name: str, archive_path: str):
+        """
+        Восстанавливает базу из архива в фоновом потоке.
+
+        Args:
+            name: Имя базы (ключ databases).
+            archive_path: Путь к архиву.
+        """
+        if name not in self._databases:
+            self.restoreFailed.emit(f"Unknown database: {name}")
+            return
+        self._start("database-restore", self._runRestore, name, archive_path)
+
+    @Slot(result="QVariantList")
+    def listBackups(self):
+        """Список резервных копий, новые первыми (name, path, size, created)."""
+        return self._backup.list_backups()
+
+    @Slot(int)
+    def setSchedule(self, interval_hours: int):
+        """
+        Включает периодическое копирование.
+
+        Args:
+            interval_hours: Интервал в часах (0 — отключить).
+        """
+        if interval_hours <= 0:
+            self._schedule_timer.stop()
+            logger.info("Database backup schedule disabled")
+            return
+
+        self._schedule_timer.start(interval_hours * 60 * 60 * 1000)
+        logger.info(f"🕒 Database backup scheduled every {interval_hours} h")
+
+    @Slot()
+    def shutdown(self):
+        """Останавливает таймер и отменяет текущее копирование."""
+        self._schedule_timer.stop()
+        self.cancelBackup()
+
+    # === Фоновый поток ===
+
+    def _start(self, thread_name: str, target, *args) -> bool:
+        if self.running:
+            logger.warning("⚠️ Database backup operation is already running")
+            return False
+
+        self._cancel_event.clear()
+        self._running = True
+        self._thread = threading.Thread(target=self._runGuarded, args=(target, *args),
+                                        name=thread_name, daemon=True)
+        self._thread.start()
+        self.runningChanged.emit()
+        return True
+
+    def _runGuarded(self, target, *args):
+        try:
+            target(*args)
+        finally:
+            self._running = False
+            self.runningChanged.emit()
+
+    def _runBackup(self):
+        """Тело фонового потока: копии всех баз."""
+        try:
+            for name, db_path in self._databases.items():
+                archive = self._backup.backup(
+                    db_path,
+                    name,
+                    progress=lambda done, total, name=name: self.backupProgress.emit(name, done, total),
+                    cancel_event=self._cancel_event
+                )
+                self.backupCreated.emit(name, archive)
+            self.backupFinished.emit()
+
+        except BackupCancelled as e:
+            logger.info(f"🛑 {e}")
+            self.backupFailed.emit(str(e))
+
+        except Exception as e:
+            logger.exception("❌ Database backup failed")
+            self.backupFailed.emit(str(e))
+
+    def _runVerify(self, archive_path: str):
+        ok, message = self._backup.verify(archive_path)
+        if ok:
+            logger.info(f"✅ Backup verified: {archive_path}")
+        else:
+            logger.error(f"❌ Backup verification failed: {archive_path}: {message}")
+        self.verificationFinished.emit(archive_path, ok, message)
+
+    def _runRestore(self, name: str, archive_path: str):
+        try:
+            self._backup.restore(archive_path, self._databases[name])
+            self._restored.emit(name)
+        except Exception as e:
+            logger.exception(f"❌ Restore of {name} from {archive_path} failed")
+            self.restoreFailed.emit(str(e))
+
+    @Slot(str)
+    def _onRestored(self, name: str):
+        self.databaseRestored.emit(name)
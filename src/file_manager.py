@@ -9,11 +9,36 @@ FileManager - Централизованный менеджер для рабо
 import os
 import shutil
 import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Dict, List
 from PySide6.QtCore import QObject, Signal, Slot, Property, QUrl
 import json
 
+from models.dto import FileFingerprint
+from utils.file_hashing import quick_fingerprint
+
+class _DirectoryIndex:
+    """
+    Файлы директории хранилища по размеру — для поиска дубликатов без
+    повторного обхода директории при каждом копировании.
+
+    Строится один раз на пакет копирований и пополняется по мере
+    копирования; в by_size попадают только полностью скопированные файлы.
+    """
+
+    def __init__(self, directory: Path):
+        self.lock = threading.Lock()
+        self.by_size: Dict[int, List[Path]] = {}
+        # Размер → события окончания идущих копирований файлов этого размера
+        self.copying: Dict[int, List[threading.Event]] = {}
+
+        for existing_file in directory.iterdir():
+            if existing_file.is_file():
+                self.by_size.setdefault(existing_file.stat().st_size, []).append(existing_file)
+
+
 class FileManager(QObject):
     """Менеджер для работы с файлами и директориями приложения."""
 
@@ -21,17 +46,29 @@ class FileManager(QObject):
     fileError = Signal(str)
     fileOperationSuccess = Signal(str)
 
-    def __init__(self, config_manager, base_path: Optional[str] = None):
+    # Файл контрольной точки миграции старых путей (в корне files)
+    MIGRATION_CHECKPOINT_FILE = ".migration_checkpoint.json"
+
+    def __init__(self, config_manager, base_path: Optional[str] = None, digests_repository=None):
         """
         Инициализирует FileManager.
 
         Args:
             config_manager: Экземпляр ConfigManager для чтения настроек структуры.
             base_path: Базовый путь к папке src. Если None, использует текущую директорию.
+            digests_repository: FileDigestsRepository для хранения отпечатков файлов.
+                Если None, отпечатки кэшируются только в памяти.
         """
         super().__init__()
 
         self._config_manager = config_manager
+        self._storage_lock = threading.Lock()
+
+        # Кэш отпечатков файлов хранилища для поиска дубликатов
+        self._digests_repository = digests_repository
+        self._fingerprint_lock = threading.Lock()
+        self._fingerprints: Optional[Dict[str, FileFingerprint]] = None
+        self._dirty_fingerprints: Dict[str, FileFingerprint] = {}
 
         if base_path is None:
             self._base_path = Path(__file__).parent.resolve()
@@ -40,6 +77,7 @@ class FileManager(QObject):
 
         # Получаем настройки из ConfigManager
         self._load_structure_from_config()
+        config_manager.configReloaded.connect(self._on_config_reloaded)
 
         # Создаем структуру директорий
         self._ensure_directory_structure()
@@ -109,32 +147,112 @@ class FileManager(QObject):
                 sha256_hash.update(chunk)
         return sha256_hash.hexdigest()
 
-    def _find_duplicate_file(self, source_path: Path, target_dir: Path) -> Optional[Path]:
+    def _get_fingerprint(self, file_path: Path, stat: os.stat_result, need_sha: bool) -> FileFingerprint:
         """
-        Ищет файл с таким же содержимым в целевой директории.
+        Возвращает отпечатки файла, по возможности без чтения с диска.
+
+        Отпечаток из кэша (память или таблица file_fingerprints) считается
+        действительным, если совпадают размер и mtime файла. Недостающие
+        значения вычисляются и помечаются для сохранения в БД.
+
+        Args:
+            file_path: Путь к файлу в хранилище.
+            stat: Результат stat() файла.
+            need_sha: Нужен ли полный SHA-256.
+
+        Returns:
+            FileFingerprint с быстрым отпечатком (и SHA-256, если need_sha).
+        """
+        try:
+            key = self._to_relative(file_path.resolve())
+        except ValueError:
+            key = file_path.resolve().as_posix()
+
+        with self._fingerprint_lock:
+            if self._fingerprints is None:
+                self._fingerprints = (
+                    self._digests_repository.get_fingerprints() if self._digests_repository else {}
+                )
+            cached = self._fingerprints.get(key)
+
+        if cached is None or cached.size != stat.st_size or cached.mtime_ns != stat.st_mtime_ns:
+            cached = FileFingerprint(
+                path=key,
+                size=stat.st_size,
+                mtime_ns=stat.st_mtime_ns,
+                quick_hash=quick_fingerprint(str(file_path), stat.st_size)
+            )
+        elif not need_sha or cached.sha256:
+            return cached
+
+        if need_sha and not cached.sha256:
+            cached.sha256 = self._calculate_file_hash(file_path)
+
+        with self._fingerprint_lock:
+            self._fingerprints[key] = cached
+            self._dirty_fingerprints[key] = cached
+
+        return cached
+
+    def _flush_fingerprints(self):
+        """Сохраняет новые отпечатки в БД (если подключён репозиторий)."""
+        with self._fingerprint_lock:
+            dirty = list(self._dirty_fingerprints.values())
+            self._dirty_fingerprints.clear()
+
+        if dirty and self._digests_repository:
+            self._digests_repository.upsert_fingerprints(dirty)
+
+    def _find_duplicate_file(self, source_path: Path, source_size: int,
+                             candidates: List[Path]) -> Optional[Path]:
+        """
+        Ищет среди файлов того же размера файл с таким же содержимым.
+
+        Сравнение поэтапное, каждый этап отсеивает кандидатов до следующего:
+        1. Размер (кандидаты берутся из индекса директории по размеру).
+        2. Быстрый отпечаток (начало/середина/конец по 64 KB).
+        3. Полный SHA-256.
+        Отпечатки файлов хранилища кэшируются по (размер, mtime), поэтому
+        повторные сравнения не читают существующие файлы.
 
         Args:
             source_path: Путь к исходному файлу.
-            target_dir: Целевая директория для поиска.
+            source_size: Размер исходного файла.
+            candidates: Файлы директории хранилища с тем же размером.
 
         Returns:
             Path к найденному дубликату или None, если дубликат не найден.
         """
         try:
-            # Вычисляем хеш исходного файла
+            # Этап 1: файл мог измениться или быть удалён после построения индекса
+            sized = []
+            for existing_file in candidates:
+                try:
+                    stat = existing_file.stat()
+                except OSError:
+                    continue
+                if stat.st_size == source_size:
+                    sized.append((existing_file, stat))
+
+            if not sized:
+                return None
+
+            # Этап 2: быстрый отпечаток
+            source_quick = quick_fingerprint(str(source_path), source_size)
+            sized = [
+                (existing_file, stat) for existing_file, stat in sized
+                if self._get_fingerprint(existing_file, stat, need_sha=False).quick_hash == source_quick
+            ]
+
+            if not sized:
+                return None
+
+            # Этап 3: полный SHA-256
             source_hash = self._calculate_file_hash(source_path)
-            source_size = source_path.stat().st_size
-
-            # Проверяем все файлы в целевой директории
-            for existing_file in target_dir.iterdir():
-                if existing_file.is_file():
-                    # Быстрая проверка по размеру
-                    if existing_file.stat().st_size == source_size:
-                        # Если размер совпадает, проверяем хеш
-                        existing_hash = self._calculate_file_hash(existing_file)
-                        if existing_hash == source_hash:
-                            print(f"DEBUG: Found duplicate file: {existing_file.name}")
-                            return existing_file
+            for existing_file, stat in sized:
+                if self._get_fingerprint(existing_file, stat, need_sha=True).sha256 == source_hash:
+                    print(f"DEBUG: Found duplicate file: {existing_file.name}")
+                    return existing_file
 
             return None
 
@@ -142,6 +260,84 @@ class FileManager(QObject):
             print(f"DEBUG: Error checking for duplicates: {str(e)}")
             return None
 
+    def _store_file(self, source: Path, dest_dir: Path,
+                    index: Optional[_DirectoryIndex] = None) -> Tuple[Path, bool]:
+        """
+        Копирует файл в директорию хранилища без дубликатов.
+
+        Безопасен для вызова из нескольких потоков с общим индексом
+        директории: поиск дубликата и резервирование имени выполняются под
+        блокировкой индекса, а само копирование — без неё. Пока в директорию
+        копируется файл того же размера, поток дожидается окончания
+        копирования и ищет дубликат заново: недокопированный файл не
+        принимается за дубликат, а одинаковые файлы не копируются дважды.
+
+        Args:
+            source: Путь к исходному файлу.
+            dest_dir: Целевая директория.
+            index: Индекс dest_dir, общий для пакета копирований (миграция);
+                вызывающий сохраняет отпечатки (_flush_fingerprints) сам.
+                None — индекс строится для одного файла, отпечатки
+                сохраняются сразу.
+
+        Returns:
+            Кортеж (путь к файлу в хранилище, True если найден дубликат).
+        """
+        single = index is None
+        if single:
+            index = _DirectoryIndex(dest_dir)
+
+        try:
+            size = source.stat().st_size
+            while True:
+                with index.lock:
+                    duplicate = self._find_duplicate_file(source, size, index.by_size.get(size, []))
+                    if duplicate:
+                        return duplicate, True
+
+                    copying = list(index.copying.get(size, ()))
+                    if not copying:
+                        with self._storage_lock:
+                            # Если файл с таким именем существует (но содержимое другое), добавляем суффикс
+                            dest_file = dest_dir / source.name
+                            counter = 1
+                            while dest_file.exists():
+                                dest_file = dest_dir / f"{source.stem}_{counter}{source.suffix}"
+                                counter += 1
+                            dest_file.touch(exist_ok=False)
+                        done = threading.Event()
+                        index.copying.setdefault(size, []).append(done)
+                        break
+
+                # Файл того же размера ещё копируется — ждём и проверяем снова
+                for event in copying:
+                    event.wait()
+
+            copied = False
+            try:
+                shutil.copy2(source, dest_file)
+                copied = True
+            finally:
+                with index.lock:
+                    index.copying[size].remove(done)
+                    if not index.copying[size]:
+                        del index.copying[size]
+                    if copied:
+                        index.by_size.setdefault(size, []).append(dest_file)
+                    else:
+                        dest_file.unlink(missing_ok=True)
+                done.set()
+
+            return dest_file, False
+
+        finally:
+            if single:
+                self._flush_fingerprints()
+
+    def _to_relative(self, file_path: Path) -> str:
+        """Возвращает путь относительно папки src с прямыми слэшами."""
+        return str(file_path.relative_to(self._base_path)).replace("\\", "/")
+
     @Slot(str, str, result=str)
     def copy_image_to_storage(self, source_path: str, subdirectory: str = "other") -> str:
         """
@@ -168,40 +364,16 @@ class FileManager(QObject):
             subdir_name = self.IMAGE_SUBDIRS[subdirectory]
             dest_dir = self._files_root / self.IMAGES_DIR / subdir_name
 
-            # НОВОЕ: Проверяем, нет ли уже такого же файла по содержимому
-            duplicate = self._find_duplicate_file(source, dest_dir)
-            if duplicate:
-                # Файл уже существует - возвращаем путь к нему
-                relative_path = duplicate.relative_to(self._base_path)
-                relative_path_str = str(relative_path).replace("\\", "/")
+            # Копируем (или находим дубликат по содержимому)
+            dest_file, is_duplicate = self._store_file(source, dest_dir)
+            relative_path_str = self._to_relative(dest_file)
 
+            if is_duplicate:
                 print(f"DEBUG: Image already exists (duplicate found): {relative_path_str}")
-                self.fileOperationSuccess.emit(f"Image already exists: {duplicate.name}")
-
-                return relative_path_str
-
-            # Формируем имя файла
-            dest_file = dest_dir / source.name
-
-            # Если файл с таким именем существует (но содержимое другое), добавляем суффикс
-            if dest_file.exists():
-                base_name = source.stem
-                extension = source.suffix
-                counter = 1
-                while dest_file.exists():
-                    new_name = f"{base_name}_{counter}{extension}"
-                    dest_file = dest_dir / new_name
-                    counter += 1
-
-            # Копируем файл
-            shutil.copy2(source, dest_file)
-
-            # Возвращаем относительный путь от папки src
-            relative_path = dest_file.relative_to(self._base_path)
-            relative_path_str = str(relative_path).replace("\\", "/")
-
-            print(f"DEBUG: Image copied to {relative_path_str}")
-            self.fileOperationSuccess.emit(f"Image saved: {dest_file.name}")
+                self.fileOperationSuccess.emit(f"Image already exists: {dest_file.name}")
+            else:
+                print(f"DEBUG: Image copied to {relative_path_str}")
+                self.fileOperationSuccess.emit(f"Image saved: {dest_file.name}")
 
             return relative_path_str
 
@@ -237,40 +409,16 @@ class FileManager(QObject):
             subdir_name = self.DOCUMENT_SUBDIRS[subdirectory]
             dest_dir = self._files_root / self.DOCUMENTS_DIR / subdir_name
 
-            # НОВОЕ: Проверяем, нет ли уже такого же файла по содержимому
-            duplicate = self._find_duplicate_file(source, dest_dir)
-            if duplicate:
-                # Файл уже существует - возвращаем путь к нему
-                relative_path = duplicate.relative_to(self._base_path)
-                relative_path_str = str(relative_path).replace("\\", "/")
+            # Копируем (или находим дубликат по содержимому)
+            dest_file, is_duplicate = self._store_file(source, dest_dir)
+            relative_path_str = self._to_relative(dest_file)
 
+            if is_duplicate:
                 print(f"DEBUG: Document already exists (duplicate found): {relative_path_str}")
-                self.fileOperationSuccess.emit(f"Document already exists: {duplicate.name}")
-
-                return relative_path_str
-
-            # Формируем имя файла
-            dest_file = dest_dir / source.name
-
-            # Если файл с таким именем существует (но содержимое другое), добавляем суффикс
-            if dest_file.exists():
-                base_name = source.stem
-                extension = source.suffix
-                counter = 1
-                while dest_file.exists():
-                    new_name = f"{base_name}_{counter}{extension}"
-                    dest_file = dest_dir / new_name
-                    counter += 1
-
-            # Копируем файл
-            shutil.copy2(source, dest_file)
-
-            # Возвращаем относительный путь от папки src
-            relative_path = dest_file.relative_to(self._base_path)
-            relative_path_str = str(relative_path).replace("\\", "/")
-
-            print(f"DEBUG: Document copied to {relative_path_str}")
-            self.fileOperationSuccess.emit(f"Document saved: {dest_file.name}")
+                self.fileOperationSuccess.emit(f"Document already exists: {dest_file.name}")
+            else:
+                print(f"DEBUG: Document copied to {relative_path_str}")
+                self.fileOperationSuccess.emit(f"Document saved: {dest_file.name}")
 
             return relative_path_str
 
@@ -361,113 +509,162 @@ class FileManager(QObject):
 
     @Slot()
     def reloadConfig(self):
-        """Перезагружает конфигурацию из файла (без merge с defaults)"""
-        try:
-            print("=== ConfigManager: Reloading config from file ===")
+        """Перечитывает config.json (если изменился) и применяет структуру каталогов."""
+        if not self._config_manager.reloadConfig():
+            # Файл не менялся, но структура могла быть изменена через setSetting
+            self._on_config_reloaded()
 
-            if os.path.exists(self._config_path):
-                with open(self._config_path, 'r', encoding='utf-8') as f:
-                    loaded_config = json.load(f)
-
-                # Сбрасываем на defaults, затем применяем загруженные настройки
-                self._config = self._load_default_config()
-                self._deep_merge(self._config, loaded_config)
-
-                print("Config reloaded successfully")
-
-                # Выводим количество подкатегорий
-                img_subdirs = self.getImageSubdirectories()
-                doc_subdirs = self.getDocumentSubdirectories()
-                print(f"Images subdirectories: {len(img_subdirs)}")
-                print(f"Documents subdirectories: {len(doc_subdirs)}")
-
-                # Испускаем сигналы об изменениях
-                self.vatIncludedChanged.emit(self._config["vat_included"])
-                self.vatRateChanged.emit(self._config["vat_rate"])
-                self.defaultCurrencyChanged.emit(self._config["default_currency"])
-
-            else:
-                print(f"ERROR: Config file not found: {self._config_path}")
-
-        except Exception as e:
-            print(f"ERROR: Failed to reload config: {e}")
-            import traceback
-            traceback.print_exc()
+    def _on_config_reloaded(self):
+        """Применяет структуру каталогов из обновлённой конфигурации."""
+        self._load_structure_from_config()
+        self._ensure_directory_structure()
 
     @Slot(result=str)
     def get_documents_root_path(self) -> str:
         """Возвращает абсолютный путь к корневой директории документов."""
         return str(self._files_root / self.DOCUMENTS_DIR)
 
-    def migrate_old_paths(self, db_manager) -> Tuple[int, int]:
-        """Миграция старых путей в базе данных к новой структуре."""
+    def migrate_old_paths(self, uow, max_workers: int = 4, batch_size: int = 500) -> Tuple[int, int]:
+        """
+        Миграция старых путей в базе данных к новой структуре.
+
+        Работает через UnitOfWork:
+        - товары читаются частями по артикулу (ItemsRepository.iter_batches),
+          ошибка чтения прерывает миграцию с сохранением контрольной точки;
+        - файлы копируются параллельно в пуле потоков; общий для товаров
+          исходный файл копируется один раз, дубликаты ищутся по индексу
+          целевой директории, построенному один раз на запуск;
+        - новые пути записываются пакетами в одной транзакции; меняется
+          только перенесённый столбец и только если в нём всё ещё старый
+          путь (ItemsRepository.update_paths), правки других пользователей
+          не затираются;
+        - после каждого пакета последний обработанный артикул сохраняется
+          в файл контрольной точки, поэтому прерванную миграцию можно
+          продолжить с него.
+
+        Args:
+            uow: Экземпляр UnitOfWork.
+            max_workers: Количество потоков для копирования файлов.
+            batch_size: Размер пакета обновлений БД.
+
+        Returns:
+            Кортеж (мигрировано изображений, мигрировано документов).
+        """
         images_migrated = 0
         documents_migrated = 0
+        checkpoint_path = self._files_root / self.MIGRATION_CHECKPOINT_FILE
 
         try:
-            items = db_manager.load_data()
-
-            for item in items:
-                article = item[0]
-                old_image_path = item[3]
-                old_document_path = item[11]
-                needs_update = False
-                new_image_path = old_image_path
-                new_document_path = old_document_path
-
-                if old_image_path and not old_image_path.startswith(f"{self.FILES_ROOT}/"):
-                    old_img_full_path = self._base_path / "images" / Path(old_image_path).name
-                    if old_img_full_path.exists():
-                        new_image_path = self.copy_image_to_storage(str(old_img_full_path), "other")
-                        if new_image_path:
-                            needs_update = True
-                            images_migrated += 1
-                            print(f"DEBUG: Migrated image for {article}: {old_image_path} -> {new_image_path}")
-
-                if old_document_path and not old_document_path.startswith(f"{self.FILES_ROOT}/"):
-                    old_doc_full_path = self._base_path / "documents" / Path(old_document_path).name
-                    if old_doc_full_path.exists():
-                        new_document_path = self.copy_document_to_storage(str(old_doc_full_path), "other")
-                        if new_document_path:
-                            needs_update = True
-                            documents_migrated += 1
-                            print(f"DEBUG: Migrated document for {article}: {old_document_path} -> {new_document_path}")
-
-                if needs_update:
-                    db_manager.update_item(
-                        old_article=article,
-                        article=article,
-                        name=item[1],
-                        description=item[2],
-                        image_path=new_image_path,
-                        category_id=self._get_category_id_by_name(db_manager, item[4]),
-                        price=item[5],
-                        stock=item[6],
-                        status=item[8],
-                        unit=item[9],
-                        manufacturer=item[10],
-                        document=new_document_path
-                    )
-
+            last_article = self._load_migration_checkpoint(checkpoint_path)
+            if last_article is not None:
+                print(f"DEBUG: Resuming migration after item {last_article}")
+
+            prefix = f"{self.FILES_ROOT}/"
+            done = 0
+            indexes: Dict[str, _DirectoryIndex] = {}
+
+            for batch in uow.items.iter_batches(batch_size, after=last_article):
+                # Собираем задачи копирования: (article, вид, исходный файл)
+                tasks = []
+                for item in batch:
+                    article, old_image_path, old_document_path = item[0], item[3], item[11]
+
+                    if old_image_path and not old_image_path.startswith(prefix):
+                        old_img_full_path = self._base_path / "images" / Path(old_image_path).name
+                        if old_img_full_path.exists():
+                            tasks.append((article, "image", old_img_full_path))
+
+                    if old_document_path and not old_document_path.startswith(prefix):
+                        old_doc_full_path = self._base_path / "documents" / Path(old_document_path).name
+                        if old_doc_full_path.exists():
+                            tasks.append((article, "document", old_doc_full_path))
+
+                # Параллельное копирование: каждый исходный файл — один раз
+                sources = list(dict.fromkeys((kind, source.resolve()) for _, kind, source in tasks))
+                for kind in {kind for kind, _ in sources} - indexes.keys():
+                    indexes[kind] = _DirectoryIndex(self._migration_dir(kind))
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    copied = dict(zip(sources, executor.map(
+                        lambda source: self._migrate_file(source, indexes[source[0]]), sources
+                    )))
+
+                # Пакетное обновление путей одной транзакцией: (столбец, новый, артикул, старый)
+                old_paths = {item[0]: {"image": item[3], "document": item[11]} for item in batch}
+                updates = []
+                for article, kind, source in tasks:
+                    new_path = copied[(kind, source.resolve())]
+                    if new_path:
+                        print(f"DEBUG: Migrated {kind} for {article}: {source.name} -> {new_path}")
+                        updates.append((
+                            "image_path" if kind == "image" else "document",
+                            new_path, article, old_paths[article][kind]
+                        ))
+
+                if updates:
+                    conflicts = uow.items.update_paths(updates)
+                    if conflicts:
+                        print(f"DEBUG: Paths changed concurrently, skipped: "
+                              f"{', '.join(f'{article} ({column})' for article, column in conflicts)}")
+                    skipped = set(conflicts)
+                    for column, _, article, _ in updates:
+                        if (article, column) not in skipped:
+                            images_migrated += column == "image_path"
+                            documents_migrated += column == "document"
+
+                self._flush_fingerprints()
+                self._save_migration_checkpoint(checkpoint_path, batch[-1][0])
+                done += len(batch)
+                print(f"DEBUG: Migration progress: {done} item(s) processed")
+
+            checkpoint_path.unlink(missing_ok=True)
             print(f"DEBUG: Migration completed: {images_migrated} images, {documents_migrated} documents")
             return images_migrated, documents_migrated
 
         except Exception as e:
-            print(f"DEBUG: Error during migration: {str(e)}")
+            print(f"DEBUG: Error during migration (checkpoint kept): {str(e)}")
             return images_migrated, documents_migrated
 
-    def _get_category_id_by_name(self, db_manager, category_name: str) -> Optional[int]:
-        """Вспомогательный метод для получения ID категории по имени."""
+        finally:
+            self._flush_fingerprints()
+
+    def _migration_dir(self, kind: str) -> Path:
+        """Подпапка 'other' для файлов миграции вида kind ('image' или 'document')."""
+        subdirs = self.IMAGE_SUBDIRS if kind == "image" else self.DOCUMENT_SUBDIRS
+        root_dir = self.IMAGES_DIR if kind == "image" else self.DOCUMENTS_DIR
+        dest_dir = self._files_root / root_dir / subdirs.get("other", "other")
+        dest_dir.mkdir(parents=True, exist_ok=True)
+        return dest_dir
+
+    def _migrate_file(self, source: Tuple[str, Path], index: _DirectoryIndex) -> str:
+        """Копирует один исходный файл миграции (вид, путь) в подпапку 'other'. Возвращает новый путь или ''."""
+        kind, path = source
         try:
-            categories = db_manager.load_categories()
-            for cat in categories:
-                if cat[1] == category_name:
-                    return cat[0]
+            dest_file, _ = self._store_file(path, self._migration_dir(kind), index)
+            return self._to_relative(dest_file)
+        except Exception as e:
+            print(f"DEBUG: Failed to migrate {kind} {path.name}: {str(e)}")
+            return ""
+
+    @staticmethod
+    def _load_migration_checkpoint(checkpoint_path: Path) -> Optional[str]:
+        """Загружает последний обработанный артикул из контрольной точки (None — с начала)."""
+        if not checkpoint_path.exists():
             return None
+        try:
+            with open(checkpoint_path, 'r', encoding='utf-8') as f:
+                return json.load(f).get("last_article")
         except Exception as e:
-            print(f"DEBUG: Error getting category ID: {str(e)}")
+            print(f"DEBUG: Ignoring unreadable migration checkpoint: {str(e)}")
             return None
 
+    @staticmethod
+    def _save_migration_checkpoint(checkpoint_path: Path, last_article: str):
+        """Атомарно сохраняет контрольную точку миграции (последний обработанный артикул)."""
+        tmp_path = checkpoint_path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"last_article": last_article}, f, ensure_ascii=False)
+        os.replace(tmp_path, checkpoint_path)
+
     @Property(str, constant=True)
     def basePath(self) -> str:
         """Qt Property: базовый путь приложения."""
@@ -476,4 +673,4 @@ class FileManager(QObject):
     @Property(str, constant=True)
     def filesRootPath(self) -> str:
         """Qt Property: корневой путь к директории files."""
-        return str(self._files_root)
\ No newline at end of file
+        return str(self._files_root)
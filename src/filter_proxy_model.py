@@ -1,9 +1,26 @@
 """Прокси-модель для фильтрации и сортировки товаров с Loguru"""
 
-from PySide6.QtCore import QSortFilterProxyModel, Slot, QSettings, Property, Qt
+from PySide6.QtCore import QSortFilterProxyModel, Slot, Signal, QSettings, Property, Qt, QTimer
 from loguru import logger
 
 from items_model import ItemsModel
+from utils.logger_config import level_enabled, every_n
+from utils.metrics import timed
+
+
+# Маппинг полей фильтра на роли ItemsModel
+FILTER_FIELD_ROLES = {
+    "article": ItemsModel.ArticleRole,
+    "name": ItemsModel.NameRole,
+    "description": ItemsModel.DescriptionRole,
+    "category": ItemsModel.CategoryRole,
+    "manufacturer": ItemsModel.ManufacturerRole,
+    "price": ItemsModel.PriceRole,
+    "stock": ItemsModel.StockRole
+}
+
+# Трассировка filterAcceptsRow: одна запись на столько проверенных строк
+FILTER_TRACE_SAMPLE = 1000
 
 
 class FilterProxyModel(QSortFilterProxyModel):
@@ -13,14 +30,31 @@ class FilterProxyModel(QSortFilterProxyModel):
     Предоставляет функциональность фильтрации по указанному полю,
     сортировки данных, а также сохранения настроек фильтрации.
     Делегирует операции CRUD в исходную модель (ItemsModel).
+
+    Строка поиска применяется с задержкой (filterDelay): при наборе текста
+    фильтр пересчитывается один раз после паузы, каждое новое нажатие
+    отменяет ещё не применённый фильтр. Пока фильтр ожидает применения,
+    свойство filtering равно True. Настройки в QSettings сохраняются
+    отложенно (SETTINGS_SAVE_DELAY_MS) и при выходе (flushSettings).
     """
 
-    def __init__(self, parent=None):
+    # Задержка применения строки поиска по умолчанию, мс
+    DEFAULT_FILTER_DELAY_MS = 250
+    # Задержка сохранения настроек фильтра в QSettings, мс
+    SETTINGS_SAVE_DELAY_MS = 2000
+
+    # === Сигналы ===
+    filteringChanged = Signal()
+    filterDelayChanged = Signal()
+    filterStringChanged = Signal()
+
+    def __init__(self, parent=None, filter_delay_ms: int = DEFAULT_FILTER_DELAY_MS):
         """
         Инициализация прокси-модели.
 
         Args:
             parent: Родительский объект Qt.
+            filter_delay_ms: Задержка применения строки поиска, мс (0 — сразу).
         """
         super().__init__(parent)
 
@@ -29,6 +63,20 @@ class FilterProxyModel(QSortFilterProxyModel):
         self._status_filter = "Все"
         self._settings = QSettings("ООО ОЗТМ", "Склад-0.1")
 
+        # Строка, ожидающая применения (None — ожидающих нет)
+        self._pending_filter_string = None
+        self._filtering = False
+
+        self._filter_timer = QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(max(0, filter_delay_ms))
+        self._filter_timer.timeout.connect(self._applyPendingFilter)
+
+        self._settings_timer = QTimer(self)
+        self._settings_timer.setSingleShot(True)
+        self._settings_timer.setInterval(self.SETTINGS_SAVE_DELAY_MS)
+        self._settings_timer.timeout.connect(self._saveSettings)
+
         # Загрузка сохраненных настроек
         self._loadSettings()
 
@@ -50,8 +98,30 @@ class FilterProxyModel(QSortFilterProxyModel):
         """Получение текущего поля фильтрации."""
         return self._filter_field
 
-    filterString = Property(str, get_filter_string, notify=None)
+    def get_filtering(self):
+        """Ожидает ли применения новая строка поиска."""
+        return self._filtering
+
+    def _set_filtering(self, value: bool):
+        if self._filtering != value:
+            self._filtering = value
+            self.filteringChanged.emit()
+
+    def get_filter_delay(self):
+        """Задержка применения строки поиска, мс."""
+        return self._filter_timer.interval()
+
+    def set_filter_delay(self, delay_ms: int):
+        """Устанавливает задержку применения строки поиска, мс."""
+        delay_ms = max(0, int(delay_ms))
+        if self._filter_timer.interval() != delay_ms:
+            self._filter_timer.setInterval(delay_ms)
+            self.filterDelayChanged.emit()
+
+    filterString = Property(str, get_filter_string, notify=filterStringChanged)
     filterField = Property(str, get_filter_field, notify=None)
+    filtering = Property(bool, get_filtering, notify=filteringChanged)
+    filterDelay = Property(int, get_filter_delay, set_filter_delay, notify=filterDelayChanged)
 
     # ==================== Settings ====================
 
@@ -68,6 +138,17 @@ class FilterProxyModel(QSortFilterProxyModel):
             f"field={self._filter_field}, string='{self._filter_string}'"
         )
 
+    def _scheduleSaveSettings(self):
+        """Отложенное сохранение настроек (одна запись после серии изменений)."""
+        self._settings_timer.start()
+
+    @Slot()
+    def flushSettings(self):
+        """Немедленно сохраняет отложенные настройки (вызывается при выходе)."""
+        if self._settings_timer.isActive():
+            self._settings_timer.stop()
+            self._saveSettings()
+
     def _saveSettings(self):
         """Сохранение настроек фильтрации в QSettings."""
         self._settings.setValue("filterField", self._filter_field)
@@ -83,16 +164,47 @@ class FilterProxyModel(QSortFilterProxyModel):
     @Slot(str)
     def setFilterString(self, filterString: str):
         """
-        Установка строки фильтра.
+        Установка строки фильтра (применяется через filterDelay мс).
+
+        Повторный вызов до применения отменяет предыдущую строку и
+        перезапускает задержку.
 
         Args:
             filterString: Новая строка фильтра.
         """
-        self._filter_string = filterString.lower()
-        self.invalidateFilter()
-        self._saveSettings()
+        self._pending_filter_string = filterString.lower()
+
+        if self._filter_timer.interval() == 0:
+            self._applyPendingFilter()
+            return
 
-        logger.debug(f"Filter string set to: '{self._filter_string}'")
+        self._set_filtering(True)
+        self._filter_timer.start()
+
+    def _takePendingFilter(self) -> bool:
+        """
+        Переносит ожидающую строку поиска в активный фильтр (без пересчёта).
+
+        Returns:
+            bool: True если строка фильтра изменилась.
+        """
+        self._filter_timer.stop()
+        self._set_filtering(False)
+
+        pending, self._pending_filter_string = self._pending_filter_string, None
+        if pending is None or pending == self._filter_string:
+            return False
+
+        self._filter_string = pending
+        self.filterStringChanged.emit()
+        return True
+
+    def _applyPendingFilter(self):
+        """Применяет ожидающую строку поиска (если она есть)."""
+        if self._takePendingFilter():
+            self.invalidateFilter()
+            self._scheduleSaveSettings()
+            logger.debug(f"Filter string set to: '{self._filter_string}' -> {self.rowCount()} rows")
 
     @Slot(str)
     def setFilterField(self, field: str):
@@ -102,19 +214,21 @@ class FilterProxyModel(QSortFilterProxyModel):
         Args:
             field: Новое поле для фильтрации.
         """
+        # Ожидающая строка поиска применяется вместе с полем — один пересчёт
+        self._takePendingFilter()
         self._filter_field = field
         self.invalidateFilter()
-        self._saveSettings()
+        self._scheduleSaveSettings()
 
         logger.debug(f"Filter field set to: {self._filter_field}")
 
     @Slot(str)
     def setStatusFilter(self, status: str):
         """Установка фильтра по статусу."""
+        self._takePendingFilter()
         self._status_filter = status
-        logger.info(f"🔍 Status filter SET TO: '{status}'")  # ← ДОБАВИТЬ
         self.invalidateFilter()
-        self._saveSettings()
+        self._scheduleSaveSettings()
         logger.debug(f"Status filter: '{status}'")
 
     @Slot(str, str)
@@ -145,7 +259,7 @@ class FilterProxyModel(QSortFilterProxyModel):
         logger.info(f"Sorting set: role={role_name}, order={order}")
 
         # Логируем первые 5 строк для проверки
-        if logger.level("TRACE").no >= logger._core.min_level:
+        if level_enabled("TRACE", __name__):
             for row in range(min(5, self.rowCount())):
                 index = self.index(row, 0)
                 source_index = self.mapToSource(index)
@@ -155,12 +269,21 @@ class FilterProxyModel(QSortFilterProxyModel):
                         f"Row {row} (source {source_index.row()}): {value}"
                     )
 
+    def _fuzzyMatches(self):
+        """Артикулы, найденные триграммным индексом ItemsModel (None — поле без индекса)."""
+        match_articles = getattr(self.sourceModel(), "matchArticles", None)
+        if match_articles is None:
+            return None
+        return match_articles(self._filter_field, self._filter_string)
+
+    @timed("FilterProxyModel.filterAcceptsRow")
     def filterAcceptsRow(self, sourceRow: int, sourceParent):
         """
         Проверка, проходит ли строка фильтр.
 
         Фильтрует по:
-        1. Текстовому полю (_filter_field: name, article, description, etc.)
+        1. Текстовому полю (_filter_field: name, article, description, etc.);
+           по name и manufacturer — нечёткий поиск (ItemsModel.matchArticles)
         2. Статусу (_status_filter: "Все", "в наличии", "под заказ", etc.)
 
         Args:
@@ -179,42 +302,28 @@ class FilterProxyModel(QSortFilterProxyModel):
 
         # 1. Фильтр по текстовому полю
         if self._filter_string:
-            # Маппинг полей на роли
-            role_map = {
-                "article": ItemsModel.ArticleRole,
-                "name": ItemsModel.NameRole,
-                "description": ItemsModel.DescriptionRole,
-                "category": ItemsModel.CategoryRole,
-                "manufacturer": ItemsModel.ManufacturerRole,
-                "price": ItemsModel.PriceRole,
-                "stock": ItemsModel.StockRole
-            }
-
-            role = role_map.get(self._filter_field, ItemsModel.NameRole)
-            value = self.sourceModel().data(index, role)
-            value_str = "" if value is None else str(value).lower()
-
-            if self._filter_string not in value_str:
-                return False  # Не прошел текстовый фильтр
+            matches = self._fuzzyMatches()
+            if matches is not None:
+                # Нечёткий поиск по индексу исходной модели (name, manufacturer)
+                if self.sourceModel().data(index, ItemsModel.ArticleRole) not in matches:
+                    return False
+            else:
+                role = FILTER_FIELD_ROLES.get(self._filter_field, ItemsModel.NameRole)
+                value = self.sourceModel().data(index, role)
+                value_str = "" if value is None else str(value).lower()
+
+                if self._filter_string not in value_str:
+                    return False  # Не прошел текстовый фильтр
 
         # 2. Фильтр по статусу
         if self._status_filter and self._status_filter != "Все":
             status_value = self.sourceModel().data(index, ItemsModel.StatusRole)
             if status_value != self._status_filter:
                 return False  # Не прошел фильтр по статусу
-            # ← ДОБАВИТЬ ЛОГИРОВАНИЕ
-            logger.debug(
-                f"Row {sourceRow}: comparing status_value='{status_value}' "
-                f"with filter='{self._status_filter}'"
-            )
-
-            if status_value != self._status_filter:
-                logger.debug(f"Row {sourceRow}: REJECTED by status filter")
-                return False
 
-            logger.debug(f"Row {sourceRow}: PASSED status filter")
-        # Прошел все фильтры
-        if logger.level("TRACE").no >= logger._core.min_level:
+        # Прошел все фильтры. Метод вызывается для каждой строки при каждом
+        # изменении фильтра — трассировка только выборочно и после дешёвой проверки уровня
+        if level_enabled("TRACE", __name__) and every_n("filterAcceptsRow", FILTER_TRACE_SAMPLE):
             logger.trace(
                 f"Row {sourceRow} PASSED filters: "
                 f"field={self._filter_field}, filter='{self._filter_string}', "
@@ -5,6 +5,7 @@ from pathlib import Path
 from loguru import logger
 
 from repositories.documents_repository import DocumentsRepository
+from repositories.events import ChangeEvent
 from models.dto import Document
 
 
@@ -14,6 +15,9 @@ class ItemDocumentsModel(QAbstractListModel):
 
     Использует Repository Pattern для работы с данными.
     Предоставляет интерфейс для отображения и управления документами в QML.
+
+    Изменения документов текущего товара (в том числе сделанные другими
+    моделями) приходят событиями репозитория и меняют только свою строку.
     """
 
     # Роли данных для QML
@@ -42,6 +46,9 @@ class ItemDocumentsModel(QAbstractListModel):
         self.documents = []  # Список DTO объектов Document
         self._current_article = ""
 
+        self.repository.events.subscribe(ChangeEvent.DOCUMENT, self._onDocumentChanged)
+        self.repository.events.subscribe(ChangeEvent.ITEM, self._onItemChanged)
+
         logger.debug("ItemDocumentsModel initialized")
 
     def roleNames(self):
@@ -169,8 +176,7 @@ class ItemDocumentsModel(QAbstractListModel):
             if doc_id:
                 logger.success(f"✅ Document added with ID: {doc_id}")
 
-                # Перезагружаем список документов
-                self.loadDocuments(self._current_article)
+                # Строка добавлена обработчиком события репозитория
                 self.documentAdded.emit()
                 return True
             else:
@@ -213,8 +219,7 @@ class ItemDocumentsModel(QAbstractListModel):
             if success:
                 logger.success(f"✅ Document {doc.id} deleted")
 
-                # Перезагружаем список документов
-                self.loadDocuments(self._current_article)
+                # Строка удалена обработчиком события репозитория
                 self.documentDeleted.emit()
                 return True
             else:
@@ -266,9 +271,6 @@ class ItemDocumentsModel(QAbstractListModel):
 
             if success:
                 logger.success(f"✅ Document {doc.id} renamed")
-
-                # Перезагружаем список документов
-                self.loadDocuments(self._current_article)
                 return True
             else:
                 error_msg = "Не удалось переименовать документ"
@@ -282,6 +284,58 @@ class ItemDocumentsModel(QAbstractListModel):
             self.errorOccurred.emit(error_msg)
             return False
 
+    # ==================== Change Events ====================
+
+    def _rowForId(self, doc_id: int) -> int:
+        for row, doc in enumerate(self.documents):
+            if doc.id == doc_id:
+                return row
+        return -1
+
+    def _onDocumentChanged(self, event: ChangeEvent):
+        """Добавляет, удаляет или переименовывает строку документа текущего товара."""
+        if not self._current_article:
+            return
+
+        if event.action == ChangeEvent.ADDED:
+            if event.fields.get("item_article") != self._current_article or self._rowForId(event.key) >= 0:
+                return
+            # Список отсортирован по дате добавления, новые — первыми
+            self.beginInsertRows(QModelIndex(), 0, 0)
+            self.documents.insert(0, Document(
+                id=event.key,
+                item_article=self._current_article,
+                document_path=event.fields.get("document_path"),
+                document_name=event.fields.get("document_name"),
+                added_date=event.fields.get("added_date")
+            ))
+            self.endInsertRows()
+            return
+
+        row = self._rowForId(event.key)
+        if row < 0:
+            return
+
+        if event.action == ChangeEvent.DELETED:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self.documents[row]
+            self.endRemoveRows()
+        elif "document_name" in event.fields:
+            self.documents[row].document_name = event.fields["document_name"]
+            self.dataChanged.emit(self.index(row, 0), self.index(row, 0), [self.NameRole])
+
+    def _onItemChanged(self, event: ChangeEvent):
+        """Следит за переименованием и удалением текущего товара."""
+        if not self._current_article or event.previous_key != self._current_article:
+            return
+
+        if event.action == ChangeEvent.DELETED:
+            self.clear()
+        elif event.old_key is not None:
+            self._current_article = event.key
+            for doc in self.documents:
+                doc.item_article = event.key
+
     # ==================== Utility Methods ====================
 
     @Slot(int, result=str)
@@ -382,4 +436,19 @@ class ItemDocumentsModel(QAbstractListModel):
             return count
         except Exception as e:
             logger.error(f"❌ Error counting documents: {e}")
-            return 0
\ No newline at end of file
+            return 0
+
+    @Slot("QVariantList", result="QVariantMap")
+    def countDocumentsForItems(self, articles) -> dict:
+        """
+        Возвращает количество документов сразу для набора товаров (один запрос).
+
+        Args:
+            articles: Артикулы товаров.
+
+        Returns:
+            dict: Артикул → количество документов (0 для товаров без документов).
+        """
+        articles = [str(article) for article in articles]
+        counts = self.repository.count_for_items(articles)
+        return {article: counts.get(article, 0) for article in articles}
\ No newline at end of file
@@ -1,11 +1,13 @@
 """Модель для отображения поставщиков конкретного товара с Repository Pattern"""
 
-from PySide6.QtCore import QAbstractListModel, Qt, Slot, Signal
+from PySide6.QtCore import QAbstractListModel, Qt, QModelIndex, Slot, Signal
 from loguru import logger
 from typing import List
 
 from repositories.suppliers_repository import SuppliersRepository
+from repositories.events import ChangeEvent
 from models.dto import Supplier
+from repositories.query_monitor import query_budget
 
 
 class ItemSuppliersModel(QAbstractListModel):
@@ -14,6 +16,10 @@ class ItemSuppliersModel(QAbstractListModel):
 
     Предоставляет данные о поставщиках для отображения в QML.
     Использует Repository Pattern для работы с данными.
+
+    Подписана на события репозиториев: изменение и удаление поставщика
+    меняют только его строку, новая привязка поставщиков текущего товара
+    перечитывает список (один запрос).
     """
 
     # Роли для QML
@@ -43,6 +49,11 @@ class ItemSuppliersModel(QAbstractListModel):
         self._article = article
         self._suppliers: List[Supplier] = []  # Список DTO объектов
 
+        events = self.repository.events
+        events.subscribe(ChangeEvent.SUPPLIER, self._onSupplierChanged)
+        events.subscribe(ChangeEvent.ITEM_SUPPLIERS, self._onItemSuppliersChanged)
+        events.subscribe(ChangeEvent.ITEM, self._onItemChanged)
+
         logger.debug(f"ItemSuppliersModel initialized for article: '{article}'")
 
         # Загружаем данные если артикул указан
@@ -88,6 +99,7 @@ class ItemSuppliersModel(QAbstractListModel):
 
     # ==================== Data Loading ====================
 
+    @query_budget(1)
     def load(self):
         """Загрузка поставщиков для текущего артикула."""
         try:
@@ -131,6 +143,37 @@ class ItemSuppliersModel(QAbstractListModel):
 
             self.errorOccurred.emit(error_msg)
 
+    # ==================== Change Events ====================
+
+    def _onSupplierChanged(self, event: ChangeEvent):
+        """Обновляет или удаляет строку изменённого поставщика."""
+        row = next((row for row, supplier in enumerate(self._suppliers) if supplier.id == event.key), -1)
+        if row < 0:
+            return
+
+        if event.action == ChangeEvent.DELETED:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self._suppliers[row]
+            self.endRemoveRows()
+        elif event.action == ChangeEvent.UPDATED:
+            self._suppliers[row] = Supplier(id=event.key, **event.fields)
+            self.dataChanged.emit(self.index(row, 0), self.index(row, 0))
+
+    def _onItemSuppliersChanged(self, event: ChangeEvent):
+        """Перечитывает поставщиков, если изменилась привязка текущего товара."""
+        if self._article and event.key == self._article:
+            self.load()
+
+    def _onItemChanged(self, event: ChangeEvent):
+        """Следит за переименованием и удалением текущего товара."""
+        if not self._article or event.previous_key != self._article:
+            return
+
+        if event.action == ChangeEvent.DELETED:
+            self.clear()
+        elif event.old_key is not None:
+            self._article = event.key
+
     @Slot(str)
     def setArticle(self, article: str):
         """
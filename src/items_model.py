@@ -1,11 +1,21 @@
 """Модель товаров для Qt/QML интерфейса с Repository Pattern"""
 
+from typing import Dict, List, Optional, Set
+
 from PySide6.QtCore import QAbstractListModel, Qt, QModelIndex, Slot, Signal
 from loguru import logger
 
 from repositories.items_repository import ItemsRepository
-from models.dto import Item
+from repositories.suppliers_repository import SuppliersRepository
+from repositories.documents_repository import DocumentsRepository
+from repositories.events import ChangeEvent
+from repositories.concurrency import ConcurrencyConflictError
+from models.dto import Item, Supplier
 from validators import validate_item
+from utils.logger_config import level_enabled
+from utils.metrics import timed
+from repositories.query_monitor import query_budget
+from utils.trigram_index import TrigramIndex
 
 
 class ItemsModel(QAbstractListModel):
@@ -18,6 +28,17 @@ class ItemsModel(QAbstractListModel):
     Attributes:
         repository: ItemsRepository для работы с базой данных
         items: Отфильтрованный список товаров для отображения
+
+    Поставщики и количество документов товаров (роли suppliers,
+    supplier_count, document_count) загружаются вместе со списком —
+    одним групповым запросом на связь, а не запросом на каждую строку.
+    Дальше они поддерживаются событиями репозиториев: изменение поставщика,
+    его привязки или документов товара обновляет только затронутые строки.
+
+    Поиск по названию и производителю идёт по триграммным индексам
+    (SEARCH_INDEX_FIELDS): находятся опечатки и кириллические «двойники»
+    латинских букв. Индексы строятся при первом поиске и после
+    перезагрузки данных пересчитываются только для изменившихся товаров.
     """
 
     # Роли данных для QML
@@ -33,10 +54,20 @@ class ItemsModel(QAbstractListModel):
     UnitRole = Qt.UserRole + 10
     ManufacturerRole = Qt.UserRole + 11
     DocumentCodeRole = Qt.UserRole + 12
+    SuppliersRole = Qt.UserRole + 13
+    SupplierCountRole = Qt.UserRole + 14
+    DocumentCountRole = Qt.UserRole + 15
 
     # Сигналы
     errorOccurred = Signal(str)
     itemsLoaded = Signal(int)  # Новый сигнал - количество загруженных товаров
+    conflictDetected = Signal(str)  # Товар изменён другим пользователем, данные перечитаны
+
+    # Поля с нечётким поиском: имя поля фильтра → индекс в кортеже товара
+    SEARCH_INDEX_FIELDS = {
+        "name": 1,
+        "manufacturer": 10,
+    }
 
     # Маппинг ролей на индексы в кортеже
     _ROLE_TO_INDEX = {
@@ -54,34 +85,65 @@ class ItemsModel(QAbstractListModel):
         DocumentCodeRole: 11,
     }
 
-    def __init__(self, items_repository: ItemsRepository):
+    def __init__(
+            self,
+            items_repository: ItemsRepository,
+            autoload: bool = True,
+            suppliers_repository: Optional[SuppliersRepository] = None,
+            documents_repository: Optional[DocumentsRepository] = None
+    ):
         """
         Инициализирует модель товаров.
 
         Args:
             items_repository: Репозиторий для работы с товарами.
+            autoload: Загрузить данные сразу (False — загрузка позже через loadData).
+            suppliers_repository: Источник роли suppliers (None — роль пустая).
+            documents_repository: Источник роли document_count (None — роль 0).
         """
         super().__init__()
 
         self.repository = items_repository
+        self.suppliers_repository = suppliers_repository
+        self.documents_repository = documents_repository
+        self._suppliers_by_article: Dict[str, List[Supplier]] = {}  # Артикул → поставщики
+        self._documents_by_article: Dict[str, int] = {}  # Артикул → количество документов
         self.items = []
         self._all_items = []  # Полный список для фильтрации
         self._filter_string = ""
         self._filter_field = "name"
 
+        # Триграммные индексы по полям (артикул → текст), строятся при первом поиске
+        self._search_indexes: Dict[str, TrigramIndex] = {}
+        self._search_dirty = True
+        self._match_cache: Dict[tuple, Set[str]] = {}
+
+        if suppliers_repository is not None:
+            suppliers_repository.events.subscribe(ChangeEvent.SUPPLIER, self._onSupplierChanged)
+            suppliers_repository.events.subscribe(ChangeEvent.ITEM_SUPPLIERS, self._onItemSuppliersChanged)
+        if documents_repository is not None:
+            documents_repository.events.subscribe(ChangeEvent.DOCUMENT, self._onDocumentChanged)
+
         logger.debug("ItemsModel initialized")
-        self.loadData()
+        if autoload:
+            self.loadData()
 
+    @timed("ItemsModel.loadData")
+    @query_budget(3)
     def loadData(self):
         """
         Загружает все данные товаров из репозитория.
 
-        Применяет текущий фильтр к загруженным данным.
+        Применяет текущий фильтр к загруженным данным. Поставщики и
+        количество документов загружаются тут же, по запросу на связь.
         """
         logger.info("Loading items data...")
 
         try:
             self._all_items = self.repository.get_all()
+            self._search_dirty = True
+            self._match_cache.clear()
+            self._loadRelations()
             self._applyFilter()
 
             logger.success(
@@ -95,17 +157,149 @@ class ItemsModel(QAbstractListModel):
             logger.exception("❌ Failed to load items")
             self.errorOccurred.emit(f"Ошибка загрузки: {str(e)}")
 
+    def _loadRelations(self):
+        """Загружает поставщиков и количество документов для всех товаров."""
+        if self.suppliers_repository is not None:
+            self._suppliers_by_article = self.suppliers_repository.get_suppliers_for_items()
+        if self.documents_repository is not None:
+            self._documents_by_article = self.documents_repository.count_for_items()
+
+    @Slot()
+    @query_budget(2)
+    def reloadRelations(self):
+        """
+        Перечитывает поставщиков и количество документов без перезагрузки товаров.
+
+        Вызывается после изменения привязок поставщиков или документов.
+        """
+        try:
+            self._loadRelations()
+        except Exception as e:
+            logger.exception("❌ Failed to load item relations")
+            self.errorOccurred.emit(f"Ошибка загрузки связей товаров: {str(e)}")
+            return
+
+        if self.items:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self.items) - 1, 0), [
+                self.SuppliersRole, self.SupplierCountRole, self.DocumentCountRole
+            ])
+
+    # ==================== Change Events ====================
+
+    def _emitRelationsChanged(self, articles: Set[str], roles: List[int]):
+        """dataChanged для строк товаров с указанными артикулами."""
+        for row, item in enumerate(self.items):
+            if item[0] in articles:
+                index = self.index(row, 0)
+                self.dataChanged.emit(index, index, roles)
+
+    def _onItemSuppliersChanged(self, event: ChangeEvent):
+        """Перечитывает поставщиков одного товара после изменения привязки."""
+        article = event.key
+        suppliers = self.suppliers_repository.get_suppliers_for_item(article)
+        if suppliers:
+            self._suppliers_by_article[article] = suppliers
+        else:
+            self._suppliers_by_article.pop(article, None)
+        self._emitRelationsChanged({article}, [self.SuppliersRole, self.SupplierCountRole])
+
+    def _onSupplierChanged(self, event: ChangeEvent):
+        """Обновляет компанию поставщика в строках товаров, где он указан."""
+        if event.action == ChangeEvent.ADDED:
+            return
+
+        changed = set()
+        for article, suppliers in self._suppliers_by_article.items():
+            for position, supplier in enumerate(suppliers):
+                if supplier.id != event.key:
+                    continue
+                if event.action == ChangeEvent.DELETED:
+                    del suppliers[position]
+                else:
+                    suppliers[position] = Supplier(id=event.key, **event.fields)
+                changed.add(article)
+                break
+
+        if changed:
+            self._emitRelationsChanged(changed, [self.SuppliersRole, self.SupplierCountRole])
+
+    def _onDocumentChanged(self, event: ChangeEvent):
+        """Меняет количество документов товара при добавлении и удалении."""
+        article = event.fields.get("item_article")
+        if article is None or event.action == ChangeEvent.UPDATED:
+            return
+
+        count = self._documents_by_article.get(article, 0) + (1 if event.action == ChangeEvent.ADDED else -1)
+        self._documents_by_article[article] = max(count, 0)
+        self._emitRelationsChanged({article}, [self.DocumentCountRole])
+
+    def _searchIndex(self, field: str) -> Optional[TrigramIndex]:
+        """
+        Триграммный индекс поля (None — поле без нечёткого поиска).
+
+        После перезагрузки данных индексы синхронизируются: триграммы
+        пересчитываются только для новых и изменившихся товаров.
+        """
+        if field not in self.SEARCH_INDEX_FIELDS:
+            return None
+
+        if self._search_dirty:
+            for name, column in self.SEARCH_INDEX_FIELDS.items():
+                index = self._search_indexes.setdefault(name, TrigramIndex())
+                changed = index.sync({item[0]: item[column] for item in self._all_items})
+                logger.debug(f"🔎 Search index '{name}' synced: {changed} change(s), {len(index)} items")
+            self._search_dirty = False
+
+        return self._search_indexes[field]
+
+    def matchArticles(self, field: str, query: str) -> Optional[Set[str]]:
+        """
+        Артикулы товаров, подходящих под нечёткий поиск по полю.
+
+        Результат кэшируется до перезагрузки данных — FilterProxyModel
+        вызывает метод для каждой строки.
+
+        Args:
+            field: Поле фильтра (name, manufacturer).
+            query: Строка поиска.
+
+        Returns:
+            Optional[Set[str]]: Артикулы или None, если для поля нет индекса.
+        """
+        key = (field, query)
+        matches = self._match_cache.get(key)
+        if matches is None:
+            index = self._searchIndex(field)
+            if index is None:
+                return None
+            matches = self._match_cache[key] = index.match(query)
+        return matches
+
     def _applyFilter(self):
         """
         Применяет текущий фильтр к списку товаров.
 
         Фильтрует товары на основе строки фильтра и выбранного поля.
+        По названию и производителю поиск нечёткий, лучшие совпадения — первыми.
         """
         if not self._filter_string:
             self.items = self._all_items.copy()
             logger.debug("No filter applied, showing all items")
             return
 
+        index = self._searchIndex(self._filter_field)
+        if index is not None:
+            scores = index.scores(self._filter_string)
+            self.items = sorted(
+                (item for item in self._all_items if item[0] in scores),
+                key=lambda item: -scores[item[0]]
+            )
+            logger.debug(
+                f"🔍 Fuzzy filter: '{self._filter_string}' in '{self._filter_field}' "
+                f"-> {len(self.items)} results"
+            )
+            return
+
         filter_lower = self._filter_string.lower()
 
         # Маппинг поля фильтра на индекс колонки
@@ -158,6 +352,13 @@ class ItemsModel(QAbstractListModel):
             return None
 
         if role not in self._ROLE_TO_INDEX:
+            if role == self.SuppliersRole:
+                return ", ".join(supplier.company for supplier in
+                                 self._suppliers_by_article.get(self.items[index.row()][0], ()))
+            if role == self.SupplierCountRole:
+                return len(self._suppliers_by_article.get(self.items[index.row()][0], ()))
+            if role == self.DocumentCountRole:
+                return self._documents_by_article.get(self.items[index.row()][0], 0)
             return None
 
         item = self.items[index.row()]
@@ -188,7 +389,10 @@ class ItemsModel(QAbstractListModel):
             self.StatusRole: b"status",
             self.UnitRole: b"unit",
             self.ManufacturerRole: b"manufacturer",
-            self.DocumentCodeRole: b"document"
+            self.DocumentCodeRole: b"document",
+            self.SuppliersRole: b"suppliers",
+            self.SupplierCountRole: b"supplier_count",
+            self.DocumentCountRole: b"document_count"
         }
 
     # ==================== CRUD Operations ====================
@@ -356,8 +560,18 @@ class ItemsModel(QAbstractListModel):
                 document=document
             )
 
-            # Обновляем в базе данных через репозиторий
-            self.repository.update(old_article, item)
+            # Обновляем в базе данных через репозиторий; версия строки —
+            # защита от перезаписи изменений с другого рабочего места
+            expected_version = self.items[row][12] if len(self.items[row]) > 12 else None
+            try:
+                self.repository.update(old_article, item, expected_version=expected_version)
+            except ConcurrencyConflictError as e:
+                error_message = str(e)
+                self.beginResetModel()
+                self.loadData()
+                self.endResetModel()
+                self.conflictDetected.emit(error_message)
+                return error_message
 
             logger.success(f"✅ Item updated: {old_article} -> {article}")
 
@@ -520,10 +734,13 @@ class ItemsModel(QAbstractListModel):
             "status": item[8] if len(item) > 8 else "в наличии",
             "unit": item[9] if len(item) > 9 else "шт.",
             "manufacturer": item[10] if len(item) > 10 else "",
-            "document": item[11] if len(item) > 11 else ""
+            "document": item[11] if len(item) > 11 else "",
+            "suppliers": [supplier.company for supplier in self._suppliers_by_article.get(item[0], [])],
+            "document_count": self._documents_by_article.get(item[0], 0)
         }
 
-        logger.trace(f"Retrieved item data for row {row}: {item[0]}")
+        if level_enabled("TRACE", __name__):
+            logger.trace(f"Retrieved item data for row {row}: {item[0]}")
         return result
 
     @Slot(str, str, result=list)
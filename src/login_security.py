@@ -0,0 +1,256 @@
+"""Ограничение попыток входа и отложенная запись истории входов
+
+Расположение: src/login_security.py
+
+LoginThrottle — скользящее окно неудачных попыток по имени пользователя
+в памяти (проверка блокировки без обращения к БД).
+LoginAuditQueue — очередь записи истории входов: события накапливаются
+в памяти и записываются пачкой одной транзакцией при выходе,
+завершении приложения или по таймеру.
+"""
+
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+
+class LoginThrottle:
+    """
+    Ограничитель попыток входа (скользящее окно на пользователя).
+
+    Потокобезопасен: вызывается из фоновых задач входа.
+    """
+
+    # Порог количества пользователей, после которого чистятся устаревшие окна
+    SWEEP_THRESHOLD = 1000
+
+    def __init__(self, max_attempts: int, window_seconds: int):
+        """
+        Args:
+            max_attempts: Количество неудачных попыток до блокировки.
+            window_seconds: Длина окна в секундах.
+        """
+        self.max_attempts = max_attempts
+        self.window_seconds = window_seconds
+        self._failures: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def seed(self, failures: List[Tuple[str, datetime]]):
+        """
+        Заполняет окна из истории (при запуске приложения).
+
+        Args:
+            failures: Список (username, время попытки).
+        """
+        with self._lock:
+            for username, at in sorted(failures, key=lambda f: f[1]):
+                self._failures.setdefault(username, deque()).append(at.timestamp())
+        logger.debug(f"LoginThrottle seeded with {len(failures)} failed attempt(s)")
+
+    def failed_count(self, username: str) -> int:
+        """Количество неудачных попыток пользователя в текущем окне."""
+        with self._lock:
+            window = self._failures.get(username)
+            if not window:
+                return 0
+            self._prune(window, time.time())
+            if not window:
+                del self._failures[username]
+                return 0
+            return len(window)
+
+    def is_locked(self, username: str) -> bool:
+        """Заблокирован ли вход для пользователя."""
+        return self.failed_count(username) >= self.max_attempts
+
+    def register_failure(self, username: str):
+        """Учитывает неудачную попытку входа."""
+        now = time.time()
+        with self._lock:
+            window = self._failures.setdefault(username, deque())
+            window.append(now)
+            self._prune(window, now)
+
+            if len(self._failures) > self.SWEEP_THRESHOLD:
+                self._sweep(now)
+
+    def _prune(self, window: Deque[float], now: float):
+        """Удаляет из окна попытки старше window_seconds."""
+        cutoff = now - self.window_seconds
+        while window and window[0] < cutoff:
+            window.popleft()
+
+    def _sweep(self, now: float):
+        """Удаляет пустые окна (защита от роста словаря)."""
+        for username in list(self._failures):
+            window = self._failures[username]
+            self._prune(window, now)
+            if not window:
+                del self._failures[username]
+
+
+class PendingSession:
+    """
+    Сессия, запись которой может быть ещё не сохранена в БД.
+
+    record_id заполняется при записи очереди; до этого выход
+    объединяется с записью входа.
+    """
+
+    def __init__(self, user_id: int, username: str, login_time: datetime):
+        self.user_id = user_id
+        self.username = username
+        self.login_time = login_time
+        self.record_id: Optional[int] = None
+        self.logout: Optional[Tuple[str, str, int]] = None  # (logout_time, reason, duration)
+
+
+class LoginAuditQueue:
+    """
+    Очередь отложенной записи истории входов и счётчиков неудачных попыток.
+
+    Потокобезопасна. Записи сохраняются в порядке поступления; одновременно
+    выполняется только одна запись (flush).
+    """
+
+    def __init__(self, history_repo, users_repo):
+        """
+        Args:
+            history_repo: LoginHistoryRepository.
+            users_repo: UsersRepository.
+        """
+        self._history_repo = history_repo
+        self._users_repo = users_repo
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+        self._sessions: List[PendingSession] = []
+        self._failures: List[Tuple[str, str, str]] = []
+        self._logouts: List[PendingSession] = []
+        self._attempt_changes: Dict[str, Tuple[bool, int]] = {}
+
+    @property
+    def pending_count(self) -> int:
+        """Количество ожидающих записи событий."""
+        with self._lock:
+            return len(self._sessions) + len(self._failures) + len(self._logouts)
+
+    def record_login(self, user_id: int, username: str) -> PendingSession:
+        """Ставит в очередь вход и сброс счётчика неудачных попыток."""
+        session = PendingSession(user_id, username, datetime.now())
+        with self._lock:
+            self._sessions.append(session)
+            self._attempt_changes[username] = (True, 0)
+        return session
+
+    def record_failed_login(self, username: str, reason: str, count_attempt: bool = False):
+        """
+        Ставит в очередь неудачную попытку входа.
+
+        Args:
+            username: Имя пользователя.
+            reason: Причина ('invalid_password', 'user_not_found', ...).
+            count_attempt: Увеличить счётчик users.failed_attempts.
+        """
+        with self._lock:
+            self._failures.append((username, datetime.now().isoformat(), reason))
+            if count_attempt:
+                reset, count = self._attempt_changes.get(username, (False, 0))
+                self._attempt_changes[username] = (reset, count + 1)
+
+        logger.warning(f"⚠️ Failed login attempt: {username} ({reason})")
+
+    def record_logout(self, session: PendingSession, reason: str):
+        """Ставит в очередь выход из сессии."""
+        logout_time = datetime.now()
+        duration = int((logout_time - session.login_time).total_seconds())
+
+        with self._lock:
+            session.logout = (logout_time.isoformat(), reason, duration)
+            # Если вход ещё не записан (в очереди или записывается сейчас) —
+            # выход запишется вместе с ним или сразу после flush
+            if session.record_id is not None:
+                self._logouts.append(session)
+
+        logger.info(f"📤 Logout queued: {session.username}, reason={reason}, duration={duration}s")
+
+    def flush(self) -> int:
+        """
+        Записывает накопленные события: историю — одной транзакцией,
+        счётчики неудачных попыток — второй.
+
+        При ошибке записи истории в очередь возвращаются все события; при
+        ошибке записи счётчиков — только изменения счётчиков (история уже
+        записана, повтор продублировал бы её).
+
+        Returns:
+            Количество записанных событий.
+        """
+        with self._flush_lock:
+            with self._lock:
+                sessions, self._sessions = self._sessions, []
+                failures, self._failures = self._failures, []
+                logouts, self._logouts = self._logouts, []
+                attempt_changes, self._attempt_changes = self._attempt_changes, {}
+
+            if not (sessions or failures or logouts or attempt_changes):
+                return 0
+
+            try:
+                # Снимок logout под блокировкой: выход мог прийти во время записи
+                with self._lock:
+                    session_rows = [
+                        (s.user_id, s.username, s.login_time.isoformat(), *(s.logout or (None, None, None)))
+                        for s in sessions
+                    ]
+                    written_logouts = {id(s) for s in sessions if s.logout}
+
+                record_ids = self._history_repo.write_batch(
+                    session_rows,
+                    failures,
+                    [(s.record_id, *s.logout) for s in logouts]
+                )
+
+            except Exception as e:
+                logger.error(f"❌ Failed to flush login audit queue: {e}")
+                with self._lock:
+                    self._sessions[:0] = sessions
+                    self._failures[:0] = failures
+                    self._logouts[:0] = logouts
+                    self._requeue_attempt_changes(attempt_changes)
+                return 0
+
+            with self._lock:
+                for session, record_id in zip(sessions, record_ids):
+                    session.record_id = record_id
+                    # Выход пришёл после снимка — запишется следующей пачкой
+                    if session.logout and id(session) not in written_logouts:
+                        self._logouts.append(session)
+
+            try:
+                self._users_repo.apply_failed_attempt_changes(attempt_changes)
+            except Exception as e:
+                logger.error(f"❌ Failed to flush failed login counters: {e}")
+                with self._lock:
+                    self._requeue_attempt_changes(attempt_changes)
+
+            return len(sessions) + len(failures) + len(logouts)
+
+    def _requeue_attempt_changes(self, attempt_changes: Dict[str, Tuple[bool, int]]):
+        """
+        Возвращает в очередь незаписанные изменения счётчиков (под self._lock).
+
+        Изменения, накопленные за время записи, новее возвращаемых: сброс
+        в них отменяет старые попытки, иначе попытки складываются.
+        """
+        for username, (reset, count) in attempt_changes.items():
+            newer = self._attempt_changes.get(username)
+            if newer is None:
+                self._attempt_changes[username] = (reset, count)
+            elif not newer[0]:
+                self._attempt_changes[username] = (reset, count + newer[1])
@@ -12,13 +12,18 @@ src_path = Path(__file__).parent
 if str(src_path) not in sys.path:
     sys.path.insert(0, str(src_path))
 
-from PySide6.QtCore import QObject, Slot, QDir
+# Хронология запуска — отсчёт от этой точки
+from utils.startup_timeline import timeline
+
+from PySide6.QtCore import QObject, Slot, QDir, QTimer
 from PySide6.QtGui import QGuiApplication
 from PySide6.QtQml import QQmlApplicationEngine, qmlRegisterType
 
 # Repository Pattern
 from repositories.unit_of_work import UnitOfWork
-from utils.logger_config import setup_logging, get_logger
+from repositories.concurrency import RetryPolicy
+from repositories.backends import SqliteBackend
+from utils.logger_config import setup_logging_from_config, get_logger
 
 # Модели (обновленные)
 from items_model import ItemsModel
@@ -39,9 +44,30 @@ from item_documents_model import ItemDocumentsModel
 from config_manager import ConfigManager
 from file_manager import FileManager
 from auth_manager import AuthManager  # ← НОВОЕ
-
-# Настраиваем логирование
-setup_logging(log_level="DEBUG")
+from storage_verification_manager import StorageVerificationManager
+from database_backup import DatabaseBackup
+from database_backup_manager import DatabaseBackupManager
+from service_registry import ServiceRegistry
+from repositories.query_monitor import query_monitor
+from metrics_manager import MetricsManager
+
+timeline.mark("imports_done")
+
+# Переменные окружения (используются бенчмарком запуска benchmarks/startup_benchmark.py)
+# Путь к items.db или строка подключения PostgreSQL (postgresql://..., см. repositories/backends.py)
+ITEMS_DB_PATH = os.environ.get("PYTHONCODE_ITEMS_DB", "items.db")
+USERS_DB_PATH = os.environ.get("PYTHONCODE_USERS_DB", "users.db")
+# Путь к JSON с хронологией; если задан — приложение завершается после
+# первого кадра и всех отложенных загрузок (вход считается выполненным)
+STARTUP_BENCHMARK_OUTPUT = os.environ.get("PYTHONCODE_STARTUP_BENCHMARK")
+STARTUP_BENCHMARK_TIMEOUT_MS = 120000
+# Сбор метрик времени выполнения с запуска (иначе включается в отладочной панели, Ctrl+Shift+M)
+METRICS_ENABLED = os.environ.get("PYTHONCODE_METRICS") == "1"
+# Снимок items.db в памяти для чтения (или "database.read_snapshot" в config.json)
+READ_SNAPSHOT_ENABLED = os.environ.get("PYTHONCODE_READ_SNAPSHOT") == "1"
+
+# Настраиваем логирование (секция "logging" в config.json)
+setup_logging_from_config("config.json", default_level="DEBUG")
 logger = get_logger()
 
 
@@ -78,6 +104,29 @@ class Backend(QObject):
             logger.error(f"Error getting suppliers: {e}")
             return []
 
+    @Slot("QVariantList", result="QVariantMap")
+    def getSuppliersForItems(self, articles):
+        """Поставщики сразу для набора товаров (артикул → список), одним запросом."""
+        try:
+            suppliers_by_article = self.uow.suppliers.get_suppliers_for_items([str(a) for a in articles])
+            return {
+                article: [
+                    {
+                        "id": s.id,
+                        "name": s.name or "",
+                        "company": s.company,
+                        "email": s.email or "",
+                        "phone": s.phone or "",
+                        "website": s.website or ""
+                    }
+                    for s in suppliers
+                ]
+                for article, suppliers in suppliers_by_article.items()
+            }
+        except Exception as e:
+            logger.error(f"Error getting suppliers: {e}")
+            return {}
+
 
 class QMLConsoleHandler(QObject):
     """Обработчик console.log из QML."""
@@ -87,6 +136,25 @@ class QMLConsoleHandler(QObject):
         logger.debug(f"QML: {message}")
 
 
+def _setup_startup_benchmark(app: QGuiApplication, services: ServiceRegistry):
+    """
+    Режим бенчмарка запуска: вход считается выполненным, после первого кадра
+    и отложенных загрузок хронология сохраняется в JSON и приложение завершается.
+    """
+    def finish():
+        timeline.dump(STARTUP_BENCHMARK_OUTPUT)
+        logger.info(f"⏱️ Startup timeline saved: {STARTUP_BENCHMARK_OUTPUT}")
+        app.quit()
+
+    def timeout():
+        timeline.mark("benchmark_timeout")
+        finish()
+
+    services.deferredLoadsFinished.connect(finish)
+    QTimer.singleShot(STARTUP_BENCHMARK_TIMEOUT_MS, timeout)
+    services.notifyLoggedIn()
+
+
 def main():
     """Главная функция приложения."""
 
@@ -99,8 +167,9 @@ def main():
         os.environ["QT_QUICK_CONTROLS_STYLE"] = "FluentWinUI3"
 
         # Инициализация Qt
-        app = QGuiApplication(sys.argv)
-        engine = QQmlApplicationEngine()
+        with timeline.measure("qt_init"):
+            app = QGuiApplication(sys.argv)
+            engine = QQmlApplicationEngine()
         logger.success("✅ Qt initialized")
 
         # Текущая директория
@@ -108,65 +177,121 @@ def main():
         engine.rootContext().setContextProperty("applicationDirPath", current_dir)
 
         # Unit of Work (основная БД)
-        uow = UnitOfWork("items.db")
+        with timeline.measure("unit_of_work"):
+            uow = UnitOfWork(ITEMS_DB_PATH)
         logger.success("✅ Unit of Work created")
 
-        # === АВТОРИЗАЦИЯ ===
-        auth_manager = AuthManager("users.db")
-        engine.rootContext().setContextProperty("authManager", auth_manager)
-        logger.success("✅ AuthManager created")
-
         # Менеджеры
-        config_manager = ConfigManager("config.json")
-        file_manager = FileManager(config_manager)
-        logger.success("✅ Managers created")
-
-        # Обновленные модели
-        itemsModel = ItemsModel(uow.items)
-        categoriesModel = CategoriesModel(uow.categories)
-        suppliersModel = SuppliersModel(uow.suppliers)
-        logger.success("✅ Main models created")
-
-        # Модели спецификаций
-        specificationItemsModel = SpecificationItemsTableModel()
-        specificationsModel = SpecificationsModel(uow.specifications, specificationItemsModel)
-        logger.success("✅ Specification models created")
+        with timeline.measure("config_manager"):
+            config_manager = ConfigManager("config.json")
+        query_monitor.configure(slow_query_ms=config_manager.get("database.slow_query_ms"))
 
-        # Старые модели
-        proxyModel = FilterProxyModel()
-        proxyModel.setSourceModel(itemsModel)
+        # Несколько рабочих мест с одной БД: журнал, ожидание блокировок, повторы
+        try:
+            uow.configure_concurrency(
+                journal_mode=config_manager.get("database.journal_mode", "wal"),
+                busy_timeout_ms=config_manager.get("database.busy_timeout_ms", 5000),
+                retry_policy=RetryPolicy(
+                    attempts=config_manager.get("database.retry_attempts", 5),
+                    base_delay_ms=config_manager.get("database.retry_base_delay_ms", 50)
+                )
+            )
+        except Exception as e:
+            logger.error(f"❌ Database concurrency settings not applied: {e}")
 
-        suppliersTableModel = SuppliersTableModel(uow.suppliers)
-        logger.success("✅ SuppliersTableModel created")
+        # Снимок БД в памяти — для items.db на сетевом диске
+        items_on_sqlite = isinstance(uow.backend, SqliteBackend)
+        if (config_manager.get("database.read_snapshot") or READ_SNAPSHOT_ENABLED) and items_on_sqlite:
+            with timeline.measure("read_snapshot"):
+                uow.enable_read_snapshot(config_manager.get("database.snapshot_check_interval_s", 2.0))
 
-        item_suppliers_model = ItemSuppliersModel(uow.suppliers)
-        logger.success("✅ ItemSuppliersModel created")
+        # === АВТОРИЗАЦИЯ ===
+        # Нужна сразу — экран входа показывается первым
+        with timeline.measure("auth_manager"):
+            security_config = config_manager.getSetting("security") or {}
+            auth_manager = AuthManager(USERS_DB_PATH, hash_iterations=security_config.get("password_hash_iterations"))
+        engine.rootContext().setContextProperty("authManager", auth_manager)
+        logger.success("✅ AuthManager created")
 
-        itemDocumentsModel = ItemDocumentsModel(uow.documents)
-        logger.success("✅ ItemDocumentsModel created")
+        with timeline.measure("file_managers"):
+            file_manager = FileManager(config_manager, digests_repository=uow.file_digests)
+            storage_verification_manager = StorageVerificationManager(uow)
+            storage_verification_manager.setSchedule(StorageVerificationManager.DEFAULT_INTERVAL_HOURS)
+
+            backup_config = config_manager.getSetting("backup") or {}
+            backup_manager = DatabaseBackupManager(
+                # Сервер PostgreSQL копируется своими средствами (pg_dump)
+                {"items": ITEMS_DB_PATH, "users": USERS_DB_PATH} if items_on_sqlite else {"users": USERS_DB_PATH},
+                DatabaseBackup(
+                    backup_config.get("directory", "backups"),
+                    keep=backup_config.get("keep", 7),
+                    pages_per_step=backup_config.get("pages_per_step", 256),
+                    step_pause_ms=backup_config.get("step_pause_ms", 10)
+                )
+            )
+            backup_manager.setSchedule(backup_config.get("interval_hours", DatabaseBackupManager.DEFAULT_INTERVAL_HOURS))
+        logger.success("✅ Managers created")
 
-        logger.success("✅ Legacy models created")
+        # === МОДЕЛИ ===
+        # Создаются пустыми; данные загружаются реестром после входа
+        # и первого кадра (DEFERRED) или при первом обращении (ON_DEMAND)
+        services = ServiceRegistry()
+
+        with timeline.measure("models"):
+            itemsModel = ItemsModel(uow.items, autoload=False,
+                                    suppliers_repository=uow.suppliers,
+                                    documents_repository=uow.documents)
+            categoriesModel = CategoriesModel(uow.categories, autoload=False)
+            suppliersModel = SuppliersModel(uow.suppliers, autoload=False)
+
+            specificationItemsModel = SpecificationItemsTableModel(events=uow.events)
+            specificationsModel = SpecificationsModel(uow.specifications, specificationItemsModel)
+
+            proxyModel = FilterProxyModel(
+                filter_delay_ms=config_manager.get("filter_delay_ms", FilterProxyModel.DEFAULT_FILTER_DELAY_MS)
+            )
+            proxyModel.setSourceModel(itemsModel)
+
+            # SuppliersManagerDialog сам вызывает load()/loadForArticle() при открытии
+            suppliersTableModel = SuppliersTableModel(uow.suppliers, autoload=False)
+            item_suppliers_model = ItemSuppliersModel(uow.suppliers)
+            itemDocumentsModel = ItemDocumentsModel(uow.documents)
+        logger.success("✅ Models created (data loading deferred)")
+
+        services.register("sourceModel", itemsModel, itemsModel.loadData)
+        services.register("itemsModel", proxyModel)
+        services.register("categoryModel", categoriesModel, categoriesModel.loadCategories)
+        services.register("suppliersModel", suppliersModel, suppliersModel.loadSuppliers,
+                          policy=ServiceRegistry.ON_DEMAND)
+        services.register("specificationsModel", specificationsModel)
+        services.register("specificationItemsModel", specificationItemsModel)
+        services.register("suppliersTableModel", suppliersTableModel)
+        services.register("itemSuppliersModel", item_suppliers_model)
+        services.register("itemDocumentsModel", itemDocumentsModel)
+
+        # После восстановления items.db из резервной копии модели перечитываются
+        def on_database_restored(name):
+            if name == "items":
+                itemsModel.loadData()
+                categoriesModel.loadCategories()
+                suppliersModel.loadSuppliers()
+
+        backup_manager.databaseRestored.connect(on_database_restored)
 
         # Backend
         backend = Backend(uow)
         consoleHandler = QMLConsoleHandler()
+        metrics_manager = MetricsManager(enabled=METRICS_ENABLED)
 
         # Регистрация в QML
         engine.rootContext().setContextProperty("configManager", config_manager)
         engine.rootContext().setContextProperty("fileManager", file_manager)
+        engine.rootContext().setContextProperty("storageVerificationManager", storage_verification_manager)
+        engine.rootContext().setContextProperty("backupManager", backup_manager)
         engine.rootContext().setContextProperty("backend", backend)
         engine.rootContext().setContextProperty("consoleHandler", consoleHandler)
-
-        engine.rootContext().setContextProperty("sourceModel", itemsModel)
-        engine.rootContext().setContextProperty("itemsModel", proxyModel)
-        engine.rootContext().setContextProperty("categoryModel", categoriesModel)
-        engine.rootContext().setContextProperty("suppliersModel", suppliersModel)
-        engine.rootContext().setContextProperty("specificationsModel", specificationsModel)
-        engine.rootContext().setContextProperty("specificationItemsModel", specificationItemsModel)
-
-        engine.rootContext().setContextProperty("suppliersTableModel", suppliersTableModel)
-        engine.rootContext().setContextProperty("itemSuppliersModel", item_suppliers_model)
-        engine.rootContext().setContextProperty("itemDocumentsModel", itemDocumentsModel)
+        engine.rootContext().setContextProperty("metricsManager", metrics_manager)
+        services.register_context_properties(engine.rootContext())
         logger.success("✅ All objects registered")
 
         # Регистрация типов QML
@@ -192,12 +317,36 @@ def main():
 
         # Загрузка QML
         qml_file = os.path.join(os.path.dirname(__file__), "qml", "main.qml")
-        engine.load(qml_file)
+        with timeline.measure("qml_load"):
+            engine.load(qml_file)
 
         if not engine.rootObjects():
             logger.critical("❌ Failed to load QML!")
             return -1
 
+        # Отложенная загрузка данных: после входа и первого кадра
+        auth_manager.loginSuccessful.connect(services.notifyLoggedIn)
+        window = engine.rootObjects()[-1]
+        if hasattr(window, "frameSwapped"):
+            def on_first_frame():
+                window.frameSwapped.disconnect(on_first_frame)
+                services.notifyFirstFrame()
+
+            window.frameSwapped.connect(on_first_frame)
+        else:
+            services.notifyFirstFrame()
+
+        # Запись отложенной истории входов и настроек при завершении
+        app.aboutToQuit.connect(auth_manager.shutdown)
+        app.aboutToQuit.connect(config_manager.flush)
+        app.aboutToQuit.connect(proxyModel.flushSettings)
+        app.aboutToQuit.connect(metrics_manager.shutdown)
+        app.aboutToQuit.connect(uow.close)
+        app.aboutToQuit.connect(backup_manager.shutdown)
+
+        if STARTUP_BENCHMARK_OUTPUT:
+            _setup_startup_benchmark(app, services)
+
         logger.success("🎉 Application started successfully!")
         return app.exec()
 
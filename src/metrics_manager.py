@@ -0,0 +1,113 @@
+"""Метрики времени выполнения для QML (отладочная панель)
+
+Расположение: src/metrics_manager.py
+"""
+
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from PySide6.QtCore import QObject, Signal, Slot, Property
+
+from loguru import logger
+
+from utils.metrics import metrics
+from repositories.query_monitor import query_monitor
+
+
+class MetricsManager(QObject):
+    """
+    Доступ к реестру метрик (utils.metrics) из QML.
+
+    Используется отладочной панелью MetricsOverlay: включение/выключение
+    сбора, сводка по операциям и SQL-запросам, сброс и выгрузка в JSON
+    (папка reports).
+    """
+
+    # === Сигналы ===
+    enabledChanged = Signal()
+
+    def __init__(self, reports_dir: Optional[str] = None, enabled: bool = False, parent=None):
+        """
+        Инициализация менеджера.
+
+        Args:
+            reports_dir: Папка для JSON-выгрузок (по умолчанию — src/reports).
+            enabled: Включить сбор метрик (и мониторинг SQL-запросов) сразу.
+            parent: Родительский QObject.
+        """
+        super().__init__(parent)
+
+        self._reports_dir = Path(reports_dir) if reports_dir else Path(__file__).parent / "reports"
+        metrics.enabled = enabled
+        query_monitor.configure(enabled=enabled or query_monitor.strict)
+
+        if enabled:
+            logger.info("📈 Metrics collection enabled")
+
+    # === Свойства ===
+
+    def _get_enabled(self) -> bool:
+        return metrics.enabled
+
+    def _set_enabled(self, value: bool):
+        if metrics.enabled != value:
+            metrics.enabled = value
+            # Новые соединения открываются с обёрткой или без неё по этому флагу
+            query_monitor.configure(enabled=value or query_monitor.strict)
+            logger.info(f"📈 Metrics collection {'enabled' if value else 'disabled'}")
+            self.enabledChanged.emit()
+
+    enabled = Property(bool, _get_enabled, _set_enabled, notify=enabledChanged)
+
+    # === Слоты ===
+
+    @Slot(result="QVariantList")
+    def getSnapshot(self):
+        """Сводка по операциям (name, count, p50_ms, p95_ms, p99_ms, ...)."""
+        return metrics.snapshot()
+
+    @Slot(int, result="QVariantList")
+    def getQueryStats(self, limit: int = 20):
+        """Статистика SQL-запросов (sql, count, total_ms, mean_ms, max_ms, rows)."""
+        return query_monitor.statement_stats(limit)
+
+    @Slot()
+    def reset(self):
+        """Очищает накопленные метрики и статистику запросов."""
+        metrics.reset()
+        query_monitor.reset()
+        logger.info("📈 Metrics reset")
+
+    @Slot(result=str)
+    @Slot(str, result=str)
+    def dumpToFile(self, path: str = "") -> str:
+        """
+        Сохраняет сводку в JSON.
+
+        Args:
+            path: Путь к файлу (по умолчанию — reports/metrics_<время>.json).
+
+        Returns:
+            str: Путь к файлу или пустая строка при ошибке.
+        """
+        if not path:
+            file_name = f"metrics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            path = str(self._reports_dir / file_name)
+
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            metrics.dump(path, extra={"queries": query_monitor.statement_stats()})
+        except Exception as e:
+            logger.error(f"❌ Failed to dump metrics: {e}")
+            return ""
+
+        logger.success(f"✅ Metrics saved: {path}")
+        return path
+
+    @Slot()
+    def shutdown(self):
+        """При завершении приложения сохраняет метрики, если сбор был включён."""
+        if metrics.enabled and metrics.snapshot():
+            self.dumpToFile()
@@ -28,6 +28,7 @@ class Supplier:
     email: Optional[str] = None
     phone: Optional[str] = None
     website: Optional[str] = None
+    row_version: int = 0  # Версия записи (оптимистичная блокировка)
 
 
 @dataclass
@@ -59,6 +60,7 @@ class Specification:
     final_price: float = 0.0
     created_date: Optional[str] = None
     modified_date: Optional[str] = None
+    row_version: int = 0  # Версия записи (оптимистичная блокировка)
 
 
 @dataclass
@@ -78,4 +80,22 @@ class Document:
     item_article: str
     document_path: str
     document_name: Optional[str] = None
-    added_date: Optional[str] = None
\ No newline at end of file
+    added_date: Optional[str] = None
+
+@dataclass
+class FileDigest:
+    """Модель контрольной суммы файла хранилища."""
+    path: str
+    size: int
+    sha256: str
+    verified_at: Optional[str] = None
+
+
+@dataclass
+class FileFingerprint:
+    """Модель отпечатков файла для поиска дубликатов."""
+    path: str
+    size: int
+    mtime_ns: int
+    quick_hash: str
+    sha256: Optional[str] = None
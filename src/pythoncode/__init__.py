@@ -0,0 +1,6 @@
+"""Командная строка приложения: массовые операции без графического интерфейса
+
+    python -m pythoncode --help
+
+См. pythoncode.cli.
+"""
@@ -0,0 +1,12 @@
+"""Точка входа: python -m pythoncode"""
+
+import sys
+from pathlib import Path
+
+# Модули приложения лежат в src рядом с пакетом (запуск и не из папки src)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pythoncode.cli import main
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,655 @@
+"""Массовые операции над базой товаров из командной строки
+
+Работает через UnitOfWork и репозитории, без Qt — на сервере, по
+расписанию, на базах любого размера:
+
+    python -m pythoncode stats
+    python -m pythoncode import items.csv --batch-size 5000
+    python -m pythoncode import prices.csv --mode update
+    python -m pythoncode export items.jsonl --category "Резисторы"
+    python -m pythoncode reprice --percent 7.5 --category "Резисторы"
+    python -m pythoncode reindex
+    python -m pythoncode verify-files --output report.json
+    python -m pythoncode vacuum
+    python -m pythoncode migrate
+    python -m pythoncode migrate-paths --base-path /srv/app/src
+
+База — --db или переменная PYTHONCODE_ITEMS_DB, как у приложения
+(файл SQLite или postgresql://...).
+
+Длинные операции (import, export, reprice) идут частями по --batch-size
+записей, каждая часть — своя короткая транзакция: приложение на других
+рабочих местах продолжает работать. Прогресс печатается в stderr, итог —
+JSON в stdout. Ctrl+C (SIGTERM) останавливает работу после текущей части,
+итог содержит место для продолжения (--after / --skip); повторный Ctrl+C
+прерывает сразу.
+
+Коды возврата: 0 — успешно, 1 — есть отклонённые записи, конфликты или
+проблемы с файлами, 2 — ошибка параметров, 130 — остановлено.
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from contextlib import contextmanager, redirect_stdout
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from loguru import logger
+
+from models.dto import Category, Item
+from repositories.concurrency import DEFAULT_BUSY_TIMEOUT_MS
+from repositories.items_repository import ITEM_FIELDS
+from repositories.unit_of_work import UnitOfWork
+from validators import (validate_article, validate_category, validate_description, validate_image_path,
+                        validate_name, validate_price, validate_stock)
+
+# Папка src: относительно неё хранятся пути изображений и документов
+SRC_DIR = Path(__file__).resolve().parent.parent
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Не чаще одной строки прогресса в интервал, с
+PROGRESS_INTERVAL_S = 5.0
+
+# Столбцы файлов импорта и экспорта (категория — по имени)
+FILE_FIELDS = ("article", "name", "description", "image_path", "category", "price",
+               "stock", "status", "unit", "manufacturer", "document")
+EXPORT_FIELDS = FILE_FIELDS + ("created_date", "row_version")
+
+# Имя категории в кортежах товаров без категории (ItemsRepository.get_all)
+NO_CATEGORY = "Без категории"
+
+EXIT_OK = 0
+EXIT_PROBLEMS = 1
+EXIT_USAGE = 2
+EXIT_INTERRUPTED = 130
+
+
+class CliError(Exception):
+    """Ошибка параметров команды (код возврата 2)."""
+
+
+def _status(message: str):
+    """Строка прогресса или предупреждения в stderr (stdout — для результата)."""
+    print(message, file=sys.stderr, flush=True)
+
+
+class _Progress:
+    """Строки прогресса длинной операции — не чаще раза в interval секунд."""
+
+    def __init__(self, command: str, total: Optional[int] = None, interval: float = PROGRESS_INTERVAL_S):
+        self.command = command
+        self.total = total
+        self.interval = interval
+        self._started = time.monotonic()
+        self._last = self._started
+
+    def update(self, done: int, force: bool = False, **details):
+        now = time.monotonic()
+        if not force and now - self._last < self.interval:
+            return
+        self._last = now
+        rate = done / max(now - self._started, 1e-9)
+        total = f"/{self.total}" if self.total else ""
+        extra = "".join(f" {key}={value}" for key, value in details.items() if value is not None)
+        _status(f"{self.command}: {done}{total} ({rate:.0f}/s){extra}")
+
+    @property
+    def elapsed_sec(self) -> float:
+        return round(time.monotonic() - self._started, 3)
+
+
+def _install_stop_handler() -> threading.Event:
+    """
+    Ctrl+C и SIGTERM — мягкая остановка: флаг проверяется между частями.
+
+    Повторный сигнал прерывает работу сразу (KeyboardInterrupt).
+    """
+    stop = threading.Event()
+    main_pid = os.getpid()
+
+    def handler(signum, frame):
+        if os.getpid() != main_pid:
+            # Процессы пула (verify-files) наследуют обработчик: останавливает главный
+            return
+        if stop.is_set():
+            raise KeyboardInterrupt
+        stop.set()
+        _status("Stopping after the current batch (press Ctrl+C again to abort now)...")
+
+    signal.signal(signal.SIGINT, handler)
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, handler)
+    return stop
+
+
+def _detect_format(path: str, requested: Optional[str]) -> str:
+    if requested:
+        return requested
+    return "jsonl" if path.lower().endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+
+def _categories(uow: UnitOfWork) -> Tuple[Dict[str, Category], Dict[int, Category]]:
+    """Категории по имени (без учёта регистра) и по id."""
+    categories = uow.categories.get_all()
+    return {c.name.casefold(): c for c in categories}, {c.id: c for c in categories}
+
+
+def _category_id(uow: UnitOfWork, name: Optional[str]) -> Optional[int]:
+    """id категории по имени из параметра --category (None — все товары)."""
+    if not name:
+        return None
+    by_name, _ = _categories(uow)
+    category = by_name.get(name.casefold())
+    if category is None:
+        raise CliError(f"Unknown category: {name}")
+    return category.id
+
+
+# === Импорт ===
+
+def _read_records(path: str, file_format: str, delimiter: str) -> Iterator[Tuple[int, Optional[Dict], str]]:
+    """
+    Записи файла импорта по одной (файл не читается в память целиком).
+
+    Yields:
+        Tuple[int, Optional[Dict], str]: (номер записи, запись или None, ошибка чтения).
+    """
+    if path == "-":
+        stream = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8-sig", newline="")
+    else:
+        stream = open(path, encoding="utf-8-sig", newline="")
+
+    with stream:
+        if file_format == "csv":
+            for number, row in enumerate(csv.DictReader(stream, delimiter=delimiter), 1):
+                yield number, row, ""
+            return
+
+        number = 0
+        for line in stream:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield number, None, f"Некорректный JSON: {e}"
+                continue
+            if isinstance(record, dict):
+                yield number, record, ""
+            else:
+                yield number, None, "Запись должна быть объектом JSON"
+
+
+def _parse_record(record: Dict[str, Any], by_name: Dict[str, Category], by_id: Dict[int, Category],
+                  complete: bool) -> Tuple[Item, Set[str]]:
+    """
+    Товар из записи файла импорта.
+
+    Args:
+        record: Запись (столбцы FILE_FIELDS; вместо category можно category_id).
+        by_name: Категории по имени в нижнем регистре.
+        by_id: Категории по id.
+        complete: Запись описывает товар целиком (добавление): название и
+            категория обязательны. Иначе проверяются только заданные поля.
+
+    Returns:
+        Tuple[Item, Set[str]]: Товар и заданные в записи поля (имена ITEM_FIELDS).
+
+    Raises:
+        ValueError: Запись не прошла проверку (текст — для отчёта).
+    """
+    values = {
+        str(key).strip().lower(): "" if value is None else str(value).strip()
+        for key, value in record.items() if key is not None
+    }
+    present = {field for field in values if field in FILE_FIELDS}
+
+    category_id = None
+    if values.get("category"):
+        category = by_name.get(values["category"].casefold())
+        if category is None:
+            raise ValueError(f"Неизвестная категория: {values['category']}")
+        category_id = category.id
+    elif values.get("category_id"):
+        try:
+            category_id = int(values["category_id"])
+        except ValueError:
+            raise ValueError(f"Некорректный category_id: {values['category_id']}") from None
+        if category_id not in by_id:
+            raise ValueError(f"Категория {category_id} не найдена")
+    if "category_id" in values:
+        present.add("category")
+
+    # Десятичная запятая и пробелы-разделители разрядов (файлы из Excel)
+    price = values.get("price", "").replace(" ", "").replace("\u00a0", "").replace(",", ".")
+    stock = values.get("stock", "").replace(" ", "").replace("\u00a0", "")
+
+    checks = [
+        validate_description(values.get("description")),
+        validate_image_path(values.get("image_path")),
+        validate_price(price),
+        validate_stock(stock),
+    ]
+    if values.get("article"):
+        checks.append(validate_article(values["article"]))
+    if complete or "name" in present:
+        checks.append(validate_name(values.get("name")))
+    if complete or "category" in present:
+        checks.append(validate_category(category_id))
+    for is_valid, error_message in checks:
+        if not is_valid:
+            raise ValueError(error_message)
+
+    item = Item(
+        article=values.get("article", ""),
+        name=values.get("name", ""),
+        description=values.get("description", ""),
+        image_path=values.get("image_path", ""),
+        category_id=category_id,
+        price=float(price) if price else 0.0,
+        stock=int(stock) if stock else 0,
+        status=values.get("status") or 'в наличии',
+        unit=values.get("unit") or 'шт.',
+        manufacturer=values.get("manufacturer", ""),
+        document=values.get("document", "")
+    )
+    fields = {"category_id" if field == "category" else field for field in present}
+    return item, fields
+
+
+def _write_batch(uow: UnitOfWork, batch: List[Tuple[Item, Set[str]]], mode: str) -> Tuple[int, int]:
+    """Записывает часть импорта; товарам без артикула выделяются артикулы категории."""
+    without_article: Dict[int, List[Item]] = {}
+    for item, _ in batch:
+        if not item.article:
+            without_article.setdefault(item.category_id, []).append(item)
+    for category_id, items in without_article.items():
+        for item, sku in zip(items, uow.categories.reserve_skus(category_id, len(items))):
+            item.article = sku
+
+    # Существующим товарам меняются только поля своей записи: записи с разным
+    # набором полей (JSON Lines) пишутся отдельными вызовами
+    groups: Dict[Tuple[str, ...], List[Item]] = {}
+    for item, item_fields in batch:
+        # Без артикула (категорию удалили во время импорта) — пропускаются
+        if item.article:
+            key = tuple(field for field in ITEM_FIELDS if field in item_fields)
+            groups.setdefault(key, []).append(item)
+
+    added = updated = 0
+    for fields, items in groups.items():
+        group_added, group_updated = uow.items.upsert_many(
+            items,
+            insert=mode != "update",
+            overwrite=mode != "insert",
+            fields=fields
+        )
+        added += group_added
+        updated += group_updated
+    return added, updated
+
+
+def cmd_import(uow: UnitOfWork, args, stop: threading.Event, summary: Dict) -> int:
+    """Импорт товаров из CSV или JSON Lines."""
+    file_format = _detect_format(args.path, args.format)
+    by_name, by_id = _categories(uow)
+    complete = args.mode != "update"
+
+    summary.update({"read": 0, "added": 0, "updated": 0, "skipped": 0, "rejected": 0,
+                    "dry_run": args.dry_run})
+    progress = _Progress("import")
+    batch: List[Tuple[Item, Set[str]]] = []
+
+    def flush(number: int):
+        if batch and not args.dry_run:
+            added, updated = _write_batch(uow, batch, args.mode)
+            summary["added"] += added
+            summary["updated"] += updated
+            summary["skipped"] += len(batch) - added - updated
+        batch.clear()
+        # Записи до number включительно сохранены
+        summary["resume"] = f"--skip {number}"
+
+    number = args.skip
+    for number, record, error in _read_records(args.path, file_format, args.delimiter):
+        if number <= args.skip:
+            continue
+        summary["read"] += 1
+        try:
+            if error:
+                raise ValueError(error)
+            item, fields = _parse_record(record, by_name, by_id, complete)
+            if not item.article and not complete:
+                raise ValueError("Артикул не может быть пустым")
+            batch.append((item, fields))
+        except ValueError as e:
+            summary["rejected"] += 1
+            _status(f"import: record {number} rejected: {e}")
+
+        if len(batch) >= args.batch_size:
+            flush(number)
+            progress.update(summary["read"], record=number)
+            if stop.is_set():
+                return EXIT_INTERRUPTED
+
+    flush(number)
+    del summary["resume"]
+    summary["elapsed_sec"] = progress.elapsed_sec
+    return EXIT_PROBLEMS if summary["rejected"] else EXIT_OK
+
+
+# === Экспорт ===
+
+def _export_record(row: Tuple) -> Dict[str, Any]:
+    """Запись файла экспорта из кортежа товара (формат импорта + дата и версия)."""
+    return {
+        "article": row[0],
+        "name": row[1],
+        "description": row[2] or "",
+        "image_path": row[3] or "",
+        "category": "" if row[4] == NO_CATEGORY else row[4],
+        "price": row[5],
+        "stock": row[6],
+        "status": row[8] or "",
+        "unit": row[9] or "",
+        "manufacturer": row[10] or "",
+        "document": row[11] or "",
+        "created_date": row[7] or "",
+        "row_version": row[12],
+    }
+
+
+@contextmanager
+def _output(path: str, append: bool, encoding: str):
+    """Файл результата или stdout ('-')."""
+    if path == "-":
+        yield sys.stdout
+        return
+    with open(path, "a" if append else "w", encoding=encoding, newline="") as stream:
+        yield stream
+
+
+def cmd_export(uow: UnitOfWork, args, stop: threading.Event, summary: Dict) -> int:
+    """Экспорт товаров в CSV или JSON Lines частями (файл пишется по мере чтения)."""
+    file_format = _detect_format(args.path, args.format)
+    category_id = _category_id(uow, args.category)
+    append = args.after is not None
+    # BOM — чтобы Excel открыл CSV в UTF-8; при дозаписи он уже есть
+    encoding = "utf-8-sig" if file_format == "csv" and not append else "utf-8"
+
+    summary["exported"] = 0
+    progress = _Progress("export")
+
+    with _output(args.path, append, encoding) as stream:
+        writer = None
+        if file_format == "csv":
+            writer = csv.DictWriter(stream, fieldnames=EXPORT_FIELDS, delimiter=args.delimiter)
+            if not append:
+                writer.writeheader()
+
+        for batch in uow.items.iter_batches(args.batch_size, args.after, category_id):
+            for row in batch:
+                record = _export_record(row)
+                if writer is not None:
+                    writer.writerow(record)
+                else:
+                    stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+            stream.flush()
+
+            summary["exported"] += len(batch)
+            summary["resume"] = f"--after {batch[-1][0]}"
+            progress.update(summary["exported"], last=batch[-1][0])
+            if stop.is_set():
+                return EXIT_INTERRUPTED
+
+    summary.pop("resume", None)
+    summary["elapsed_sec"] = progress.elapsed_sec
+    return EXIT_OK
+
+
+# === Переоценка ===
+
+def cmd_reprice(uow: UnitOfWork, args, stop: threading.Event, summary: Dict) -> int:
+    """Изменение цен на процент или в factor раз, частями с проверкой версий."""
+    factor = args.factor if args.factor is not None else 1 + args.percent / 100
+    if factor < 0:
+        raise CliError("Price factor must not be negative")
+    category_id = _category_id(uow, args.category)
+
+    summary.update({"factor": factor, "checked": 0, "repriced": 0, "conflicts": 0, "dry_run": args.dry_run})
+    progress = _Progress("reprice")
+
+    for batch in uow.items.iter_batches(args.batch_size, args.after, category_id):
+        prices = []
+        for row in batch:
+            price = round(row[5] * factor, args.round)
+            if price != row[5]:
+                prices.append((row[0], price, row[12]))
+
+        conflicts = [] if args.dry_run or not prices else uow.items.set_prices(prices)
+        for article in conflicts:
+            _status(f"reprice: {article} skipped: changed by another user during reprice")
+
+        summary["checked"] += len(batch)
+        summary["repriced"] += len(prices) - len(conflicts)
+        summary["conflicts"] += len(conflicts)
+        summary["resume"] = f"--after {batch[-1][0]}"
+        progress.update(summary["checked"], last=batch[-1][0])
+        if stop.is_set():
+            return EXIT_INTERRUPTED
+
+    summary.pop("resume", None)
+    summary["elapsed_sec"] = progress.elapsed_sec
+    return EXIT_PROBLEMS if summary["conflicts"] else EXIT_OK
+
+
+# === Обслуживание ===
+
+def cmd_verify_files(uow: UnitOfWork, args, stop: threading.Event, summary: Dict) -> int:
+    """Проверка файлового хранилища (storage_verifier); отчёт — JSON."""
+    from storage_verifier import StorageVerifier
+
+    verifier = StorageVerifier(
+        uow,
+        args.base_path,
+        max_workers=args.workers,
+        work_hours=None if args.no_throttle else (8, 19)
+    )
+    progress = _Progress("verify-files")
+
+    def on_progress(done: int, total: int):
+        progress.total = total
+        progress.update(done)
+
+    report = verifier.verify(progress=on_progress, cancel_event=stop)
+
+    if args.output != "-":
+        StorageVerifier.write_report(report, args.output)
+        # В stdout — только количество проблем, списки — в файле отчёта
+        report = {key: len(value) if isinstance(value, list) else value for key, value in report.items()}
+        report["report"] = args.output
+    summary.update(report)
+
+    if report["cancelled"]:
+        return EXIT_INTERRUPTED
+    problems = report["missing"] or report["corrupt"] or report["mismatched"]
+    return EXIT_PROBLEMS if problems else EXIT_OK
+
+
+def cmd_reindex(uow: UnitOfWork, args, stop: threading.Event, summary: Dict) -> int:
+    """Перестроение индексов и статистики планировщика."""
+    started = time.monotonic()
+    uow.reindex()
+    summary["elapsed_sec"] = round(time.monotonic() - started, 3)
+    return EXIT_OK
+
+
+def cmd_vacuum(uow: UnitOfWork, args, stop: threading.Event, summary: Dict) -> int:
+    """Сжатие базы данных."""
+    started = time.monotonic()
+    summary["freed_bytes"] = uow.vacuum()
+    summary["size_bytes"] = uow.backend.size_bytes()
+    summary["elapsed_sec"] = round(time.monotonic() - started, 3)
+    return EXIT_OK
+
+
+def cmd_migrate(uow: UnitOfWork, args, stop: threading.Event, summary: Dict) -> int:
+    """Миграции данных (перенос документов товаров в item_documents)."""
+    summary["documents_migrated"] = uow.migrate_documents()
+    return EXIT_OK
+
+
+def cmd_migrate_paths(uow: UnitOfWork, args, stop: threading.Event, summary: Dict) -> int:
+    """Перенос файлов товаров со старыми путями в хранилище files (FileManager.migrate_old_paths)."""
+    from config_manager import ConfigManager
+    from file_manager import FileManager
+
+    base_path = Path(args.base_path)
+    # Отладочный вывод FileManager — в stderr, stdout только для итога
+    with redirect_stdout(sys.stderr):
+        file_manager = FileManager(ConfigManager(str(base_path / "config.json")), str(base_path),
+                                   digests_repository=uow.file_digests)
+        images, documents = file_manager.migrate_old_paths(uow, max_workers=args.workers,
+                                                           batch_size=args.batch_size)
+
+    summary["images_migrated"] = images
+    summary["documents_migrated"] = documents
+    # Контрольная точка остаётся, если миграция прервана ошибкой: повторный запуск продолжит
+    checkpoint = Path(file_manager.filesRootPath) / FileManager.MIGRATION_CHECKPOINT_FILE
+    summary["checkpoint_kept"] = checkpoint.exists()
+    return EXIT_PROBLEMS if summary["checkpoint_kept"] else EXIT_OK
+
+
+def cmd_stats(uow: UnitOfWork, args, stop: threading.Event, summary: Dict) -> int:
+    """Статистика базы данных."""
+    summary.update(uow.stats())
+    return EXIT_OK
+
+
+# === Разбор параметров ===
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("must be a positive integer")
+    return number
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m pythoncode",
+        description="Массовые операции над базой товаров без графического интерфейса"
+    )
+    parser.add_argument("--db", default=os.environ.get("PYTHONCODE_ITEMS_DB", "items.db"),
+                        help="База товаров: файл SQLite или postgresql://... (PYTHONCODE_ITEMS_DB)")
+    parser.add_argument("--busy-timeout-ms", type=int, default=DEFAULT_BUSY_TIMEOUT_MS,
+                        help="Ожидание блокировки, занятой другими экземплярами, мс")
+    parser.add_argument("--log-level", default="WARNING", help="Уровень журнала в stderr (INFO, DEBUG...)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser(
+        "import", help="Импорт товаров из CSV или JSON Lines",
+        description="Столбцы: " + ", ".join(FILE_FIELDS) + " (category — имя категории "
+                    "или category_id). Без артикула товару выделяется артикул категории."
+    )
+    import_parser.add_argument("path", help="Файл ('-' — stdin)")
+    import_parser.add_argument("--format", choices=("csv", "jsonl"), help="По умолчанию — по расширению")
+    import_parser.add_argument("--delimiter", default=",", help="Разделитель CSV")
+    import_parser.add_argument(
+        "--mode", choices=("upsert", "insert", "update"), default="upsert",
+        help="upsert — добавить новые и обновить существующие; insert — только добавить; "
+             "update — только обновить (достаточно article и меняемых столбцов)"
+    )
+    import_parser.add_argument("--batch-size", type=_positive_int, default=DEFAULT_BATCH_SIZE)
+    import_parser.add_argument("--skip", type=int, default=0, help="Пропустить первые N записей (продолжение)")
+    import_parser.add_argument("--dry-run", action="store_true", help="Только проверить записи")
+    import_parser.set_defaults(handler=cmd_import)
+
+    export_parser = commands.add_parser("export", help="Экспорт товаров в CSV или JSON Lines")
+    export_parser.add_argument("path", help="Файл ('-' — stdout)")
+    export_parser.add_argument("--format", choices=("csv", "jsonl"), help="По умолчанию — по расширению")
+    export_parser.add_argument("--delimiter", default=",", help="Разделитель CSV")
+    export_parser.add_argument("--category", help="Только товары категории")
+    export_parser.add_argument("--batch-size", type=_positive_int, default=DEFAULT_BATCH_SIZE)
+    export_parser.add_argument("--after", help="Продолжить после артикула (дозапись в файл)")
+    export_parser.set_defaults(handler=cmd_export)
+
+    reprice_parser = commands.add_parser("reprice", help="Изменить цены на процент или в N раз")
+    change = reprice_parser.add_mutually_exclusive_group(required=True)
+    change.add_argument("--percent", type=float, help="Наценка, %% (отрицательная — скидка)")
+    change.add_argument("--factor", type=float, help="Множитель цены")
+    reprice_parser.add_argument("--category", help="Только товары категории")
+    reprice_parser.add_argument("--round", type=int, default=2, help="Знаков после запятой")
+    reprice_parser.add_argument("--batch-size", type=_positive_int, default=DEFAULT_BATCH_SIZE)
+    reprice_parser.add_argument("--after", help="Продолжить после артикула")
+    reprice_parser.add_argument("--dry-run", action="store_true", help="Только посчитать")
+    reprice_parser.set_defaults(handler=cmd_reprice)
+
+    verify_parser = commands.add_parser("verify-files", help="Проверить файлы изображений и документов")
+    verify_parser.add_argument("--base-path", default=str(SRC_DIR), help="Папка src")
+    verify_parser.add_argument("--output", default="-", help="Файл отчёта JSON ('-' — stdout)")
+    verify_parser.add_argument("--workers", type=int, default=None, help="Количество процессов")
+    verify_parser.add_argument("--no-throttle", action="store_true", help="Не ограничивать нагрузку в рабочее время")
+    verify_parser.set_defaults(handler=cmd_verify_files)
+
+    commands.add_parser("reindex", help="Перестроить индексы и статистику").set_defaults(handler=cmd_reindex)
+    commands.add_parser("vacuum", help="Сжать базу данных").set_defaults(handler=cmd_vacuum)
+    commands.add_parser("migrate", help="Выполнить миграции данных").set_defaults(handler=cmd_migrate)
+    paths_parser = commands.add_parser("migrate-paths", help="Перенести файлы со старыми путями в хранилище")
+    paths_parser.add_argument("--base-path", default=str(SRC_DIR), help="Папка src (config.json и files)")
+    paths_parser.add_argument("--workers", type=_positive_int, default=4, help="Потоков копирования")
+    paths_parser.add_argument("--batch-size", type=_positive_int, default=500)
+    paths_parser.set_defaults(handler=cmd_migrate_paths)
+
+    commands.add_parser("stats", help="Статистика базы данных").set_defaults(handler=cmd_stats)
+    return parser
+
+
+def main(argv=None) -> int:
+    """
+    Точка входа командной строки (коды возврата — в описании модуля).
+
+    Итог команды печатается и при ошибке: в нём место для продолжения (resume).
+    """
+    args = build_parser().parse_args(argv)
+
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level.upper(),
+               format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}")
+
+    stop = _install_stop_handler()
+    summary: Dict[str, Any] = {"command": args.command}
+    uow = UnitOfWork(args.db)
+    try:
+        uow.configure_concurrency(busy_timeout_ms=args.busy_timeout_ms)
+        code = args.handler(uow, args, stop, summary)
+    except CliError as e:
+        _status(f"error: {e}")
+        return EXIT_USAGE
+    except KeyboardInterrupt:
+        summary["error"] = "aborted"
+        code = EXIT_INTERRUPTED
+    except BrokenPipeError:
+        # Читатель stdout закрыл поток (export - | head)
+        summary["error"] = "output closed"
+        code = EXIT_PROBLEMS
+    except Exception as e:
+        logger.exception(f"❌ Command {args.command} failed")
+        summary["error"] = str(e)
+        code = EXIT_PROBLEMS
+    finally:
+        uow.close()
+
+    # Экспорт в stdout: итог — в stderr, чтобы не смешивать с данными
+    output = sys.stderr if args.command == "export" and args.path == "-" else sys.stdout
+    print(json.dumps(summary, ensure_ascii=False, indent=2, default=str), file=output, flush=True)
+    return code
@@ -69,6 +69,20 @@ Rectangle {
                     text = itemsModel.filterString
                 }
             }
+
+            // Индикатор: поиск ожидает применения (задержка filterDelay)
+            rightPadding: searchBusyIndicator.visible ? searchBusyIndicator.width + 12 : leftPadding
+
+            BusyIndicator {
+                id: searchBusyIndicator
+                anchors.right: parent.right
+                anchors.rightMargin: 6
+                anchors.verticalCenter: parent.verticalCenter
+                height: parent.height * 0.6
+                width: height
+                running: typeof itemsModel !== "undefined" && itemsModel && itemsModel.filtering
+                visible: running
+            }
         }
 
         // Выбор поля фильтрации
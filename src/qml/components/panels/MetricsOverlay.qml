@@ -0,0 +1,209 @@
+// qml/components/panels/MetricsOverlay.qml
+// Отладочная панель метрик времени выполнения (Ctrl+Shift+M)
+import QtQuick
+import QtQuick.Controls
+import QtQuick.Layouts
+import "../../styles"
+
+Rectangle {
+    id: metricsOverlay
+
+    width: 620
+    height: Math.min(560, parent ? parent.height - 40 : 560)
+    color: "#E6202830"
+    radius: Theme.smallRadius
+    visible: false
+    z: 1000
+
+    property var operations: []
+    property var queries: []
+
+    function refresh() {
+        if (typeof metricsManager !== "undefined" && metricsManager) {
+            operations = metricsManager.getSnapshot()
+            queries = metricsManager.getQueryStats(10)
+        }
+    }
+
+    function toggle() {
+        visible = !visible
+        if (visible) {
+            refresh()
+        }
+    }
+
+    // Обновление раз в секунду, только пока панель открыта
+    Timer {
+        interval: 1000
+        repeat: true
+        running: metricsOverlay.visible
+        onTriggered: metricsOverlay.refresh()
+    }
+
+    ColumnLayout {
+        anchors.fill: parent
+        anchors.margins: 10
+        spacing: 6
+
+        RowLayout {
+            Layout.fillWidth: true
+            spacing: 8
+
+            Text {
+                text: "Метрики"
+                color: "white"
+                font.bold: true
+                font.pixelSize: 14
+                Layout.fillWidth: true
+            }
+
+            CheckBox {
+                id: enabledCheckBox
+                text: "Сбор"
+                checked: typeof metricsManager !== "undefined" && metricsManager && metricsManager.enabled
+                onToggled: metricsManager.enabled = checked
+
+                contentItem: Text {
+                    text: enabledCheckBox.text
+                    color: "white"
+                    leftPadding: enabledCheckBox.indicator.width + 4
+                    verticalAlignment: Text.AlignVCenter
+                }
+            }
+
+            Button {
+                text: "Сбросить"
+                focusPolicy: Qt.NoFocus
+                onClicked: {
+                    metricsManager.reset()
+                    metricsOverlay.refresh()
+                }
+            }
+
+            Button {
+                text: "Сохранить JSON"
+                focusPolicy: Qt.NoFocus
+                onClicked: {
+                    var path = metricsManager.dumpToFile()
+                    statusText.text = path ? "Сохранено: " + path : "Ошибка сохранения"
+                }
+            }
+
+            Button {
+                text: "✕"
+                focusPolicy: Qt.NoFocus
+                onClicked: metricsOverlay.visible = false
+            }
+        }
+
+        // Заголовок таблицы
+        RowLayout {
+            Layout.fillWidth: true
+            spacing: 4
+
+            Repeater {
+                model: ["Операция", "Вызовы", "p50, мс", "p95, мс", "p99, мс", "Всего, мс"]
+                Text {
+                    text: modelData
+                    color: "#bdc3c7"
+                    font.pixelSize: 11
+                    font.bold: true
+                    Layout.preferredWidth: index === 0 ? 220 : 70
+                    horizontalAlignment: index === 0 ? Text.AlignLeft : Text.AlignRight
+                }
+            }
+        }
+
+        ListView {
+            Layout.fillWidth: true
+            Layout.fillHeight: true
+            clip: true
+            model: metricsOverlay.operations
+
+            delegate: RowLayout {
+                width: ListView.view.width
+                spacing: 4
+
+                Text {
+                    text: modelData.name
+                    color: "white"
+                    font.pixelSize: 11
+                    elide: Text.ElideLeft
+                    Layout.preferredWidth: 220
+                }
+
+                Repeater {
+                    model: [modelData.count, modelData.p50_ms, modelData.p95_ms, modelData.p99_ms, modelData.total_ms]
+                    Text {
+                        text: index === 0 ? modelData : Number(modelData).toFixed(3)
+                        color: "white"
+                        font.pixelSize: 11
+                        font.family: "monospace"
+                        horizontalAlignment: Text.AlignRight
+                        Layout.preferredWidth: 70
+                    }
+                }
+            }
+
+            Text {
+                anchors.centerIn: parent
+                visible: metricsOverlay.operations.length === 0
+                text: enabledCheckBox.checked ? "Нет данных" : "Сбор метрик выключен"
+                color: "#bdc3c7"
+            }
+        }
+
+        // SQL-запросы (repositories.query_monitor), по суммарному времени
+        Text {
+            text: "SQL (всего мс / вызовы / строки)"
+            color: "#bdc3c7"
+            font.pixelSize: 11
+            font.bold: true
+        }
+
+        ListView {
+            Layout.fillWidth: true
+            Layout.preferredHeight: 150
+            clip: true
+            model: metricsOverlay.queries
+
+            delegate: RowLayout {
+                width: ListView.view.width
+                spacing: 4
+
+                Text {
+                    text: Number(modelData.total_ms).toFixed(1) + " / " + modelData.count + " / " + modelData.rows
+                    color: "white"
+                    font.pixelSize: 11
+                    font.family: "monospace"
+                    Layout.preferredWidth: 150
+                }
+
+                Text {
+                    text: modelData.sql
+                    color: "white"
+                    font.pixelSize: 11
+                    elide: Text.ElideRight
+                    Layout.fillWidth: true
+
+                    ToolTip.visible: sqlMouseArea.containsMouse
+                    ToolTip.text: modelData.sql
+
+                    MouseArea {
+                        id: sqlMouseArea
+                        anchors.fill: parent
+                        hoverEnabled: true
+                    }
+                }
+            }
+        }
+
+        Text {
+            id: statusText
+            Layout.fillWidth: true
+            color: "#bdc3c7"
+            font.pixelSize: 10
+            elide: Text.ElideMiddle
+        }
+    }
+}
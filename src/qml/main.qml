@@ -12,6 +12,7 @@ import "components/dialogs/suppliers"
 import "components/dialogs/system"
 import "components/dialogs/items"
 import "components/dialogs/specifications"
+import "components/panels"
 
 ApplicationWindow {
     id: mainWindow
@@ -54,6 +55,19 @@ ApplicationWindow {
         if (itemsModel && itemsModel.errorOccurred) {
             itemsModel.errorOccurred.connect(handleError)
         }
+        // Запись изменена на другом рабочем месте — данные уже перечитаны
+        if (sourceModel && sourceModel.conflictDetected) {
+            sourceModel.conflictDetected.connect(handleError)
+        }
+        if (suppliersModel && suppliersModel.conflictDetected) {
+            suppliersModel.conflictDetected.connect(handleError)
+        }
+        if (suppliersTableModel && suppliersTableModel.conflictDetected) {
+            suppliersTableModel.conflictDetected.connect(handleError)
+        }
+        if (specificationsModel && specificationsModel.conflictDetected) {
+            specificationsModel.conflictDetected.connect(handleError)
+        }
     }
 
     function handleError(message) {
@@ -287,6 +301,23 @@ ApplicationWindow {
         }
     }
 
+    // ========================================
+    // ОТЛАДОЧНАЯ ПАНЕЛЬ МЕТРИК (Ctrl+Shift+M)
+    // ========================================
+
+    MetricsOverlay {
+        id: metricsOverlay
+        anchors.top: parent.top
+        anchors.right: parent.right
+        anchors.margins: 20
+    }
+
+    Shortcut {
+        sequence: "Ctrl+Shift+M"
+        context: Qt.ApplicationShortcut
+        onActivated: metricsOverlay.toggle()
+    }
+
     // ========================================
     // SHARED DIALOGS
     // ========================================
@@ -218,8 +218,12 @@ Item {
                 Layout.fillWidth: true
                 Layout.preferredHeight: 50
                 Layout.topMargin: 8
-                text: "Войти"
-                enabled: userComboBox.editText.trim() !== "" && passwordField.text !== ""
+                text: loginInProgress ? "Вход..." : "Войти"
+                enabled: userComboBox.editText.trim() !== "" && passwordField.text !== "" && !loginInProgress
+
+                // Вход выполняется асинхронно, результат — сигналами authManager
+                readonly property bool loginInProgress: typeof authManager !== "undefined"
+                                                        && authManager && authManager.loginInProgress
 
                 background: Rectangle {
                     radius: Theme.defaultRadius
@@ -245,14 +249,10 @@ Item {
                 onClicked: {
                     if (typeof authManager !== "undefined" && authManager) {
                         errorMessage.text = ""
-                        var success = authManager.login(
+                        authManager.login(
                             userComboBox.editText.trim(),
                             passwordField.text
                         )
-                        if (success) {
-                            passwordField.text = ""
-                            root.loginSuccessful()
-                        }
                     } else {
                         errorMessage.text = "Ошибка: AuthManager не инициализирован"
                     }
@@ -276,6 +276,11 @@ Item {
     Connections {
         target: typeof authManager !== "undefined" ? authManager : null
 
+        function onLoginSuccessful(username, role) {
+            passwordField.text = ""
+            root.loginSuccessful()
+        }
+
         function onLoginFailed(reason) {
             errorMessage.text = reason
             passwordField.text = ""
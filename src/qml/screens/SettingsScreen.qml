@@ -421,6 +421,20 @@ Item {
 
                 model: ListModel { id: historyModel }
 
+                // Догрузка следующей страницы (пагинация по id)
+                footer: Item {
+                    width: historyListView.width
+                    height: loginHistoryPanel.hasMoreHistory ? 50 : 0
+                    visible: loginHistoryPanel.hasMoreHistory
+
+                    AppButton {
+                        anchors.centerIn: parent
+                        text: "Показать ещё"
+                        btnColor: Theme.primaryColor
+                        onClicked: loginHistoryPanel.loadMoreHistory()
+                    }
+                }
+
                 delegate: Rectangle {
                     width: historyListView.width
                     height: 45
@@ -482,14 +496,30 @@ Item {
             }
         }
 
+        // Размер страницы совпадает с AuthManager.HISTORY_PAGE_SIZE
+        readonly property int historyPageSize: 100
+        property bool hasMoreHistory: false
+
         // Загрузка истории
         function loadHistory() {
             historyModel.clear()
+            appendHistory(0)
+        }
+
+        // Загрузка следующей страницы истории
+        function loadMoreHistory() {
+            if (historyModel.count > 0) {
+                appendHistory(historyModel.get(historyModel.count - 1).id)
+            }
+        }
+
+        function appendHistory(beforeId) {
             if (typeof authManager !== "undefined" && authManager) {
-                var history = authManager.getLoginHistory()
+                var history = authManager.getLoginHistory(beforeId)
                 for (var i = 0; i < history.length; i++) {
                     historyModel.append(history[i])
                 }
+                hasMoreHistory = history.length >= historyPageSize
             }
         }
 
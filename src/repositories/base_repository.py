@@ -1,48 +1,92 @@
 """Базовый репозиторий для всех доменных сущностей"""
 
 from abc import ABC, abstractmethod
-from typing import List, Optional, Any
+from typing import Iterable, Iterator, List, Optional, Any
 import sqlite3
 from contextlib import contextmanager
 from loguru import logger
 
+from utils.logger_config import level_enabled, throttle
+from repositories.read_snapshot import ReadSnapshot
+from repositories.events import EventBus
+from repositories.concurrency import RetryPolicy
+from repositories.backends import SqliteBackend, StorageBackend
+
+
+# Размер списка в IN (?, ...): запас до лимита переменных старых сборок SQLite (999)
+IN_CLAUSE_CHUNK = 500
+
 
 class BaseRepository(ABC):
     """
     Абстрактный базовый класс для всех репозиториев.
 
-    Предоставляет общую функциональность для работы с SQLite:
+    Предоставляет общую функциональность для работы с БД:
     - Управление соединениями через context manager
     - Обработка ошибок с логированием
     - Автоматический commit/rollback
 
+    Соединения выдаёт хранилище (repositories.backends): файл SQLite или
+    сервер PostgreSQL. SQL репозиториев пишется в диалекте SQLite.
+
     Attributes:
-        db_path (str): Путь к файлу базы данных SQLite.
+        db_path (str): Путь к файлу базы данных SQLite (или адрес хранилища).
+        backend (StorageBackend): Хранилище (общее для UnitOfWork).
+        events (EventBus): Шина событий изменения (общая для UnitOfWork);
+            репозитории публикуют в неё после commit.
+        busy_timeout_ms (int): Ожидание блокировки БД внутри SQLite, мс.
+        retry_policy (RetryPolicy): Повтор BEGIN IMMEDIATE при занятой БД.
     """
 
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, backend: Optional[StorageBackend] = None):
         """
         Инициализирует репозиторий.
 
         Args:
             db_path: Путь к файлу базы данных SQLite.
+            backend: Хранилище; None — файл SQLite db_path.
         """
+        self.backend = backend if backend is not None else SqliteBackend(db_path)
         self.db_path = db_path
+        # Снимок БД в памяти для чтения (UnitOfWork.enable_read_snapshot)
+        self.snapshot: Optional[ReadSnapshot] = None
+        self.events = EventBus()
+        # Совместная работа нескольких экземпляров (UnitOfWork.configure_concurrency)
+        self.retry_policy = RetryPolicy()
         logger.debug(f"{self.__class__.__name__} initialized with db_path: {db_path}")
 
+    @property
+    def busy_timeout_ms(self) -> int:
+        """Ожидание блокировки БД, мс (настройка хранилища)."""
+        return self.backend.busy_timeout_ms
+
+    @busy_timeout_ms.setter
+    def busy_timeout_ms(self, value: int):
+        self.backend.busy_timeout_ms = value
+
     @contextmanager
-    def get_connection(self):
+    def get_connection(self, immediate: bool = False):
         """
         Context manager для безопасной работы с соединением БД.
 
         Автоматически:
-        - Открывает соединение
+        - Открывает соединение (при включённом мониторинге запросы
+          замеряются, медленные пишутся в лог с планом, см. repositories.query_monitor)
         - Коммитит транзакцию при успехе
         - Откатывает транзакцию при ошибке
         - Закрывает соединение
 
+        Args:
+            immediate: Начать транзакцию с BEGIN IMMEDIATE — блокировка записи
+                берётся сразу, и чтение-изменение-запись (счётчики) атомарно
+                относительно других соединений. Нужно всем транзакциям,
+                которые сначала читают, а потом пишут: в режиме WAL такая
+                транзакция без IMMEDIATE получает SQLITE_BUSY без ожидания.
+                Занятая база — повтор по retry_policy.
+
         Yields:
-            sqlite3.Connection: Соединение с базой данных.
+            sqlite3.Connection: Соединение с базой данных (для PostgreSQL —
+                PgConnection с тем же интерфейсом).
 
         Raises:
             Exception: Любая ошибка при работе с БД.
@@ -52,23 +96,125 @@ class BaseRepository(ABC):
             >>>     cursor = conn.cursor()
             >>>     cursor.execute("SELECT * FROM items")
         """
+        if self.snapshot is not None:
+            # Режим снимка: запись через постоянное соединение снимка
+            try:
+                with self.snapshot.write_connection(immediate, self.retry_policy) as conn:
+                    yield conn
+            except Exception as e:
+                self._log_db_error(e)
+                raise
+            return
+
+        # Вызывается на каждый запрос: уровень проверяется один раз,
+        # сообщения форматируются только при включённом TRACE
+        trace = level_enabled("TRACE", __name__)
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
-            logger.trace(f"Database connection opened: {self.db_path}")
+            conn = self.backend.open()
+            if immediate:
+                self.backend.begin_immediate(conn, self.retry_policy, self.__class__.__name__)
+            if trace:
+                logger.trace(f"Database connection opened: {self.backend.location}")
             yield conn
             conn.commit()
-            logger.trace("Transaction committed")
+            if trace:
+                logger.trace("Transaction committed")
         except Exception as e:
             if conn:
                 conn.rollback()
-                logger.warning("Transaction rolled back due to error")
-            logger.error(f"Database error in {self.__class__.__name__}: {e}")
+            self._log_db_error(e)
             raise
         finally:
             if conn:
-                conn.close()
-                logger.trace("Database connection closed")
+                self.backend.release(conn)
+                if trace:
+                    logger.trace("Database connection closed")
+
+    @contextmanager
+    def get_read_connection(self):
+        """
+        Context manager для запросов только на чтение.
+
+        В режиме снимка (self.snapshot) запросы идут к копии БД в памяти,
+        иначе — как get_connection. Писать через это соединение нельзя:
+        изменения снимка не попадут в файл.
+
+        Yields:
+            sqlite3.Connection: Соединение для чтения.
+        """
+        if self.snapshot is None:
+            with self.get_connection() as conn:
+                yield conn
+            return
+
+        try:
+            with self.snapshot.read_connection() as conn:
+                yield conn
+        except Exception as e:
+            self._log_db_error(e)
+            raise
+
+    def _log_db_error(self, error: Exception):
+        """Пишет ошибку БД в лог (повторяющиеся — не чаще раза в секунду)."""
+        suppressed = throttle(f"db_error:{self.__class__.__name__}", 1.0)
+        if suppressed is not None:
+            more = f" (+{suppressed} similar suppressed)" if suppressed else ""
+            logger.error(f"Database error in {self.__class__.__name__}, transaction rolled back: {error}{more}")
+
+    @staticmethod
+    def _current_version(cursor: sqlite3.Cursor, table: str, key_column: str, key: Any) -> Optional[int]:
+        """
+        Текущая версия записи (row_version) — после неудачного compare-and-swap.
+
+        Returns:
+            Optional[int]: Версия или None, если записи нет.
+        """
+        cursor.execute(f"SELECT row_version FROM {table} WHERE {key_column} = ?", (key,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+    def _ensure_column(self, conn: sqlite3.Connection, table: str, column: str, definition: str) -> bool:
+        """
+        Добавляет столбец в существующую таблицу, если его ещё нет.
+
+        Используется для миграции схемы в create_table: CREATE TABLE IF NOT EXISTS
+        не меняет уже созданные таблицы. Столбцы читаются через хранилище,
+        определение в диалекте SQLite переводится для движка при выполнении.
+
+        Args:
+            conn: Открытое соединение.
+            table: Имя таблицы.
+            column: Имя столбца.
+            definition: Тип и ограничения столбца (например, "INTEGER DEFAULT 0").
+
+        Returns:
+            bool: True если столбец был добавлен.
+        """
+        if column in self.backend.columns(conn, table):
+            return False
+
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        logger.info(f"🛠️ Column added: {table}.{column}")
+        return True
+
+    @staticmethod
+    def _in_chunks(values: Iterable[Any], size: int = IN_CLAUSE_CHUNK) -> Iterator[List[Any]]:
+        """
+        Делит значения для запросов WHERE ... IN (?, ...) на части.
+
+        Повторы отбрасываются, порядок сохраняется.
+
+        Args:
+            values: Значения (например, артикулы).
+            size: Максимальный размер части.
+
+        Yields:
+            List: Очередная часть значений.
+        """
+        unique = list(dict.fromkeys(values))
+        for start in range(0, len(unique), size):
+            yield unique[start:start + size]
 
     @abstractmethod
     def create_table(self):
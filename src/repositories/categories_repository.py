@@ -1,9 +1,10 @@
 """Репозиторий для управления категориями товаров"""
 
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from loguru import logger
 
 from repositories.base_repository import BaseRepository  # ← ПРАВИЛЬНО
+from repositories.events import ChangeEvent
 from models.dto import Category  # ← ПРАВИЛЬНО
 
 
@@ -15,6 +16,13 @@ class CategoriesRepository(BaseRepository):
     - Создания и загрузки категорий
     - Обновления и удаления категорий
     - Генерации артикулов (SKU) для товаров
+
+    Номера артикулов выдаются из таблицы sku_sequences (счётчик на
+    категорию) в транзакции BEGIN IMMEDIATE, поэтому два пользователя,
+    добавляющих товары одновременно, не получат одинаковый артикул.
+
+    После commit публикует ChangeEvent.CATEGORY (key — ID, fields — все
+    поля категории).
     """
 
     def create_table(self):
@@ -30,6 +38,13 @@ class CategoriesRepository(BaseRepository):
                         sku_digits INTEGER DEFAULT 4
                     )
                 ''')
+                # Счётчики артикулов: следующий свободный номер по категории
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS sku_sequences (
+                        category_id INTEGER PRIMARY KEY,
+                        next_value INTEGER NOT NULL
+                    )
+                ''')
             logger.success("✅ Categories table created/verified")
         except Exception as e:
             logger.error(f"❌ Error creating categories table: {e}")
@@ -43,7 +58,7 @@ class CategoriesRepository(BaseRepository):
             List[Category]: Список всех категорий, отсортированных по имени.
         """
         try:
-            with self.get_connection() as conn:
+            with self.get_read_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     SELECT id, name, sku_prefix, sku_digits 
@@ -96,6 +111,7 @@ class CategoriesRepository(BaseRepository):
                 f"✅ Category added: '{category.name}' "
                 f"(SKU: {category.sku_prefix}-{'X' * category.sku_digits})"
             )
+            self.events.emit(ChangeEvent.CATEGORY, ChangeEvent.ADDED, category_id, self._event_fields(category))
             return category_id
 
         except Exception as e:
@@ -114,18 +130,26 @@ class CategoriesRepository(BaseRepository):
             Exception: Если произошла ошибка при обновлении.
         """
         try:
-            with self.get_connection() as conn:
+            with self.get_connection(immediate=True) as conn:
                 cursor = conn.cursor()
+                cursor.execute("SELECT sku_prefix FROM categories WHERE id = ?", (category_id,))
+                row = cursor.fetchone()
+
                 cursor.execute("""
                     UPDATE categories 
                     SET name = ?, sku_prefix = ?, sku_digits = ?
                     WHERE id = ?
                 """, (category.name, category.sku_prefix, category.sku_digits, category_id))
 
+                # Новый префикс — нумерация начнётся заново по существующим артикулам
+                if row and row[0] != category.sku_prefix:
+                    cursor.execute("DELETE FROM sku_sequences WHERE category_id = ?", (category_id,))
+
             logger.success(
                 f"✅ Category {category_id} updated: {category.name} "
                 f"(prefix={category.sku_prefix}, digits={category.sku_digits})"
             )
+            self.events.emit(ChangeEvent.CATEGORY, ChangeEvent.UPDATED, category_id, self._event_fields(category))
 
         except Exception as e:
             logger.error(f"❌ Error updating category {category_id}: {e}")
@@ -145,13 +169,23 @@ class CategoriesRepository(BaseRepository):
             with self.get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("DELETE FROM categories WHERE id = ?", (category_id,))
+                cursor.execute("DELETE FROM sku_sequences WHERE category_id = ?", (category_id,))
 
             logger.warning(f"⚠️ Category {category_id} deleted")
+            self.events.emit(ChangeEvent.CATEGORY, ChangeEvent.DELETED, category_id)
 
         except Exception as e:
             logger.error(f"❌ Error deleting category {category_id}: {e}")
             raise
 
+    @staticmethod
+    def _event_fields(category: Category) -> dict:
+        return {
+            "name": category.name,
+            "sku_prefix": category.sku_prefix,
+            "sku_digits": category.sku_digits,
+        }
+
     def generate_next_sku(self, category_id: int) -> Optional[str]:
         """
         Генерирует следующий артикул (SKU) для указанной категории.
@@ -159,6 +193,9 @@ class CategoriesRepository(BaseRepository):
         Артикул генерируется в формате: {prefix}-{number}
         Например: ITEM-0001, TOOL-0042
 
+        Номер резервируется сразу (см. reserve_skus): если артикул не был
+        использован, в нумерации останется пропуск.
+
         Args:
             category_id: ID категории.
 
@@ -166,10 +203,45 @@ class CategoriesRepository(BaseRepository):
             str: Новый артикул или None, если категория не найдена.
         """
         try:
-            with self.get_connection() as conn:
+            skus = self.reserve_skus(category_id, 1)
+        except Exception as e:
+            logger.error(f"❌ Error generating SKU for category {category_id}: {e}")
+            return None
+
+        if not skus:
+            return None
+
+        logger.info(f"🔢 Generated SKU: {skus[0]} for category {category_id}")
+        return skus[0]
+
+    def reserve_skus(self, category_id: int, count: int) -> List[str]:
+        """
+        Резервирует блок последовательных артикулов для категории.
+
+        Счётчик увеличивается атомарно в транзакции BEGIN IMMEDIATE — одним
+        обращением можно выделить тысячи артикулов для массового импорта.
+        Первый вызов для категории инициализирует счётчик по максимальному
+        номеру среди существующих артикулов с её префиксом. Номера, уже
+        занятые вручную введёнными артикулами, пропускаются.
+
+        Args:
+            category_id: ID категории.
+            count: Количество артикулов.
+
+        Returns:
+            List[str]: Артикулы по возрастанию номера; пустой список,
+                если категория не найдена или count < 1.
+
+        Raises:
+            Exception: Если произошла ошибка при работе с БД.
+        """
+        if count < 1:
+            return []
+
+        try:
+            with self.get_connection(immediate=True) as conn:
                 cursor = conn.cursor()
 
-                # Получаем шаблон SKU для категории
                 cursor.execute("""
                     SELECT sku_prefix, sku_digits 
                     FROM categories 
@@ -179,35 +251,88 @@ class CategoriesRepository(BaseRepository):
                 result = cursor.fetchone()
                 if not result:
                     logger.warning(f"⚠️ Category {category_id} not found")
-                    return None
+                    return []
 
                 prefix, digits = result
+                digits = digits or 0
 
-                # Находим последний артикул для этой категории
-                cursor.execute("""
-                    SELECT article FROM items 
-                    WHERE category_id = ? AND article LIKE ?
-                    ORDER BY article DESC LIMIT 1
-                """, (category_id, f"{prefix}-%"))
+                cursor.execute("SELECT next_value FROM sku_sequences WHERE category_id = ?", (category_id,))
+                row = cursor.fetchone()
+                start = row[0] if row else self._max_sku_number(cursor, prefix) + 1
 
-                last_sku = cursor.fetchone()
+                # Артикулы, введённые вручную внутри блока, — сдвигаем блок за них
+                while True:
+                    taken = self._max_taken_number(cursor, prefix, digits, start, start + count - 1)
+                    if taken is None:
+                        break
+                    start = taken + 1
 
-                if last_sku:
-                    try:
-                        # Извлекаем номер из последнего артикула
-                        last_number = int(last_sku[0].split('-')[1])
-                        next_number = last_number + 1
-                    except (IndexError, ValueError):
-                        next_number = 1
-                else:
-                    next_number = 1
+                cursor.execute("""
+                    INSERT INTO sku_sequences (category_id, next_value) VALUES (?, ?)
+                    ON CONFLICT(category_id) DO UPDATE SET next_value = excluded.next_value
+                """, (category_id, start + count))
 
-                # Генерируем новый SKU
-                new_sku = f"{prefix}-{str(next_number).zfill(digits)}"
+            skus = [self._format_sku(prefix, digits, number) for number in range(start, start + count)]
 
-            logger.info(f"🔢 Generated SKU: {new_sku} for category {category_id}")
-            return new_sku
+            if count > 1:
+                logger.info(f"🔢 Reserved {count} SKUs for category {category_id}: {skus[0]} … {skus[-1]}")
+            return skus
 
         except Exception as e:
-            logger.error(f"❌ Error generating SKU for category {category_id}: {e}")
-            return None
\ No newline at end of file
+            logger.error(f"❌ Error reserving {count} SKUs for category {category_id}: {e}")
+            raise
+
+    @staticmethod
+    def _format_sku(prefix: str, digits: int, number: int) -> str:
+        """Артикул вида {prefix}-{number}, номер дополняется нулями до digits знаков."""
+        return f"{prefix}-{str(number).zfill(digits)}"
+
+    @staticmethod
+    def _prefix_range(prefix: str) -> Tuple[str, str]:
+        """Границы строк, начинающихся с '{prefix}-' (поиск по индексу article, без LIKE)."""
+        return f"{prefix}-", f"{prefix}."
+
+    @classmethod
+    def _max_sku_number(cls, cursor, prefix: str) -> int:
+        """
+        Максимальный номер среди существующих артикулов с префиксом.
+
+        Номера сравниваются как числа, а не строки (ITEM-10000 > ITEM-9999).
+        Учитываются все товары с этим префиксом, а не только товары категории:
+        артикул — первичный ключ таблицы items.
+        """
+        low, high = cls._prefix_range(prefix)
+        cursor.execute("SELECT article FROM items WHERE article >= ? AND article < ?", (low, high))
+
+        numbers = [int(suffix) for (article,) in cursor.fetchall()
+                   if (suffix := article[len(low):]).isdigit()]
+        return max(numbers, default=0)
+
+    @classmethod
+    def _max_taken_number(cls, cursor, prefix: str, digits: int, first: int, last: int) -> Optional[int]:
+        """
+        Максимальный номер из диапазона [first, last], уже занятый артикулом.
+
+        Артикулы одной длины упорядочены как строки так же, как номера,
+        поэтому диапазон проверяется запросами BETWEEN по первичному ключу —
+        по одному на каждую длину номера в диапазоне.
+        """
+        low_prefix = cls._prefix_range(prefix)[0]
+        taken = None
+
+        for width in range(len(str(first).zfill(digits)), len(str(last).zfill(digits)) + 1):
+            low = max(first, 10 ** (width - 1) if width > digits else 0)
+            high = min(last, 10 ** width - 1)
+            if low > high:
+                continue
+
+            cursor.execute(
+                "SELECT article FROM items WHERE article BETWEEN ? AND ?",
+                (cls._format_sku(prefix, digits, low), cls._format_sku(prefix, digits, high))
+            )
+            for (article,) in cursor.fetchall():
+                suffix = article[len(low_prefix):]
+                if len(suffix) == width and suffix.isdigit():
+                    taken = max(taken or 0, int(suffix))
+
+        return taken
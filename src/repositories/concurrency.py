@@ -0,0 +1,131 @@
+"""Совместная работа нескольких экземпляров приложения с одной БД
+
+- Журнал WAL (UnitOfWork.configure_concurrency): чтение не блокирует
+  запись и наоборот; одновременно пишет только одно соединение.
+- Ожидание блокировки: sqlite3.connect(timeout=busy_timeout_ms) — встроенный
+  busy handler SQLite.
+- Повтор: транзакции записи начинаются с BEGIN IMMEDIATE (блокировка записи
+  берётся сразу), и если база занята дольше busy_timeout, BEGIN повторяется
+  по RetryPolicy с экспоненциальной задержкой и случайным разбросом.
+- Оптимистичная блокировка: у товаров, поставщиков и спецификаций есть
+  столбец row_version. UPDATE с ожидаемой версией (compare-and-swap) не
+  затирает чужое изменение, а выбрасывает ConcurrencyConflictError.
+
+WAL требует общей памяти между процессами: все экземпляры должны работать
+на одном компьютере. Для items.db на сетевом диске — journal_mode "delete".
+
+На PostgreSQL (repositories.backends) роль busy timeout играет lock_timeout,
+а BEGIN IMMEDIATE заменяет транзакционная advisory-блокировка.
+"""
+
+import random
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Any, Iterator, Optional
+
+from loguru import logger
+
+from utils.logger_config import throttle
+
+# Сколько соединение ждёт блокировку внутри SQLite, мс
+DEFAULT_BUSY_TIMEOUT_MS = 5000
+
+# Режим журнала, который включает приложение
+DEFAULT_JOURNAL_MODE = "wal"
+
+JOURNAL_MODES = ("delete", "truncate", "persist", "wal")
+
+# SQLSTATE PostgreSQL: lock_not_available, serialization_failure, deadlock_detected
+_BUSY_SQLSTATES = {"55P03", "40001", "40P01"}
+
+
+class ConcurrencyConflictError(Exception):
+    """
+    Запись изменена или удалена другим пользователем после чтения.
+
+    Attributes:
+        entity: Сущность (как в ChangeEvent: item, supplier, specification).
+        key: Ключ записи.
+        expected_version: Версия, с которой начиналось редактирование.
+        actual_version: Текущая версия в БД (None — запись удалена).
+    """
+
+    def __init__(self, entity: str, key: Any, expected_version: int, actual_version: Optional[int]):
+        self.entity = entity
+        self.key = key
+        self.expected_version = expected_version
+        self.actual_version = actual_version
+
+        if actual_version is None:
+            message = f"Запись «{key}» удалена другим пользователем"
+        else:
+            message = (f"Запись «{key}» изменена другим пользователем. "
+                       f"Данные обновлены — повторите изменение")
+        super().__init__(message)
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Повтор начала транзакции при занятой базе.
+
+    Attributes:
+        attempts: Всего попыток (1 — без повторов).
+        base_delay_ms: Задержка перед первым повтором.
+        max_delay_ms: Верхняя граница задержки.
+    """
+    attempts: int = 5
+    base_delay_ms: float = 50.0
+    max_delay_ms: float = 2000.0
+
+    def delays(self) -> Iterator[float]:
+        """Задержки перед повторами, с (экспонента со случайным разбросом)."""
+        for attempt in range(max(self.attempts, 1) - 1):
+            ceiling = min(self.max_delay_ms, self.base_delay_ms * (2 ** attempt))
+            # Разброс: экземпляры, упёршиеся в одну блокировку, не повторяют синхронно
+            yield random.uniform(ceiling / 2, ceiling) / 1000
+
+
+def is_busy_error(error: BaseException) -> bool:
+    """Ошибка «база занята» (SQLITE_BUSY / SQLITE_LOCKED, для PostgreSQL — ожидание блокировки)."""
+    if getattr(error, "sqlstate", None) in _BUSY_SQLSTATES:
+        return True
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+def begin_immediate(conn: sqlite3.Connection, policy: RetryPolicy, label: str = "",
+                    statement: str = "BEGIN IMMEDIATE"):
+    """
+    Начинает транзакцию записи, повторяя BEGIN IMMEDIATE по политике.
+
+    Args:
+        conn: Соединение (ожидание внутри попытки — его busy timeout).
+        policy: Политика повторов.
+        label: Имя вызывающего для журнала.
+        statement: Оператор, берущий блокировку записи (у PostgreSQL свой).
+
+    Raises:
+        sqlite3.OperationalError: Если база занята и попытки исчерпаны.
+    """
+    delays = policy.delays()
+    while True:
+        try:
+            conn.execute(statement)
+            return
+        except Exception as e:
+            delay = next(delays, None) if is_busy_error(e) else None
+            if delay is None:
+                raise
+            # PostgreSQL: после ошибки транзакция прервана (для SQLite — no-op)
+            conn.rollback()
+
+        suppressed = throttle(f"db_busy:{label}", 1.0)
+        if suppressed is not None:
+            more = f" (+{suppressed} similar suppressed)" if suppressed else ""
+            logger.warning(f"⏳ Database is busy{f' in {label}' if label else ''}, "
+                           f"retrying in {delay * 1000:.0f} ms{more}")
+        time.sleep(delay)
@@ -1,11 +1,12 @@
 #documents_repository.py
 """Репозиторий для управления документами товаров"""
 
-from typing import List
+from typing import Dict, Iterable, List, Optional, Tuple
 from pathlib import Path
 from loguru import logger
 
 from repositories.base_repository import BaseRepository  # ← ПРАВИЛЬНО
+from repositories.events import ChangeEvent
 from models.dto import Document  # ← ПРАВИЛЬНО
 
 
@@ -18,6 +19,9 @@ class DocumentsRepository(BaseRepository):
     - Загрузки документов товара
     - Удаления и переименования документов
     - Миграции старых документов
+
+    После commit публикует ChangeEvent.DOCUMENT (key — ID документа);
+    fields всегда содержит item_article.
     """
 
     def create_table(self):
@@ -35,6 +39,11 @@ class DocumentsRepository(BaseRepository):
                         FOREIGN KEY (item_article) REFERENCES items(article) ON DELETE CASCADE
                     )
                 ''')
+                # Выборка и подсчёт документов по товару
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_item_documents_article
+                    ON item_documents(item_article)
+                ''')
 
             logger.success("✅ Documents table created/verified")
 
@@ -74,7 +83,18 @@ class DocumentsRepository(BaseRepository):
 
                 doc_id = cursor.lastrowid
 
+                added_date = None
+                if self.events.has_subscribers(ChangeEvent.DOCUMENT):
+                    cursor.execute("SELECT added_date FROM item_documents WHERE id = ?", (doc_id,))
+                    added_date = cursor.fetchone()[0]
+
             logger.success(f"✅ Document added for item {article}: {document_name} (ID: {doc_id})")
+            self.events.emit(ChangeEvent.DOCUMENT, ChangeEvent.ADDED, doc_id, {
+                "item_article": article,
+                "document_path": document_path,
+                "document_name": document_name,
+                "added_date": added_date,
+            })
             return doc_id
 
         except Exception as e:
@@ -92,7 +112,7 @@ class DocumentsRepository(BaseRepository):
             List[Document]: Список документов товара.
         """
         try:
-            with self.get_connection() as conn:
+            with self.get_read_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     SELECT id, item_article, document_path, document_name, added_date
@@ -132,11 +152,14 @@ class DocumentsRepository(BaseRepository):
             bool: True если удаление успешно, False в случае ошибки.
         """
         try:
-            with self.get_connection() as conn:
+            # IMMEDIATE: чтение артикула и запись — одна транзакция записи
+            with self.get_connection(immediate=True) as conn:
                 cursor = conn.cursor()
+                article = self._article_for_event(cursor, doc_id)
                 cursor.execute("DELETE FROM item_documents WHERE id = ?", (doc_id,))
 
             logger.warning(f"⚠️ Document {doc_id} deleted")
+            self.events.emit(ChangeEvent.DOCUMENT, ChangeEvent.DELETED, doc_id, {"item_article": article})
             return True
 
         except Exception as e:
@@ -155,8 +178,10 @@ class DocumentsRepository(BaseRepository):
             bool: True если обновление успешно, False в случае ошибки.
         """
         try:
-            with self.get_connection() as conn:
+            # IMMEDIATE: чтение артикула и запись — одна транзакция записи
+            with self.get_connection(immediate=True) as conn:
                 cursor = conn.cursor()
+                article = self._article_for_event(cursor, doc_id)
                 cursor.execute("""
                     UPDATE item_documents
                     SET document_name = ?
@@ -164,12 +189,22 @@ class DocumentsRepository(BaseRepository):
                 """, (new_name, doc_id))
 
             logger.success(f"✅ Document {doc_id} renamed to '{new_name}'")
+            self.events.emit(ChangeEvent.DOCUMENT, ChangeEvent.UPDATED, doc_id,
+                             {"item_article": article, "document_name": new_name})
             return True
 
         except Exception as e:
             logger.error(f"❌ Error updating document name: {e}")
             return False
 
+    def _article_for_event(self, cursor, doc_id: int) -> Optional[str]:
+        """Артикул товара документа — только если на события есть подписчики."""
+        if not self.events.has_subscribers(ChangeEvent.DOCUMENT):
+            return None
+        cursor.execute("SELECT item_article FROM item_documents WHERE id = ?", (doc_id,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+
     def count_for_item(self, article: str) -> int:
         """
         Подсчитывает количество документов товара.
@@ -181,7 +216,7 @@ class DocumentsRepository(BaseRepository):
             int: Количество документов.
         """
         try:
-            with self.get_connection() as conn:
+            with self.get_read_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     SELECT COUNT(*) 
@@ -197,6 +232,63 @@ class DocumentsRepository(BaseRepository):
             logger.error(f"❌ Error counting documents: {e}")
             return 0
 
+    def count_for_items(self, articles: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """
+        Подсчитывает документы сразу для набора товаров (GROUP BY).
+
+        Args:
+            articles: Артикулы товаров; None — все товары.
+
+        Returns:
+            Dict[str, int]: Артикул → количество документов. Товаров без
+                документов в словаре нет.
+        """
+        query = "SELECT item_article, COUNT(*) FROM item_documents"
+        counts: Dict[str, int] = {}
+
+        try:
+            with self.get_read_connection() as conn:
+                if articles is None:
+                    counts.update(conn.execute(f"{query} GROUP BY item_article").fetchall())
+                else:
+                    for chunk in self._in_chunks(articles):
+                        counts.update(conn.execute(
+                            f"{query} WHERE item_article IN ({', '.join('?' * len(chunk))}) "
+                            f"GROUP BY item_article",
+                            chunk
+                        ).fetchall())
+
+            logger.debug(f"📄 Counted documents for {len(counts)} article(s)")
+            return counts
+
+        except Exception as e:
+            logger.error(f"❌ Error counting documents: {e}")
+            return {}
+
+    def get_file_references(self) -> List[Tuple[str, str]]:
+        """
+        Возвращает все ссылки документов на файлы хранилища.
+
+        Returns:
+            List[Tuple[str, str]]: Список кортежей (item_article, document_path).
+        """
+        try:
+            with self.get_read_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT item_article, document_path
+                    FROM item_documents
+                    WHERE document_path IS NOT NULL AND document_path != ''
+                """)
+                references = cursor.fetchall()
+
+            logger.debug(f"📎 Found {len(references)} file reference(s) in documents")
+            return references
+
+        except Exception as e:
+            logger.error(f"❌ Error loading document file references: {e}")
+            return []
+
     def migrate_from_items_table(self) -> int:
         """
         Мигрирует существующие документы из поля document в таблицу item_documents.
@@ -0,0 +1,117 @@
+"""События изменения данных репозиториев
+
+Репозитории после успешного commit публикуют ChangeEvent в общую для
+UnitOfWork шину (BaseRepository.events). Модели подписываются на нужные
+сущности и обновляют только затронутые строки — без перезагрузки:
+
+    def on_item_changed(event: ChangeEvent):
+        if event.action == ChangeEvent.UPDATED and "price" in event.fields:
+            ...
+
+    unsubscribe = uow.events.subscribe(ChangeEvent.ITEM, on_item_changed)
+
+Обработчики вызываются синхронно в потоке, выполнившем запись (для
+моделей — поток GUI). Исключение обработчика пишется в лог и не мешает
+остальным подписчикам и вызвавшему коду.
+"""
+
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+from loguru import logger
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    """
+    Изменение одной записи.
+
+    Attributes:
+        entity: Сущность (ITEM, DOCUMENT, SUPPLIER, ITEM_SUPPLIERS, CATEGORY).
+        action: ADDED, UPDATED или DELETED.
+        key: Ключ записи после изменения (артикул, ID).
+        fields: Новые значения изменённых полей (для ADDED — всех полей).
+        old_key: Прежний ключ, если он изменился (переименование артикула).
+    """
+    entity: str
+    action: str
+    key: Any
+    fields: Mapping[str, Any] = field(default_factory=dict)
+    old_key: Any = None
+
+    # Сущности
+    ITEM = "item"
+    DOCUMENT = "document"
+    SUPPLIER = "supplier"
+    ITEM_SUPPLIERS = "item_suppliers"  # Привязка поставщиков к товару, key — артикул
+    CATEGORY = "category"
+
+    # Действия
+    ADDED = "added"
+    UPDATED = "updated"
+    DELETED = "deleted"
+
+    @property
+    def previous_key(self) -> Any:
+        """Ключ записи до изменения."""
+        return self.key if self.old_key is None else self.old_key
+
+
+Handler = Callable[[ChangeEvent], None]
+
+# Подписка на все сущности
+ALL = "*"
+
+
+class EventBus:
+    """Синхронная шина событий изменения данных."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._handlers: Dict[str, List[Handler]] = {}
+
+    def subscribe(self, entity: str, handler: Handler) -> Callable[[], None]:
+        """
+        Подписывает обработчик на события сущности.
+
+        Args:
+            entity: Сущность (ChangeEvent.ITEM, ...) или ALL.
+            handler: Вызывается с ChangeEvent.
+
+        Returns:
+            Callable: Функция отписки.
+        """
+        with self._lock:
+            # Список заменяется целиком: publish обходит свою копию без блокировки
+            self._handlers[entity] = self._handlers.get(entity, []) + [handler]
+
+        def unsubscribe():
+            with self._lock:
+                handlers = [h for h in self._handlers.get(entity, []) if h is not handler]
+                if handlers:
+                    self._handlers[entity] = handlers
+                else:
+                    self._handlers.pop(entity, None)
+
+        return unsubscribe
+
+    def has_subscribers(self, entity: str) -> bool:
+        """Есть ли подписчики событий сущности (чтобы не собирать событие впустую)."""
+        return bool(self._handlers.get(entity) or self._handlers.get(ALL))
+
+    def publish(self, event: ChangeEvent):
+        """Передаёт событие подписчикам сущности и подписчикам ALL."""
+        handlers = self._handlers.get(event.entity, []) + self._handlers.get(ALL, [])
+        for handler in handlers:
+            try:
+                handler(event)
+            except Exception:
+                logger.exception(f"❌ Change event handler failed: {event.entity} {event.action} {event.key!r}")
+
+    def emit(self, entity: str, action: str, key: Any, fields: Optional[Mapping[str, Any]] = None,
+             old_key: Any = None):
+        """Создаёт и публикует ChangeEvent (ничего не делает без подписчиков)."""
+        if not self.has_subscribers(entity):
+            return
+        self.publish(ChangeEvent(entity, action, key, dict(fields or {}), old_key))
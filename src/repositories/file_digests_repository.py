@@ -0,0 +1,176 @@
+"""Репозиторий контрольных сумм файлов хранилища"""
+
+from typing import Dict, List
+from datetime import datetime
+from loguru import logger
+
+from repositories.base_repository import BaseRepository
+from models.dto import FileDigest, FileFingerprint
+
+
+class FileDigestsRepository(BaseRepository):
+    """
+    Репозиторий контрольных сумм файлов хранилища.
+
+    Хранит эталонные размер и SHA-256 для каждого файла, на который
+    ссылаются товары и документы. Используется проверкой целостности
+    хранилища (StorageVerifier).
+
+    Также хранит отпечатки файлов (размер, mtime, быстрый отпечаток и,
+    если вычислялся, SHA-256), чтобы FileManager при поиске дубликатов
+    не перечитывал уже известные файлы.
+    """
+
+    def create_table(self):
+        """Создает таблицу file_digests если не существует."""
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS file_digests (
+                        path TEXT PRIMARY KEY,
+                        size INTEGER NOT NULL,
+                        sha256 TEXT NOT NULL,
+                        verified_at DATETIME
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS file_fingerprints (
+                        path TEXT PRIMARY KEY,
+                        size INTEGER NOT NULL,
+                        mtime_ns INTEGER NOT NULL,
+                        quick_hash TEXT NOT NULL,
+                        sha256 TEXT
+                    )
+                ''')
+
+            logger.success("✅ File digests table created/verified")
+
+        except Exception as e:
+            logger.error(f"❌ Error creating file digests table: {e}")
+            raise
+
+    def get_all(self) -> Dict[str, FileDigest]:
+        """
+        Загружает все сохранённые контрольные суммы.
+
+        Returns:
+            Dict[str, FileDigest]: Словарь {относительный путь: FileDigest}.
+        """
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT path, size, sha256, verified_at FROM file_digests")
+                digests = {
+                    row[0]: FileDigest(path=row[0], size=row[1], sha256=row[2], verified_at=row[3])
+                    for row in cursor.fetchall()
+                }
+
+            logger.debug(f"🔐 Loaded {len(digests)} file digest(s)")
+            return digests
+
+        except Exception as e:
+            logger.error(f"❌ Error loading file digests: {e}")
+            return {}
+
+    def upsert_many(self, digests: List[FileDigest]) -> int:
+        """
+        Сохраняет (или обновляет) контрольные суммы одной транзакцией.
+
+        Args:
+            digests: Список контрольных сумм.
+
+        Returns:
+            int: Количество сохранённых записей.
+        """
+        if not digests:
+            return 0
+
+        now = datetime.now().isoformat()
+
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.executemany("""
+                    INSERT INTO file_digests (path, size, sha256, verified_at)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(path) DO UPDATE SET
+                        size = excluded.size,
+                        sha256 = excluded.sha256,
+                        verified_at = excluded.verified_at
+                """, [(d.path, d.size, d.sha256, d.verified_at or now) for d in digests])
+
+            logger.debug(f"🔐 Saved {len(digests)} file digest(s)")
+            return len(digests)
+
+        except Exception as e:
+            logger.error(f"❌ Error saving file digests: {e}")
+            raise
+
+    def touch_verified(self, paths: List[str]) -> None:
+        """
+        Отмечает время последней успешной проверки файлов.
+
+        Args:
+            paths: Относительные пути проверенных файлов.
+        """
+        if not paths:
+            return
+
+        now = datetime.now().isoformat()
+
+        try:
+            with self.get_connection() as conn:
+                conn.executemany(
+                    "UPDATE file_digests SET verified_at = ? WHERE path = ?",
+                    [(now, path) for path in paths]
+                )
+        except Exception as e:
+            logger.error(f"❌ Error updating verification time: {e}")
+
+    def get_fingerprints(self) -> Dict[str, FileFingerprint]:
+        """
+        Загружает все сохранённые отпечатки файлов.
+
+        Returns:
+            Dict[str, FileFingerprint]: Словарь {относительный путь: FileFingerprint}.
+        """
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT path, size, mtime_ns, quick_hash, sha256 FROM file_fingerprints")
+                fingerprints = {row[0]: FileFingerprint(*row) for row in cursor.fetchall()}
+
+            logger.debug(f"🔐 Loaded {len(fingerprints)} file fingerprint(s)")
+            return fingerprints
+
+        except Exception as e:
+            logger.error(f"❌ Error loading file fingerprints: {e}")
+            return {}
+
+    def upsert_fingerprints(self, fingerprints: List[FileFingerprint]) -> None:
+        """
+        Сохраняет (или обновляет) отпечатки файлов одной транзакцией.
+
+        Args:
+            fingerprints: Список отпечатков.
+        """
+        if not fingerprints:
+            return
+
+        try:
+            with self.get_connection() as conn:
+                conn.executemany("""
+                    INSERT INTO file_fingerprints (path, size, mtime_ns, quick_hash, sha256)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(path) DO UPDATE SET
+                        size = excluded.size,
+                        mtime_ns = excluded.mtime_ns,
+                        quick_hash = excluded.quick_hash,
+                        sha256 = excluded.sha256
+                """, [(f.path, f.size, f.mtime_ns, f.quick_hash, f.sha256) for f in fingerprints])
+
+            logger.debug(f"🔐 Saved {len(fingerprints)} file fingerprint(s)")
+
+        except Exception as e:
+            logger.error(f"❌ Error saving file fingerprints: {e}")
@@ -1,10 +1,17 @@
 """Репозиторий для управления товарами"""
 
-from typing import List, Tuple
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 from loguru import logger
 
 from repositories.base_repository import BaseRepository  # ← ПРАВИЛЬНО
+from repositories.events import ChangeEvent
+from repositories.concurrency import ConcurrencyConflictError
 from models.dto import Item  # ← ПРАВИЛЬНО
+from utils.metrics import timed
+
+# Поля товара в событиях изменения (в порядке столбцов UPDATE)
+ITEM_FIELDS = ("article", "name", "description", "image_path", "category_id", "price",
+               "stock", "status", "unit", "manufacturer", "document")
 
 class ItemsRepository(BaseRepository):
     """
@@ -14,6 +21,15 @@ class ItemsRepository(BaseRepository):
     - Создания и загрузки товаров
     - Обновления и удаления товаров
     - Поиска и фильтрации товаров
+
+    После commit публикует ChangeEvent.ITEM (key — артикул); при
+    обновлении fields содержит только изменившиеся поля.
+
+    Кортежи товаров: 12-й элемент (индекс 12) — row_version, версия для
+    оптимистичной блокировки в update(expected_version=...).
+
+    Для массовых операций (импорт, экспорт, переоценка) — iter_batches,
+    upsert_many и set_prices: работа частями короткими транзакциями.
     """
 
     def create_table(self):
@@ -38,6 +54,8 @@ class ItemsRepository(BaseRepository):
                         FOREIGN KEY (category_id) REFERENCES categories(id) ON DELETE SET NULL
                     )
                 ''')
+                # Версия записи для compare-and-swap (несколько экземпляров приложения)
+                self._ensure_column(conn, "items", "row_version", "INTEGER NOT NULL DEFAULT 0")
 
             logger.success("✅ Items table created/verified")
 
@@ -45,6 +63,7 @@ class ItemsRepository(BaseRepository):
             logger.error(f"❌ Error creating items table: {e}")
             raise
 
+    @timed("ItemsRepository.get_all")
     def get_all(self) -> List[Tuple]:
         """
         Загружает все товары с информацией о категориях.
@@ -53,7 +72,7 @@ class ItemsRepository(BaseRepository):
             List[Tuple]: Список кортежей с данными товаров.
         """
         try:
-            with self.get_connection() as conn:
+            with self.get_read_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     SELECT 
@@ -68,7 +87,8 @@ class ItemsRepository(BaseRepository):
                         i.status,
                         i.unit,
                         i.manufacturer,
-                        i.document
+                        i.document,
+                        i.row_version
                     FROM items i
                     LEFT JOIN categories c ON i.category_id = c.id
                     ORDER BY i.created_date DESC
@@ -104,53 +124,193 @@ class ItemsRepository(BaseRepository):
                     f"category_id={item.category_id}, price={item.price}, stock={item.stock}"
                 )
 
+                values = self._insert_values(item)
                 cursor.execute('''
                     INSERT INTO items (
                         article, name, description, image_path, category_id, 
                         price, stock, status, unit, manufacturer, document
                     ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    item.article,
-                    item.name,
-                    item.description,
-                    item.image_path,
-                    item.category_id,
-                    item.price,
-                    item.stock,
-                    item.status or 'в наличии',
-                    item.unit or 'шт.',
-                    item.manufacturer or '',
-                    item.document or ''
-                ))
+                ''', values)
 
             logger.success(f"✅ Item added: {item.article} - {item.name}")
+            self.events.emit(ChangeEvent.ITEM, ChangeEvent.ADDED, item.article, dict(zip(ITEM_FIELDS, values)))
             return item.article
 
         except Exception as e:
             logger.error(f"❌ Error adding item {item.article}: {e}")
             raise
 
-    def update(self, old_article: str, item: Item) -> None:
+    @staticmethod
+    def _insert_values(item: Item) -> Tuple:
+        """Значения нового товара в порядке ITEM_FIELDS (с умолчаниями)."""
+        return (
+            item.article,
+            item.name,
+            item.description,
+            item.image_path,
+            item.category_id,
+            item.price,
+            item.stock,
+            item.status or 'в наличии',
+            item.unit or 'шт.',
+            item.manufacturer or '',
+            item.document or ''
+        )
+
+    def upsert_many(self, items: List[Item], insert: bool = True, overwrite: bool = True,
+                    fields: Optional[Sequence[str]] = None) -> Tuple[int, int]:
+        """
+        Пакетно добавляет товары, а существующие (по артикулу) — обновляет.
+
+        Одна транзакция BEGIN IMMEDIATE на весь пакет: проверка артикулов,
+        executemany INSERT и executemany UPDATE. Повторы артикула в пакете
+        схлопываются (действует последний).
+
+        Args:
+            items: Товары пакета.
+            insert: Добавлять новые товары (False — только обновление существующих).
+            overwrite: Обновлять существующие товары (False — пропускать).
+            fields: Поля, которые меняются у существующих товаров (например,
+                только столбцы файла импорта); None — все поля ITEM_FIELDS.
+
+        Returns:
+            Tuple[int, int]: (добавлено, обновлено).
+
+        Raises:
+            ValueError: Неизвестное поле в fields.
+            Exception: Если произошла ошибка при записи (пакет откатывается).
+        """
+        columns = [field for field in (ITEM_FIELDS if fields is None else fields) if field != "article"]
+        unknown = set(columns) - set(ITEM_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown item fields: {sorted(unknown)}")
+
+        rows = list({item.article: self._insert_values(item) for item in items}.values())
+        if not rows:
+            return 0, 0
+
+        try:
+            with self.get_connection(immediate=True) as conn:
+                cursor = conn.cursor()
+                existing = set()
+                for chunk in self._in_chunks(values[0] for values in rows):
+                    cursor.execute(
+                        f"SELECT article FROM items WHERE article IN ({', '.join('?' * len(chunk))})",
+                        chunk
+                    )
+                    existing.update(row[0] for row in cursor.fetchall())
+
+                added = [values for values in rows if values[0] not in existing] if insert else []
+                if added:
+                    cursor.executemany(
+                        f"INSERT INTO items ({', '.join(ITEM_FIELDS)}) "
+                        f"VALUES ({', '.join('?' * len(ITEM_FIELDS))})",
+                        added
+                    )
+
+                updated = [values for values in rows if values[0] in existing] if overwrite and columns else []
+                if updated:
+                    indexes = [ITEM_FIELDS.index(column) for column in columns]
+                    cursor.executemany(
+                        f"UPDATE items SET {', '.join(f'{column}=?' for column in columns)}, "
+                        f"row_version=row_version + 1 WHERE article=?",
+                        [tuple(values[index] for index in indexes) + (values[0],) for values in updated]
+                    )
+
+            logger.success(f"✅ Items upserted: {len(added)} added, {len(updated)} updated")
+
+            if self.events.has_subscribers(ChangeEvent.ITEM):
+                for values in added:
+                    self.events.emit(ChangeEvent.ITEM, ChangeEvent.ADDED, values[0], dict(zip(ITEM_FIELDS, values)))
+                for values in updated:
+                    self.events.emit(ChangeEvent.ITEM, ChangeEvent.UPDATED, values[0],
+                                     {column: values[ITEM_FIELDS.index(column)] for column in columns})
+
+            return len(added), len(updated)
+
+        except Exception as e:
+            logger.error(f"❌ Error upserting {len(rows)} item(s): {e}")
+            raise
+
+    def set_prices(self, prices: List[Tuple[str, float, int]]) -> List[str]:
+        """
+        Пакетно меняет цены товаров с проверкой версий (compare-and-swap).
+
+        Цена записывается, только если товар не менялся с момента чтения
+        (row_version совпадает) — переоценка не затирает правки других
+        пользователей, сделанные во время её работы.
+
+        Args:
+            prices: Кортежи (article, новая цена, row_version прочитанного товара).
+
+        Returns:
+            List[str]: Артикулы, пропущенные из-за конфликта (товар изменён
+            или удалён после чтения).
+
+        Raises:
+            Exception: Если произошла ошибка при записи (пакет откатывается).
+        """
+        conflicts = []
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                for article, price, version in prices:
+                    cursor.execute(
+                        "UPDATE items SET price=?, row_version=row_version + 1 WHERE article=? AND row_version=?",
+                        (price, article, version)
+                    )
+                    if cursor.rowcount == 0:
+                        conflicts.append(article)
+
+            logger.success(f"✅ Prices updated: {len(prices) - len(conflicts)}, conflicts: {len(conflicts)}")
+
+            if self.events.has_subscribers(ChangeEvent.ITEM):
+                skipped = set(conflicts)
+                for article, price, version in prices:
+                    if article not in skipped:
+                        self.events.emit(ChangeEvent.ITEM, ChangeEvent.UPDATED, article,
+                                         {"price": price, "row_version": version + 1})
+            return conflicts
+
+        except Exception as e:
+            logger.error(f"❌ Error updating prices of {len(prices)} item(s): {e}")
+            raise
+
+    def update(self, old_article: str, item: Item, expected_version: Optional[int] = None) -> int:
         """
         Обновляет информацию о товаре.
 
         Args:
             old_article: Текущий артикул товара.
             item: Объект товара с новыми данными.
+            expected_version: row_version, с которой начиналось редактирование.
+                Если запись с тех пор изменил кто-то другой — ConcurrencyConflictError
+                вместо перезаписи чужих изменений. None — без проверки.
+
+        Returns:
+            int: Новая версия записи (row_version).
 
         Raises:
+            ConcurrencyConflictError: Товар изменён или удалён другим пользователем.
             Exception: Если произошла ошибка при обновлении.
         """
+        track = self.events.has_subscribers(ChangeEvent.ITEM)
+        old_values = None
+        conflict = None
+        new_version = None
         try:
-            with self.get_connection() as conn:
+            # IMMEDIATE: чтение прежних значений и UPDATE — одна транзакция записи
+            with self.get_connection(immediate=track) as conn:
                 cursor = conn.cursor()
-                cursor.execute("""
-                    UPDATE items 
-                    SET article=?, name=?, description=?, image_path=?, 
-                        category_id=?, price=?, stock=?, status=?, 
-                        unit=?, manufacturer=?, document=?
-                    WHERE article=?
-                """, (
+                if track:
+                    # Прежние значения — для списка изменившихся полей в событии
+                    cursor.execute(
+                        f"SELECT {', '.join(ITEM_FIELDS)} FROM items WHERE article=?",
+                        (old_article,)
+                    )
+                    old_values = cursor.fetchone()
+
+                values = (
                     item.article,
                     item.name,
                     item.description,
@@ -161,16 +321,253 @@ class ItemsRepository(BaseRepository):
                     item.status,
                     item.unit,
                     item.manufacturer,
-                    item.document,
-                    old_article
-                ))
+                    item.document
+                )
+                query = """
+                    UPDATE items 
+                    SET article=?, name=?, description=?, image_path=?, 
+                        category_id=?, price=?, stock=?, status=?, 
+                        unit=?, manufacturer=?, document=?,
+                        row_version=row_version + 1
+                    WHERE article=?
+                """
+                params = values + (old_article,)
+                if expected_version is not None:
+                    query += " AND row_version=?"
+                    params += (expected_version,)
+                cursor.execute(query, params)
+
+                if cursor.rowcount == 0 and expected_version is not None:
+                    conflict = ConcurrencyConflictError(
+                        ChangeEvent.ITEM, old_article, expected_version,
+                        self._current_version(cursor, "items", "article", old_article)
+                    )
+                else:
+                    new_version = self._current_version(cursor, "items", "article", item.article)
+
+            if conflict is not None:
+                logger.warning(
+                    f"⚠️ Item {old_article} changed concurrently: "
+                    f"expected version {expected_version}, actual {conflict.actual_version}"
+                )
+                raise conflict
 
             logger.success(f"✅ Item updated: {old_article} -> {item.article}")
 
+            if track:
+                changed = {
+                    field: value
+                    for index, (field, value) in enumerate(zip(ITEM_FIELDS, values))
+                    if old_values is None or old_values[index] != value
+                }
+                changed["row_version"] = new_version
+                self.events.emit(
+                    ChangeEvent.ITEM, ChangeEvent.UPDATED, item.article, changed,
+                    old_key=old_article if old_article != item.article else None
+                )
+
+            return new_version
+
+        except ConcurrencyConflictError:
+            raise
         except Exception as e:
             logger.error(f"❌ Error updating item {old_article}: {e}")
             raise
 
+    def update_paths(self, updates: List[Tuple[str, str, str, str]]) -> List[Tuple[str, str]]:
+        """
+        Пакетно переносит пути к файлам товаров (изображению или документу).
+
+        Все обновления выполняются в одной транзакции. Меняется только
+        указанный столбец и только если в нём всё ещё старый путь
+        (compare-and-swap, как в set_prices): перенос не затирает правки,
+        сделанные другими пользователями после чтения. row_version
+        увеличивается, как при любой другой записи товара.
+
+        Args:
+            updates: Кортежи (столбец "image_path" или "document", новый путь,
+                article, прочитанный старый путь).
+
+        Returns:
+            List[Tuple[str, str]]: Пропущенные из-за конфликта (article, столбец):
+            путь изменён или товар удалён после чтения.
+
+        Raises:
+            ValueError: Недопустимый столбец.
+            Exception: Если произошла ошибка при обновлении (пакет откатывается).
+        """
+        invalid = {column for column, *_ in updates} - {"image_path", "document"}
+        if invalid:
+            raise ValueError(f"Недопустимые столбцы путей: {', '.join(sorted(invalid))}")
+
+        track = self.events.has_subscribers(ChangeEvent.ITEM)
+        conflicts = []
+        applied = []
+        versions = {}
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                for column, new_path, article, old_path in updates:
+                    cursor.execute(
+                        f"UPDATE items SET {column}=?, row_version=row_version + 1 WHERE article=? AND {column}=?",
+                        (new_path, article, old_path)
+                    )
+                    if cursor.rowcount == 0:
+                        conflicts.append((article, column))
+                    else:
+                        applied.append((column, new_path, article))
+
+                if track:
+                    for chunk in self._in_chunks(article for _, _, article in applied):
+                        cursor.execute(
+                            f"SELECT article, row_version FROM items "
+                            f"WHERE article IN ({', '.join('?' * len(chunk))})",
+                            chunk
+                        )
+                        versions.update(cursor.fetchall())
+
+            logger.success(f"✅ Paths updated: {len(applied)}, conflicts: {len(conflicts)}")
+            for column, new_path, article in applied:
+                if article in versions:
+                    self.events.emit(ChangeEvent.ITEM, ChangeEvent.UPDATED, article,
+                                     {column: new_path, "row_version": versions[article]})
+            return conflicts
+
+        except Exception as e:
+            logger.error(f"❌ Error updating item paths: {e}")
+            raise
+
+    def iter_batches(self, batch_size: int = 1000, after: Optional[str] = None,
+                     category_id: Optional[int] = None) -> Iterator[List[Tuple]]:
+        """
+        Перебирает товары частями в порядке артикулов.
+
+        Каждая часть читается отдельной короткой транзакцией (keyset-пагинация
+        по первичному ключу): многочасовой перебор не держит чтение открытым,
+        не мешает контрольным точкам WAL и записи других экземпляров.
+
+        Args:
+            batch_size: Товаров в части.
+            after: Начать после этого артикула (продолжение прерванного перебора).
+            category_id: Только товары категории (None — все).
+
+        Yields:
+            List[Tuple]: Часть товаров (кортежи как в get_all).
+
+        Raises:
+            Exception: Если произошла ошибка при чтении.
+        """
+        while True:
+            conditions, params = [], []
+            if after is not None:
+                conditions.append("i.article > ?")
+                params.append(after)
+            if category_id is not None:
+                conditions.append("i.category_id = ?")
+                params.append(category_id)
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+            with self.get_read_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f"""
+                    SELECT 
+                        i.article,
+                        i.name,
+                        i.description,
+                        i.image_path,
+                        COALESCE(c.name, 'Без категории') AS category_name,
+                        i.price,
+                        i.stock,
+                        i.created_date,
+                        i.status,
+                        i.unit,
+                        i.manufacturer,
+                        i.document,
+                        i.row_version
+                    FROM items i
+                    LEFT JOIN categories c ON i.category_id = c.id
+                    {where}
+                    ORDER BY i.article
+                    LIMIT ?
+                """, (*params, batch_size))
+                batch = cursor.fetchall()
+
+            if batch:
+                yield batch
+            if len(batch) < batch_size:
+                return
+            after = batch[-1][0]
+
+    def get_summary(self) -> Dict:
+        """
+        Сводка по складу: количество товаров, остатки и их стоимость.
+
+        Returns:
+            Dict: items, stock_units, stock_value, out_of_stock и by_category —
+            список {category, items, stock_units, stock_value}.
+        """
+        with self.get_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT COUNT(*), COALESCE(SUM(stock), 0), COALESCE(SUM(price * stock), 0),
+                       COALESCE(SUM(CASE WHEN stock = 0 THEN 1 ELSE 0 END), 0)
+                FROM items
+            """)
+            total, units, value, out_of_stock = cursor.fetchone()
+            # Группировка по category_id до соединения: имена — только для итоговых строк
+            cursor.execute("""
+                SELECT COALESCE(c.name, 'Без категории'), s.items, s.stock_units, s.stock_value
+                FROM (
+                    SELECT category_id, COUNT(*) AS items,
+                           COALESCE(SUM(stock), 0) AS stock_units,
+                           COALESCE(SUM(price * stock), 0) AS stock_value
+                    FROM items
+                    GROUP BY category_id
+                ) s
+                LEFT JOIN categories c ON s.category_id = c.id
+                ORDER BY s.items DESC
+            """)
+            by_category = cursor.fetchall()
+
+        # SUM по BIGINT в PostgreSQL возвращает numeric (Decimal)
+        return {
+            "items": total,
+            "stock_units": int(units),
+            "stock_value": round(float(value), 2),
+            "out_of_stock": int(out_of_stock),
+            "by_category": [
+                {"category": name, "items": count, "stock_units": int(stock), "stock_value": round(float(amount), 2)}
+                for name, count, stock, amount in by_category
+            ],
+        }
+
+    def get_file_references(self) -> List[Tuple[str, str]]:
+        """
+        Возвращает все ссылки товаров на файлы хранилища.
+
+        Returns:
+            List[Tuple[str, str]]: Список кортежей (article, относительный путь)
+            для непустых image_path и document.
+        """
+        try:
+            with self.get_read_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT article, image_path FROM items
+                    WHERE image_path IS NOT NULL AND image_path != ''
+                    UNION ALL
+                    SELECT article, document FROM items
+                    WHERE document IS NOT NULL AND document != ''
+                """)
+                references = cursor.fetchall()
+
+            logger.debug(f"📎 Found {len(references)} file reference(s) in items")
+            return references
+
+        except Exception as e:
+            logger.error(f"❌ Error loading item file references: {e}")
+            return []
+
     def delete(self, article: str) -> None:
         """
         Удаляет товар и все связанные документы.
@@ -192,6 +589,9 @@ class ItemsRepository(BaseRepository):
                 )
                 deleted_docs = cursor.rowcount
 
+                # Связи с поставщиками явно: SQLite без PRAGMA foreign_keys не выполняет ON DELETE CASCADE
+                cursor.execute("DELETE FROM item_suppliers WHERE item_article=?", (article,))
+
                 # Удаляем товар
                 cursor.execute("DELETE FROM items WHERE article=?", (article,))
 
@@ -199,6 +599,7 @@ class ItemsRepository(BaseRepository):
                 f"✅ Item deleted: {article} "
                 f"(with {deleted_docs} document(s))"
             )
+            self.events.emit(ChangeEvent.ITEM, ChangeEvent.DELETED, article)
 
         except Exception as e:
             logger.error(f"❌ Error deleting item {article}: {e}")
@@ -216,7 +617,7 @@ class ItemsRepository(BaseRepository):
             List[Tuple]: Список найденных товаров.
         """
         try:
-            with self.get_connection() as conn:
+            with self.get_read_connection() as conn:
                 cursor = conn.cursor()
 
                 # Безопасная подстановка имени поля
@@ -237,7 +638,8 @@ class ItemsRepository(BaseRepository):
                         i.status,
                         i.unit,
                         i.manufacturer,
-                        i.document
+                        i.document,
+                        i.row_version
                     FROM items i
                     LEFT JOIN categories c ON i.category_id = c.id
                     WHERE i.{field} LIKE ?
@@ -264,7 +666,7 @@ class ItemsRepository(BaseRepository):
             Tuple: Данные товара или None, если не найден.
         """
         try:
-            with self.get_connection() as conn:
+            with self.get_read_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     SELECT 
@@ -279,7 +681,8 @@ class ItemsRepository(BaseRepository):
                         i.status,
                         i.unit,
                         i.manufacturer,
-                        i.document
+                        i.document,
+                        i.row_version
                     FROM items i
                     LEFT JOIN categories c ON i.category_id = c.id
                     WHERE i.article = ?
@@ -4,7 +4,7 @@
 """
 
 from datetime import datetime, timedelta
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from dataclasses import dataclass
 
 from loguru import logger
@@ -22,10 +22,31 @@ class LoginHistoryDTO:
     logout_time: Optional[datetime]
     logout_reason: Optional[str]  # 'manual', 'timeout', 'forced'
     session_duration: Optional[int]  # В секундах
+    event_type: str = "login"  # 'login' (сессия) или 'failed' (неудачная попытка)
 
 
 class LoginHistoryRepository(BaseRepository):
-    """Репозиторий для истории входов."""
+    """
+    Репозиторий для истории входов.
+
+    Старые записи переносятся в компактную таблицу login_history_archive
+    (время — unix timestamp, без logout_time), чтобы рабочая таблица
+    оставалась небольшой.
+
+    Сводная таблица login_daily_stats (день × пользователь) обновляется
+    инкрементально при закрытии сессий и неудачных попытках, поэтому
+    статистика не требует сканирования истории.
+    """
+
+    # Типы событий
+    EVENT_LOGIN = "login"
+    EVENT_FAILED = "failed"
+
+    # Причины выхода, для которых в сводке есть отдельные счётчики
+    ROLLUP_REASONS = ("manual", "timeout", "forced")
+
+    # Общий список столбцов для SELECT (порядок соответствует _row_to_dto)
+    _COLUMNS = "id, user_id, username, login_time, logout_time, logout_reason, session_duration, event_type"
 
     def __init__(self, db_path: str = "users.db"):
         """
@@ -53,12 +74,72 @@ class LoginHistoryRepository(BaseRepository):
                 )
             """)
 
+            # Тип события: до появления столбца неудачные попытки отличались
+            # только префиксом 'failed:' в logout_reason
+            if self._ensure_column(conn, "login_history", "event_type", "TEXT NOT NULL DEFAULT 'login'"):
+                cursor = conn.execute("""
+                    UPDATE login_history SET event_type = 'failed'
+                    WHERE logout_reason LIKE 'failed:%'
+                """)
+                logger.info(f"🛠️ Backfilled event_type for {cursor.rowcount} failed login record(s)")
+
             # Индекс для быстрого поиска по пользователю и времени
             conn.execute("""
                 CREATE INDEX IF NOT EXISTS idx_login_history_user 
                 ON login_history(user_id, login_time DESC)
             """)
 
+            # Индекс для подсчёта неудачных попыток (блокировка)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_login_history_username_event
+                ON login_history(username, event_type, login_time)
+            """)
+
+            # Индекс для переноса старых записей в архив
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_login_history_time
+                ON login_history(login_time)
+            """)
+
+            # Компактный архив старых записей
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS login_history_archive (
+                    id INTEGER PRIMARY KEY,
+                    user_id INTEGER NOT NULL,
+                    username TEXT NOT NULL,
+                    event_type TEXT NOT NULL,
+                    login_ts INTEGER NOT NULL,
+                    session_duration INTEGER,
+                    reason TEXT
+                )
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_login_history_archive_ts
+                ON login_history_archive(login_ts)
+            """)
+
+            # Дневная сводка по пользователям
+            stats_exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'login_daily_stats'"
+            ).fetchone()
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS login_daily_stats (
+                    day TEXT NOT NULL,
+                    username TEXT NOT NULL,
+                    session_count INTEGER NOT NULL DEFAULT 0,
+                    total_duration INTEGER NOT NULL DEFAULT 0,
+                    failed_count INTEGER NOT NULL DEFAULT 0,
+                    manual_count INTEGER NOT NULL DEFAULT 0,
+                    timeout_count INTEGER NOT NULL DEFAULT 0,
+                    forced_count INTEGER NOT NULL DEFAULT 0,
+                    other_count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (day, username)
+                ) WITHOUT ROWID
+            """)
+
+            if not stats_exists:
+                self._rebuild_daily_stats(conn)
+
         logger.debug("Login history table ensured")
 
     def record_login(self, user_id: int, username: str) -> int:
@@ -89,6 +170,11 @@ class LoginHistoryRepository(BaseRepository):
         Args:
             record_id: ID записи входа.
             reason: Причина выхода ('manual', 'timeout', 'forced').
+
+        Returns:
+            False, если запись не найдена или выход уже записан (например,
+            принудительный) — повторный выход не меняет причину и не
+            учитывается в сводке второй раз.
         """
         try:
             with self.get_connection() as conn:
@@ -107,12 +193,18 @@ class LoginHistoryRepository(BaseRepository):
                 logout_time = datetime.now()
                 duration = int((logout_time - login_time).total_seconds())
 
-                conn.execute("""
+                cursor = conn.execute("""
                     UPDATE login_history 
                     SET logout_time = ?, logout_reason = ?, session_duration = ?
-                    WHERE id = ?
+                    WHERE id = ? AND logout_time IS NULL
                 """, (logout_time.isoformat(), reason, duration, record_id))
 
+                if cursor.rowcount != 1:
+                    logger.info(f"Logout for record {record_id} already recorded")
+                    return False
+
+                self._rollup_closed_sessions(conn, [(record_id, duration, reason)])
+
             logger.info(f"📤 Logout recorded: record_id={record_id}, reason={reason}, duration={duration}s")
             return True
 
@@ -128,14 +220,94 @@ class LoginHistoryRepository(BaseRepository):
             username: Имя пользователя.
             reason: Причина ('invalid_password', 'user_not_found', 'account_locked').
         """
+        now = datetime.now().isoformat()
+
         with self.get_connection() as conn:
             conn.execute("""
-                INSERT INTO login_history (user_id, username, login_time, logout_time, logout_reason)
-                VALUES (0, ?, ?, ?, ?)
-            """, (username, datetime.now().isoformat(), datetime.now().isoformat(), f"failed:{reason}"))
+                INSERT INTO login_history (user_id, username, login_time, logout_time, logout_reason, event_type)
+                VALUES (0, ?, ?, ?, ?, ?)
+            """, (username, now, now, f"failed:{reason}", self.EVENT_FAILED))
+
+            self._rollup_failures(conn, [(username, now)])
 
         logger.warning(f"⚠️ Failed login attempt: {username} ({reason})")
 
+    def write_batch(
+            self,
+            sessions: List[Tuple[int, str, str, Optional[str], Optional[str], Optional[int]]],
+            failures: List[Tuple[str, str, str]],
+            logouts: List[Tuple[int, str, str, int]]
+    ) -> List[int]:
+        """
+        Запись пачки событий одной транзакцией (для очереди LoginAuditQueue).
+
+        Args:
+            sessions: Входы (user_id, username, login_time, logout_time, logout_reason, duration);
+                logout_* заполнены, если выход произошёл до записи входа.
+            failures: Неудачные попытки (username, time, reason).
+            logouts: Выходы уже записанных сессий (record_id, logout_time, reason, duration);
+                уже закрытые сессии (например, принудительным выходом) пропускаются.
+
+        Returns:
+            Список id записанных сессий в порядке sessions.
+        """
+        with self.get_connection() as conn:
+            record_ids = []
+            closed = []
+            for session in sessions:
+                cursor = conn.execute("""
+                    INSERT INTO login_history
+                        (user_id, username, login_time, logout_time, logout_reason, session_duration)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, session)
+                record_ids.append(cursor.lastrowid)
+                if session[3]:
+                    closed.append((cursor.lastrowid, session[5], session[4]))
+
+            conn.executemany("""
+                INSERT INTO login_history (user_id, username, login_time, logout_time, logout_reason, event_type)
+                VALUES (0, ?, ?, ?, 'failed:' || ?, 'failed')
+            """, [(username, at, at, reason) for username, at, reason in failures])
+
+            for record_id, logout_time, reason, duration in logouts:
+                cursor = conn.execute("""
+                    UPDATE login_history
+                    SET logout_time = ?, logout_reason = ?, session_duration = ?
+                    WHERE id = ? AND logout_time IS NULL
+                """, (logout_time, reason, duration, record_id))
+                if cursor.rowcount == 1:
+                    closed.append((record_id, duration, reason))
+
+            self._rollup_closed_sessions(conn, closed)
+            self._rollup_failures(conn, [(username, at) for username, at, _ in failures])
+
+        logger.debug(
+            f"📝 Login history batch written: {len(sessions)} login(s), "
+            f"{len(failures)} failure(s), {len(logouts)} logout(s)"
+        )
+        return record_ids
+
+    def get_recent_failures(self, minutes: int = 15) -> List[Tuple[str, datetime]]:
+        """
+        Неудачные попытки входа за период (для заполнения LoginThrottle).
+
+        Args:
+            minutes: За сколько минут.
+
+        Returns:
+            Список (username, время попытки).
+        """
+        since = (datetime.now() - timedelta(minutes=minutes)).isoformat()
+
+        with self.get_connection() as conn:
+            cursor = conn.execute("""
+                SELECT username, login_time FROM login_history
+                WHERE event_type = 'failed' AND login_time >= ?
+            """, (since,))
+            rows = cursor.fetchall()
+
+        return [(row[0], datetime.fromisoformat(row[1])) for row in rows]
+
     def get_user_history(self, user_id: int, limit: int = 50) -> List[LoginHistoryDTO]:
         """
         Получение истории входов пользователя.
@@ -145,8 +317,8 @@ class LoginHistoryRepository(BaseRepository):
             limit: Максимальное количество записей.
         """
         with self.get_connection() as conn:
-            cursor = conn.execute("""
-                SELECT id, user_id, username, login_time, logout_time, logout_reason, session_duration
+            cursor = conn.execute(f"""
+                SELECT {self._COLUMNS}
                 FROM login_history
                 WHERE user_id = ?
                 ORDER BY login_time DESC
@@ -156,24 +328,34 @@ class LoginHistoryRepository(BaseRepository):
 
         return [self._row_to_dto(row) for row in rows]
 
-    def get_all_history(self, limit: int = 100, days: int = 30) -> List[LoginHistoryDTO]:
+    def get_all_history(self, limit: int = 100, before_id: Optional[int] = None) -> List[LoginHistoryDTO]:
         """
-        Получение всей истории входов за период.
+        Получение страницы истории входов (новые записи первыми).
+
+        Пагинация по ключу: следующая страница запрашивается с before_id,
+        равным id последней записи предыдущей страницы. Запрос идёт по
+        первичному ключу и не сканирует таблицу по дате.
 
         Args:
-            limit: Максимальное количество записей.
-            days: За сколько дней.
+            limit: Размер страницы.
+            before_id: Вернуть записи с id меньше указанного (None — первая страница).
         """
-        since = (datetime.now() - timedelta(days=days)).isoformat()
-
         with self.get_connection() as conn:
-            cursor = conn.execute("""
-                SELECT id, user_id, username, login_time, logout_time, logout_reason, session_duration
-                FROM login_history
-                WHERE login_time >= ?
-                ORDER BY login_time DESC
-                LIMIT ?
-            """, (since, limit))
+            if before_id is None:
+                cursor = conn.execute(f"""
+                    SELECT {self._COLUMNS}
+                    FROM login_history
+                    ORDER BY id DESC
+                    LIMIT ?
+                """, (limit,))
+            else:
+                cursor = conn.execute(f"""
+                    SELECT {self._COLUMNS}
+                    FROM login_history
+                    WHERE id < ?
+                    ORDER BY id DESC
+                    LIMIT ?
+                """, (before_id, limit))
             rows = cursor.fetchall()
 
         return [self._row_to_dto(row) for row in rows]
@@ -181,10 +363,10 @@ class LoginHistoryRepository(BaseRepository):
     def get_active_sessions(self) -> List[LoginHistoryDTO]:
         """Получение активных сессий (без logout_time)."""
         with self.get_connection() as conn:
-            cursor = conn.execute("""
-                SELECT id, user_id, username, login_time, logout_time, logout_reason, session_duration
+            cursor = conn.execute(f"""
+                SELECT {self._COLUMNS}
                 FROM login_history
-                WHERE logout_time IS NULL AND user_id > 0
+                WHERE logout_time IS NULL AND event_type = 'login'
                 ORDER BY login_time DESC
             """)
             rows = cursor.fetchall()
@@ -232,7 +414,7 @@ class LoginHistoryRepository(BaseRepository):
         with self.get_connection() as conn:
             cursor = conn.execute("""
                 SELECT COUNT(*) FROM login_history
-                WHERE username = ? AND login_time >= ? AND logout_reason LIKE 'failed:%'
+                WHERE username = ? AND event_type = 'failed' AND login_time >= ?
             """, (username, since))
             row = cursor.fetchone()
 
@@ -259,12 +441,107 @@ class LoginHistoryRepository(BaseRepository):
         logger.info(f"🗑️ Cleaned up {count} old login history records")
         return count
 
-    def delete_user_history(self, user_id: int) -> int:
+    def archive_old_records(self, days: int = 90, batch_size: int = 5000) -> int:
+        """
+        Перенос старых записей в архив.
+
+        Записи старше N дней копируются в login_history_archive и удаляются
+        из рабочей таблицы. Перенос идёт пачками, каждая — отдельной
+        транзакцией, чтобы не держать блокировку БД долго.
+
+        Args:
+            days: Переносить записи старше N дней.
+            batch_size: Размер пачки.
+
+        Returns:
+            Количество перенесённых записей.
+        """
+        cutoff = (datetime.now() - timedelta(days=days)).isoformat()
+        total = 0
+
+        try:
+            while True:
+                with self.get_connection() as conn:
+                    ids = [row[0] for row in conn.execute("""
+                        SELECT id FROM login_history
+                        WHERE login_time < ?
+                        ORDER BY login_time
+                        LIMIT ?
+                    """, (cutoff, batch_size))]
+
+                    if not ids:
+                        break
+
+                    # IN (...) частями: старые сборки SQLite ограничены 999 параметрами
+                    for chunk in self._in_chunks(ids):
+                        placeholders = ",".join("?" * len(chunk))
+                        conn.execute(f"""
+                            INSERT OR REPLACE INTO login_history_archive
+                                (id, user_id, username, event_type, login_ts, session_duration, reason)
+                            SELECT id, user_id, username, event_type,
+                                   CAST(strftime('%s', login_time) AS INTEGER),
+                                   session_duration, logout_reason
+                            FROM login_history
+                            WHERE id IN ({placeholders})
+                        """, chunk)
+                        conn.execute(f"DELETE FROM login_history WHERE id IN ({placeholders})", chunk)
+
+                total += len(ids)
+
+            if total:
+                logger.info(f"📦 Archived {total} login history record(s) older than {days} days")
+            return total
+
+        except Exception as e:
+            logger.error(f"❌ Failed to archive login history: {e}")
+            return total
+
+    def purge_archive(self, days: int = 730) -> int:
+        """
+        Удаление записей архива старше N дней.
+
+        Args:
+            days: Удалять архивные записи старше N дней.
+
+        Returns:
+            Количество удалённых записей.
+        """
+        cutoff = (datetime.now() - timedelta(days=days)).isoformat()
+
+        with self.get_connection() as conn:
+            # login_ts получен через strftime('%s') — сравниваем в той же шкале
+            cursor = conn.execute(
+                "DELETE FROM login_history_archive WHERE login_ts < CAST(strftime('%s', ?) AS INTEGER)",
+                (cutoff,)
+            )
+            count = cursor.rowcount
+
+        if count:
+            logger.info(f"🗑️ Purged {count} archived login history records")
+        return count
+
+    def apply_retention(self, archive_after_days: int = 90, purge_after_days: int = 730) -> int:
+        """
+        Политика хранения: перенос старых записей в архив и очистка архива.
+
+        Args:
+            archive_after_days: Возраст записи для переноса в архив.
+            purge_after_days: Возраст архивной записи для удаления.
+
+        Returns:
+            Количество перенесённых в архив записей.
+        """
+        archived = self.archive_old_records(archive_after_days)
+        self.purge_archive(purge_after_days)
+        return archived
+
+    def delete_user_history(self, user_id: int, username: Optional[str] = None) -> int:
         """
         Удаление всей истории входов пользователя.
 
         Args:
             user_id: ID пользователя.
+            username: Имя пользователя (для удаления дневной сводки).
 
         Returns:
             Количество удалённых записей.
@@ -277,12 +554,202 @@ class LoginHistoryRepository(BaseRepository):
                 )
                 count = cursor.rowcount
 
+                cursor = conn.execute(
+                    "DELETE FROM login_history_archive WHERE user_id = ?",
+                    (user_id,)
+                )
+                count += cursor.rowcount
+
+                if username:
+                    conn.execute("DELETE FROM login_daily_stats WHERE username = ?", (username,))
+
             logger.info(f"🗑️ Deleted {count} login history records for user {user_id}")
             return count
         except Exception as e:
             logger.error(f"❌ Failed to delete history for user {user_id}: {e}")
             return 0
 
+    # === Дневная сводка ===
+
+    def _rollup_closed_sessions(self, conn, closed: List[Tuple[int, Optional[int], Optional[str]]]):
+        """
+        Добавляет закрытые сессии в дневную сводку.
+
+        День и пользователь берутся из записи входа (сессия относится ко дню входа).
+
+        Args:
+            conn: Открытое соединение (та же транзакция, что и запись выхода).
+            closed: Список (record_id, длительность, причина выхода).
+        """
+        if not closed:
+            return
+
+        rows = []
+        for record_id, duration, reason in closed:
+            reason_flags = [int(reason == r) for r in self.ROLLUP_REASONS]
+            rows.append((duration or 0, *reason_flags, int(not any(reason_flags)), record_id))
+
+        conn.executemany("""
+            INSERT INTO login_daily_stats
+                (day, username, session_count, total_duration,
+                 manual_count, timeout_count, forced_count, other_count)
+            SELECT date(login_time), username, 1, ?, ?, ?, ?, ?
+            FROM login_history
+            WHERE id = ?
+            ON CONFLICT(day, username) DO UPDATE SET
+                session_count = session_count + 1,
+                total_duration = total_duration + excluded.total_duration,
+                manual_count = manual_count + excluded.manual_count,
+                timeout_count = timeout_count + excluded.timeout_count,
+                forced_count = forced_count + excluded.forced_count,
+                other_count = other_count + excluded.other_count
+        """, rows)
+
+    @staticmethod
+    def _rollup_failures(conn, failures: List[Tuple[str, str]]):
+        """
+        Добавляет неудачные попытки в дневную сводку.
+
+        Args:
+            conn: Открытое соединение.
+            failures: Список (username, время попытки ISO).
+        """
+        if not failures:
+            return
+
+        conn.executemany("""
+            INSERT INTO login_daily_stats (day, username, failed_count)
+            VALUES (date(?), ?, 1)
+            ON CONFLICT(day, username) DO UPDATE SET
+                failed_count = failed_count + 1
+        """, [(at, username) for username, at in failures])
+
+    def _rebuild_daily_stats(self, conn) -> int:
+        """
+        Пересчитывает дневную сводку из истории и архива.
+
+        Args:
+            conn: Открытое соединение.
+
+        Returns:
+            Количество строк сводки.
+        """
+        conn.execute("DELETE FROM login_daily_stats")
+        conn.execute("""
+            INSERT INTO login_daily_stats
+                (day, username, session_count, total_duration, failed_count,
+                 manual_count, timeout_count, forced_count, other_count)
+            SELECT day, username,
+                   SUM(event_type = 'login'),
+                   SUM(CASE WHEN event_type = 'login' THEN COALESCE(duration, 0) ELSE 0 END),
+                   SUM(event_type = 'failed'),
+                   SUM(event_type = 'login' AND reason = 'manual'),
+                   SUM(event_type = 'login' AND reason = 'timeout'),
+                   SUM(event_type = 'login' AND reason = 'forced'),
+                   SUM(event_type = 'login' AND reason NOT IN ('manual', 'timeout', 'forced'))
+            FROM (
+                SELECT date(login_time) AS day, username, event_type,
+                       session_duration AS duration, logout_reason AS reason
+                FROM login_history
+                WHERE event_type = 'failed' OR logout_time IS NOT NULL
+                UNION ALL
+                SELECT date(login_ts, 'unixepoch'), username, event_type,
+                       session_duration, reason
+                FROM login_history_archive
+                WHERE event_type = 'failed' OR reason IS NOT NULL
+            )
+            GROUP BY day, username
+        """)
+        count = conn.execute("SELECT COUNT(*) FROM login_daily_stats").fetchone()[0]
+        logger.info(f"📊 Login daily stats rebuilt: {count} row(s)")
+        return count
+
+    def rebuild_daily_stats(self) -> int:
+        """
+        Полный пересчёт дневной сводки (восстановление после сбоя/ручной правки).
+
+        Returns:
+            Количество строк сводки.
+        """
+        with self.get_connection() as conn:
+            return self._rebuild_daily_stats(conn)
+
+    def get_user_stats(self, days: int = 30) -> List[dict]:
+        """
+        Статистика по пользователям за период (из дневной сводки).
+
+        Args:
+            days: За сколько дней.
+
+        Returns:
+            Список словарей: username, sessions, total_duration, avg_duration,
+            failed, manual, timeout, forced, other.
+        """
+        since = (datetime.now() - timedelta(days=days)).date().isoformat()
+
+        with self.get_connection() as conn:
+            cursor = conn.execute("""
+                SELECT username,
+                       SUM(session_count), SUM(total_duration), SUM(failed_count),
+                       SUM(manual_count), SUM(timeout_count), SUM(forced_count), SUM(other_count)
+                FROM login_daily_stats
+                WHERE day >= ?
+                GROUP BY username
+                ORDER BY username
+            """, (since,))
+            rows = cursor.fetchall()
+
+        return [
+            {
+                "username": row[0],
+                "sessions": row[1],
+                "total_duration": row[2],
+                "avg_duration": row[2] // row[1] if row[1] else 0,
+                "failed": row[3],
+                "manual": row[4],
+                "timeout": row[5],
+                "forced": row[6],
+                "other": row[7],
+            }
+            for row in rows
+        ]
+
+    def get_daily_stats(self, username: Optional[str] = None, days: int = 30) -> List[dict]:
+        """
+        Статистика по дням за период (из дневной сводки).
+
+        Args:
+            username: Имя пользователя (None — все пользователи).
+            days: За сколько дней.
+
+        Returns:
+            Список словарей: day, sessions, total_duration, failed (по возрастанию дня).
+        """
+        since = (datetime.now() - timedelta(days=days)).date().isoformat()
+
+        with self.get_connection() as conn:
+            if username:
+                cursor = conn.execute("""
+                    SELECT day, session_count, total_duration, failed_count
+                    FROM login_daily_stats
+                    WHERE day >= ? AND username = ?
+                    ORDER BY day
+                """, (since, username))
+            else:
+                cursor = conn.execute("""
+                    SELECT day, SUM(session_count), SUM(total_duration), SUM(failed_count)
+                    FROM login_daily_stats
+                    WHERE day >= ?
+                    GROUP BY day
+                    ORDER BY day
+                """, (since,))
+            rows = cursor.fetchall()
+
+        return [
+            {"day": row[0], "sessions": row[1], "total_duration": row[2], "failed": row[3]}
+            for row in rows
+        ]
+
     def _row_to_dto(self, row) -> LoginHistoryDTO:
         """Конвертация строки БД в DTO."""
         return LoginHistoryDTO(
@@ -292,5 +759,6 @@ class LoginHistoryRepository(BaseRepository):
             login_time=datetime.fromisoformat(row[3]) if row[3] else None,
             logout_time=datetime.fromisoformat(row[4]) if row[4] else None,
             logout_reason=row[5],
-            session_duration=row[6]
+            session_duration=row[6],
+            event_type=row[7] if len(row) > 7 and row[7] else self.EVENT_LOGIN
         )
\ No newline at end of file
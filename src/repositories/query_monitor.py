@@ -0,0 +1,370 @@
+"""Мониторинг SQL-запросов репозиториев
+
+Мониторинг включается вместе со сбором метрик (PYTHONCODE_METRICS=1,
+MetricsManager.enabled) или query_monitor.configure(enabled=True); пока
+он выключен, соединения SQLite открываются без обёртки и запросы ничего
+не стоят сверх обычного выполнения.
+
+Во включённом режиме соединения BaseRepository создаются с
+InstrumentedConnection: каждый запрос (execute/executemany и последующие
+fetch*) замеряется, и по нему копится статистика (количество, суммарное
+время, строки). Запросы дольше порога пишутся в лог с EXPLAIN QUERY PLAN;
+из параметров в лог попадают только количество и типы — значения (хеши
+паролей, соль) не пишутся.
+
+Бюджет запросов (N+1):
+
+    with query_monitor.budget(2, "ItemSuppliersModel.loadForArticle"):
+        model.loadForArticle(article)
+
+    @query_budget(1)
+    def loadData(self): ...
+
+При превышении пишется предупреждение со списком запросов, а в строгом
+режиме (query_monitor.strict = True или PYTHONCODE_QUERY_BUDGET_STRICT=1,
+включает и мониторинг) выбрасывается QueryBudgetExceeded — для тестов и
+отладки. Бюджет считается только при включённом мониторинге.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from functools import wraps
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+# Список плейсхолдеров IN (?, ?, ?) любой длины — один и тот же запрос
+_PLACEHOLDER_LIST = re.compile(r"\?(\s*,\s*\?)+")
+_WHITESPACE = re.compile(r"\s+")
+
+# Запросы, для которых имеет смысл EXPLAIN QUERY PLAN
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Блок выполнил больше запросов, чем разрешено бюджетом (строгий режим)."""
+
+
+def describe_parameters(parameters) -> str:
+    """Параметры запроса для журнала: количество и типы, без значений."""
+    if isinstance(parameters, dict):
+        return f"{len(parameters)}: " + ", ".join(
+            f"{name}={type(value).__name__}" for name, value in parameters.items()
+        )
+    parameters = tuple(parameters or ())
+    return f"{len(parameters)}: " + ", ".join(type(value).__name__ for value in parameters)
+
+
+def normalize_sql(sql: str) -> str:
+    """Ключ статистики: SQL без лишних пробелов, списки плейсхолдеров свёрнуты."""
+    return _PLACEHOLDER_LIST.sub("?, ...", _WHITESPACE.sub(" ", sql).strip())
+
+
+class _StatementStats:
+    __slots__ = ("count", "total_ns", "max_ns", "rows")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.rows = 0
+
+
+class _Budget:
+    """Счётчик запросов одного блока с бюджетом."""
+
+    def __init__(self, monitor: "QueryMonitor", max_queries: int, label: str):
+        self._monitor = monitor
+        self.max_queries = max_queries
+        self.label = label
+        self.statements: List[str] = []
+
+    def __enter__(self):
+        self._monitor._budgets().append(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._monitor._budgets().remove(self)
+        if exc_type is None and len(self.statements) > self.max_queries:
+            self._monitor._budget_exceeded(self)
+        return False
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+class QueryMonitor:
+    """
+    Статистика и журнал медленных SQL-запросов процесса.
+
+    Attributes:
+        enabled: Собирать статистику и журнал медленных запросов. По умолчанию
+            выключено (включается PYTHONCODE_METRICS=1 или строгим бюджетом).
+        slow_query_ms: Порог медленного запроса, мс.
+        strict: Превышение бюджета запросов — исключение, а не предупреждение.
+    """
+
+    def __init__(self, slow_query_ms: float = 100.0):
+        self.slow_query_ms = slow_query_ms
+        self.strict = os.environ.get("PYTHONCODE_QUERY_BUDGET_STRICT") == "1"
+        self.enabled = self.strict or os.environ.get("PYTHONCODE_METRICS") == "1"
+
+        self._lock = threading.Lock()
+        self._stats: Dict[str, _StatementStats] = {}
+        self._local = threading.local()
+
+    def configure(self, slow_query_ms: Optional[float] = None, enabled: Optional[bool] = None,
+                  strict: Optional[bool] = None):
+        """Изменяет настройки мониторинга (None — оставить как есть)."""
+        if slow_query_ms is not None:
+            self.slow_query_ms = float(slow_query_ms)
+        if enabled is not None:
+            self.enabled = enabled
+        if strict is not None:
+            self.strict = strict
+
+    # === Статистика ===
+
+    def record(self, key: str, duration_ns: int, rows: int, new_statement: bool, execution_ns: int):
+        """
+        Добавляет измерение к статистике запроса.
+
+        Args:
+            key: Нормализованный SQL.
+            duration_ns: Время выполнения (execute или fetch).
+            rows: Затронутые или прочитанные строки.
+            new_statement: True для execute (считается запросом), False для fetch.
+            execution_ns: Время этого выполнения запроса с учётом чтения (для max).
+        """
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = _StatementStats()
+            if new_statement:
+                stats.count += 1
+            stats.total_ns += duration_ns
+            stats.max_ns = max(stats.max_ns, execution_ns)
+            stats.rows += rows
+
+        if new_statement:
+            for budget in self._budgets():
+                budget.statements.append(key)
+
+    def statement_stats(self, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Статистика по запросам, отсортированная по суммарному времени.
+
+        Returns:
+            List[Dict]: sql, count, total_ms, mean_ms, max_ms, rows.
+        """
+        with self._lock:
+            rows = [
+                {
+                    "sql": key,
+                    "count": stats.count,
+                    "total_ms": round(stats.total_ns / 1e6, 3),
+                    "mean_ms": round(stats.total_ns / max(stats.count, 1) / 1e6, 4),
+                    "max_ms": round(stats.max_ns / 1e6, 4),
+                    "rows": stats.rows,
+                }
+                for key, stats in self._stats.items()
+            ]
+        rows.sort(key=lambda row: row["total_ms"], reverse=True)
+        return rows[:limit] if limit else rows
+
+    def reset(self):
+        """Очищает статистику запросов."""
+        with self._lock:
+            self._stats.clear()
+
+    # === Медленные запросы ===
+
+    def log_slow(self, conn: sqlite3.Connection, sql: str, parameters, duration_ns: int, rows: int):
+        """Пишет медленный запрос в лог вместе с планом выполнения (параметры — только типы)."""
+        plan = self.explain(conn, sql, parameters)
+        logger.warning(
+            f"🐢 Slow query ({duration_ns / 1e6:.1f} ms, {rows} rows): {normalize_sql(sql)}\n"
+            f"   params: {describe_parameters(parameters)}\n"
+            f"   plan:\n{plan}"
+        )
+
+    @staticmethod
+    def explain(conn: sqlite3.Connection, sql: str, parameters) -> str:
+        """EXPLAIN QUERY PLAN запроса (текстом, по строке на шаг)."""
+        if not sql.lstrip().upper().startswith(_EXPLAINABLE):
+            return "      (no plan)"
+        if not isinstance(conn, sqlite3.Connection):
+            # Соединение другого хранилища (repositories.backends) строит план само
+            return conn.explain(sql, parameters)
+        try:
+            # Обычный курсор — без повторного учёта в статистике
+            cursor = conn.cursor(sqlite3.Cursor)
+            steps = cursor.execute(f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()
+        except sqlite3.Error as e:
+            return f"      (plan unavailable: {e})"
+        return "\n".join(f"      {step[-1]}" for step in steps)
+
+    # === Бюджет запросов ===
+
+    def _budgets(self) -> List[_Budget]:
+        budgets = getattr(self._local, "budgets", None)
+        if budgets is None:
+            budgets = self._local.budgets = []
+        return budgets
+
+    def budget(self, max_queries: int, label: str = "") -> _Budget:
+        """
+        Контекстный менеджер: не больше max_queries запросов в блоке (в текущем потоке).
+
+        Args:
+            max_queries: Разрешённое количество запросов.
+            label: Имя действия для сообщения.
+        """
+        return _Budget(self, max_queries, label)
+
+    def _budget_exceeded(self, budget: _Budget):
+        repeated = Counter(budget.statements).most_common(3)
+        details = "\n".join(f"   {count}× {sql[:150]}" for sql, count in repeated)
+        message = (f"{budget.label or 'Block'} issued {budget.count} queries "
+                   f"(budget {budget.max_queries}):\n{details}")
+
+        if self.strict:
+            raise QueryBudgetExceeded(message)
+        logger.warning(f"⚠️ Query budget exceeded: {message}")
+
+
+# Монитор процесса
+query_monitor = QueryMonitor()
+
+
+def query_budget(max_queries: int, label: Optional[str] = None):
+    """
+    Декоратор: бюджет запросов на вызов функции (см. QueryMonitor.budget).
+
+    Args:
+        max_queries: Разрешённое количество запросов.
+        label: Имя действия; по умолчанию — __qualname__ функции.
+    """
+    def decorate(func):
+        name = label or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with query_monitor.budget(max_queries, name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+class RecordingCursorMixin:
+    """
+    Учёт запросов курсора в query_monitor: выполнение, чтение, медленные.
+
+    Класс-наследник вызывает _begin после execute/executemany и оборачивает
+    fetch* в _fetch; нужны атрибуты rowcount и connection.
+    """
+
+    _key: Optional[str] = None
+    _sql: str = ""
+    _parameters = ()
+    _elapsed_ns: int = 0
+    _rows: int = 0
+    _slow_logged: bool = False
+
+    def _begin(self, sql: str, parameters, duration_ns: int):
+        """Учитывает выполнение запроса."""
+        rows = max(self.rowcount, 0)
+        self._key = normalize_sql(sql)
+        self._sql = sql
+        self._parameters = parameters
+        self._elapsed_ns = duration_ns
+        self._rows = rows
+        self._slow_logged = False
+
+        query_monitor.record(self._key, duration_ns, rows, True, duration_ns)
+        self._check_slow()
+
+    def _fetch(self, fetch, single: bool = False):
+        """Учитывает чтение результатов текущего запроса."""
+        if self._key is None or not query_monitor.enabled:
+            return fetch()
+
+        started = time.perf_counter_ns()
+        result = fetch()
+        duration_ns = time.perf_counter_ns() - started
+
+        rows = (1 if result is not None else 0) if single else len(result)
+        self._elapsed_ns += duration_ns
+        self._rows += rows
+        query_monitor.record(self._key, duration_ns, rows, False, self._elapsed_ns)
+        self._check_slow()
+        return result
+
+    def _check_slow(self):
+        """Пишет запрос в журнал медленных (один раз на выполнение)."""
+        if not self._slow_logged and self._elapsed_ns >= query_monitor.slow_query_ms * 1e6:
+            self._slow_logged = True
+            query_monitor.log_slow(self.connection, self._sql, self._parameters, self._elapsed_ns, self._rows)
+
+
+class InstrumentedCursor(RecordingCursorMixin, sqlite3.Cursor):
+    """Курсор, замеряющий execute/executemany и чтение результатов."""
+
+    def execute(self, sql, parameters=()):
+        if not query_monitor.enabled:
+            return super().execute(sql, parameters)
+
+        started = time.perf_counter_ns()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._begin(sql, parameters, time.perf_counter_ns() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        if not query_monitor.enabled:
+            return super().executemany(sql, seq_of_parameters)
+
+        # Для плана и журнала нужен первый набор параметров
+        seq_of_parameters = list(seq_of_parameters)
+        started = time.perf_counter_ns()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._begin(sql, seq_of_parameters[0] if seq_of_parameters else (),
+                        time.perf_counter_ns() - started)
+
+    def fetchone(self):
+        return self._fetch(super().fetchone, single=True)
+
+    def fetchmany(self, size=None):
+        if size is None:
+            size = self.arraysize
+        return self._fetch(lambda: super(InstrumentedCursor, self).fetchmany(size))
+
+    def fetchall(self):
+        return self._fetch(super().fetchall)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """
+    Соединение с InstrumentedCursor по умолчанию.
+
+    Connection.execute в CPython создаёт курсор в обход cursor(), поэтому
+    execute/executemany переопределены явно.
+    """
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
@@ -0,0 +1,292 @@
+"""Снимок базы данных в памяти для чтения
+
+На сетевом диске каждое чтение из items.db — обращение к медленному
+файлу. В режиме снимка (UnitOfWork.enable_read_snapshot) база копируется
+в :memory: через sqlite3.Connection.backup, и чтения репозиториев
+(BaseRepository.get_read_connection) обслуживаются из памяти.
+
+Запись идёт в файл через одно постоянное соединение; выполненные
+операторы запоминаются курсором соединения вместе с параметрами и после
+успешного commit повторяются в снимке с теми же значениями. Столбцы со
+значением по умолчанию, вычисляемым при вставке (CURRENT_TIMESTAMP),
+у вставленных строк копируются из файла, а не вычисляются повторно.
+Так как свои записи идут через то же соединение, PRAGMA data_version на
+нём меняется только от изменений других процессов — тогда снимок
+перечитывается (постранично, в новую базу, с заменой по
+готовности).
+"""
+
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from repositories.query_monitor import InstrumentedConnection, InstrumentedCursor
+from repositories.concurrency import DEFAULT_BUSY_TIMEOUT_MS, RetryPolicy, begin_immediate
+
+# Страниц за шаг backup: между шагами SQLite отпускает блокировку файла
+BACKUP_PAGES = 256
+
+# Как часто (с) проверять PRAGMA data_version — это тоже чтение с диска
+DEFAULT_CHECK_INTERVAL_S = 2.0
+
+# Операторы, которые не нужно повторять в снимке
+_NOT_REPLAYED = re.compile(
+    r"^\s*(SELECT|EXPLAIN|BEGIN|COMMIT|END|ROLLBACK|SAVEPOINT|RELEASE)\b"
+    r"|^\s*PRAGMA\s+[\w.]+\s*(\(.*\))?\s*;?\s*$",
+    re.IGNORECASE | re.DOTALL
+)
+
+_INSERT_INTO = re.compile(r"^\s*(?:INSERT|REPLACE)\s+(?:OR\s+\w+\s+)?INTO\s+[\"`\[]?(\w+)", re.IGNORECASE)
+
+# Значения по умолчанию, которые при повторе вставки дали бы другой результат
+_VOLATILE_DEFAULT = re.compile(r"CURRENT_(TIMESTAMP|DATE|TIME)|'now'|random\s*\(", re.IGNORECASE)
+
+
+class _RecordingCursor(InstrumentedCursor):
+    """Курсор соединения записи: сообщает снимку о выполненных операторах."""
+
+    def execute(self, sql, parameters=()):
+        snapshot = self.connection.snapshot
+        if snapshot is None or _NOT_REPLAYED.match(sql):
+            return super().execute(sql, parameters)
+        snapshot._before_write(sql)
+        result = super().execute(sql, parameters)
+        snapshot._statements.append((sql, parameters, False))
+        return result
+
+    def executemany(self, sql, seq_of_parameters):
+        snapshot = self.connection.snapshot
+        if snapshot is None or _NOT_REPLAYED.match(sql):
+            return super().executemany(sql, seq_of_parameters)
+        seq_of_parameters = list(seq_of_parameters)
+        snapshot._before_write(sql)
+        result = super().executemany(sql, seq_of_parameters)
+        snapshot._statements.append((sql, seq_of_parameters, True))
+        return result
+
+
+class _WriteConnection(InstrumentedConnection):
+    """Постоянное соединение записи снимка (snapshot задан на время транзакции)."""
+
+    snapshot: Optional["ReadSnapshot"] = None
+
+    def cursor(self, factory=_RecordingCursor):
+        return super().cursor(factory)
+
+
+class ReadSnapshot:
+    """
+    Копия базы данных в памяти для чтения с повтором собственных записей.
+
+    Потокобезопасен: обращения к снимку и к соединению записи
+    сериализуются одной блокировкой.
+
+    Attributes:
+        db_path: Путь к файлу базы данных.
+        check_interval: Минимальный интервал проверки внешних изменений, с.
+    """
+
+    def __init__(self, db_path: str, check_interval: float = DEFAULT_CHECK_INTERVAL_S,
+                 busy_timeout_ms: int = DEFAULT_BUSY_TIMEOUT_MS):
+        """
+        Копирует базу данных в память.
+
+        Args:
+            db_path: Путь к файлу базы данных.
+            check_interval: Интервал проверки изменений другими процессами, с.
+            busy_timeout_ms: Ожидание блокировки файла базы, мс.
+        """
+        self.db_path = db_path
+        self.check_interval = check_interval
+
+        self._lock = threading.RLock()
+        self._disk = sqlite3.connect(db_path, timeout=busy_timeout_ms / 1000, check_same_thread=False,
+                                     factory=_WriteConnection)
+        self._memory: Optional[sqlite3.Connection] = None
+        self._data_version = 0
+        self._last_check = 0.0
+        self._stale = True
+
+        # Вложенные блоки записи разделяют одну транзакцию
+        self._write_depth = 0
+        # (sql, параметры, executemany) операторов записи текущей транзакции
+        self._statements: List[Tuple[str, Any, bool]] = []
+        # Таблица → max(rowid) до первой вставки в транзакции (строки для копирования из файла)
+        self._inserted_after: Dict[str, int] = {}
+        # Таблица → столбцы с вычисляемым при вставке значением по умолчанию
+        self._volatile_columns: Dict[str, Tuple[str, ...]] = {}
+
+        self.refresh()
+
+    # === Обновление снимка ===
+
+    def _read_data_version(self) -> int:
+        return self._disk.execute("PRAGMA data_version").fetchone()[0]
+
+    def refresh(self):
+        """Перечитывает снимок из файла (новая база в памяти заменяет старую)."""
+        with self._lock:
+            started = time.perf_counter()
+            memory = sqlite3.connect(":memory:", check_same_thread=False, factory=InstrumentedConnection)
+            self._disk.backup(memory, pages=BACKUP_PAGES)
+
+            if self._memory is not None:
+                self._memory.close()
+            self._memory = memory
+            self._volatile_columns.clear()
+            self._data_version = self._read_data_version()
+            self._last_check = time.monotonic()
+            self._stale = False
+
+            logger.info(
+                f"💾 Read snapshot loaded: {self.db_path} "
+                f"({(time.perf_counter() - started) * 1000:.0f} ms)"
+            )
+
+    def refresh_if_changed(self, force_check: bool = False) -> bool:
+        """
+        Перечитывает снимок, если базу изменил другой процесс.
+
+        Args:
+            force_check: Проверить data_version, не дожидаясь check_interval.
+
+        Returns:
+            bool: True если снимок был перечитан.
+        """
+        with self._lock:
+            if not self._stale:
+                now = time.monotonic()
+                if not force_check and now - self._last_check < self.check_interval:
+                    return False
+                self._last_check = now
+
+                if self._read_data_version() == self._data_version:
+                    return False
+                logger.info("🔄 Database changed by another process, refreshing snapshot")
+
+            self.refresh()
+            return True
+
+    # === Соединения ===
+
+    @contextmanager
+    def read_connection(self):
+        """
+        Соединение со снимком в памяти (только для чтения).
+
+        Yields:
+            sqlite3.Connection: Соединение с базой в памяти.
+        """
+        with self._lock:
+            self.refresh_if_changed()
+            yield self._memory
+
+    @contextmanager
+    def write_connection(self, immediate: bool = False, retry_policy: Optional[RetryPolicy] = None):
+        """
+        Соединение с файлом базы для записи.
+
+        При успешном завершении внешнего блока транзакция фиксируется, а
+        выполненные операторы повторяются в снимке. При ошибке — откат.
+
+        Args:
+            immediate: Начать транзакцию с BEGIN IMMEDIATE.
+            retry_policy: Повтор BEGIN IMMEDIATE при занятой базе.
+
+        Yields:
+            sqlite3.Connection: Постоянное соединение с файлом базы.
+        """
+        with self._lock:
+            outermost = self._write_depth == 0
+            if outermost:
+                self._statements = []
+                self._inserted_after = {}
+                self._disk.snapshot = self
+                if immediate:
+                    begin_immediate(self._disk, retry_policy or RetryPolicy(), "ReadSnapshot")
+
+            self._write_depth += 1
+            try:
+                yield self._disk
+            except Exception:
+                if outermost:
+                    self._disk.rollback()
+                raise
+            else:
+                if outermost:
+                    self._disk.commit()
+                    self._replay()
+            finally:
+                self._write_depth -= 1
+                if outermost:
+                    self._disk.snapshot = None
+                    self._statements = []
+                    self._inserted_after = {}
+
+    def _before_write(self, sql: str):
+        """Перед вставкой: запоминает границу rowid таблицы с вычисляемыми умолчаниями."""
+        match = _INSERT_INTO.match(sql)
+        if not match or match.group(1) in self._inserted_after:
+            return
+        table = match.group(1)
+        columns = self._volatile_columns.get(table)
+        # Служебные запросы — обычным курсором, вне записи и статистики
+        cursor = self._disk.cursor(sqlite3.Cursor)
+        if columns is None:
+            columns = self._volatile_columns[table] = tuple(
+                row[1] for row in cursor.execute(f"PRAGMA table_info({table})")
+                if row[4] and _VOLATILE_DEFAULT.search(str(row[4]))
+            )
+        if columns:
+            self._inserted_after[table] = cursor.execute(
+                f"SELECT COALESCE(MAX(rowid), 0) FROM {table}"
+            ).fetchone()[0]
+
+    def _copy_inserted(self, cursor: sqlite3.Cursor):
+        """Копирует из файла вычисленные при вставке значения (created_date) новых строк."""
+        disk = self._disk.cursor(sqlite3.Cursor)
+        for table, after in self._inserted_after.items():
+            columns = self._volatile_columns[table]
+            rows = disk.execute(
+                f"SELECT {', '.join(columns)}, rowid FROM {table} WHERE rowid > ?", (after,)
+            ).fetchall()
+            cursor.executemany(
+                f"UPDATE {table} SET {', '.join(f'{column}=?' for column in columns)} WHERE rowid=?",
+                rows
+            )
+
+    def _replay(self):
+        """Повторяет в снимке операторы записи последней транзакции с их параметрами."""
+        if not self._statements or self._stale:
+            return
+
+        # Обычный курсор — повтор не попадает в статистику запросов
+        cursor = self._memory.cursor(sqlite3.Cursor)
+        try:
+            cursor.execute("BEGIN")
+            for sql, parameters, many in self._statements:
+                if many:
+                    cursor.executemany(sql, parameters)
+                else:
+                    cursor.execute(sql, parameters)
+            self._copy_inserted(cursor)
+            cursor.execute("COMMIT")
+        except sqlite3.Error as e:
+            if self._memory.in_transaction:
+                self._memory.rollback()
+            # Снимок разошёлся с файлом — перечитаем при следующем чтении
+            self._stale = True
+            logger.warning(f"⚠️ Snapshot replay failed, snapshot will be reloaded: {e}")
+
+    def close(self):
+        """Закрывает соединения снимка."""
+        with self._lock:
+            if self._memory is not None:
+                self._memory.close()
+                self._memory = None
+            self._disk.close()
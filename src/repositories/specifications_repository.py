@@ -1,10 +1,11 @@
 """Репозиторий для управления спецификациями и их позициями"""
 
-from typing import List, Tuple, Dict
+from typing import List, Optional, Tuple, Dict
 from datetime import datetime
 from loguru import logger
 
 from repositories.base_repository import BaseRepository
+from repositories.concurrency import ConcurrencyConflictError
 from models.dto import Specification, SpecificationItem
 
 
@@ -17,6 +18,8 @@ class SpecificationsRepository(BaseRepository):
     - Обновления и удаления спецификаций
     - Управления позициями в спецификациях
     - Расчета стоимости спецификаций
+
+    Specification.row_version — версия записи для update(expected_version=...).
     """
 
     def create_table(self):
@@ -39,6 +42,7 @@ class SpecificationsRepository(BaseRepository):
                         final_price REAL DEFAULT 0.0
                     )
                 ''')
+                self._ensure_column(conn, "specifications", "row_version", "INTEGER NOT NULL DEFAULT 0")
 
                 # Таблица позиций спецификации
                 cursor.execute('''
@@ -67,12 +71,12 @@ class SpecificationsRepository(BaseRepository):
             List[Specification]: Список объектов Specification.
         """
         try:
-            with self.get_connection() as conn:
+            with self.get_read_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     SELECT 
                         id, name, description, created_date, modified_date, 
-                        status, labor_cost, overhead_percentage, final_price
+                        status, labor_cost, overhead_percentage, final_price, row_version
                     FROM specifications
                     ORDER BY modified_date DESC
                 """)
@@ -89,7 +93,8 @@ class SpecificationsRepository(BaseRepository):
                         status=row[5],
                         labor_cost=row[6],
                         overhead_percentage=row[7],
-                        final_price=row[8]
+                        final_price=row[8],
+                        row_version=row[9]
                     )
                     for row in rows
                 ]
@@ -112,12 +117,12 @@ class SpecificationsRepository(BaseRepository):
             Specification: Объект спецификации или None, если не найдена.
         """
         try:
-            with self.get_connection() as conn:
+            with self.get_read_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     SELECT 
                         id, name, description, created_date, modified_date,
-                        status, labor_cost, overhead_percentage, final_price
+                        status, labor_cost, overhead_percentage, final_price, row_version
                     FROM specifications
                     WHERE id = ?
                 """, (spec_id,))
@@ -135,7 +140,8 @@ class SpecificationsRepository(BaseRepository):
                     status=row[5],
                     labor_cost=row[6],
                     overhead_percentage=row[7],
-                    final_price=row[8]
+                    final_price=row[8],
+                    row_version=row[9]
                 )
             else:
                 logger.warning(f"⚠️ Specification not found: {spec_id}")
@@ -180,34 +186,61 @@ class SpecificationsRepository(BaseRepository):
             logger.error(f"❌ Error adding specification '{spec.name}': {e}")
             raise
 
-    def update(self, spec_id: int, spec: Specification) -> bool:
+    def update(self, spec_id: int, spec: Specification, expected_version: Optional[int] = None) -> bool:
         """
         Обновляет существующую спецификацию.
 
         Args:
             spec_id: ID спецификации для обновления.
             spec: Объект спецификации с новыми данными.
+            expected_version: row_version, с которой начиналось редактирование
+                (None — без проверки). Новая версия записывается в spec.row_version.
 
         Returns:
             bool: True если обновление успешно, False в случае ошибки.
+
+        Raises:
+            ConcurrencyConflictError: Спецификация изменена или удалена другим пользователем.
         """
+        conflict = None
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
                 now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
-                cursor.execute("""
+                query = """
                     UPDATE specifications
                     SET name=?, description=?, modified_date=?, status=?,
-                        labor_cost=?, overhead_percentage=?, final_price=?
+                        labor_cost=?, overhead_percentage=?, final_price=?,
+                        row_version=row_version + 1
                     WHERE id = ?
-                """, (spec.name, spec.description, now, spec.status,
-                      spec.labor_cost, spec.overhead_percentage,
-                      spec.final_price, spec_id))
+                """
+                params = (spec.name, spec.description, now, spec.status,
+                          spec.labor_cost, spec.overhead_percentage,
+                          spec.final_price, spec_id)
+                if expected_version is not None:
+                    query += " AND row_version=?"
+                    params += (expected_version,)
+                cursor.execute(query, params)
+                updated = cursor.rowcount
+
+                version = self._current_version(cursor, "specifications", "id", spec_id)
+                if updated == 0 and expected_version is not None:
+                    conflict = ConcurrencyConflictError("specification", spec.name, expected_version, version)
+
+            if conflict is not None:
+                logger.warning(
+                    f"⚠️ Specification {spec_id} changed concurrently: "
+                    f"expected version {expected_version}, actual {conflict.actual_version}"
+                )
+                raise conflict
 
+            spec.row_version = version
             logger.success(f"✅ Specification {spec_id} updated: {spec.name}")
             return True
 
+        except ConcurrencyConflictError:
+            raise
         except Exception as e:
             logger.error(f"❌ Error updating specification {spec_id}: {e}")
             return False
@@ -249,7 +282,7 @@ class SpecificationsRepository(BaseRepository):
             List[Tuple]: Список кортежей с данными позиций и товаров.
         """
         try:
-            with self.get_connection() as conn:
+            with self.get_read_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     SELECT 
@@ -462,7 +495,8 @@ class SpecificationsRepository(BaseRepository):
         logger.info(f"💾 Saving specification with {len(items)} items...")
 
         try:
-            with self.get_connection() as conn:
+            # IMMEDIATE: цены читаются и итог записывается в одной транзакции записи
+            with self.get_connection(immediate=True) as conn:
                 cursor = conn.cursor()
                 now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
@@ -502,7 +536,8 @@ class SpecificationsRepository(BaseRepository):
                     cursor.execute("""
                         UPDATE specifications
                         SET name=?, description=?, modified_date=?, status=?,
-                            labor_cost=?, overhead_percentage=?, final_price=?
+                            labor_cost=?, overhead_percentage=?, final_price=?,
+                            row_version=row_version + 1
                         WHERE id = ?
                     """, (name, description, now, status,
                           labor_cost, overhead_percentage, final_price, spec_id))
@@ -1,9 +1,12 @@
 """Репозиторий для управления поставщиками"""
 
-from typing import List
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 from loguru import logger
 
 from repositories.base_repository import BaseRepository  # ← ПРАВИЛЬНО
+from repositories.events import ChangeEvent
+from repositories.concurrency import ConcurrencyConflictError
+from repositories.backends import StorageBackend
 from models.dto import Supplier  # ← ПРАВИЛЬНО
 
 
@@ -15,8 +18,27 @@ class SuppliersRepository(BaseRepository):
     - Создания и загрузки поставщиков
     - Обновления и удаления поставщиков
     - Управления связями товар-поставщик
+
+    Модели, кэширующие результат get_all, сравнивают отпечаток справочника
+    (get_catalogue_signature), чтобы не перечитывать его без изменений.
+
+    После commit публикует ChangeEvent.SUPPLIER (key — ID, fields — все
+    поля поставщика) и ChangeEvent.ITEM_SUPPLIERS (key — артикул, fields —
+    supplier_ids, added, removed).
+
+    Supplier.row_version — версия записи для update(expected_version=...).
     """
 
+    def __init__(self, db_path: str, backend: Optional[StorageBackend] = None):
+        """
+        Инициализирует репозиторий.
+
+        Args:
+            db_path: Путь к файлу базы данных SQLite.
+            backend: Хранилище; None — файл SQLite db_path.
+        """
+        super().__init__(db_path, backend)
+
     def create_table(self):
         """Создает таблицы suppliers и item_suppliers если не существуют."""
         try:
@@ -34,6 +56,7 @@ class SuppliersRepository(BaseRepository):
                         website TEXT
                     )
                 ''')
+                self._ensure_column(conn, "suppliers", "row_version", "INTEGER NOT NULL DEFAULT 0")
 
                 # Таблица связей многие-ко-многим: товары — поставщики
                 cursor.execute('''
@@ -60,10 +83,10 @@ class SuppliersRepository(BaseRepository):
             List[Supplier]: Список всех поставщиков.
         """
         try:
-            with self.get_connection() as conn:
+            with self.get_read_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
-                    SELECT id, name, company, email, phone, website 
+                    SELECT id, name, company, email, phone, website, row_version
                     FROM suppliers
                     ORDER BY company
                 """)
@@ -76,7 +99,8 @@ class SuppliersRepository(BaseRepository):
                         company=row[2],
                         email=row[3],
                         phone=row[4],
-                        website=row[5]
+                        website=row[5],
+                        row_version=row[6]
                     )
                     for row in rows
                 ]
@@ -88,6 +112,29 @@ class SuppliersRepository(BaseRepository):
             logger.error(f"❌ Error loading suppliers: {e}")
             return []
 
+    def get_catalogue_signature(self) -> Tuple[int, int, int]:
+        """
+        Отпечаток справочника поставщиков: (количество, сумма ID, сумма row_version).
+
+        Хранится в самой базе, поэтому меняется и от изменений других
+        экземпляров приложения и командной строки. Изменение предсказуемо:
+        добавление — (+1, +id, +0), изменение — (0, 0, +1), удаление —
+        (-1, -id, -row_version).
+
+        Returns:
+            Tuple[int, int, int]: Отпечаток справочника.
+
+        Raises:
+            Exception: Если произошла ошибка при чтении.
+        """
+        with self.get_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT COUNT(*), COALESCE(SUM(id), 0), COALESCE(SUM(row_version), 0) FROM suppliers"
+            )
+            count, ids, versions = cursor.fetchone()
+        return int(count), int(ids), int(versions)
+
     def add(self, supplier: Supplier) -> int:
         """
         Добавляет нового поставщика в базу данных.
@@ -113,35 +160,67 @@ class SuppliersRepository(BaseRepository):
                 supplier_id = cursor.lastrowid
 
             logger.success(f"✅ Supplier added: {supplier.company} (ID: {supplier_id})")
+            self.events.emit(ChangeEvent.SUPPLIER, ChangeEvent.ADDED, supplier_id, self._event_fields(supplier))
             return supplier_id
 
         except Exception as e:
             logger.error(f"❌ Error adding supplier '{supplier.company}': {e}")
             raise
 
-    def update(self, supplier_id: int, supplier: Supplier) -> None:
+    def update(self, supplier_id: int, supplier: Supplier, expected_version: Optional[int] = None) -> int:
         """
         Обновляет информацию о поставщике.
 
         Args:
             supplier_id: ID поставщика для обновления.
             supplier: Объект поставщика с новыми данными.
+            expected_version: row_version, с которой начиналось редактирование
+                (None — без проверки).
+
+        Returns:
+            int: Новая версия записи (row_version).
 
         Raises:
+            ConcurrencyConflictError: Поставщик изменён или удалён другим пользователем.
             Exception: Если произошла ошибка при обновлении.
         """
+        conflict = None
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute("""
+                query = """
                     UPDATE suppliers 
-                    SET name=?, company=?, email=?, phone=?, website=? 
+                    SET name=?, company=?, email=?, phone=?, website=?,
+                        row_version=row_version + 1
                     WHERE id=?
-                """, (supplier.name, supplier.company, supplier.email,
-                      supplier.phone, supplier.website, supplier_id))
+                """
+                params = (supplier.name, supplier.company, supplier.email,
+                          supplier.phone, supplier.website, supplier_id)
+                if expected_version is not None:
+                    query += " AND row_version=?"
+                    params += (expected_version,)
+                cursor.execute(query, params)
+                updated = cursor.rowcount
+
+                version = self._current_version(cursor, "suppliers", "id", supplier_id)
+                if updated == 0 and expected_version is not None:
+                    conflict = ConcurrencyConflictError(ChangeEvent.SUPPLIER, supplier.company,
+                                                        expected_version, version)
+
+            if conflict is not None:
+                logger.warning(
+                    f"⚠️ Supplier {supplier_id} changed concurrently: "
+                    f"expected version {expected_version}, actual {conflict.actual_version}"
+                )
+                raise conflict
 
+            supplier.row_version = version
             logger.success(f"✅ Supplier {supplier_id} updated: {supplier.company}")
+            self.events.emit(ChangeEvent.SUPPLIER, ChangeEvent.UPDATED, supplier_id, self._event_fields(supplier))
+            return version
 
+        except ConcurrencyConflictError:
+            raise
         except Exception as e:
             logger.error(f"❌ Error updating supplier {supplier_id}: {e}")
             raise
@@ -159,14 +238,28 @@ class SuppliersRepository(BaseRepository):
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
+                # Связи явно: SQLite без PRAGMA foreign_keys не выполняет ON DELETE CASCADE
+                cursor.execute("DELETE FROM item_suppliers WHERE supplier_id=?", (supplier_id,))
                 cursor.execute("DELETE FROM suppliers WHERE id=?", (supplier_id,))
 
             logger.warning(f"⚠️ Supplier {supplier_id} deleted")
+            self.events.emit(ChangeEvent.SUPPLIER, ChangeEvent.DELETED, supplier_id)
 
         except Exception as e:
             logger.error(f"❌ Error deleting supplier {supplier_id}: {e}")
             raise
 
+    @staticmethod
+    def _event_fields(supplier: Supplier) -> Dict[str, Any]:
+        return {
+            "name": supplier.name,
+            "company": supplier.company,
+            "email": supplier.email,
+            "phone": supplier.phone,
+            "website": supplier.website,
+            "row_version": supplier.row_version,
+        }
+
     def get_suppliers_for_item(self, article: str) -> List[Supplier]:
         """
         Получает список поставщиков для указанного товара.
@@ -182,10 +275,10 @@ class SuppliersRepository(BaseRepository):
             return []
 
         try:
-            with self.get_connection() as conn:
+            with self.get_read_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
-                    SELECT s.id, s.name, s.company, s.email, s.phone, s.website
+                    SELECT s.id, s.name, s.company, s.email, s.phone, s.website, s.row_version
                     FROM suppliers s
                     JOIN item_suppliers item_supp ON s.id = item_supp.supplier_id
                     WHERE item_supp.item_article = ?
@@ -199,7 +292,8 @@ class SuppliersRepository(BaseRepository):
                         company=row[2],
                         email=row[3],
                         phone=row[4],
-                        website=row[5]
+                        website=row[5],
+                        row_version=row[6]
                     )
                     for row in rows
                 ]
@@ -211,10 +305,94 @@ class SuppliersRepository(BaseRepository):
             logger.error(f"❌ Error fetching suppliers for article {article}: {e}")
             return []
 
+    def get_suppliers_for_items(self, articles: Optional[Iterable[str]] = None) -> Dict[str, List[Supplier]]:
+        """
+        Получает поставщиков сразу для набора товаров.
+
+        Один запрос на весь набор (списки больше IN_CLAUSE_CHUNK делятся
+        на части) вместо запроса на каждый товар.
+
+        Args:
+            articles: Артикулы товаров; None — все товары с поставщиками.
+
+        Returns:
+            Dict[str, List[Supplier]]: Артикул → поставщики (по компании).
+                Товаров без поставщиков в словаре нет.
+        """
+        query = """
+            SELECT item_supp.item_article, s.id, s.name, s.company, s.email, s.phone, s.website,
+                   s.row_version
+            FROM item_suppliers item_supp
+            JOIN suppliers s ON s.id = item_supp.supplier_id
+        """
+        result: Dict[str, List[Supplier]] = {}
+
+        try:
+            with self.get_read_connection() as conn:
+                if articles is None:
+                    batches = [conn.execute(query + " ORDER BY s.company").fetchall()]
+                else:
+                    batches = (
+                        conn.execute(
+                            f"{query} WHERE item_supp.item_article IN ({', '.join('?' * len(chunk))}) "
+                            f"ORDER BY s.company",
+                            chunk
+                        ).fetchall()
+                        for chunk in self._in_chunks(articles)
+                    )
+
+                for rows in batches:
+                    for row in rows:
+                        result.setdefault(row[0], []).append(Supplier(
+                            id=row[1],
+                            name=row[2],
+                            company=row[3],
+                            email=row[4],
+                            phone=row[5],
+                            website=row[6],
+                            row_version=row[7]
+                        ))
+
+            logger.debug(f"🔗 Loaded suppliers for {len(result)} article(s)")
+            return result
+
+        except Exception as e:
+            logger.error(f"❌ Error fetching suppliers for articles: {e}")
+            return {}
+
+    def get_supplier_ids_for_item(self, article: str) -> Set[int]:
+        """
+        Возвращает ID поставщиков, привязанных к товару (только таблица связей).
+
+        Args:
+            article: Артикул товара.
+
+        Returns:
+            Set[int]: ID поставщиков; пустое множество при ошибке.
+        """
+        if not isinstance(article, str) or not article.strip():
+            logger.warning(f"⚠️ Invalid article: {article}")
+            return set()
+
+        try:
+            with self.get_read_connection() as conn:
+                rows = conn.execute(
+                    "SELECT supplier_id FROM item_suppliers WHERE item_article = ?",
+                    (article,)
+                ).fetchall()
+            return {row[0] for row in rows}
+
+        except Exception as e:
+            logger.error(f"❌ Error fetching supplier IDs for article {article}: {e}")
+            return set()
+
     def set_suppliers_for_item(self, article: str, supplier_ids: List[int]) -> bool:
         """
         Устанавливает список поставщиков для товара, заменяя существующие связи.
 
+        Сохраняется только разница: удаляются снятые связи и добавляются
+        новые, неизменные строки не трогаются.
+
         Args:
             article: Артикул товара.
             supplier_ids: Список ID поставщиков.
@@ -243,26 +421,42 @@ class SuppliersRepository(BaseRepository):
                 return False
 
         try:
-            with self.get_connection() as conn:
+            wanted = set(supplier_ids)
+
+            # IMMEDIATE: чтение текущих связей и запись разницы — одна транзакция
+            with self.get_connection(immediate=True) as conn:
                 cursor = conn.cursor()
 
-                # Удаляем старые связи
                 cursor.execute(
-                    "DELETE FROM item_suppliers WHERE item_article = ?",
+                    "SELECT supplier_id FROM item_suppliers WHERE item_article = ?",
                     (article,)
                 )
+                current = {row[0] for row in cursor.fetchall()}
 
-                # Добавляем новые связи
-                if supplier_ids:
+                removed = current - wanted
+                added = wanted - current
+
+                if removed:
+                    cursor.executemany(
+                        "DELETE FROM item_suppliers WHERE item_article = ? AND supplier_id = ?",
+                        [(article, sid) for sid in sorted(removed)]
+                    )
+                if added:
                     cursor.executemany(
                         "INSERT INTO item_suppliers (item_article, supplier_id) VALUES (?, ?)",
-                        [(article, sid) for sid in supplier_ids]
+                        [(article, sid) for sid in sorted(added)]
                     )
 
             logger.success(
                 f"✅ Suppliers updated for article {article}: "
-                f"{len(supplier_ids)} supplier(s) linked"
+                f"{len(wanted)} supplier(s) linked (+{len(added)}, -{len(removed)})"
             )
+            if added or removed:
+                self.events.emit(ChangeEvent.ITEM_SUPPLIERS, ChangeEvent.UPDATED, article, {
+                    "supplier_ids": sorted(wanted),
+                    "added": sorted(added),
+                    "removed": sorted(removed),
+                })
             return True
 
         except Exception as e:
@@ -4,6 +4,8 @@
 и обеспечивает их согласованную инициализацию.
 """
 
+from typing import Dict, Optional
+
 from loguru import logger
 
 from repositories.categories_repository import CategoriesRepository  # ← ПРАВИЛЬНО
@@ -11,6 +13,11 @@ from repositories.suppliers_repository import SuppliersRepository  # ← ПРА
 from repositories.items_repository import ItemsRepository  # ← ПРАВИЛЬНО
 from repositories.documents_repository import DocumentsRepository  # ← ПРАВИЛЬНО
 from repositories.specifications_repository import SpecificationsRepository  # ← ПРАВИЛЬНО
+from repositories.file_digests_repository import FileDigestsRepository
+from repositories.read_snapshot import ReadSnapshot, DEFAULT_CHECK_INTERVAL_S
+from repositories.events import EventBus
+from repositories.concurrency import JOURNAL_MODES, RetryPolicy
+from repositories.backends import SqliteBackend, StorageBackend, create_backend
 
 
 class UnitOfWork:
@@ -28,33 +35,49 @@ class UnitOfWork:
         items: Репозиторий товаров
         documents: Репозиторий документов
         specifications: Репозиторий спецификаций
+        file_digests: Репозиторий контрольных сумм файлов
+        snapshot: Снимок БД в памяти для чтения (None — режим выключен)
+        events: Шина событий изменения данных всех репозиториев
+        backend: Хранилище данных (файл SQLite или сервер PostgreSQL)
 
     Example:
         >>> uow = UnitOfWork("items.db")
+        >>> uow = UnitOfWork("postgresql://inventory@db-server/inventory")
         >>> categories = uow.categories.get_all()
         >>> uow.items.add(item)
     """
 
-    def __init__(self, db_path: str = "items.db"):
+    def __init__(self, db_path: str = "items.db", backend: Optional[StorageBackend] = None):
         """
         Инициализирует Unit of Work и все репозитории.
 
         Args:
-            db_path: Путь к файлу базы данных SQLite.
+            db_path: Путь к файлу базы данных SQLite или строка подключения
+                PostgreSQL (postgresql://...).
+            backend: Готовое хранилище (например, с настроенным пулом);
+                None — по db_path (repositories.backends.create_backend).
         """
+        self.backend = backend if backend is not None else create_backend(db_path)
         self.db_path = db_path
+        self.snapshot: Optional[ReadSnapshot] = None
 
         logger.info("=" * 80)
         logger.info("🚀 Initializing Unit of Work")
-        logger.info(f"📁 Database path: {db_path}")
+        logger.info(f"📁 Database: {self.backend.location} ({self.backend.dialect.name})")
         logger.info("=" * 80)
 
-        # Создаем все репозитории
-        self.categories = CategoriesRepository(db_path)
-        self.suppliers = SuppliersRepository(db_path)
-        self.items = ItemsRepository(db_path)
-        self.documents = DocumentsRepository(db_path)
-        self.specifications = SpecificationsRepository(db_path)
+        # Создаем все репозитории (одно хранилище — один пул соединений)
+        self.categories = CategoriesRepository(db_path, self.backend)
+        self.suppliers = SuppliersRepository(db_path, self.backend)
+        self.items = ItemsRepository(db_path, self.backend)
+        self.documents = DocumentsRepository(db_path, self.backend)
+        self.specifications = SpecificationsRepository(db_path, self.backend)
+        self.file_digests = FileDigestsRepository(db_path, self.backend)
+
+        # Общая шина: модели подписываются на изменения любых репозиториев
+        self.events = EventBus()
+        for repository in self._repositories():
+            repository.events = self.events
 
         logger.info("📦 All repositories initialized")
 
@@ -70,11 +93,13 @@ class UnitOfWork:
 
         try:
             # Создаем таблицы в правильном порядке (с учетом зависимостей)
+            # (PostgreSQL проверяет REFERENCES при создании: item_suppliers ссылается на items)
             self.categories.create_table()
-            self.suppliers.create_table()
             self.items.create_table()
+            self.suppliers.create_table()
             self.documents.create_table()
             self.specifications.create_table()
+            self.file_digests.create_table()
 
             logger.success("✅ Database structure initialized")
 
@@ -82,6 +107,91 @@ class UnitOfWork:
             logger.critical(f"💥 Critical error initializing database: {e}")
             raise
 
+    def _repositories(self):
+        return (self.categories, self.suppliers, self.items,
+                self.documents, self.specifications, self.file_digests)
+
+    def configure_concurrency(self, journal_mode: Optional[str] = None,
+                              busy_timeout_ms: Optional[int] = None,
+                              retry_policy: Optional[RetryPolicy] = None) -> str:
+        """
+        Настраивает работу нескольких экземпляров приложения с одной БД.
+
+        Вызывается до enable_read_snapshot. См. repositories.concurrency.
+
+        Args:
+            journal_mode: Режим журнала ("wal", "delete", ...; None — не менять).
+                Режим хранится в файле БД и действует для всех соединений.
+                Только для SQLite: у сервера PostgreSQL журнала нет.
+            busy_timeout_ms: Ожидание блокировки, мс (None — не менять).
+            retry_policy: Повтор BEGIN IMMEDIATE (None — не менять).
+
+        Returns:
+            str: Действующий режим журнала (для PostgreSQL — имя диалекта).
+        """
+        if busy_timeout_ms is not None:
+            self.backend.busy_timeout_ms = busy_timeout_ms
+        if retry_policy is not None:
+            for repository in self._repositories():
+                repository.retry_policy = retry_policy
+
+        if not isinstance(self.backend, SqliteBackend):
+            logger.info(f"🔒 Database concurrency: {self.backend.dialect.name}, "
+                        f"lock_timeout={self.backend.busy_timeout_ms} ms")
+            return self.backend.dialect.name
+
+        with self.items.get_connection() as conn:
+            if journal_mode is not None:
+                if journal_mode.lower() not in JOURNAL_MODES:
+                    raise ValueError(f"Unsupported journal mode: {journal_mode}")
+                # Смена режима требует, чтобы базу не держали другие соединения
+                conn.isolation_level = None
+                conn.execute(f"PRAGMA journal_mode={journal_mode.lower()}")
+            mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+
+        logger.info(f"🔒 Database concurrency: journal_mode={mode}, busy_timeout={self.backend.busy_timeout_ms} ms")
+        return mode
+
+    def enable_read_snapshot(self, check_interval: float = DEFAULT_CHECK_INTERVAL_S) -> ReadSnapshot:
+        """
+        Включает режим снимка: БД копируется в память, чтения идут из копии.
+
+        Для БД на сетевом диске: запросы на чтение не обращаются к файлу,
+        записи выполняются в файле и повторяются в снимке. Изменения других
+        процессов обнаруживаются по PRAGMA data_version (не чаще check_interval).
+
+        Args:
+            check_interval: Интервал проверки внешних изменений, с.
+
+        Returns:
+            ReadSnapshot: Снимок, общий для всех репозиториев.
+
+        Raises:
+            RuntimeError: Хранилище — не файл SQLite.
+        """
+        if not isinstance(self.backend, SqliteBackend):
+            raise RuntimeError(f"Read snapshot requires SQLite, not {self.backend.dialect.name}")
+        if self.snapshot is None:
+            self.snapshot = ReadSnapshot(self.db_path, check_interval, self.backend.busy_timeout_ms)
+            for repository in self._repositories():
+                repository.snapshot = self.snapshot
+            logger.success("✅ Read snapshot mode enabled")
+        return self.snapshot
+
+    def disable_read_snapshot(self):
+        """Выключает режим снимка: чтения снова идут из файла."""
+        if self.snapshot is not None:
+            for repository in self._repositories():
+                repository.snapshot = None
+            self.snapshot.close()
+            self.snapshot = None
+            logger.info("Read snapshot mode disabled")
+
+    def close(self):
+        """Выключает снимок и закрывает хранилище (пул соединений сервера)."""
+        self.disable_read_snapshot()
+        self.backend.close()
+
     def migrate_documents(self) -> int:
         """
         Выполняет миграцию документов из старой структуры в новую.
@@ -96,6 +206,52 @@ class UnitOfWork:
         logger.success(f"✅ Migration completed: {count} document(s)")
         return count
 
+    # Таблицы в статистике (stats)
+    _TABLES = ("categories", "items", "suppliers", "item_suppliers", "item_documents",
+               "specifications", "specification_items", "file_digests")
+
+    def stats(self) -> Dict:
+        """
+        Статистика базы данных: размер, строки таблиц и сводка по складу.
+
+        Returns:
+            Dict: location, dialect, size_bytes, tables ({таблица: строк})
+            и items (см. ItemsRepository.get_summary).
+        """
+        with self.items.get_read_connection() as conn:
+            tables = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                      for table in self._TABLES}
+        return {
+            "location": self.backend.location,
+            "dialect": self.backend.dialect.name,
+            "size_bytes": self.backend.size_bytes(),
+            "tables": tables,
+            "items": self.items.get_summary(),
+        }
+
+    def vacuum(self) -> int:
+        """
+        Сжимает базу данных (VACUUM) и обновляет статистику планировщика.
+
+        Для SQLite требует монопольного доступа на время работы: другие
+        экземпляры приложения ждут (busy_timeout) или получают ошибку.
+
+        Returns:
+            int: Освобождено байт.
+        """
+        before = self.backend.size_bytes()
+        logger.info(f"🧹 Vacuum started: {self.backend.location} ({before} bytes)")
+        self.backend.vacuum()
+        after = self.backend.size_bytes()
+        logger.success(f"✅ Vacuum completed: {before} -> {after} bytes")
+        return before - after
+
+    def reindex(self):
+        """Перестраивает индексы всех таблиц и обновляет статистику планировщика."""
+        logger.info(f"🔧 Reindex started: {self.backend.location}")
+        self.backend.reindex()
+        logger.success("✅ Reindex completed")
+
     def __repr__(self):
         """Строковое представление Unit of Work."""
-        return f"UnitOfWork(db_path='{self.db_path}')"
\ No newline at end of file
+        return f"UnitOfWork(db_path='{self.backend.location}')"
\ No newline at end of file
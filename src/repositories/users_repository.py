@@ -4,9 +4,10 @@
 """
 
 import hashlib
+import hmac
 import secrets
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Dict, Tuple
 from dataclasses import dataclass
 
 from loguru import logger
@@ -25,19 +26,26 @@ class UserDTO:
     is_active: bool
     created_at: datetime
     failed_attempts: int = 0
+    hash_iterations: int = 100000
 
 
 class UsersRepository(BaseRepository):
     """Репозиторий для управления пользователями."""
 
-    def __init__(self, db_path: str = "users.db"):
+    # Количество итераций PBKDF2, с которым хэшировались пароли до появления
+    # столбца hash_iterations (значение по умолчанию для старых записей)
+    LEGACY_HASH_ITERATIONS = 100000
+
+    def __init__(self, db_path: str = "users.db", hash_iterations: int = LEGACY_HASH_ITERATIONS):
         """
         Инициализация репозитория.
 
         Args:
             db_path: Путь к базе данных пользователей.
+            hash_iterations: Количество итераций PBKDF2 для новых хэшей паролей.
         """
         super().__init__(db_path)
+        self.hash_iterations = hash_iterations
         self.create_table()
         self._ensure_admin_exists()
 
@@ -53,9 +61,14 @@ class UsersRepository(BaseRepository):
                     role TEXT DEFAULT 'user',
                     is_active INTEGER DEFAULT 1,
                     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    failed_attempts INTEGER DEFAULT 0
+                    failed_attempts INTEGER DEFAULT 0,
+                    hash_iterations INTEGER DEFAULT 100000
                 )
             """)
+            self._ensure_column(
+                conn, "users", "hash_iterations",
+                f"INTEGER DEFAULT {self.LEGACY_HASH_ITERATIONS}"
+            )
         logger.debug("Users table ensured")
 
     def _ensure_admin_exists(self):
@@ -67,13 +80,15 @@ class UsersRepository(BaseRepository):
             logger.warning("⚠️ Default admin created with password 'admin123' - CHANGE IT!")
 
     @staticmethod
-    def _hash_password(password: str, salt: str = None) -> tuple[str, str]:
+    def _hash_password(password: str, salt: str = None,
+                       iterations: int = LEGACY_HASH_ITERATIONS) -> tuple[str, str]:
         """
         Хэширование пароля с солью.
 
         Args:
             password: Пароль в открытом виде.
             salt: Соль (если None — генерируется новая).
+            iterations: Количество итераций PBKDF2.
 
         Returns:
             Кортеж (hash, salt).
@@ -85,12 +100,13 @@ class UsersRepository(BaseRepository):
             'sha256',
             password.encode('utf-8'),
             salt.encode('utf-8'),
-            100000  # Количество итераций
+            iterations
         ).hex()
 
         return password_hash, salt
 
-    def verify_password(self, password: str, password_hash: str, salt: str) -> bool:
+    def verify_password(self, password: str, password_hash: str, salt: str,
+                        iterations: int = LEGACY_HASH_ITERATIONS) -> bool:
         """
         Проверка пароля.
 
@@ -98,12 +114,55 @@ class UsersRepository(BaseRepository):
             password: Пароль для проверки.
             password_hash: Хэш из базы.
             salt: Соль из базы.
+            iterations: Количество итераций, с которым был создан хэш.
 
         Returns:
             True если пароль верный.
         """
-        computed_hash, _ = self._hash_password(password, salt)
-        return computed_hash == password_hash
+        computed_hash, _ = self._hash_password(password, salt, iterations)
+        return hmac.compare_digest(computed_hash, password_hash)
+
+    def needs_rehash(self, user: UserDTO) -> bool:
+        """
+        Проверяет, создан ли хэш пароля с устаревшими параметрами.
+
+        Args:
+            user: Пользователь.
+
+        Returns:
+            True если количество итераций меньше текущего.
+        """
+        return user.hash_iterations < self.hash_iterations
+
+    def rehash_password(self, user_id: int, password: str) -> bool:
+        """
+        Перехэширование пароля с текущими параметрами.
+
+        Вызывается после успешной проверки пароля, когда needs_rehash() == True.
+        Счётчик неудачных попыток не меняется.
+
+        Args:
+            user_id: ID пользователя.
+            password: Проверенный пароль в открытом виде.
+
+        Returns:
+            True при успехе.
+        """
+        try:
+            password_hash, salt = self._hash_password(password, iterations=self.hash_iterations)
+
+            with self.get_connection() as conn:
+                conn.execute("""
+                    UPDATE users
+                    SET password_hash = ?, salt = ?, hash_iterations = ?
+                    WHERE id = ?
+                """, (password_hash, salt, self.hash_iterations, user_id))
+
+            logger.info(f"🔑 Password rehashed for user {user_id} ({self.hash_iterations} iterations)")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Failed to rehash password for user {user_id}: {e}")
+            return False
 
     def create(self, username: str, password: str, role: str = "user") -> Optional[int]:
         """
@@ -118,13 +177,13 @@ class UsersRepository(BaseRepository):
             ID созданного пользователя или None при ошибке.
         """
         try:
-            password_hash, salt = self._hash_password(password)
+            password_hash, salt = self._hash_password(password, iterations=self.hash_iterations)
 
             with self.get_connection() as conn:
                 cursor = conn.execute("""
-                    INSERT INTO users (username, password_hash, salt, role)
-                    VALUES (?, ?, ?, ?)
-                """, (username, password_hash, salt, role))
+                    INSERT INTO users (username, password_hash, salt, role, hash_iterations)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (username, password_hash, salt, role, self.hash_iterations))
                 user_id = cursor.lastrowid
 
             logger.info(f"✅ User created: {username} (id={user_id}, role={role})")
@@ -209,14 +268,14 @@ class UsersRepository(BaseRepository):
             new_password: Новый пароль.
         """
         try:
-            password_hash, salt = self._hash_password(new_password)
+            password_hash, salt = self._hash_password(new_password, iterations=self.hash_iterations)
 
             with self.get_connection() as conn:
                 conn.execute("""
                     UPDATE users 
-                    SET password_hash = ?, salt = ?, failed_attempts = 0
+                    SET password_hash = ?, salt = ?, failed_attempts = 0, hash_iterations = ?
                     WHERE id = ?
-                """, (password_hash, salt, user_id))
+                """, (password_hash, salt, self.hash_iterations, user_id))
 
             logger.info(f"✅ Password changed for user {user_id}")
             return True
@@ -245,6 +304,28 @@ class UsersRepository(BaseRepository):
             row = cursor.fetchone()
         return row[0] if row else 0
 
+    def apply_failed_attempt_changes(self, changes: Dict[str, Tuple[bool, int]]):
+        """
+        Пакетное обновление счётчиков неудачных попыток одной транзакцией.
+
+        Args:
+            changes: {username: (сброшен, число новых неудачных попыток)}.
+                Если счётчик сброшен — он становится равным числу попыток
+                после сброса, иначе увеличивается на него.
+        """
+        if not changes:
+            return
+
+        with self.get_connection() as conn:
+            conn.executemany(
+                "UPDATE users SET failed_attempts = ? WHERE username = ?",
+                [(count, username) for username, (reset, count) in changes.items() if reset]
+            )
+            conn.executemany(
+                "UPDATE users SET failed_attempts = failed_attempts + ? WHERE username = ?",
+                [(count, username) for username, (reset, count) in changes.items() if not reset and count]
+            )
+
     def reset_failed_attempts(self, user_id: int):
         """Сброс счётчика неудачных попыток."""
         with self.get_connection() as conn:
@@ -315,5 +396,6 @@ class UsersRepository(BaseRepository):
             role=row[4],
             is_active=bool(row[5]),
             created_at=datetime.fromisoformat(row[6]) if row[6] else datetime.now(),
-            failed_attempts=row[7] if len(row) > 7 else 0
+            failed_attempts=row[7] if len(row) > 7 else 0,
+            hash_iterations=row[8] if len(row) > 8 and row[8] else self.LEGACY_HASH_ITERATIONS
         )
\ No newline at end of file
@@ -0,0 +1,145 @@
+"""Реестр сервисов с отложенной загрузкой данных
+
+Расположение: src/service_registry.py
+"""
+
+from typing import Callable, Dict, List, Optional
+
+from PySide6.QtCore import QObject, Signal, Slot, QTimer
+
+from loguru import logger
+
+from utils.startup_timeline import timeline
+
+
+class ServiceRegistry(QObject):
+    """
+    Реестр сервисов (моделей и менеджеров) для QML.
+
+    Объекты регистрируются пустыми (без загрузки данных) и выставляются
+    как context properties. Загрузка данных выполняется:
+    - DEFERRED — после входа пользователя и первого кадра, по одному
+      сервису за итерацию цикла событий;
+    - ON_DEMAND — при первом обращении: get() из Python или
+      services.ensureLoaded(name) из QML.
+    """
+
+    DEFERRED = "deferred"
+    ON_DEMAND = "on_demand"
+
+    # === Сигналы ===
+    serviceLoaded = Signal(str)     # имя сервиса
+    deferredLoadsFinished = Signal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        self._services: Dict[str, QObject] = {}
+        self._loaders: Dict[str, Optional[Callable[[], None]]] = {}
+        self._policies: Dict[str, str] = {}
+        self._loaded: Dict[str, bool] = {}
+
+        self._logged_in = False
+        self._first_frame = False
+        self._deferred_started = False
+        self._deferred_queue: List[str] = []
+
+    def register(self, name: str, service: QObject, loader: Optional[Callable[[], None]] = None,
+                 policy: str = DEFERRED) -> QObject:
+        """
+        Регистрирует сервис.
+
+        Args:
+            name: Имя сервиса (совпадает с именем context property).
+            service: Объект сервиса.
+            loader: Функция загрузки данных (None — загрузка не нужна).
+            policy: DEFERRED или ON_DEMAND.
+
+        Returns:
+            Зарегистрированный объект.
+        """
+        self._services[name] = service
+        self._loaders[name] = loader
+        self._policies[name] = policy
+        self._loaded[name] = loader is None
+        return service
+
+    def register_context_properties(self, context):
+        """Выставляет все сервисы как context properties QML."""
+        for name, service in self._services.items():
+            context.setContextProperty(name, service)
+        context.setContextProperty("services", self)
+
+    def get(self, name: str) -> QObject:
+        """Возвращает сервис, при необходимости загружая его данные."""
+        self.ensureLoaded(name)
+        return self._services[name]
+
+    @Slot(str)
+    def ensureLoaded(self, name: str):
+        """
+        Загружает данные сервиса, если они ещё не загружены.
+
+        Args:
+            name: Имя сервиса.
+        """
+        if name not in self._services:
+            logger.warning(f"⚠️ Unknown service: {name}")
+            return
+        if self._loaded[name]:
+            return
+
+        self._loaded[name] = True
+        try:
+            with timeline.measure(f"load:{name}"):
+                self._loaders[name]()
+            self.serviceLoaded.emit(name)
+        except Exception:
+            logger.exception(f"❌ Failed to load service: {name}")
+
+    @Slot(str, result=bool)
+    def isLoaded(self, name: str) -> bool:
+        """Загружены ли данные сервиса."""
+        return self._loaded.get(name, False)
+
+    # === Отложенная загрузка ===
+
+    @Slot()
+    def notifyLoggedIn(self):
+        """Пользователь вошёл в систему."""
+        if not self._logged_in:
+            self._logged_in = True
+            timeline.mark("logged_in")
+        self._maybe_start_deferred()
+
+    @Slot()
+    def notifyFirstFrame(self):
+        """Отрисован первый кадр окна."""
+        if not self._first_frame:
+            self._first_frame = True
+            timeline.mark("first_frame")
+        self._maybe_start_deferred()
+
+    def _maybe_start_deferred(self):
+        """Запускает отложенные загрузки, когда выполнены оба условия."""
+        if self._deferred_started or not (self._logged_in and self._first_frame):
+            return
+
+        self._deferred_started = True
+        self._deferred_queue = [
+            name for name, policy in self._policies.items()
+            if policy == self.DEFERRED and not self._loaded[name]
+        ]
+        logger.info(f"⏳ Starting deferred loads: {', '.join(self._deferred_queue) or 'none'}")
+        QTimer.singleShot(0, self._load_next_deferred)
+
+    def _load_next_deferred(self):
+        """Загружает следующий отложенный сервис (по одному за итерацию цикла событий)."""
+        if self._deferred_queue:
+            self.ensureLoaded(self._deferred_queue.pop(0))
+            QTimer.singleShot(0, self._load_next_deferred)
+            return
+
+        timeline.mark("deferred_loads_finished")
+        timeline.log_summary()
+        self.deferredLoadsFinished.emit()
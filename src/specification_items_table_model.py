@@ -2,7 +2,10 @@
 
 from PySide6.QtCore import QAbstractTableModel, Qt, QModelIndex, Slot, Signal
 from loguru import logger
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+from utils.logger_config import level_enabled
+from repositories.events import ChangeEvent, EventBus
 
 
 class SpecificationItemsTableModel(QAbstractTableModel):
@@ -14,8 +17,22 @@ class SpecificationItemsTableModel(QAbstractTableModel):
     Примечание: Эта модель работает с временными данными в памяти,
     которые загружаются/сохраняются через SpecificationsModel.
     Не требует Repository Pattern.
+
+    При подписке на шину событий (events) изменения товара — артикул,
+    название, единица, цена, изображение, статус — сразу попадают в
+    открытую спецификацию: обновляются только строки этого товара.
     """
 
+    # Поля товара (ChangeEvent.ITEM) → ключи позиции спецификации
+    _ITEM_FIELDS = {
+        'article': 'article',
+        'name': 'name',
+        'unit': 'unit',
+        'price': 'price',
+        'image_path': 'image_path',
+        'status': 'status',
+    }
+
     # Индексы столбцов
     COL_IMAGE = 0
     COL_ARTICLE = 1
@@ -35,8 +52,14 @@ class SpecificationItemsTableModel(QAbstractTableModel):
     itemAdded = Signal()
     itemRemoved = Signal()
 
-    def __init__(self):
-        """Инициализация модели."""
+    def __init__(self, events: Optional[EventBus] = None):
+        """
+        Инициализация модели.
+
+        Args:
+            events: Шина событий репозиториев (UnitOfWork.events) для
+                обновления позиций при изменении товаров.
+        """
         super().__init__()
 
         self._items: List[Dict[str, Any]] = []
@@ -45,6 +68,9 @@ class SpecificationItemsTableModel(QAbstractTableModel):
             "Кол-во", "Ед.", "Цена", "Сумма", "Статус", "Удалить"
         ]
 
+        if events is not None:
+            events.subscribe(ChangeEvent.ITEM, self._onItemChanged)
+
         logger.debug("SpecificationItemsTableModel initialized")
 
     # ==================== Qt Model API ====================
@@ -383,7 +409,7 @@ class SpecificationItemsTableModel(QAbstractTableModel):
         items_copy = self._items.copy()
 
         # Логируем для отладки (только если TRACE включен)
-        if logger.level("TRACE").no >= logger._core.min_level:
+        if level_enabled("TRACE", __name__):
             for i, item in enumerate(items_copy):
                 logger.trace(
                     f"  Item {i}: {item.get('article')} - {item.get('name')}, "
@@ -474,4 +500,33 @@ class SpecificationItemsTableModel(QAbstractTableModel):
         """Испускает сигнал при изменении общей стоимости."""
         total = self.getTotalMaterialsCost()
         self.totalCostChanged.emit(total)
-        logger.trace(f"Total cost changed signal emitted: {total}")
\ No newline at end of file
+        logger.trace(f"Total cost changed signal emitted: {total}")
+
+    def _onItemChanged(self, event: ChangeEvent):
+        """Переносит изменённые поля товара в его позиции спецификации."""
+        if event.action != ChangeEvent.UPDATED:
+            return
+
+        changes = {
+            key: event.fields[field]
+            for field, key in self._ITEM_FIELDS.items()
+            if field in event.fields
+        }
+        if not changes:
+            return
+        if 'price' in changes:
+            changes['price'] = float(changes['price'] or 0.0)
+
+        article = str(event.previous_key).strip()
+        rows = [
+            row for row, item in enumerate(self._items)
+            if str(item.get('article', '')).strip() == article
+        ]
+        for row in rows:
+            self._items[row].update(changes)
+            self.dataChanged.emit(self.index(row, 0), self.index(row, self.COLUMN_COUNT - 1))
+
+        if rows:
+            logger.debug(f"Specification rows updated for item {article}: {sorted(changes)}")
+            if 'price' in changes:
+                self._emitTotalCostChanged()
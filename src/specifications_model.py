@@ -8,7 +8,10 @@ from PySide6.QtCore import QObject, Signal, Slot
 from loguru import logger
 
 from repositories.specifications_repository import SpecificationsRepository
+from repositories.concurrency import ConcurrencyConflictError
 from models.dto import Specification, SpecificationItem
+from utils.metrics import timed
+from repositories.query_monitor import query_budget
 
 
 class SpecificationsModel(QObject):
@@ -18,11 +21,15 @@ class SpecificationsModel(QObject):
     Координирует работу со спецификациями и их позициями.
     Поддерживает сохранение, загрузку, удаление и экспорт.
     Работает с SpecificationItemsTableModel для управления позициями.
+
+    Версии загруженных спецификаций (row_version) запоминаются: сохранение
+    поверх изменений с другого рабочего места даёт conflictDetected.
     """
 
     # Сигналы
     errorOccurred = Signal(str)
     specificationsLoaded = Signal()
+    conflictDetected = Signal(str)  # Спецификация изменена другим пользователем
 
     def __init__(
         self,
@@ -42,6 +49,7 @@ class SpecificationsModel(QObject):
 
         self.repository = specifications_repository
         self.specification_items_model = items_table_model
+        self._versions = {}  # ID спецификации → row_version при загрузке
 
         logger.debug("SpecificationsModel initialized")
 
@@ -129,10 +137,18 @@ class SpecificationsModel(QObject):
             if spec_id == 0 or spec_id <= 0:
                 # Создаем новую
                 saved_spec_id = self.repository.add(spec)
+                self._versions[saved_spec_id] = 0
                 logger.info(f"Created new specification with ID: {saved_spec_id}")
             else:
                 # Обновляем существующую
-                self.repository.update(spec_id, spec)
+                try:
+                    self.repository.update(spec_id, spec, expected_version=self._versions.get(spec_id))
+                except ConcurrencyConflictError as e:
+                    # Повторное сохранение — осознанная перезапись текущей версии
+                    self._versions[spec_id] = e.actual_version
+                    self.conflictDetected.emit(str(e))
+                    return -1
+                self._versions[spec_id] = spec.row_version
                 saved_spec_id = spec_id
                 logger.info(f"Updated specification ID: {saved_spec_id}")
 
@@ -192,6 +208,7 @@ class SpecificationsModel(QObject):
     # ==================== Loading ====================
 
     @Slot(result="QVariantList")
+    @query_budget(1)
     def loadAllSpecifications(self):
         """
         Загружает все спецификации для отображения в списке.
@@ -203,6 +220,7 @@ class SpecificationsModel(QObject):
             logger.info("Loading all specifications")
 
             specs = self.repository.get_all()
+            self._versions = {spec.id: spec.row_version for spec in specs}
 
             result = []
             for spec in specs:
@@ -215,7 +233,8 @@ class SpecificationsModel(QObject):
                     'overhead_percentage': spec.overhead_percentage or 0.0,
                     'final_price': spec.final_price or 0.0,  # Добавлено
                     'created_date': spec.created_date or '',
-                    'modified_date': spec.modified_date or ''
+                    'modified_date': spec.modified_date or '',
+                    'row_version': spec.row_version
                 })
 
             logger.success(f"✅ Loaded {len(result)} specifications")
@@ -230,6 +249,7 @@ class SpecificationsModel(QObject):
             return []
 
     @Slot(int, result="QVariantList")
+    @query_budget(1)
     def loadSpecificationItems(self, spec_id: int):
         """
         Загружает позиции спецификации для табличной модели.
@@ -289,6 +309,7 @@ class SpecificationsModel(QObject):
     # ==================== Export ====================
 
     @Slot(int)
+    @timed("SpecificationsModel.exportToExcel")
     def exportToExcel(self, spec_id: int):
         """
         Экспортирует спецификацию в Excel.
@@ -461,6 +482,7 @@ class SpecificationsModel(QObject):
             self.errorOccurred.emit(error_msg)
 
     @Slot(int, bool)
+    @timed("SpecificationsModel.exportToPDF")
     def exportToPDF(self, spec_id: int, landscape: bool = False):
         """
         Экспортирует спецификацию в PDF с выбором ориентации.
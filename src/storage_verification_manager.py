@@ -0,0 +1,136 @@
+"""Фоновая проверка целостности файлового хранилища
+
+Расположение: src/storage_verification_manager.py
+"""
+
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from PySide6.QtCore import QObject, Signal, Slot, Property, QTimer
+
+from loguru import logger
+
+from storage_verifier import StorageVerifier
+
+
+class StorageVerificationManager(QObject):
+    """
+    Менеджер фоновой проверки хранилища.
+
+    Запускает StorageVerifier в отдельном потоке (хеширование — в пуле
+    процессов), сохраняет JSON-отчёт в папку reports и при необходимости
+    повторяет проверку по таймеру.
+    """
+
+    # === Сигналы ===
+    verificationProgress = Signal(int, int)      # проверено, всего
+    verificationFinished = Signal(str, int)      # путь к отчёту, число проблем
+    verificationFailed = Signal(str)             # текст ошибки
+    runningChanged = Signal()
+
+    # Константы
+    DEFAULT_INTERVAL_HOURS = 24
+
+    def __init__(self, uow, base_path: Optional[str] = None, reports_dir: Optional[str] = None, parent=None):
+        """
+        Инициализация менеджера.
+
+        Args:
+            uow: Экземпляр UnitOfWork.
+            base_path: Папка src (по умолчанию — папка модуля).
+            reports_dir: Папка для отчётов (по умолчанию — src/reports).
+            parent: Родительский QObject.
+        """
+        super().__init__(parent)
+
+        self._base_path = Path(base_path) if base_path else Path(__file__).parent
+        self._reports_dir = Path(reports_dir) if reports_dir else self._base_path / "reports"
+        self._verifier = StorageVerifier(uow, str(self._base_path))
+
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._cancel_event = threading.Event()
+        self._last_report_path = ""
+
+        # Таймер периодической проверки
+        self._schedule_timer = QTimer(self)
+        self._schedule_timer.timeout.connect(self.startVerification)
+
+        logger.info("StorageVerificationManager initialized")
+
+    # === Properties для QML ===
+
+    @Property(bool, notify=runningChanged)
+    def running(self) -> bool:
+        """Выполняется ли проверка."""
+        return self._running
+
+    @Property(str, notify=runningChanged)
+    def lastReportPath(self) -> str:
+        """Путь к последнему сохранённому отчёту."""
+        return self._last_report_path
+
+    # === Слоты ===
+
+    @Slot()
+    def startVerification(self):
+        """Запускает проверку в фоновом потоке (если она ещё не идёт)."""
+        if self.running:
+            logger.warning("⚠️ Storage verification is already running")
+            return
+
+        self._cancel_event.clear()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="storage-verification", daemon=True)
+        self._thread.start()
+        self.runningChanged.emit()
+
+    @Slot()
+    def cancelVerification(self):
+        """Запрашивает отмену текущей проверки."""
+        if self.running:
+            self._cancel_event.set()
+            logger.info("🛑 Storage verification cancel requested")
+
+    @Slot(int)
+    def setSchedule(self, interval_hours: int):
+        """
+        Включает периодическую проверку.
+
+        Args:
+            interval_hours: Интервал в часах (0 — отключить).
+        """
+        if interval_hours <= 0:
+            self._schedule_timer.stop()
+            logger.info("Storage verification schedule disabled")
+            return
+
+        self._schedule_timer.start(interval_hours * 60 * 60 * 1000)
+        logger.info(f"🕒 Storage verification scheduled every {interval_hours} h")
+
+    # === Фоновый поток ===
+
+    def _run(self):
+        """Тело фонового потока: проверка и сохранение отчёта."""
+        try:
+            report = self._verifier.verify(
+                progress=self.verificationProgress.emit,
+                cancel_event=self._cancel_event
+            )
+
+            file_name = f"storage_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            self._last_report_path = StorageVerifier.write_report(report, str(self._reports_dir / file_name))
+
+            problems = len(report["missing"]) + len(report["corrupt"]) + len(report["mismatched"])
+            logger.info(f"📄 Storage report saved: {self._last_report_path}")
+            self.verificationFinished.emit(self._last_report_path, problems)
+
+        except Exception as e:
+            logger.exception("❌ Storage verification failed")
+            self.verificationFailed.emit(str(e))
+
+        finally:
+            self._running = False
+            self.runningChanged.emit()
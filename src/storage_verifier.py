@@ -0,0 +1,277 @@
+"""Проверка целостности файлового хранилища
+
+Проверяет каждый файл, на который ссылаются товары и документы:
+существование, размер и SHA-256 относительно сохранённого эталона
+(таблица file_digests). Хеширование выполняется в пуле процессов,
+в рабочее время — с ограничением параллелизма и скорости чтения.
+
+Модуль не зависит от Qt и может запускаться из командной строки:
+
+    python storage_verifier.py --db items.db --output report.json
+"""
+
+import json
+import os
+import time
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from models.dto import FileDigest
+from utils.file_hashing import hash_file_job
+
+
+class StorageVerifier:
+    """
+    Проверка целостности файлов хранилища.
+
+    Категории проблем в отчёте:
+    - missing: файл отсутствует на диске;
+    - corrupt: файл не читается или его размер отличается от эталонного;
+    - mismatched: размер совпадает, но SHA-256 отличается от эталонного.
+
+    Файлы без эталона считаются новыми: их контрольная сумма сохраняется
+    как эталон для следующих проверок.
+
+    Attributes:
+        uow: UnitOfWork для доступа к ссылкам и контрольным суммам.
+        base_path: Папка, относительно которой хранятся пути (src).
+    """
+
+    def __init__(
+            self,
+            uow,
+            base_path: str,
+            max_workers: Optional[int] = None,
+            work_hours: Optional[Tuple[int, int]] = (8, 19),
+            work_hours_workers: int = 1,
+            work_hours_bytes_per_sec: int = 20 * 1024 * 1024
+    ):
+        """
+        Инициализирует проверку.
+
+        Args:
+            uow: Экземпляр UnitOfWork.
+            base_path: Базовый путь к папке src.
+            max_workers: Количество процессов (по умолчанию — число ядер).
+            work_hours: Рабочие часы (начало, конец) по будням, когда включается
+                ограничение нагрузки на диск. None — без ограничений.
+            work_hours_workers: Параллельных задач в рабочее время.
+            work_hours_bytes_per_sec: Лимит скорости чтения в рабочее время.
+        """
+        self.uow = uow
+        self.base_path = Path(base_path).resolve()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.work_hours = work_hours
+        self.work_hours_workers = max(1, work_hours_workers)
+        self.work_hours_bytes_per_sec = work_hours_bytes_per_sec
+
+    def _is_throttled(self) -> bool:
+        """Проверяет, действует ли сейчас ограничение нагрузки (рабочее время)."""
+        if not self.work_hours:
+            return False
+        now = datetime.now()
+        start, end = self.work_hours
+        return now.weekday() < 5 and start <= now.hour < end
+
+    def collect_references(self) -> Dict[str, List[str]]:
+        """
+        Собирает все ссылки на файлы из товаров и документов.
+
+        Returns:
+            Dict[str, List[str]]: {относительный путь: [артикулы]}.
+        """
+        references: Dict[str, List[str]] = {}
+        for article, path in self.uow.items.get_file_references() + self.uow.documents.get_file_references():
+            articles = references.setdefault(path.replace("\\", "/"), [])
+            if article not in articles:
+                articles.append(article)
+        return references
+
+    def verify(
+            self,
+            progress: Optional[Callable[[int, int], None]] = None,
+            cancel_event: Optional[threading.Event] = None
+    ) -> dict:
+        """
+        Выполняет проверку и возвращает машиночитаемый отчёт.
+
+        Args:
+            progress: Колбэк progress(done, total).
+            cancel_event: Событие отмены проверки.
+
+        Returns:
+            dict: Отчёт (см. описание класса), пригодный для json.dump.
+        """
+        started = time.perf_counter()
+        references = self.collect_references()
+        stored = self.uow.file_digests.get_all()
+
+        report = {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "base_path": str(self.base_path),
+            "total": len(references),
+            "ok": 0,
+            "new": 0,
+            "missing": [],
+            "corrupt": [],
+            "mismatched": [],
+            "cancelled": False,
+        }
+
+        # Отсутствующие файлы определяем сразу, без пула процессов
+        to_hash = {}
+        for rel_path, articles in references.items():
+            abs_path = self.base_path / rel_path
+            if abs_path.is_file():
+                to_hash[str(abs_path)] = rel_path
+            else:
+                report["missing"].append({"path": rel_path, "articles": articles})
+
+        logger.info(
+            f"🔎 Verifying {len(to_hash)} file(s) with {self.max_workers} worker(s), "
+            f"{len(report['missing'])} missing"
+        )
+
+        new_digests: List[FileDigest] = []
+        verified_paths: List[str] = []
+        done = len(report["missing"])
+        pending = iter(to_hash)
+        throttle_bytes = 0
+        throttle_started = time.perf_counter()
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            in_flight = set()
+
+            while True:
+                throttled = self._is_throttled()
+                limit = self.work_hours_workers if throttled else self.max_workers * 2
+
+                # Дозаполняем очередь задач до лимита
+                while len(in_flight) < limit and not (cancel_event and cancel_event.is_set()):
+                    abs_path = next(pending, None)
+                    if abs_path is None:
+                        break
+                    in_flight.add(executor.submit(hash_file_job, abs_path))
+
+                if not in_flight:
+                    break
+
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    abs_path, size, sha256, error = future.result()
+                    rel_path = to_hash[abs_path]
+                    self._classify(rel_path, size, sha256, error, stored.get(rel_path),
+                                   references[rel_path], report, new_digests, verified_paths)
+                    done += 1
+                    throttle_bytes += size or 0
+
+                if progress:
+                    progress(done, len(references))
+
+                # Ограничение скорости чтения в рабочее время
+                if throttled and self.work_hours_bytes_per_sec > 0:
+                    expected = throttle_bytes / self.work_hours_bytes_per_sec
+                    elapsed = time.perf_counter() - throttle_started
+                    if expected > elapsed:
+                        time.sleep(expected - elapsed)
+                else:
+                    throttle_bytes = 0
+                    throttle_started = time.perf_counter()
+
+            if cancel_event and cancel_event.is_set():
+                report["cancelled"] = True
+
+        self.uow.file_digests.upsert_many(new_digests)
+        self.uow.file_digests.touch_verified(verified_paths)
+
+        report["elapsed_sec"] = round(time.perf_counter() - started, 3)
+        problems = len(report["missing"]) + len(report["corrupt"]) + len(report["mismatched"])
+
+        if problems:
+            logger.warning(
+                f"⚠️ Storage verification: {len(report['missing'])} missing, "
+                f"{len(report['corrupt'])} corrupt, {len(report['mismatched'])} mismatched"
+            )
+        else:
+            logger.success(f"✅ Storage verification passed: {report['ok']} ok, {report['new']} new")
+
+        return report
+
+    @staticmethod
+    def _classify(rel_path, size, sha256, error, digest, articles, report, new_digests, verified_paths):
+        """Относит результат хеширования к одной из категорий отчёта."""
+        if error is not None:
+            report["corrupt"].append({"path": rel_path, "articles": articles, "reason": error})
+        elif digest is None:
+            new_digests.append(FileDigest(path=rel_path, size=size, sha256=sha256))
+            report["new"] += 1
+        elif size != digest.size:
+            report["corrupt"].append({
+                "path": rel_path, "articles": articles,
+                "reason": "size_mismatch", "expected_size": digest.size, "actual_size": size
+            })
+        elif sha256 != digest.sha256:
+            report["mismatched"].append({
+                "path": rel_path, "articles": articles,
+                "expected_sha256": digest.sha256, "actual_sha256": sha256
+            })
+        else:
+            verified_paths.append(rel_path)
+            report["ok"] += 1
+
+    @staticmethod
+    def write_report(report: dict, output_path: str) -> str:
+        """
+        Сохраняет отчёт в JSON-файл.
+
+        Args:
+            report: Отчёт проверки.
+            output_path: Путь к файлу отчёта.
+
+        Returns:
+            str: Путь к сохранённому отчёту.
+        """
+        output = Path(output_path)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return str(output)
+
+
+def main(argv=None) -> int:
+    """Точка входа командной строки. Код возврата 1, если найдены проблемы."""
+    import argparse
+
+    from repositories.unit_of_work import UnitOfWork
+
+    parser = argparse.ArgumentParser(description="Проверка целостности файлового хранилища")
+    parser.add_argument("--db", default="items.db", help="Путь к базе данных товаров")
+    parser.add_argument("--base-path", default=str(Path(__file__).parent), help="Папка src")
+    parser.add_argument("--output", default="-", help="Файл отчёта JSON ('-' — stdout)")
+    parser.add_argument("--workers", type=int, default=None, help="Количество процессов")
+    parser.add_argument("--no-throttle", action="store_true", help="Не ограничивать нагрузку в рабочее время")
+    args = parser.parse_args(argv)
+
+    verifier = StorageVerifier(
+        UnitOfWork(args.db),
+        args.base_path,
+        max_workers=args.workers,
+        work_hours=None if args.no_throttle else (8, 19)
+    )
+    report = verifier.verify()
+
+    if args.output == "-":
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        StorageVerifier.write_report(report, args.output)
+
+    return 1 if report["missing"] or report["corrupt"] or report["mismatched"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
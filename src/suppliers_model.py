@@ -1,10 +1,17 @@
 """Модель поставщиков для Qt/QML интерфейса с Repository Pattern"""
 
-from PySide6.QtCore import QAbstractListModel, Qt, Slot, Signal
+from bisect import bisect_right
+from typing import Dict, List, Optional
+
+from PySide6.QtCore import QAbstractListModel, QModelIndex, Qt, Slot, Signal
 from loguru import logger
 
 from repositories.suppliers_repository import SuppliersRepository
+from repositories.concurrency import ConcurrencyConflictError
+from repositories.events import ChangeEvent
 from models.dto import Supplier
+from utils.logger_config import level_enabled
+from repositories.query_monitor import query_budget
 
 
 class SuppliersModel(QAbstractListModel):
@@ -16,7 +23,14 @@ class SuppliersModel(QAbstractListModel):
 
     Attributes:
         repository: SuppliersRepository для работы с базой данных
-        _suppliers: Список поставщиков для отображения
+        _suppliers: Список поставщиков для отображения (по компании, как get_all)
+        _row_by_id: Индекс ID → строка
+        _row_by_name: Индекс имя контактного лица → первая строка
+        _row_by_company: Индекс название компании (casefold) → первая строка
+
+    Поиск по ID, имени и компании идёт по словарям. Индексы перестраиваются
+    при загрузке; добавление, изменение и удаление обновляют модель
+    точечно, без повторной загрузки из БД.
     """
 
     # Роли данных для QML
@@ -30,22 +44,31 @@ class SuppliersModel(QAbstractListModel):
     # Сигналы
     errorOccurred = Signal(str)
     suppliersLoaded = Signal(int)  # Количество загруженных поставщиков
+    conflictDetected = Signal(str)  # Поставщик изменён другим пользователем, данные перечитаны
 
-    def __init__(self, suppliers_repository: SuppliersRepository, parent=None):
+    def __init__(self, suppliers_repository: SuppliersRepository, parent=None, autoload: bool = True):
         """
         Инициализирует модель поставщиков.
 
         Args:
             suppliers_repository: Репозиторий для работы с поставщиками.
             parent: Родительский объект Qt (опционально).
+            autoload: Загрузить данные сразу (False — загрузка позже через loadSuppliers).
         """
         super().__init__(parent)
 
         self.repository = suppliers_repository
         self._suppliers = []
+        self._row_by_id: Dict[int, int] = {}
+        self._row_by_name: Dict[str, int] = {}
+        self._row_by_company: Dict[str, int] = {}
+        self._companies_cache: Optional[List[str]] = None
+
+        self.repository.events.subscribe(ChangeEvent.SUPPLIER, self._onSupplierChanged)
 
         logger.debug("SuppliersModel initialized")
-        self.loadSuppliers()
+        if autoload:
+            self.loadSuppliers()
 
     def roleNames(self):
         """
@@ -108,6 +131,7 @@ class SuppliersModel(QAbstractListModel):
 
     # ==================== Data Loading ====================
 
+    @query_budget(1)
     def loadSuppliers(self):
         """
         Загружает поставщиков из репозитория и обновляет модель.
@@ -119,6 +143,7 @@ class SuppliersModel(QAbstractListModel):
         try:
             self.beginResetModel()
             self._suppliers = self.repository.get_all()
+            self._rebuild_index()
             self.endResetModel()
 
             logger.success(f"✅ Loaded {len(self._suppliers)} suppliers")
@@ -128,6 +153,76 @@ class SuppliersModel(QAbstractListModel):
             logger.exception("❌ Failed to load suppliers")
             self.errorOccurred.emit(f"Ошибка загрузки поставщиков: {str(e)}")
 
+    def _rebuild_index(self):
+        """Перестраивает индексы по ID, имени и компании, сбрасывает кэш списка компаний."""
+        self._row_by_id = {}
+        self._row_by_name = {}
+        self._row_by_company = {}
+        for row, supplier in enumerate(self._suppliers):
+            self._row_by_id[supplier.id] = row
+            self._row_by_name.setdefault(supplier.name, row)
+            self._row_by_company.setdefault(supplier.company.casefold(), row)
+        self._companies_cache = None
+
+    def _sorted_row(self, company: str) -> int:
+        """Позиция для вставки поставщика (порядок ORDER BY company)."""
+        return bisect_right([supplier.company for supplier in self._suppliers], company)
+
+    def _insert_supplier(self, supplier: Supplier):
+        """Вставляет поставщика в модель с сохранением сортировки."""
+        row = self._sorted_row(supplier.company)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._suppliers.insert(row, supplier)
+        self._rebuild_index()
+        self.endInsertRows()
+
+    def _remove_row(self, row: int):
+        """Удаляет строку модели."""
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._suppliers[row]
+        self._rebuild_index()
+        self.endRemoveRows()
+
+    def _replace_supplier(self, supplier: Supplier) -> bool:
+        """
+        Заменяет данные поставщика в модели.
+
+        Строка обновляется на месте (dataChanged), а при смене позиции
+        в сортировке переставляется.
+
+        Returns:
+            bool: False если поставщика нет в модели.
+        """
+        row = self._row_by_id.get(supplier.id)
+        if row is None:
+            return False
+
+        companies = [s.company for s in self._suppliers]
+        in_order = ((row == 0 or companies[row - 1] <= supplier.company) and
+                    (row == len(companies) - 1 or supplier.company <= companies[row + 1]))
+        if not in_order:
+            self._remove_row(row)
+            self._insert_supplier(supplier)
+            return True
+
+        previous = self._suppliers[row]
+        self._suppliers[row] = supplier
+        # Имена и компании могут повторяться — индекс по ним проще перестроить
+        if previous.name != supplier.name or previous.company != supplier.company:
+            self._rebuild_index()
+
+        index = self.index(row, 0)
+        self.dataChanged.emit(index, index, [
+            self.NameRole, self.CompanyRole, self.EmailRole, self.PhoneRole, self.WebsiteRole
+        ])
+        return True
+
+    def _onSupplierChanged(self, event: ChangeEvent):
+        """Обновляет версию строки после правки поставщика в другой модели."""
+        row = self._row_by_id.get(event.key)
+        if row is not None and event.action == ChangeEvent.UPDATED and "row_version" in event.fields:
+            self._suppliers[row].row_version = event.fields["row_version"]
+
     @Slot()
     def refresh(self):
         """
@@ -183,7 +278,8 @@ class SuppliersModel(QAbstractListModel):
             logger.success(f"✅ Supplier added: {company} (ID: {supplier_id})")
 
             # Обновляем модель
-            self.loadSuppliers()
+            supplier.id = supplier_id
+            self._insert_supplier(supplier)
 
         except Exception as e:
             error_msg = f"Ошибка добавления поставщика: {str(e)}"
@@ -231,13 +327,21 @@ class SuppliersModel(QAbstractListModel):
                 website=website.strip() if website else None
             )
 
-            # Обновляем через репозиторий
-            self.repository.update(supplier_id, supplier)
+            # Обновляем через репозиторий с проверкой версии загруженной строки
+            row = self._row_by_id.get(supplier_id)
+            expected_version = self._suppliers[row].row_version if row is not None else None
+            try:
+                self.repository.update(supplier_id, supplier, expected_version=expected_version)
+            except ConcurrencyConflictError as e:
+                self.loadSuppliers()
+                self.conflictDetected.emit(str(e))
+                return
 
             logger.success(f"✅ Supplier {supplier_id} updated: {company}")
 
-            # Обновляем модель
-            self.loadSuppliers()
+            # Обновляем модель (поставщика нет в модели — перечитываем целиком)
+            if not self._replace_supplier(supplier):
+                self.loadSuppliers()
 
         except Exception as e:
             error_msg = f"Ошибка обновления поставщика: {str(e)}"
@@ -261,7 +365,9 @@ class SuppliersModel(QAbstractListModel):
             logger.success(f"✅ Supplier {supplier_id} deleted")
 
             # Обновляем модель
-            self.loadSuppliers()
+            row = self._row_by_id.get(supplier_id)
+            if row is not None:
+                self._remove_row(row)
 
         except Exception as e:
             error_msg = f"Ошибка удаления поставщика: {str(e)}"
@@ -293,7 +399,8 @@ class SuppliersModel(QAbstractListModel):
                 "website": supplier.website or ""
             }
 
-            logger.trace(f"Retrieved supplier data for index {idx}: {supplier.company}")
+            if level_enabled("TRACE", __name__):
+                logger.trace(f"Retrieved supplier data for index {idx}: {supplier.company}")
             return result
 
         logger.warning(f"⚠️ Invalid supplier index: {idx}")
@@ -317,10 +424,9 @@ class SuppliersModel(QAbstractListModel):
         Returns:
             int: Идентификатор поставщика или -1, если не найден.
         """
-        for supplier in self._suppliers:
-            if supplier.name == name:
-                logger.trace(f"Found supplier by name '{name}': ID {supplier.id}")
-                return supplier.id
+        row = self._row_by_name.get(name)
+        if row is not None:
+            return self._suppliers[row].id
 
         logger.debug(f"Supplier with name '{name}' not found")
         return -1
@@ -330,16 +436,17 @@ class SuppliersModel(QAbstractListModel):
         """
         Возвращает идентификатор поставщика по названию компании.
 
+        Регистр не учитывается («ООО Ромашка» и «ооо ромашка» — одна компания).
+
         Args:
             company: Название компании.
 
         Returns:
             int: Идентификатор поставщика или -1, если не найден.
         """
-        for supplier in self._suppliers:
-            if supplier.company == company:
-                logger.trace(f"Found supplier by company '{company}': ID {supplier.id}")
-                return supplier.id
+        row = self._row_by_company.get(company.casefold())
+        if row is not None:
+            return self._suppliers[row].id
 
         logger.debug(f"Supplier with company '{company}' not found")
         return -1
@@ -355,17 +462,17 @@ class SuppliersModel(QAbstractListModel):
         Returns:
             dict: Словарь с данными поставщика или пустой словарь.
         """
-        for supplier in self._suppliers:
-            if supplier.id == supplier_id:
-                logger.trace(f"Found supplier with ID {supplier_id}: {supplier.company}")
-                return {
-                    "id": supplier.id,
-                    "name": supplier.name or "",
-                    "company": supplier.company,
-                    "email": supplier.email or "",
-                    "phone": supplier.phone or "",
-                    "website": supplier.website or ""
-                }
+        row = self._row_by_id.get(supplier_id)
+        if row is not None:
+            supplier = self._suppliers[row]
+            return {
+                "id": supplier.id,
+                "name": supplier.name or "",
+                "company": supplier.company,
+                "email": supplier.email or "",
+                "phone": supplier.phone or "",
+                "website": supplier.website or ""
+            }
 
         logger.warning(f"⚠️ Supplier with ID {supplier_id} not found")
         return {
@@ -390,7 +497,7 @@ class SuppliersModel(QAbstractListModel):
     @Slot(str, result=bool)
     def existsByCompany(self, company: str) -> bool:
         """
-        Проверяет существование поставщика по названию компании.
+        Проверяет существование поставщика по названию компании (без учёта регистра).
 
         Args:
             company: Название компании.
@@ -398,21 +505,21 @@ class SuppliersModel(QAbstractListModel):
         Returns:
             bool: True если поставщик существует, иначе False.
         """
-        exists = any(supplier.company == company for supplier in self._suppliers)
-        logger.trace(f"Supplier with company '{company}' exists: {exists}")
-        return exists
+        return company.casefold() in self._row_by_company
 
     @Slot(result=list)
     def getAllCompanies(self):
         """
         Возвращает список всех названий компаний.
 
+        Список кэшируется до следующего изменения модели.
+
         Returns:
             list: Список названий компаний.
         """
-        companies = [supplier.company for supplier in self._suppliers]
-        logger.trace(f"Retrieved {len(companies)} company names")
-        return companies
+        if self._companies_cache is None:
+            self._companies_cache = [supplier.company for supplier in self._suppliers]
+        return list(self._companies_cache)
 
     # ==================== Item-Supplier Relations ====================
 
@@ -2,10 +2,14 @@
 
 from PySide6.QtCore import QAbstractTableModel, Qt, Slot, Signal
 from loguru import logger
-from typing import List
+from typing import List, Optional, Set, Tuple
 
 from repositories.suppliers_repository import SuppliersRepository
+from repositories.concurrency import ConcurrencyConflictError
+from repositories.events import ChangeEvent
 from models.dto import Supplier
+from repositories.query_monitor import query_budget
+from utils.trigram_index import TrigramIndex
 
 
 class SuppliersTableModel(QAbstractTableModel):
@@ -15,6 +19,17 @@ class SuppliersTableModel(QAbstractTableModel):
     Предоставляет табличное представление поставщиков для QML,
     поддерживает фильтрацию, выбор через чекбоксы и привязку к товарам.
     Использует Repository Pattern для работы с данными.
+
+    Справочник поставщиков кэшируется до изменения в базе (отпечаток
+    SuppliersRepository.get_catalogue_signature, учитывает и правки других
+    экземпляров приложения и командной строки): при переключении между
+    товарами читаются только связи item_suppliers, а в модели обновляется
+    столбец чекбоксов (dataChanged) без сброса.
+
+    Поиск идёт по триграммному индексу (имя, компания, email): находит
+    подстроки, опечатки и кириллические «двойники» латинских букв, а
+    результаты упорядочены по сходству. Добавление, изменение и удаление
+    поставщика обновляют справочник и индекс точечно.
     """
 
     # Роли для QML
@@ -28,14 +43,16 @@ class SuppliersTableModel(QAbstractTableModel):
     # Сигналы
     errorOccurred = Signal(str)
     dataLoaded = Signal(int)  # Количество загруженных записей
+    conflictDetected = Signal(str)  # Поставщик изменён другим пользователем, данные перечитаны
 
-    def __init__(self, suppliers_repository: SuppliersRepository, parent=None):
+    def __init__(self, suppliers_repository: SuppliersRepository, parent=None, autoload: bool = True):
         """
         Инициализация модели.
 
         Args:
             suppliers_repository: Репозиторий для работы с поставщиками.
             parent: Родительский объект Qt.
+            autoload: Загрузить данные сразу (False — загрузка позже через load).
         """
         super().__init__(parent)
 
@@ -44,9 +61,15 @@ class SuppliersTableModel(QAbstractTableModel):
         self._filtered_suppliers: List[Supplier] = []  # Отфильтрованные поставщики
         self._checked = set()  # Множество ID выбранных поставщиков
         self._filter_string = ""  # Строка фильтра
+        self._catalogue_signature: Optional[Tuple[int, int, int]] = None  # Отпечаток закэшированного справочника
+        # ID поставщика → имя, компания, email (email — только подстрокой)
+        self._search_index = TrigramIndex(fuzzy_fields=2)
+
+        self.repository.events.subscribe(ChangeEvent.SUPPLIER, self._onSupplierChanged)
 
         logger.debug("🔧 SuppliersTableModel initialized")
-        self.load()
+        if autoload:
+            self.load()
 
     # ==================== Filtering ====================
 
@@ -63,86 +86,114 @@ class SuppliersTableModel(QAbstractTableModel):
         self._applyFilter()
 
     def _applyFilter(self):
-        """Применяет фильтр к списку поставщиков."""
-        logger.debug("=" * 80)
-        logger.debug("🔍 APPLYING FILTER")
-        logger.debug(f"Filter string: '{self._filter_string}'")
-        logger.debug(f"Total suppliers BEFORE filter: {len(self._suppliers)}")
-        logger.debug(f"Checked IDs BEFORE filter: {self._checked}")
-
+        """Применяет фильтр к списку поставщиков (со сбросом модели)."""
         self.beginResetModel()
+        self._filter()
+        self.endResetModel()
 
+    def _filter(self):
+        """Пересчитывает отфильтрованный список (без уведомления представлений)."""
         if not self._filter_string:
-            # Без фильтра - показываем всех
             self._filtered_suppliers = self._suppliers.copy()
-            logger.debug("✅ No filter - showing all suppliers")
         else:
-            # Фильтруем по имени, компании и email
-            self._filtered_suppliers = [
-                supplier for supplier in self._suppliers
-                if self._matchesFilter(supplier)
-            ]
-            logger.debug(f"✅ Filter applied - showing {len(self._filtered_suppliers)} suppliers")
-
-        # Проверяем, какие ID в отфильтрованном списке
-        filtered_ids = {s.id for s in self._filtered_suppliers}
-        checked_in_filtered = self._checked & filtered_ids
-        logger.debug(f"Filtered supplier IDs: {filtered_ids}")
-        logger.debug(f"Checked IDs in filtered list: {checked_in_filtered}")
-        logger.debug(f"Checked IDs NOT in filtered list: {self._checked - filtered_ids}")
+            # Поиск по имени, компании и email; лучшие совпадения — первыми
+            scores = self._search_index.scores(self._filter_string)
+            self._filtered_suppliers = sorted(
+                (supplier for supplier in self._suppliers if supplier.id in scores),
+                key=lambda supplier: -scores[supplier.id]
+            )
+        logger.debug(
+            f"🔍 Filter '{self._filter_string}': "
+            f"{len(self._filtered_suppliers)} of {len(self._suppliers)} suppliers"
+        )
 
-        self.endResetModel()
+    @staticmethod
+    def _searchFields(supplier: Supplier):
+        """Поля поставщика, по которым идёт поиск."""
+        return supplier.name, supplier.company, supplier.email
+
+    # ==================== Data Loading ====================
 
-        logger.debug("=" * 80)
+    def _catalogue_stale(self) -> Optional[Tuple[int, int, int]]:
+        """Текущий отпечаток справочника, если он изменился с последней загрузки, иначе None."""
+        signature = self.repository.get_catalogue_signature()
+        return signature if signature != self._catalogue_signature else None
 
-    def _matchesFilter(self, supplier: Supplier) -> bool:
+    def _reload_catalogue(self, checked: Set[int], signature: Optional[Tuple[int, int, int]] = None):
+        """Перечитывает справочник поставщиков и отмеченные ID (со сбросом модели)."""
+        self.beginResetModel()
+        # Отпечаток до чтения: изменение между запросами вызовет ещё одну перезагрузку, а не потеряется
+        self._catalogue_signature = signature or self.repository.get_catalogue_signature()
+        self._suppliers = self.repository.get_all()
+        self._search_index.sync({supplier.id: self._searchFields(supplier) for supplier in self._suppliers})
+        self._checked = checked
+        self._filter()
+        self.endResetModel()
+
+    def _patchCatalogue(self, supplier_id: int, supplier: Optional[Supplier]):
         """
-        Проверяет соответствие поставщика фильтру.
+        Вносит изменение поставщика в кэш справочника и индекс поиска.
 
-        Args:
-            supplier: DTO объект поставщика.
+        Если кэш уже устарел (отпечаток в базе отличается от ожидаемого
+        после этого изменения — были другие правки), справочник
+        перечитывается целиком.
 
-        Returns:
-            bool: True если соответствует фильтру.
+        Args:
+            supplier_id: ID поставщика.
+            supplier: Новые данные; None — поставщик удалён.
         """
-        # Поиск в имени, компании и email
-        search_fields = [
-            str(supplier.name or "").lower(),
-            str(supplier.company or "").lower(),
-            str(supplier.email or "").lower(),
-        ]
+        cached = next((s for s in self._suppliers if s.id == supplier_id), None)
+        if supplier is None:
+            delta = (-1, -supplier_id, -cached.row_version) if cached else None
+        else:
+            delta = (0, 0, 1) if cached else (1, supplier_id, supplier.row_version)
 
-        return any(self._filter_string in field for field in search_fields)
+        # Отпечаток изменился ровно на это изменение — кэш был актуален
+        signature = self.repository.get_catalogue_signature()
+        if delta is None or self._catalogue_signature is None or \
+                signature != tuple(old + change for old, change in zip(self._catalogue_signature, delta)):
+            self.load()
+            return
 
-    # ==================== Data Loading ====================
+        self._catalogue_signature = signature
+        self._suppliers = [s for s in self._suppliers if s.id != supplier_id]
+        self._search_index.remove(supplier_id)
+        self._checked.discard(supplier_id)
+
+        if supplier is not None:
+            # Порядок как у get_all (ORDER BY company)
+            row = next((i for i, s in enumerate(self._suppliers) if s.company > supplier.company),
+                       len(self._suppliers))
+            self._suppliers.insert(row, supplier)
+            self._search_index.add(supplier_id, *self._searchFields(supplier))
+
+        self._applyFilter()
+        self.dataLoaded.emit(len(self._suppliers))
+
+    def _onSupplierChanged(self, event: ChangeEvent):
+        """Обновляет версию поставщика в кэше после правки в другой модели."""
+        if event.action != ChangeEvent.UPDATED or "row_version" not in event.fields:
+            return
+        for supplier in self._suppliers:
+            if supplier.id == event.key:
+                supplier.row_version = event.fields["row_version"]
+                break
+
+    def _emitCheckStateChanged(self, supplier_ids: Set[int]):
+        """Обновляет чекбоксы строк с указанными поставщиками."""
+        rows = [row for row, supplier in enumerate(self._filtered_suppliers)
+                if supplier.id in supplier_ids]
+        if rows:
+            self.dataChanged.emit(self.index(min(rows), 0), self.index(max(rows), 0),
+                                  [Qt.CheckStateRole])
 
     @Slot()
     def load(self):
         """Загружает всех поставщиков (режим управления)."""
         try:
-            logger.info("=" * 80)
-            logger.info("📥 LOADING SUPPLIERS (Management Mode)")
-
-            self.beginResetModel()
+            self._reload_catalogue(set())
 
-            # Загружаем через репозиторий
-            self._suppliers = self.repository.get_all()
-            logger.info(f"📊 Loaded {len(self._suppliers)} suppliers from repository")
-
-            # Логируем первых 3 для проверки
-            for i, s in enumerate(self._suppliers[:3]):
-                logger.debug(f"  Supplier {i+1}: ID={s.id}, Company={s.company}")
-
-            self._checked.clear()
-            logger.debug("🔲 Cleared all checkboxes")
-
-            # Применяем текущий фильтр
-            self._applyFilter()
-
-            self.endResetModel()
-
-            logger.success(f"✅ Loaded {len(self._suppliers)} suppliers successfully")
-            logger.info("=" * 80)
+            logger.info(f"📥 Loaded {len(self._suppliers)} suppliers (management mode)")
             self.dataLoaded.emit(len(self._suppliers))
 
         except Exception as e:
@@ -151,69 +202,37 @@ class SuppliersTableModel(QAbstractTableModel):
             self.errorOccurred.emit(error_msg)
 
     @Slot(str)
+    @query_budget(3)
     def loadForArticle(self, article: str):
         """
         Загружает поставщиков для привязки к товару.
 
+        Справочник перечитывается, только если изменился его отпечаток в
+        базе; иначе запрашиваются лишь привязки товара и отпечаток и
+        обновляются чекбоксы.
+
         Args:
             article: Артикул товара.
         """
         try:
-            logger.info("=" * 80)
-            logger.info(f"📥 LOADING SUPPLIERS FOR ARTICLE: {article}")
-
-            self.beginResetModel()
-
-            # Загружаем всех поставщиков
-            logger.debug("Step 1: Loading ALL suppliers...")
-            self._suppliers = self.repository.get_all()
-            logger.info(f"📊 Loaded {len(self._suppliers)} total suppliers")
-
-            # Логируем первых 3 для проверки
-            for i, s in enumerate(self._suppliers[:3]):
-                logger.debug(f"  Supplier {i+1}: ID={s.id}, Company={s.company}")
-
-            # Загружаем привязанных поставщиков
-            logger.debug(f"Step 2: Loading BOUND suppliers for article {article}...")
-            bound_suppliers = self.repository.get_suppliers_for_item(article)
-            logger.info(f"📌 Found {len(bound_suppliers)} bound suppliers")
-
-            # Логируем привязанных
-            for i, s in enumerate(bound_suppliers):
-                logger.debug(f"  Bound supplier {i+1}: ID={s.id}, Company={s.company}")
-
-            # Извлекаем ID привязанных поставщиков
-            logger.debug("Step 3: Extracting bound supplier IDs...")
-            self._checked = {supplier.id for supplier in bound_suppliers}
-            logger.info(f"✅ Checked IDs set: {self._checked}")
+            checked = self.repository.get_supplier_ids_for_item(article)
 
-            # Проверяем, что все ID существуют в общем списке
-            all_ids = {s.id for s in self._suppliers}
-            logger.debug(f"All supplier IDs: {all_ids}")
-
-            invalid_checked = self._checked - all_ids
-            if invalid_checked:
-                logger.warning(f"⚠️ WARNING: Some checked IDs don't exist in suppliers list: {invalid_checked}")
+            signature = self._catalogue_stale()
+            if signature is not None:
+                self._reload_catalogue(checked, signature)
             else:
-                logger.debug("✅ All checked IDs are valid")
-
-            # Применяем текущий фильтр
-            logger.debug("Step 4: Applying current filter...")
-            self._applyFilter()
-
-            self.endResetModel()
+                changed = self._checked ^ checked
+                self._checked = checked
+                self._emitCheckStateChanged(changed)
 
-            logger.success(
-                f"✅ Loaded {len(self._suppliers)} suppliers, "
-                f"{len(self._checked)} already bound to {article}"
+            logger.info(
+                f"📥 Suppliers for {article}: {len(self._checked)} of {len(self._suppliers)} bound"
             )
-            logger.info("=" * 80)
             self.dataLoaded.emit(len(self._suppliers))
 
         except Exception as e:
             error_msg = f"Ошибка загрузки поставщиков: {str(e)}"
             logger.exception(f"❌ {error_msg}")
-            logger.info("=" * 80)
             self.errorOccurred.emit(error_msg)
 
     # ==================== Qt Model API ====================
@@ -236,9 +255,7 @@ class SuppliersTableModel(QAbstractTableModel):
 
     def rowCount(self, parent=None):
         """Количество строк (отфильтрованных поставщиков)."""
-        count = len(self._filtered_suppliers)
-        logger.trace(f"rowCount() called: {count}")
-        return count
+        return len(self._filtered_suppliers)
 
     def headerData(self, section, orientation, role=Qt.DisplayRole):
         """Заголовки столбцов."""
@@ -267,17 +284,7 @@ class SuppliersTableModel(QAbstractTableModel):
         elif role == self.WebsiteRole:
             return supplier.website
         elif role == Qt.CheckStateRole:
-            is_checked = supplier.id in self._checked
-            state = Qt.Checked.value if is_checked else Qt.Unchecked.value
-
-            # Логируем только для первых 5 строк чтобы не захламлять лог
-            if index.row() < 5:
-                logger.trace(
-                    f"data() CheckState: row={index.row()}, "
-                    f"supplier_id={supplier.id}, checked={is_checked}, state={state}"
-                )
-
-            return state
+            return Qt.Checked.value if supplier.id in self._checked else Qt.Unchecked.value
 
         return None
 
@@ -289,21 +296,12 @@ class SuppliersTableModel(QAbstractTableModel):
         supplier = self._filtered_suppliers[index.row()]
         is_checked = (value == Qt.Checked.value)
 
-        logger.debug("=" * 60)
-        logger.debug(f"📌 CHECKBOX CHANGED")
-        logger.debug(f"Row: {index.row()}")
-        logger.debug(f"Supplier ID: {supplier.id}")
-        logger.debug(f"Company: {supplier.company}")
-        logger.debug(f"New state: {'CHECKED' if is_checked else 'UNCHECKED'}")
-        logger.debug(f"Checked IDs BEFORE: {self._checked}")
-
         if is_checked:
             self._checked.add(supplier.id)
         else:
             self._checked.discard(supplier.id)
 
-        logger.debug(f"Checked IDs AFTER: {self._checked}")
-        logger.debug("=" * 60)
+        logger.debug(f"📌 Supplier {supplier.id} {'checked' if is_checked else 'unchecked'}")
 
         self.dataChanged.emit(index, index, [Qt.CheckStateRole])
         return True
@@ -328,9 +326,7 @@ class SuppliersTableModel(QAbstractTableModel):
         Returns:
             list: Список ID выбранных поставщиков.
         """
-        selected = list(self._checked)
-        logger.info(f"📋 getSelectedSupplierIds() called: {selected}")
-        return selected
+        return list(self._checked)
 
     @Slot(str, "QVariantList")
     def bindSuppliersToItem(self, article: str, supplier_ids: List[int]):
@@ -345,32 +341,21 @@ class SuppliersTableModel(QAbstractTableModel):
             # Конвертируем в int на всякий случай
             supplier_ids = [int(sid) for sid in supplier_ids]
 
-            logger.info("=" * 80)
-            logger.info(f"💾 BINDING SUPPLIERS TO ITEM: {article}")
-            logger.info(f"Supplier count: {len(supplier_ids)}")
-            logger.debug(f"Supplier IDs: {supplier_ids}")
-
-            # Сохраняем через репозиторий
-            self.repository.set_suppliers_for_item(article, supplier_ids)
+            # Сохраняем через репозиторий (только разница со старыми связями)
+            if not self.repository.set_suppliers_for_item(article, supplier_ids):
+                self.errorOccurred.emit(f"Не удалось привязать поставщиков к товару {article}")
+                return
 
             # Очищаем чекбоксы
-            logger.debug("Clearing checkboxes...")
-            self._checked.clear()
-
-            # Обновляем все чекбоксы
-            if self.rowCount() > 0:
-                top_left = self.index(0, 0)
-                bottom_right = self.index(self.rowCount() - 1, 0)
-                self.dataChanged.emit(top_left, bottom_right, [Qt.CheckStateRole])
-                logger.debug("Checkboxes updated")
+            cleared = self._checked
+            self._checked = set()
+            self._emitCheckStateChanged(cleared)
 
-            logger.success(f"✅ Suppliers bound to item {article}")
-            logger.info("=" * 80)
+            logger.success(f"✅ {len(supplier_ids)} supplier(s) bound to item {article}")
 
         except Exception as e:
             error_msg = f"Ошибка привязки поставщиков: {str(e)}"
             logger.exception(f"❌ {error_msg}")
-            logger.info("=" * 80)
             self.errorOccurred.emit(error_msg)
 
     @Slot(int, result="QVariant")
@@ -418,7 +403,8 @@ class SuppliersTableModel(QAbstractTableModel):
             supplier_id = self.repository.add(supplier)
             logger.success(f"✅ Supplier added with ID: {supplier_id}")
 
-            self.load()
+            supplier.id = supplier_id
+            self._patchCatalogue(supplier_id, supplier)
 
         except Exception as e:
             error_msg = f"Ошибка добавления поставщика: {str(e)}"
@@ -441,11 +427,19 @@ class SuppliersTableModel(QAbstractTableModel):
                 website=website
             )
 
-            # ✅ ИСПРАВЛЕНО: передаем оба аргумента
-            self.repository.update(supplier_id, supplier)
+            # Версия из кэша справочника: чужое изменение не затирается
+            cached = next((s for s in self._suppliers if s.id == supplier_id), None)
+            try:
+                self.repository.update(supplier_id, supplier,
+                                       expected_version=cached.row_version if cached else None)
+            except ConcurrencyConflictError as e:
+                self._reload_catalogue(set(self._checked))
+                self.dataLoaded.emit(len(self._suppliers))
+                self.conflictDetected.emit(str(e))
+                return
             logger.success(f"✅ Supplier {supplier_id} updated")
 
-            self.load()
+            self._patchCatalogue(supplier_id, supplier)
 
         except Exception as e:
             error_msg = f"Ошибка обновления поставщика: {str(e)}"
@@ -461,7 +455,7 @@ class SuppliersTableModel(QAbstractTableModel):
             self.repository.delete(supplier_id)
             logger.success(f"✅ Supplier {supplier_id} deleted")
 
-            self.load()
+            self._patchCatalogue(supplier_id, None)
 
         except Exception as e:
             error_msg = f"Ошибка удаления поставщика: {str(e)}"
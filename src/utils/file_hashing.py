@@ -0,0 +1,110 @@
+# src/utils/file_hashing.py
+"""Функции хеширования файлов хранилища
+
+Модуль не зависит от Qt, поэтому его функции можно передавать
+в ProcessPoolExecutor (дочерние процессы импортируют только его).
+"""
+
+import hashlib
+import os
+from typing import Optional, Tuple
+
+# Размер чанка чтения (1 MB) — компромисс между числом системных вызовов и памятью
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def sha256_file(file_path: str, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """
+    Вычисляет SHA-256 файла.
+
+    Args:
+        file_path: Путь к файлу.
+        chunk_size: Размер чанка для чтения.
+
+    Returns:
+        str: Хеш в hex формате.
+    """
+    sha256_hash = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha256_hash.update(chunk)
+    return sha256_hash.hexdigest()
+
+
+def hash_file_job(file_path: str) -> Tuple[str, Optional[int], Optional[str], Optional[str]]:
+    """
+    Задача для пула процессов: размер и SHA-256 файла.
+
+    Никогда не выбрасывает исключения — ошибка чтения возвращается строкой,
+    чтобы один битый файл не останавливал всю проверку.
+
+    Args:
+        file_path: Абсолютный путь к файлу.
+
+    Returns:
+        Кортеж (file_path, size, sha256, error).
+    """
+    try:
+        with open(file_path, "rb") as f:
+            sha256_hash = hashlib.sha256()
+            size = 0
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                sha256_hash.update(chunk)
+                size += len(chunk)
+        return file_path, size, sha256_hash.hexdigest(), None
+    except OSError as e:
+        return file_path, None, None, str(e)
+
+
+# Размер каждого из трёх фрагментов (начало/середина/конец) для быстрого отпечатка
+FINGERPRINT_SAMPLE_SIZE = 64 * 1024
+
+try:
+    import xxhash
+
+    def _new_fast_hash():
+        return xxhash.xxh3_128()
+
+    FINGERPRINT_ALGORITHM = "xxh3"
+except ImportError:
+    def _new_fast_hash():
+        return hashlib.blake2b(digest_size=16)
+
+    FINGERPRINT_ALGORITHM = "b2b"
+
+
+def quick_fingerprint(file_path: str, size: Optional[int] = None,
+                      sample_size: int = FINGERPRINT_SAMPLE_SIZE) -> str:
+    """
+    Вычисляет быстрый частичный отпечаток файла.
+
+    Хешируются размер файла и три фрагмента: начало, середина и конец.
+    Файлы, которые меньше трёх фрагментов, читаются целиком. Используется
+    xxhash (если установлен) или blake2b с коротким дайджестом.
+
+    Отпечаток не гарантирует совпадение содержимого — только отсеивает
+    заведомо разные файлы перед полным SHA-256.
+
+    Args:
+        file_path: Путь к файлу.
+        size: Размер файла (если уже известен).
+        sample_size: Размер каждого фрагмента.
+
+    Returns:
+        str: Отпечаток вида "<алгоритм>:<hex>".
+    """
+    if size is None:
+        size = os.path.getsize(file_path)
+
+    fast_hash = _new_fast_hash()
+    fast_hash.update(size.to_bytes(8, "little"))
+
+    with open(file_path, "rb") as f:
+        if size <= sample_size * 3:
+            fast_hash.update(f.read())
+        else:
+            for offset in (0, (size - sample_size) // 2, size - sample_size):
+                f.seek(offset)
+                fast_hash.update(f.read(sample_size))
+
+    return f"{FINGERPRINT_ALGORITHM}:{fast_hash.hexdigest()}"
@@ -1,17 +1,64 @@
 # src/utils/logger_config.py
-"""Централизованная настройка логирования с Loguru"""
+"""Централизованная настройка логирования с Loguru
 
+Все приёмники пишут через фоновую очередь (enqueue=True):
+вызов logger.* в GUI-потоке только ставит запись в очередь, форматирование
+и запись на диск выполняются отдельным потоком.
+
+Для горячих путей (filterAcceptsRow, get_connection, data()) есть дешёвые
+помощники:
+- level_enabled(level, module) — проверка уровня до форматирования сообщения;
+- every_n(key, n) — выборка каждого n-го события;
+- throttle(key, seconds) — не чаще одного сообщения в интервал.
+"""
+
+import json
 import sys
+import threading
+import time
 from pathlib import Path
+from typing import Dict, Optional, Tuple
+
 from loguru import logger
 
+# Уровни модулей (из секции "logging.modules" конфигурации); "" — уровень по умолчанию
+_module_levels: Dict[str, int] = {}
+_default_level_no: int = 0
+_enabled_cache: Dict[Tuple[str, str], bool] = {}
+
+_sample_lock = threading.Lock()
+_sample_counters: Dict[str, int] = {}
+_throttle_state: Dict[str, Tuple[float, int]] = {}
+
+
+def _level_no(level: str) -> int:
+    """Числовое значение уровня loguru."""
+    return logger.level(level.upper()).no
+
+
+def _sink_filter(sink_level: str, module_levels: Dict[str, str]):
+    """
+    Возвращает (уровень, фильтр) приёмника с учётом уровней модулей.
+
+    Уровень модуля может как повышать (заглушить шумный модуль), так и понижать
+    (включить TRACE для одного модуля) уровень приёмника.
+    """
+    if not module_levels:
+        return sink_level, None
+
+    levels = [sink_level, *module_levels.values()]
+    lowest = min(levels, key=_level_no)
+    return lowest, {"": sink_level, **module_levels}
+
 
 def setup_logging(
         log_level: str = "INFO",
         log_dir: str = "logs",
         rotation: str = "10 MB",
         retention: str = "1 week",
-        compression: str = "zip"
+        compression: str = "zip",
+        module_levels: Optional[Dict[str, str]] = None,
+        enqueue: bool = True
 ):
     """
     Настраивает логирование для приложения.
@@ -22,7 +69,14 @@ def setup_logging(
         rotation: Когда создавать новый файл (размер или время).
         retention: Как долго хранить старые логи.
         compression: Сжимать ли старые логи.
+        module_levels: Уровни отдельных модулей, например
+            {"filter_proxy_model": "INFO", "repositories": "WARNING"}.
+        enqueue: Писать через фоновую очередь (False — синхронно в вызывающем потоке).
     """
+    global _default_level_no
+
+    module_levels = {name: level.upper() for name, level in (module_levels or {}).items()}
+
     # Создаем директорию для логов
     log_path = Path(log_dir)
     log_path.mkdir(exist_ok=True)
@@ -30,18 +84,30 @@ def setup_logging(
     # Удаляем стандартный handler (вывод в stderr)
     logger.remove()
 
+    # Кэш проверок уровня (level_enabled)
+    _module_levels.clear()
+    _module_levels.update({name: _level_no(level) for name, level in module_levels.items()})
+    _default_level_no = min(_level_no(log_level), _level_no("DEBUG"))
+    _enabled_cache.clear()
+
     # 1. Консольный вывод (красивый и цветной)
+    level, sink_filter = _sink_filter(log_level.upper(), module_levels)
     logger.add(
         sys.stderr,
-        level=log_level,
+        level=level,
+        filter=sink_filter,
+        enqueue=enqueue,
         format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
         colorize=True
     )
 
     # 2. Основной файл логов (с ротацией)
+    level, sink_filter = _sink_filter("DEBUG", module_levels)
     logger.add(
         log_path / "app.log",
-        level="DEBUG",
+        level=level,
+        filter=sink_filter,
+        enqueue=enqueue,
         format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
         rotation=rotation,  # Новый файл каждые 10 MB
         retention=retention,  # Хранить логи 1 неделю
@@ -57,18 +123,21 @@ def setup_logging(
         rotation="1 day",  # Новый файл каждый день
         retention="30 days",  # Хранить ошибки 30 дней
         compression="zip",
+        enqueue=enqueue,
         encoding="utf-8"
     )
 
     # 4. JSON логи (для машинного анализа)
     logger.add(
         log_path / "app_json.log",
-        level="DEBUG",
+        level=level,
+        filter=sink_filter,
         format="{message}",
         rotation="1 day",
         retention="7 days",
         compression="zip",
         serialize=True,  # JSON формат!
+        enqueue=enqueue,
         encoding="utf-8"
     )
 
@@ -76,9 +145,113 @@ def setup_logging(
     logger.info("🚀 Application logging initialized")
     logger.info(f"📁 Log directory: {log_path.absolute()}")
     logger.info(f"📊 Log level: {log_level}")
+    if module_levels:
+        logger.info(f"📊 Module levels: {module_levels}")
     logger.info("=" * 80)
 
 
+def setup_logging_from_config(config_path: str = "config.json", default_level: str = "INFO"):
+    """
+    Настраивает логирование по секции "logging" файла конфигурации.
+
+    Файл читается напрямую (без ConfigManager): логирование настраивается
+    до создания остальных объектов.
+
+    Пример секции:
+        "logging": {
+            "level": "DEBUG",
+            "enqueue": true,
+            "modules": {"filter_proxy_model": "INFO"}
+        }
+
+    Args:
+        config_path: Путь к config.json.
+        default_level: Уровень, если в конфигурации он не указан.
+    """
+    settings = {}
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            settings = json.load(f).get("logging", {})
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"ERROR: Failed to read logging config: {e}")
+
+    setup_logging(
+        log_level=settings.get("level", default_level),
+        log_dir=settings.get("directory", "logs"),
+        module_levels=settings.get("modules"),
+        enqueue=settings.get("enqueue", True)
+    )
+
+
+def level_enabled(level: str, module: str = "") -> bool:
+    """
+    Будет ли записано сообщение уровня level из модуля module.
+
+    Дешёвая проверка (словарь) для горячих путей — вызывается до
+    форматирования f-строки:
+
+        if level_enabled("TRACE", __name__):
+            logger.trace(f"Row {row}: {value}")
+
+    Args:
+        level: Имя уровня.
+        module: Имя модуля (__name__); уровень ищется по префиксам, как в loguru.
+    """
+    key = (level, module)
+    enabled = _enabled_cache.get(key)
+    if enabled is None:
+        threshold = _default_level_no
+        name = module
+        while name:
+            if name in _module_levels:
+                threshold = _module_levels[name]
+                break
+            name = name.rpartition(".")[0]
+
+        enabled = _level_no(level) >= threshold
+        _enabled_cache[key] = enabled
+    return enabled
+
+
+def every_n(key: str, n: int) -> bool:
+    """
+    Выборка: True для первого и каждого n-го вызова с данным ключом.
+
+    Usage:
+        if every_n("filter.rows", 1000):
+            logger.debug(...)
+    """
+    with _sample_lock:
+        count = _sample_counters.get(key, 0)
+        _sample_counters[key] = count + 1
+    return count % n == 0
+
+
+def throttle(key: str, interval: float) -> Optional[int]:
+    """
+    Ограничение частоты: не чаще одного сообщения с данным ключом за interval секунд.
+
+    Returns:
+        None — сообщение нужно пропустить; иначе количество пропущенных
+        с прошлого сообщения (удобно добавить в текст).
+
+    Usage:
+        skipped = throttle("db.error", 5.0)
+        if skipped is not None:
+            logger.warning(f"... (+{skipped} suppressed)")
+    """
+    now = time.monotonic()
+    with _sample_lock:
+        last, skipped = _throttle_state.get(key, (None, 0))
+        if last is not None and now - last < interval:
+            _throttle_state[key] = (last, skipped + 1)
+            return None
+        _throttle_state[key] = (now, 0)
+    return skipped
+
+
 def get_logger():
     """
     Возвращает настроенный логгер.
@@ -0,0 +1,216 @@
+# src/utils/metrics.py
+"""Метрики времени выполнения операций
+
+Количество вызовов и гистограмма задержек (p50/p95/p99) по именам операций:
+методы репозиториев, слоты Qt, filterAcceptsRow, экспорт.
+
+Пока метрики выключены (по умолчанию), декоратор и контекстный менеджер
+стоят одну проверку флага.
+
+Usage:
+    @timed("ItemsRepository.get_all")
+    def get_all(self): ...
+
+    with metrics.measure("export.pdf"):
+        ...
+
+    metrics.enabled = True
+    metrics.snapshot()
+    metrics.dump("metrics.json")
+"""
+
+import json
+import math
+import threading
+import time
+from functools import wraps
+from typing import Dict, List, Optional
+
+# Подкорзин на каждую степень двойки: шаг ~9%, погрешность перцентилей в пределах шага
+BUCKETS_PER_OCTAVE = 8
+
+
+class LatencyHistogram:
+    """Гистограмма задержек с логарифмическими корзинами (в наносекундах)."""
+
+    __slots__ = ("count", "total_ns", "min_ns", "max_ns", "_buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = 0
+        self.max_ns = 0
+        self._buckets: Dict[int, int] = {}
+
+    def add(self, duration_ns: int):
+        """Добавляет одно измерение."""
+        duration_ns = max(duration_ns, 1)
+        if self.count == 0 or duration_ns < self.min_ns:
+            self.min_ns = duration_ns
+        if duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+        self.count += 1
+        self.total_ns += duration_ns
+
+        bucket = int(math.log2(duration_ns) * BUCKETS_PER_OCTAVE)
+        self._buckets[bucket] = self._buckets.get(bucket, 0) + 1
+
+    def percentile(self, q: float) -> float:
+        """
+        Перцентиль задержки в наносекундах (верхняя граница корзины).
+
+        Args:
+            q: Доля от 0 до 1 (0.95 — p95).
+        """
+        if not self.count:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+        for bucket in sorted(self._buckets):
+            seen += self._buckets[bucket]
+            if seen >= rank:
+                upper = 2 ** ((bucket + 1) / BUCKETS_PER_OCTAVE)
+                return min(max(upper, self.min_ns), self.max_ns)
+        return float(self.max_ns)
+
+
+class _Measure:
+    """Контекстный менеджер одного измерения."""
+
+    __slots__ = ("_registry", "_name", "_started")
+
+    def __init__(self, registry: "MetricsRegistry", name: str):
+        self._registry = registry
+        self._name = name
+
+    def __enter__(self):
+        self._started = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._registry.record(self._name, time.perf_counter_ns() - self._started)
+        return False
+
+
+class _NoopMeasure:
+    """Контекстный менеджер при выключенных метриках."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopMeasure()
+
+
+class MetricsRegistry:
+    """
+    Реестр метрик операций.
+
+    Потокобезопасен: операции вызываются и из GUI-потока, и из фоновых задач.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._started_at = time.time()
+
+    def record(self, name: str, duration_ns: int):
+        """Записывает длительность одного вызова операции."""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = LatencyHistogram()
+            histogram.add(duration_ns)
+
+    def measure(self, name: str):
+        """Контекстный менеджер: измеряет блок, если метрики включены."""
+        if not self.enabled:
+            return _NOOP
+        return _Measure(self, name)
+
+    def reset(self):
+        """Очищает накопленные метрики."""
+        with self._lock:
+            self._histograms.clear()
+            self._started_at = time.time()
+
+    def snapshot(self) -> List[Dict]:
+        """
+        Сводка по операциям, отсортированная по суммарному времени.
+
+        Returns:
+            List[Dict]: name, count, total_ms, mean_ms, p50_ms, p95_ms, p99_ms, max_ms.
+        """
+        with self._lock:
+            items = list(self._histograms.items())
+            rows = [
+                {
+                    "name": name,
+                    "count": h.count,
+                    "total_ms": round(h.total_ns / 1e6, 3),
+                    "mean_ms": round(h.total_ns / h.count / 1e6, 4),
+                    "p50_ms": round(h.percentile(0.50) / 1e6, 4),
+                    "p95_ms": round(h.percentile(0.95) / 1e6, 4),
+                    "p99_ms": round(h.percentile(0.99) / 1e6, 4),
+                    "max_ms": round(h.max_ns / 1e6, 4),
+                }
+                for name, h in items if h.count
+            ]
+        rows.sort(key=lambda row: row["total_ms"], reverse=True)
+        return rows
+
+    def dump(self, path: str, extra: Optional[Dict] = None):
+        """
+        Сохраняет сводку в JSON-файл.
+
+        Args:
+            path: Путь к файлу.
+            extra: Дополнительные разделы (например, статистика SQL-запросов).
+        """
+        data = {
+            "started_at": self._started_at,
+            "dumped_at": time.time(),
+            "operations": self.snapshot(),
+            **(extra or {}),
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+# Глобальный реестр процесса
+metrics = MetricsRegistry()
+
+
+def timed(name: Optional[str] = None):
+    """
+    Декоратор: измеряет время вызова функции или метода.
+
+    Совместим с @Slot (Slot ставится поверх) и с виртуальными методами
+    Qt (filterAcceptsRow, data).
+
+    Args:
+        name: Имя операции; по умолчанию — __qualname__ функции.
+    """
+    def decorate(func):
+        operation = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not metrics.enabled:
+                return func(*args, **kwargs)
+            started = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                metrics.record(operation, time.perf_counter_ns() - started)
+
+        return wrapper
+
+    return decorate
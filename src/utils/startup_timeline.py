@@ -0,0 +1,86 @@
+# src/utils/startup_timeline.py
+"""Хронология запуска приложения
+
+Отметки времени этапов запуска относительно старта процесса:
+создание UnitOfWork, моделей, загрузка QML, первый кадр, отложенные
+загрузки данных. Итог пишется в лог и может быть выгружен в JSON.
+"""
+
+import json
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+
+class StartupTimeline:
+    """
+    Хронология этапов запуска.
+
+    Usage:
+        timeline.mark("qml_loaded")
+
+        with timeline.measure("items_model"):
+            items_model = ItemsModel(uow.items)
+    """
+
+    def __init__(self):
+        self._origin = time.perf_counter()
+        self._events: List[Dict] = []
+
+    def reset(self):
+        """Сбрасывает хронологию и начинает отсчёт заново."""
+        self._origin = time.perf_counter()
+        self._events.clear()
+
+    def elapsed_ms(self) -> float:
+        """Время с начала отсчёта в миллисекундах."""
+        return (time.perf_counter() - self._origin) * 1000
+
+    def mark(self, name: str, duration_ms: Optional[float] = None):
+        """
+        Добавляет отметку этапа.
+
+        Args:
+            name: Имя этапа.
+            duration_ms: Длительность этапа (если измерялась).
+        """
+        event = {"name": name, "at_ms": round(self.elapsed_ms(), 2)}
+        if duration_ms is not None:
+            event["duration_ms"] = round(duration_ms, 2)
+        self._events.append(event)
+
+        if duration_ms is not None:
+            logger.debug(f"⏱️ {name}: {duration_ms:.1f} ms (at {event['at_ms']:.1f} ms)")
+        else:
+            logger.debug(f"⏱️ {name} at {event['at_ms']:.1f} ms")
+
+    @contextmanager
+    def measure(self, name: str):
+        """Измеряет длительность блока и добавляет отметку."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.mark(name, (time.perf_counter() - started) * 1000)
+
+    def events(self) -> List[Dict]:
+        """Копия списка отметок."""
+        return list(self._events)
+
+    def log_summary(self, title: str = "Startup timeline"):
+        """Пишет итоговую хронологию в лог."""
+        logger.info(f"⏱️ {title}:")
+        for event in self._events:
+            duration = f" ({event['duration_ms']:.1f} ms)" if "duration_ms" in event else ""
+            logger.info(f"   {event['at_ms']:>9.1f} ms  {event['name']}{duration}")
+
+    def dump(self, path: str):
+        """Сохраняет хронологию в JSON-файл."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"events": self._events}, f, ensure_ascii=False, indent=2)
+
+
+# Глобальная хронология процесса (отсчёт — импорт модуля, т.е. самое начало main.py)
+timeline = StartupTimeline()
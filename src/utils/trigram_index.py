@@ -0,0 +1,271 @@
+# src/utils/trigram_index.py
+"""Триграммный индекс для нечёткого поиска
+
+Инвертированный индекс в памяти: триграмма → ключи записей. Находит
+записи, содержащие строку запроса, и похожие на неё — с опечатками и с
+кириллическими буквами, похожими на латинские (артикул «АВС-01»,
+набранный как «ABC-01»). Результаты ранжируются по сходству.
+
+Сходство — доля триграмм слов запроса, найденных в записи (как
+word_similarity в PostgreSQL pg_trgm, но без триграмм с пробелами по
+краям слова: они совпадают у всех слов с той же первой буквой, раздувают
+кандидатов и пропускают в результаты записи, общие с запросом только
+началом). Короткое слово запроса («M8») сравнивается с началами слов
+записи. Запрос, входящий в запись подстрокой, получает 1.0.
+
+Поля вроде email ищутся только подстрокой (fuzzy_fields): нечёткое
+совпадение «mail123» с «mail.ru» в каждой второй записи бесполезно.
+
+Usage:
+    index = TrigramIndex(fuzzy_fields=2)
+    index.add(1, "Иванов", "ООО Ромашка", "info@romashka.ru")
+    index.search("ромашкка")          # [(1, 0.78)]
+    index.sync({1: "...", 2: "..."})  # пересчёт только изменившихся записей
+"""
+
+import heapq
+import re
+from collections import Counter
+from typing import Dict, FrozenSet, Hashable, Iterable, List, Mapping, Optional, Sequence, Set, Tuple, Union
+
+# Порог сходства по умолчанию (доля триграмм запроса)
+DEFAULT_THRESHOLD = 0.4
+
+# Кириллические буквы, совпадающие по начертанию с латинскими
+_LOOKALIKES = str.maketrans({
+    "а": "a", "в": "b", "е": "e", "ё": "e", "к": "k", "м": "m", "н": "h",
+    "о": "o", "р": "p", "с": "c", "т": "t", "у": "y", "х": "x",
+})
+
+_SEPARATORS = re.compile(r"[\W_]+")
+
+
+def normalize(text: str) -> str:
+    """
+    Приводит текст к виду для поиска.
+
+    Нижний регистр, кириллические «двойники» латинских букв заменены
+    латинскими, знаки препинания — одиночными пробелами.
+    """
+    return _SEPARATORS.sub(" ", text.casefold().translate(_LOOKALIKES)).strip()
+
+
+def trigrams(normalized: str) -> Set[str]:
+    """
+    Триграммы слов нормализованного текста (без дополнения пробелами).
+
+    Их содержит любая запись, где текст стоит подстрокой; слова короче
+    трёх букв триграмм не дают.
+    """
+    result = set()
+    for word in normalized.split():
+        result.update(word[i:i + 3] for i in range(len(word) - 2))
+    return result
+
+
+def _word_starts(normalized: str, short_only: bool = False) -> Set[str]:
+    """
+    Начала слов (пробел и две первые буквы) — по ним ищутся слова запроса
+    короче трёх букв («m8», «dn»).
+
+    Args:
+        normalized: Нормализованный текст.
+        short_only: Только для слов короче трёх букв (для запроса).
+    """
+    return {f" {word[:2]}" for word in normalized.split() if not short_only or len(word) < 3}
+
+
+def _join(texts: Iterable[Optional[str]]) -> str:
+    """Поля записи одной строкой (пустые пропускаются)."""
+    return "\n".join(text for text in texts if text)
+
+
+class TrigramIndex:
+    """
+    Инвертированный триграммный индекс записей.
+
+    Запись — ключ (ID, артикул) и один или несколько текстов. Добавление,
+    изменение и удаление записи пересчитывают только её триграммы.
+    """
+
+    def __init__(self, fuzzy_fields: Optional[int] = None):
+        """
+        Args:
+            fuzzy_fields: Сколько первых полей записи участвуют в нечётком
+                поиске; остальные (email) ищутся только подстрокой.
+                None — все поля.
+        """
+        self._fuzzy_fields = fuzzy_fields
+        # Триграмма → записи: нечёткие поля и поля только для подстроки
+        self._postings: Dict[str, Set[Hashable]] = {}
+        self._substring_postings: Dict[str, Set[Hashable]] = {}
+        self._trigrams: Dict[Hashable, Tuple[FrozenSet[str], FrozenSet[str]]] = {}
+        self._texts: Dict[Hashable, str] = {}  # Нормализованный текст записи
+        self._sources: Dict[Hashable, str] = {}  # Исходный текст (для sync)
+
+    def __len__(self) -> int:
+        return len(self._trigrams)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._trigrams
+
+    # === Изменение ===
+
+    def add(self, key: Hashable, *texts: Optional[str]):
+        """
+        Добавляет запись или заменяет существующую.
+
+        Args:
+            key: Ключ записи.
+            *texts: Поля записи (None пропускаются).
+        """
+        source = _join(texts)
+        if self._sources.get(key) == source and key in self._trigrams:
+            return
+
+        self.remove(key)
+        split = len(texts) if self._fuzzy_fields is None else self._fuzzy_fields
+        fuzzy_text = normalize(_join(texts[:split]))
+        fuzzy = frozenset(trigrams(fuzzy_text) | _word_starts(fuzzy_text))
+        substring = frozenset(trigrams(normalize(_join(texts[split:])))) - fuzzy
+
+        self._sources[key] = source
+        self._texts[key] = normalize(source)
+        self._trigrams[key] = (fuzzy, substring)
+        for grams, postings in ((fuzzy, self._postings), (substring, self._substring_postings)):
+            for gram in grams:
+                posting = postings.get(gram)
+                if posting is None:
+                    posting = postings[gram] = set()
+                posting.add(key)
+
+    def remove(self, key: Hashable):
+        """Удаляет запись (отсутствующий ключ игнорируется)."""
+        grams = self._trigrams.pop(key, None)
+        if grams is None:
+            return
+
+        del self._texts[key]
+        del self._sources[key]
+        for record_grams, postings in zip(grams, (self._postings, self._substring_postings)):
+            for gram in record_grams:
+                posting = postings[gram]
+                posting.discard(key)
+                if not posting:
+                    del postings[gram]
+
+    def clear(self):
+        """Удаляет все записи."""
+        self._postings.clear()
+        self._substring_postings.clear()
+        self._trigrams.clear()
+        self._texts.clear()
+        self._sources.clear()
+
+    def sync(self, entries: Mapping[Hashable, Union[Optional[str], Sequence[Optional[str]]]]) -> int:
+        """
+        Приводит индекс к набору записей: удаляет отсутствующие,
+        пересчитывает только новые и изменившиеся.
+
+        Args:
+            entries: Ключ → текст записи или кортеж полей (как в add).
+
+        Returns:
+            int: Количество добавленных, изменённых и удалённых записей.
+        """
+        changed = 0
+        for key in [key for key in self._trigrams if key not in entries]:
+            self.remove(key)
+            changed += 1
+
+        for key, texts in entries.items():
+            if texts is None or isinstance(texts, str):
+                texts = (texts,)
+            if key not in self._trigrams or self._sources[key] != _join(texts):
+                self.add(key, *texts)
+                changed += 1
+        return changed
+
+    # === Поиск ===
+
+    def search(self, query: str, threshold: float = DEFAULT_THRESHOLD,
+               limit: Optional[int] = None) -> List[Tuple[Hashable, float]]:
+        """
+        Ищет записи, похожие на запрос.
+
+        Args:
+            query: Строка поиска.
+            threshold: Минимальное сходство (0..1); подстрока — всегда 1.0.
+            limit: Максимум результатов (None — все).
+
+        Returns:
+            List[Tuple[key, score]]: По убыванию сходства; при равном
+                сходстве — более короткие записи выше.
+        """
+        scores = self.scores(query, threshold)
+        rank = lambda kv: (-kv[1], len(self._texts[kv[0]]))
+        if limit:
+            return heapq.nsmallest(limit, scores.items(), key=rank)
+        return sorted(scores.items(), key=rank)
+
+    def match(self, query: str, threshold: float = DEFAULT_THRESHOLD) -> Set[Hashable]:
+        """Ключи записей, похожих на запрос (без ранжирования — для фильтров)."""
+        return set(self.scores(query, threshold))
+
+    def scores(self, query: str, threshold: float = DEFAULT_THRESHOLD) -> Dict[Hashable, float]:
+        """
+        Сходство с запросом для всех подходящих записей.
+
+        Returns:
+            Dict[key, score]: Записи со сходством не ниже threshold.
+        """
+        normalized = normalize(query)
+        if not normalized:
+            return {}
+
+        inner = trigrams(normalized)
+        if not inner:
+            # Слова короче трёх букв — триграммы ничего не отсекают, только подстрока
+            return {key: 1.0 for key, text in self._texts.items() if normalized in text}
+
+        grams = inner | _word_starts(normalized, short_only=True)
+        total = len(grams)
+        required = total * threshold
+
+        # Счёт общих триграмм нечётких полей: Counter.update обходит множества без цикла в Python
+        shared: Counter = Counter()
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if posting:
+                shared.update(posting)
+        scores = {key: count / total for key, count in shared.items() if count >= required}
+
+        # Записи со всеми триграммами в нечётких полях уже получили 1.0;
+        # подстрокой остаётся проверить только поля без нечёткого поиска
+        fuzzy, substring = self._postings, self._substring_postings
+        if not substring:
+            return scores
+
+        # Кандидаты — записи со всеми триграммами слов запроса (в любых полях);
+        # начинаем с самой редкой триграммы
+        pairs = sorted(((fuzzy.get(gram, ()), substring.get(gram, ())) for gram in inner),
+                       key=lambda pair: len(pair[0]) + len(pair[1]))
+        candidates = set(pairs[0][0]).union(pairs[0][1])
+        for in_fuzzy, in_substring in pairs[1:]:
+            if not candidates:
+                break
+            candidates = candidates.intersection(in_fuzzy) | candidates.intersection(in_substring)
+
+        if candidates:
+            candidates.difference_update(candidates.intersection(*(fuzzy.get(gram, ()) for gram in grams)))
+
+        texts = self._texts
+        for key in candidates:
+            if normalized in texts[key]:
+                scores[key] = 1.0
+
+        return scores
+
+    def keys(self) -> Iterable[Hashable]:
+        """Ключи всех записей."""
+        return self._trigrams.keys()